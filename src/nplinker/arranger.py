@@ -1,16 +1,29 @@
 from __future__ import annotations
 import fnmatch
+import hashlib
 import json
+import logging
+import os
 import shutil
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from contextlib import contextmanager
 from glob import glob
 from os import PathLike
 from pathlib import Path
+from typing import Any
 from dynaconf import Dynaconf
 from jsonschema import validate
 import nplinker.defaults as defaults
 from nplinker.genomics.antismash import podp_download_and_extract_antismash_data
 from nplinker.genomics.bigscape.runbigscape import run_bigscape
-from nplinker.genomics.mibig import download_and_extract_mibig_metadata
+from nplinker.genomics.mibig import MibigStore
 from nplinker.genomics.utils import generate_mappings_genome_id_bgc_id
 from nplinker.metabolomics.gnps import GNPSDownloader
 from nplinker.metabolomics.gnps import GNPSExtractor
@@ -23,8 +36,12 @@ from nplinker.utils import list_dirs
 from nplinker.utils import list_files
 
 
+logger = logging.getLogger(__name__)
+
 PODP_PROJECT_URL = "https://pairedomicsdata.bioinformatics.nl/api/projects/{}"
 
+VALIDATION_MANIFEST_FORMAT = "nplinker-validation-manifest-1"
+
 
 class DatasetArranger:
     """Arrange datasets based on the fixed working directory structure with the given configuration.
@@ -42,6 +59,12 @@ class DatasetArranger:
 
     The datasets include MIBiG, GNPS, antiSMASH, and BiG-SCAPE data.
 
+    If the config `concurrency.arranging` is true, the arranging steps that do not depend on each
+    other (MIBiG, GNPS, antiSMASH and the selected strains) run concurrently in worker threads, and
+    each dependent step starts as soon as the steps it depends on are done: BiG-SCAPE after
+    antiSMASH, and the strain mappings after GNPS and antiSMASH. The wall time of each step is
+    logged and stored in `self.timings`.
+
     Attributes:
         config: A Dynaconf object that contains the configuration settings.
         root_dir: The root directory of the datasets.
@@ -51,6 +74,7 @@ class DatasetArranger:
         antismash_dir: The directory to store antiSMASH data.
         bigscape_dir: The directory to store BiG-SCAPE data.
         bigscape_running_output_dir: The directory to store the running output of BiG-SCAPE.
+        timings: The wall time in seconds of each arranging step of the last `arrange` call.
     """
 
     def __init__(self, config: Dynaconf) -> None:
@@ -82,6 +106,7 @@ class DatasetArranger:
         self.bigscape_running_output_dir = (
             self.bigscape_dir / defaults.BIGSCAPE_RUNNING_OUTPUT_DIRNAME
         )
+        self.timings: dict[str, float] = {}
 
         self.arrange_podp_project_json()
 
@@ -90,13 +115,74 @@ class DatasetArranger:
 
         The datasets include MIBiG, GNPS, antiSMASH, and BiG-SCAPE.
         """
-        # The order of arranging the datasets matters, as some datasets depend on others
-        self.arrange_mibig()
-        self.arrange_gnps()
-        self.arrange_antismash()
-        self.arrange_bigscape()
-        self.arrange_strain_mappings()
-        self.arrange_strains_selected()
+        # Each step with the steps it depends on. In sequential mode, the steps run in this order.
+        steps: dict[str, tuple[Callable[[], None], tuple[str, ...]]] = {
+            "mibig": (self.arrange_mibig, ()),
+            "gnps": (self.arrange_gnps, ()),
+            "antismash": (self.arrange_antismash, ()),
+            "bigscape": (self.arrange_bigscape, ("antismash",)),
+            "strain mappings": (self.arrange_strain_mappings, ("gnps", "antismash")),
+            "strains selected": (self.arrange_strains_selected, ()),
+        }
+
+        self.timings = {}
+        with self._timed("total"):
+            if self.config.get("concurrency.arranging", False):
+                self._arrange_concurrently(steps)
+            else:
+                for step, (fn, _) in steps.items():
+                    self._timed_call(step, fn)
+
+        logger.info(
+            "Arranging step wall times: "
+            + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in self.timings.items())
+        )
+
+    def _arrange_concurrently(
+        self, steps: dict[str, tuple[Callable[[], None], tuple[str, ...]]]
+    ) -> None:
+        """Run the arranging steps in worker threads, each once the steps it depends on are done.
+
+        Args:
+            steps: The arranging functions, keyed by step name, with the names of the steps they
+                depend on.
+
+        Raises:
+            Exception: The first error raised by a step. The running steps are completed, and the
+                steps that have not started are skipped.
+        """
+        pending = dict(steps)
+        running: dict[Future, str] = {}
+        done: set[str] = set()
+        with ThreadPoolExecutor(
+            max_workers=len(steps), thread_name_prefix="nplinker-arranger"
+        ) as executor:
+            while pending or running:
+                for step, (fn, dependencies) in list(pending.items()):
+                    if done.issuperset(dependencies):
+                        del pending[step]
+                        running[executor.submit(self._timed_call, step, fn)] = step
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    step = running.pop(future)
+                    # raise the error of a failed step
+                    future.result()
+                    done.add(step)
+
+    def _timed_call(self, step: str, fn: Callable[[], None]) -> None:
+        """Call an arranging function and store its wall time as the time of the step."""
+        with self._timed(step):
+            fn()
+
+    @contextmanager
+    def _timed(self, step: str) -> Iterator[None]:
+        """Measure the wall time of an arranging step and store it in `self.timings`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[step] = time.perf_counter() - start
+            logger.debug(f"Arranging step '{step}' took {self.timings[step]:.2f}s")
 
     def arrange_podp_project_json(self) -> None:
         """Arrange the PODP project JSON file.
@@ -122,19 +208,17 @@ class DatasetArranger:
     def arrange_mibig(self) -> None:
         """Arrange the MIBiG metadata.
 
-        If `config.mibig.to_use` is `True`, download and extract the MIBiG metadata and override
-        the existing MIBiG metadata if it exists. This ensures that the MIBiG metadata is always
-        up-to-date to the specified version in the configuration.
+        If `config.mibig.to_use` is `True`, put the MIBiG metadata of the version specified in the
+        configuration into the MIBiG directory, overriding the existing MIBiG metadata if it has
+        another version. This ensures that the MIBiG metadata is always up-to-date to the specified
+        version in the configuration.
+
+        The metadata is taken from the shared [`MibigStore`][nplinker.genomics.mibig.MibigStore],
+        so each MIBiG version is downloaded and extracted only once for all projects. If the store
+        cannot be written, the metadata is downloaded into the working directory instead.
         """
         if self.config.mibig.to_use:
-            if self.mibig_dir.exists():
-                # remove existing mibig data
-                shutil.rmtree(self.mibig_dir)
-            download_and_extract_mibig_metadata(
-                self.downloads_dir,
-                self.mibig_dir,
-                version=self.config.mibig.version,
-            )
+            MibigStore().install(self.config.mibig.version, self.mibig_dir, self.downloads_dir)
 
     def arrange_gnps(self) -> None:
         """Arrange the GNPS data.
@@ -287,6 +371,13 @@ class DatasetArranger:
             validate_bigscape(self.bigscape_dir, self.config.bigscape.cutoff)
             return
 
+        fingerprint = bigscape_fingerprint(
+            self.antismash_dir, self.config.bigscape.parameters, self.config.bigscape.version
+        )
+        if _read_bigscape_fingerprint(self.bigscape_dir) not in (None, fingerprint):
+            logger.info("BiG-SCAPE inputs, parameters or version changed, re-running BiG-SCAPE")
+            self._clear_bigscape_results()
+
         pass_validation = False
         for _ in range(3):
             try:
@@ -294,42 +385,70 @@ class DatasetArranger:
                 pass_validation = True
                 break
             except FileNotFoundError:
-                shutil.rmtree(self.bigscape_dir, ignore_errors=True)
-                self._run_bigscape()
+                self._clear_bigscape_results()
+                self._run_bigscape(fingerprint)
 
         if not pass_validation:
             validate_bigscape(self.bigscape_dir, self.config.bigscape.cutoff)
 
-    def _run_bigscape(self) -> None:
+    def _clear_bigscape_results(self) -> None:
+        """Remove the BiG-SCAPE results, but keep the running output of BiG-SCAPE.
+
+        BiG-SCAPE reuses the intermediate results in its running output, e.g. the domains of the
+        BGCs, so a new run only processes the BGCs that are new.
+        """
+        if not self.bigscape_dir.exists():
+            return
+        for path in self.bigscape_dir.iterdir():
+            if path == self.bigscape_running_output_dir:
+                continue
+            if path.is_dir() and not path.is_symlink():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+
+    def _run_bigscape(self, fingerprint: str) -> None:
         """Run BiG-SCAPE to generate the clustering file.
 
         The running output of BiG-SCAPE will be saved to the `BIGSCAPE_RUNNING_OUTPUT_PATH`.
 
         The clustering file "mix_clustering_c{self.config.bigscape.cutoff}.tsv" will be copied to the
         default BiG-SCAPE directory.
+
+        BiG-SCAPE is not run again if the running output was generated from the same antiSMASH
+        data, parameters and version, i.e. if its fingerprint file has the given fingerprint.
+
+        Args:
+            fingerprint: The fingerprint of the BiG-SCAPE inputs, see
+                [`bigscape_fingerprint`][nplinker.arranger.bigscape_fingerprint].
         """
         self.bigscape_running_output_dir.mkdir(exist_ok=True, parents=True)
 
         version = self.config.bigscape.version
 
-        run_bigscape(
-            self.antismash_dir,
-            self.bigscape_running_output_dir,
-            self.config.bigscape.parameters,
-            version,
-        )
+        if _read_bigscape_fingerprint(self.bigscape_running_output_dir) == fingerprint:
+            logger.info("BiG-SCAPE inputs, parameters and version unchanged, reusing its output")
+        else:
+            # an interrupted run must not be taken as complete
+            (self.bigscape_running_output_dir / defaults.BIGSCAPE_FINGERPRINT_FILENAME).unlink(
+                missing_ok=True
+            )
+            run_bigscape(
+                self.antismash_dir,
+                self.bigscape_running_output_dir,
+                self.config.bigscape.parameters,
+                version,
+                cores=self.config.get("bigscape.cores"),
+            )
+            _write_bigscape_fingerprint(self.bigscape_running_output_dir, fingerprint)
 
         if version == 1:
-            for f in glob(
-                str(
-                    self.bigscape_running_output_dir
-                    / "network_files"
-                    / "*"
-                    / "mix"
-                    / "mix_clustering_c*.tsv"
-                )
-            ):
-                shutil.copy(f, self.bigscape_dir)
+            # the output of each run is in its own directory, use the latest one
+            run_dirs = glob(str(self.bigscape_running_output_dir / "network_files" / "*"))
+            if run_dirs:
+                latest_run_dir = max(run_dirs, key=os.path.getmtime)
+                for f in glob(str(Path(latest_run_dir) / "mix" / "mix_clustering_c*.tsv")):
+                    shutil.copy(f, self.bigscape_dir)
         elif version == 2:
             shutil.copy(
                 self.bigscape_running_output_dir / "data_sqlite.db",
@@ -337,6 +456,7 @@ class DatasetArranger:
             )
         else:
             raise ValueError(f"Invalid BiG-SCAPE version: {version}")
+        _write_bigscape_fingerprint(self.bigscape_dir, fingerprint)
 
     def arrange_strain_mappings(self) -> None:
         """Arrange the strain mappings file.
@@ -427,6 +547,8 @@ def validate_gnps(gnps_dir: str | PathLike) -> None:
         ValueError: If both file_mappings.tsv and file_mapping.csv are found.
     """
     gnps_dir = Path(gnps_dir)
+    if _is_validated(gnps_dir, "gnps", {}):
+        return
     if not gnps_dir.exists():
         raise FileNotFoundError(f"GNPS data directory not found at {gnps_dir}")
 
@@ -454,6 +576,9 @@ def validate_gnps(gnps_dir: str | PathLike) -> None:
             f"Files not found in GNPS directory {gnps_dir}: ', '.join({list_not_found})"
         )
 
+    file_mappings = file_mappings_tsv if file_mappings_tsv.exists() else file_mappings_csv
+    _save_validation(gnps_dir, "gnps", {}, [file_mappings, *required_files])
+
 
 def validate_antismash(antismash_dir: str | PathLike) -> None:
     """Validate the antiSMASH data directory and its contents.
@@ -478,6 +603,8 @@ def validate_antismash(antismash_dir: str | PathLike) -> None:
         ValueError: If any sub-directory name contains a space.
     """
     antismash_dir = Path(antismash_dir)
+    if _is_validated(antismash_dir, "antismash", {}):
+        return
     if not antismash_dir.exists():
         raise FileNotFoundError(f"antiSMASH data directory not found at {antismash_dir}")
 
@@ -499,6 +626,9 @@ def validate_antismash(antismash_dir: str | PathLike) -> None:
         if not bgc_files:
             raise FileNotFoundError(f"No BGC files found in antiSMASH sub-directory {sub_dir}")
 
+    # the modification time of a sub-directory changes when files are added, removed or renamed
+    _save_validation(antismash_dir, "antismash", {}, [Path(sub_dir) for sub_dir in sub_dirs])
+
 
 def validate_bigscape(bigscape_dir: str | PathLike, cutoff: str) -> None:
     """Validate the BiG-SCAPE data directory and its contents.
@@ -508,8 +638,8 @@ def validate_bigscape(bigscape_dir: str | PathLike, cutoff: str) -> None:
     bigscape cutoff value set in the config file.
 
     Alternatively, the directory can contain the BiG-SCAPE database file generated by BiG-SCAPE v2.
-    At the moment, all the family assignments in the database will be used, so this database should
-    contain results from a single run with the desired cutoff.
+    Only the family assignments of the latest run in the database with the configured cutoff are
+    used, so the latest run must have been clustered with this cutoff (`--gcf_cutoffs`).
 
     Args:
         bigscape_dir: Path to the BiG-SCAPE data directory.
@@ -519,6 +649,8 @@ def validate_bigscape(bigscape_dir: str | PathLike, cutoff: str) -> None:
         FileNotFoundError: If the BiG-SCAPE data directory or the clustering file is not found.
     """
     bigscape_dir = Path(bigscape_dir)
+    if _is_validated(bigscape_dir, "bigscape", {"cutoff": str(cutoff)}):
+        return
     if not bigscape_dir.exists():
         raise FileNotFoundError(f"BiG-SCAPE data directory not found at {bigscape_dir}")
 
@@ -526,3 +658,131 @@ def validate_bigscape(bigscape_dir: str | PathLike, cutoff: str) -> None:
     database_file = bigscape_dir / "data_sqlite.db"
     if not clustering_file.exists() and not database_file.exists():
         raise FileNotFoundError(f"BiG-SCAPE data not found in {clustering_file} or {database_file}")
+
+    _save_validation(
+        bigscape_dir,
+        "bigscape",
+        {"cutoff": str(cutoff)},
+        [f for f in (clustering_file, database_file) if f.exists()],
+    )
+
+
+def bigscape_fingerprint(antismash_dir: str | PathLike, parameters: str, version: int) -> str:
+    """Compute the fingerprint of the inputs of a BiG-SCAPE run.
+
+    The fingerprint is a hash of the path, size and modification time of every GenBank file in
+    the antiSMASH directory, and of the BiG-SCAPE parameters and version. File contents are not
+    read, so computing the fingerprint only takes a directory walk.
+
+    Args:
+        antismash_dir: Path to the antiSMASH data directory, i.e. the input of BiG-SCAPE.
+        parameters: The BiG-SCAPE parameters, see the config `bigscape.parameters`.
+        version: The BiG-SCAPE version, see the config `bigscape.version`.
+
+    Returns:
+        The hex digest of the fingerprint.
+    """
+    antismash_dir = Path(antismash_dir)
+    entries: list[tuple[str, int, int]] = []
+    for dirpath, _, filenames in os.walk(antismash_dir):
+        for filename in filenames:
+            if filename.endswith(".gbk"):
+                path = Path(dirpath) / filename
+                stat = path.stat()
+                entries.append(
+                    (path.relative_to(antismash_dir).as_posix(), stat.st_size, stat.st_mtime_ns)
+                )
+    entries.sort()
+    content = {"parameters": parameters, "version": version, "files": entries}
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def _read_bigscape_fingerprint(directory: Path) -> str | None:
+    """Read the BiG-SCAPE fingerprint saved in a directory, or get None if there is none."""
+    try:
+        with open(directory / defaults.BIGSCAPE_FINGERPRINT_FILENAME, "r") as f:
+            return json.load(f)["fingerprint"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_bigscape_fingerprint(directory: Path, fingerprint: str) -> None:
+    """Save the fingerprint of the BiG-SCAPE inputs of the output in a directory."""
+    with open(directory / defaults.BIGSCAPE_FINGERPRINT_FILENAME, "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+
+
+# Validation manifests
+#
+# After a data directory passed validation, a manifest with the state of the directory is saved in
+# it: the names of its entries and the size and modification time of the validated files and
+# sub-directories. If the state is unchanged in a later run, the directory is not validated again,
+# so that only the manifest is read and a few files are stat'ed.
+
+
+def _validation_state(directory: Path, paths: Sequence[Path]) -> dict[str, Any]:
+    """Get the names of the entries of a directory and the size and mtime of the given paths."""
+    with os.scandir(directory) as entries:
+        names = sorted(
+            entry.name
+            for entry in entries
+            if not entry.name.startswith(defaults.VALIDATION_MANIFEST_FILENAME)
+        )
+    stats = {}
+    for path in paths:
+        stat = path.stat()
+        stats[path.relative_to(directory).as_posix()] = [stat.st_size, stat.st_mtime_ns]
+    return {"entries": names, "stats": stats}
+
+
+def _manifest_checksum(manifest: dict[str, Any]) -> str:
+    """Get the checksum of the content of a validation manifest."""
+    content = {key: value for key, value in manifest.items() if key != "checksum"}
+    return hashlib.md5(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def _is_validated(directory: Path, validator: str, params: dict[str, Any]) -> bool:
+    """Check if a directory passed a validation and has not changed since."""
+    try:
+        with open(directory / defaults.VALIDATION_MANIFEST_FILENAME, "r") as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("format") != VALIDATION_MANIFEST_FORMAT
+            or manifest.get("checksum") != _manifest_checksum(manifest)
+            or manifest["validator"] != validator
+            or manifest["params"] != params
+        ):
+            return False
+        paths = [directory / name for name in manifest["state"]["stats"]]
+        return _validation_state(directory, paths) == manifest["state"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def _save_validation(
+    directory: Path, validator: str, params: dict[str, Any], paths: Sequence[Path]
+) -> None:
+    """Save the manifest of a directory that passed a validation.
+
+    Args:
+        directory: The validated directory.
+        validator: The name of the validation, e.g. "gnps".
+        params: The parameters of the validation, e.g. the BiG-SCAPE cutoff.
+        paths: The validated files and sub-directories in the directory.
+    """
+    manifest = {
+        "format": VALIDATION_MANIFEST_FORMAT,
+        "validator": validator,
+        "params": params,
+        "state": _validation_state(directory, paths),
+    }
+    manifest["checksum"] = _manifest_checksum(manifest)
+    manifest_file = directory / defaults.VALIDATION_MANIFEST_FILENAME
+    tmp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+    try:
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, manifest_file)
+    except OSError as e:
+        # e.g. a read-only data directory, which is then validated in every run
+        logger.debug(f"Failed to save validation manifest in {directory}: {e}")
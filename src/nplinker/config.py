@@ -74,6 +74,10 @@ CONFIG_VALIDATORS = [
     Validator("bigscape.parameters", required=True, is_type_of=str),
     Validator("bigscape.cutoff", required=True, is_type_of=str),
     Validator("bigscape.version", required=True, is_type_of=int),
+    Validator("bigscape.all_cutoffs", is_type_of=bool),
+    Validator("bigscape.cores", is_type_of=int, gte=1),
+    # GNPS
+    Validator("gnps.lazy_peaks", is_type_of=bool),
     # Scoring
     ## `scoring.methods` must be a list of strings and must contain at least one of the
     ## supported scoring methods.
@@ -85,4 +89,9 @@ CONFIG_VALIDATORS = [
         len_min=1,
         condition=lambda v: set(v).issubset({"metcalf", "rosetta"}),
     ),
+    # Cache
+    Validator("cache.warm_start", is_type_of=bool),
+    # Concurrency
+    Validator("concurrency.loading", is_type_of=bool),
+    Validator("concurrency.arranging", is_type_of=bool),
 ]
@@ -1,9 +1,15 @@
+import os
 from pathlib import Path
 from typing import Final
 
 
 # The path to the NPLinker application database directory
 NPLINKER_APP_DATA_DIR: Final = Path(__file__).parent / "data"
+# The per-user cache directory, for data shared by all projects.
+# Unlike the application data directory, it is writable and kept when NPLinker is upgraded.
+NPLINKER_CACHE_DIR: Final = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "nplinker"
+)
 
 
 STRAIN_MAPPINGS_FILENAME: Final = "strain_mappings.json"
@@ -15,10 +21,15 @@ GNPS_ANNOTATIONS_FILENAME: Final = "annotations.tsv"
 GNPS_FILE_MAPPINGS_TSV: Final = "file_mappings.tsv"
 GNPS_FILE_MAPPINGS_CSV: Final = "file_mappings.csv"
 STRAINS_SELECTED_FILENAME: Final = "strains_selected.json"
+DATASET_SNAPSHOT_FILENAME: Final = "dataset.snapshot"
+GENOME_RESOLUTION_CACHE_FILENAME: Final = "genome_resolution_cache.sqlite"
+VALIDATION_MANIFEST_FILENAME: Final = ".nplinker_validation.json"
+BIGSCAPE_FINGERPRINT_FILENAME: Final = "bigscape_fingerprint.json"
 
 
 DOWNLOADS_DIRNAME: Final = "downloads"
 MIBIG_DIRNAME: Final = "mibig"
+MIBIG_STORE_DIRNAME: Final = "mibig_store"
 GNPS_DIRNAME: Final = "gnps"
 ANTISMASH_DIRNAME: Final = "antismash"
 BIGSCAPE_DIRNAME: Final = "bigscape"
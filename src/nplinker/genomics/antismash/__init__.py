@@ -1,16 +1,20 @@
 from .antismash_downloader import download_and_extract_antismash_data
 from .antismash_loader import AntismashBGCLoader
 from .antismash_loader import parse_bgc_genbank
+from .genome_resolution_cache import GenomeResolutionCache
 from .podp_antismash_downloader import GenomeStatus
 from .podp_antismash_downloader import get_best_available_genome_id
 from .podp_antismash_downloader import podp_download_and_extract_antismash_data
+from .podp_antismash_downloader import prewarm_genome_resolution_cache
 
 
 __all__ = [
     "download_and_extract_antismash_data",
     "AntismashBGCLoader",
     "parse_bgc_genbank",
+    "GenomeResolutionCache",
     "GenomeStatus",
     "get_best_available_genome_id",
     "podp_download_and_extract_antismash_data",
+    "prewarm_genome_resolution_cache",
 ]
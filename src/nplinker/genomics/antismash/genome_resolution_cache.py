@@ -0,0 +1,170 @@
+from __future__ import annotations
+import logging
+import sqlite3
+import time
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import closing
+from contextlib import contextmanager
+from os import PathLike
+from pathlib import Path
+from nplinker.defaults import GENOME_RESOLUTION_CACHE_FILENAME
+from nplinker.defaults import NPLINKER_CACHE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+# the default cache file, shared by all projects
+DEFAULT_CACHE_FILE = NPLINKER_CACHE_DIR / GENOME_RESOLUTION_CACHE_FILENAME
+
+# the time in seconds a failed resolution is cached, after which it is tried again
+NEGATIVE_RESULT_TTL = 7 * 24 * 3600
+
+
+class GenomeResolutionCache:
+    """Persistent store of resolved genome accessions, shared across projects.
+
+    Resolving a GenBank accession or JGI genome ID to a RefSeq assembly ID takes one or more
+    lookups on the NCBI and JGI websites. The cache keeps each resolution in a SQLite database,
+    keyed by the type and value of the original ID (e.g. `GenBank_accession` and
+    `GCA_000016425.1`), together with the time it was resolved.
+
+    Failed resolutions are cached as well (with an empty RefSeq ID), so that the same unknown ID
+    is not looked up again in every project. Only IDs that NCBI or JGI could not resolve should be
+    cached as failed, not lookups that failed because of network errors. As the databases are
+    updated, a failed resolution expires after `negative_ttl` seconds. Successful resolutions
+    never expire.
+
+    The cache can be used from several threads and processes at the same time. If the database
+    cannot be opened or written, e.g. on a read-only file system, the cache logs a warning and
+    behaves as if it were empty.
+
+    Attributes:
+        db_file: Path to the SQLite database file.
+        negative_ttl: The time in seconds a failed resolution is cached.
+
+    Examples:
+        >>> cache = GenomeResolutionCache()
+        >>> cache.set("GenBank_accession", "GCA_000016425.1", "GCF_000016425.1")
+        >>> cache.get("GenBank_accession", "GCA_000016425.1")
+        'GCF_000016425.1'
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS resolution (
+        id_type TEXT NOT NULL,
+        original_id TEXT NOT NULL,
+        refseq_id TEXT NOT NULL,
+        resolved_at REAL NOT NULL,
+        PRIMARY KEY (id_type, original_id)
+    );
+    """
+
+    def __init__(
+        self, db_file: str | PathLike | None = None, negative_ttl: float = NEGATIVE_RESULT_TTL
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            db_file: Path to the SQLite database file, created if it does not exist. Defaults to
+                the file `genome_resolution_cache.sqlite` in the NPLinker cache directory, i.e.
+                `$XDG_CACHE_HOME/nplinker` or `~/.cache/nplinker`.
+            negative_ttl: The time in seconds a failed resolution is cached. Defaults to 7 days.
+        """
+        self.db_file = str(db_file if db_file is not None else DEFAULT_CACHE_FILE)
+        self.negative_ttl = negative_ttl
+        self._disabled = False
+
+    def get(self, id_type: str, original_id: str) -> str | None:
+        """Get the cached resolution of a genome ID.
+
+        Args:
+            id_type: The type of the ID, e.g. `GenBank_accession` or `JGI_Genome_ID`.
+            original_id: The original ID of the genome.
+
+        Returns:
+            The resolved RefSeq ID, an empty string if the resolution failed and has not
+            expired, or None if the ID is not in the cache.
+        """
+        return self.get_many(id_type, [original_id]).get(original_id)
+
+    def get_many(self, id_type: str, original_ids: Iterable[str]) -> dict[str, str]:
+        """Get the cached resolutions of many genome IDs of the same type.
+
+        Args:
+            id_type: The type of the IDs, e.g. `GenBank_accession` or `JGI_Genome_ID`.
+            original_ids: The original IDs of the genomes.
+
+        Returns:
+            A dict with the original IDs found in the cache as keys and the resolved RefSeq IDs
+            as values. Failed resolutions that have not expired have an empty string as value.
+        """
+        original_ids = list(original_ids)
+        resolved: dict[str, str] = {}
+        expired_before = time.time() - self.negative_ttl
+        with self._connect() as conn:
+            if conn is None:
+                return resolved
+            # query in batches to stay below the limit of SQL variables
+            for i in range(0, len(original_ids), 500):
+                batch = original_ids[i : i + 500]
+                rows = conn.execute(
+                    "SELECT original_id, refseq_id, resolved_at FROM resolution "
+                    f"WHERE id_type = ? AND original_id IN ({', '.join('?' * len(batch))})",
+                    (id_type, *batch),
+                )
+                for original_id, refseq_id, resolved_at in rows:
+                    if refseq_id or resolved_at >= expired_before:
+                        resolved[original_id] = refseq_id
+        return resolved
+
+    def set(self, id_type: str, original_id: str, refseq_id: str) -> None:
+        """Cache the resolution of a genome ID.
+
+        Args:
+            id_type: The type of the ID, e.g. `GenBank_accession` or `JGI_Genome_ID`.
+            original_id: The original ID of the genome.
+            refseq_id: The resolved RefSeq ID, or an empty string if the resolution failed.
+        """
+        with self._connect() as conn:
+            if conn is None:
+                return
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO resolution "
+                    "(id_type, original_id, refseq_id, resolved_at) VALUES (?, ?, ?, ?)",
+                    (id_type, original_id, refseq_id, time.time()),
+                )
+
+    def clear(self) -> None:
+        """Remove all cached resolutions."""
+        with self._connect() as conn:
+            if conn is None:
+                return
+            with conn:
+                conn.execute("DELETE FROM resolution")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection | None]:
+        """Open a connection to the database, or get None if the database is not usable.
+
+        Each operation uses its own connection, as a connection cannot be shared by threads.
+        """
+        if self._disabled:
+            yield None
+            return
+        try:
+            Path(self.db_file).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.executescript(self.SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Genome resolution cache {self.db_file} is not usable: {e}")
+            self._disabled = True
+            yield None
+            return
+        with closing(conn):
+            try:
+                yield conn
+            except sqlite3.Error as e:
+                logger.warning(f"Genome resolution cache {self.db_file} is not usable: {e}")
+                self._disabled = True
@@ -1,21 +1,32 @@
 from __future__ import annotations
 import json
 import logging
+import os
 import re
+import threading
 import time
 import warnings
+from collections import defaultdict
+from collections.abc import Iterator
 from collections.abc import Mapping
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
 from os import PathLike
 from pathlib import Path
+from urllib.parse import urlsplit
 import httpx
 from bs4 import BeautifulSoup
 from bs4 import NavigableString
 from bs4 import Tag
 from jsonschema import validate
 from nplinker.defaults import GENOME_STATUS_FILENAME
+from nplinker.genomics.antismash import antismash_downloader
 from nplinker.genomics.antismash import download_and_extract_antismash_data
+from nplinker.genomics.antismash.genome_resolution_cache import GenomeResolutionCache
 from nplinker.schemas import GENOME_STATUS_SCHEMA
+from nplinker.utils import get_http_client
 
 
 logger = logging.getLogger(__name__)
@@ -26,6 +37,9 @@ JGI_GENOME_LOOKUP_URL = (
 )
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:86.0) Gecko/20100101 Firefox/86.0"
 
+# the maximum number of concurrent requests to a single host, e.g. NCBI, JGI or antiSMASH database
+MAX_REQUESTS_PER_HOST = 2
+
 
 class GenomeStatus:
     """Class to represent the status of a single genome.
@@ -90,7 +104,8 @@ class GenomeStatus:
         """Convert the genome status dictionary to a JSON string.
 
         If a file path is provided, the JSON string is written to the file. If
-        the file already exists, it is overwritten.
+        the file already exists, it is overwritten. The file is replaced atomically, so it is
+        never left partially written.
 
         Args:
             genome_status_dict: A dictionary of genome
@@ -109,8 +124,10 @@ class GenomeStatus:
         validate(json_data, schema=GENOME_STATUS_SCHEMA)
 
         if file is not None:
-            with open(file, "w") as f:
+            tmp_file = f"{file}.tmp"
+            with open(tmp_file, "w") as f:
                 json.dump(json_data, f)
+            os.replace(tmp_file, file)
             return None
         return json.dumps(json_data)
 
@@ -128,9 +145,24 @@ def podp_download_and_extract_antismash_data(
     genome_records: Sequence[Mapping[str, Mapping[str, str]]],
     project_download_root: str | PathLike,
     project_extract_root: str | PathLike,
+    max_workers: int = 8,
+    cache: GenomeResolutionCache | None = None,
 ):
     """Download and extract antiSMASH BGC archive for the given genome records.
 
+    The genomes are processed concurrently in a pipeline: each genome ID is resolved to a RefSeq
+    ID (via NCBI and/or JGI), then its antiSMASH archive is downloaded and extracted, while other
+    genomes are in other stages. The number of concurrent requests to each host is limited to
+    [MAX_REQUESTS_PER_HOST][nplinker.genomics.antismash.podp_antismash_downloader.MAX_REQUESTS_PER_HOST].
+
+    The status of each genome is saved to the genome status file
+    [GENOME_STATUS_FILENAME][nplinker.defaults.GENOME_STATUS_FILENAME] as soon as the genome is
+    processed, so an interrupted run resumes from the genomes not processed yet.
+
+    The resolved RefSeq IDs are looked up in and added to the
+    [GenomeResolutionCache][nplinker.genomics.antismash.GenomeResolutionCache], so that genomes
+    resolved before, e.g. in other projects, are not looked up again.
+
     Args:
         genome_records: list of dicts representing genome records.
 
@@ -144,6 +176,9 @@ def podp_download_and_extract_antismash_data(
             Note that an `antismash` directory will be created in the specified
             `extract_root` if it doesn't exist. The files will be extracted to
             `<extract_root>/antismash/<antismash_id>` directory.
+        max_workers: The maximum number of genomes processed concurrently. Defaults to 8.
+        cache: The cache of resolved genome IDs. Defaults to the cache shared by all projects in
+            the NPLinker cache directory.
 
     Warnings:
         UserWarning: when no antiSMASH data is found for some genomes.
@@ -156,75 +191,148 @@ def podp_download_and_extract_antismash_data(
     gs_file = Path(project_download_root, GENOME_STATUS_FILENAME)
     gs_dict = GenomeStatus.read_json(gs_file)
 
-    for i, genome_record in enumerate(genome_records):
+    # get the genomes to process, a genome ID occurring in several records is processed once
+    genomes: dict[str, Mapping[str, str]] = {}
+    for genome_record in genome_records:
         # get the best available ID from the dict
         genome_id_data = genome_record["genome_ID"]
         raw_genome_id = get_best_available_genome_id(genome_id_data)
         if raw_genome_id is None or len(raw_genome_id) == 0:
             logger.warning(f'Invalid input genome record "{genome_record}"')
             continue
+        genomes.setdefault(raw_genome_id, genome_id_data)
 
         # check if genome ID exist in the genome status file
         if raw_genome_id not in gs_dict:
             gs_dict[raw_genome_id] = GenomeStatus(raw_genome_id)
 
-        gs_obj = gs_dict[raw_genome_id]
+    pipeline = _AntismashPipeline(
+        gs_dict,
+        gs_file,
+        project_download_root,
+        project_extract_root,
+        cache or GenomeResolutionCache(),
+    )
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nplinker-podp") as pool:
+        futures = [
+            pool.submit(pipeline.process, i, len(genomes), raw_genome_id, genome_id_data)
+            for i, (raw_genome_id, genome_id_data) in enumerate(genomes.items())
+        ]
+        for future in as_completed(futures):
+            future.result()
 
-        logger.info(
-            f"Checking for antismash data {i + 1}/{len(genome_records)}, "
-            f"current genome ID={raw_genome_id}"
+    # raise and log warning for failed downloads
+    failed_ids = [gs.original_id for gs in gs_dict.values() if not gs.bgc_path]
+    if failed_ids:
+        warning_message = (
+            f"Failed to download antiSMASH data for the following genome IDs: {failed_ids}"
         )
+        logger.warning(warning_message)
+        warnings.warn(warning_message, UserWarning)
+
+    # save updated genome status to json file
+    GenomeStatus.to_json(gs_dict, gs_file)
+
+    if len(failed_ids) == len(genome_records):
+        raise ValueError("No antiSMASH data found for any genome")
+
+
+class _AntismashPipeline:
+    """The steps to get the antiSMASH data of a genome, run concurrently for many genomes."""
+
+    def __init__(
+        self,
+        gs_dict: dict[str, GenomeStatus],
+        gs_file: Path,
+        download_root: str | PathLike,
+        extract_root: str | PathLike,
+        cache: GenomeResolutionCache,
+    ) -> None:
+        self.gs_dict = gs_dict
+        self.gs_file = gs_file
+        self.download_root = download_root
+        self.extract_root = extract_root
+        self.cache = cache
+        self._status_lock = threading.Lock()
+        # genomes with different original IDs may resolve to the same RefSeq ID, whose archive
+        # must be downloaded and extracted only once
+        self._refseq_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+
+    def process(
+        self, i: int, n: int, raw_genome_id: str, genome_id_data: Mapping[str, str]
+    ) -> None:
+        """Resolve, download and extract the antiSMASH data of a genome, and save its status."""
+        gs_obj = self.gs_dict[raw_genome_id]
+        logger.info(f"Checking for antismash data {i + 1}/{n}, current genome ID={raw_genome_id}")
         # first, check if BGC data is downloaded
         if gs_obj.bgc_path and Path(gs_obj.bgc_path).exists():
             logger.info(f"Genome ID {raw_genome_id} already downloaded to {gs_obj.bgc_path}")
-            continue
+            return
         # second, check if lookup attempted previously
         if gs_obj.resolve_attempted:
             logger.info(f"Genome ID {raw_genome_id} skipped due to previous failed attempt")
-            continue
+            return
 
         # if not downloaded or lookup attempted, then try to resolve the ID
         # and download
         logger.info(f"Start lookup process for genome ID {raw_genome_id}")
-        gs_obj.resolved_refseq_id = _resolve_refseq_id(genome_id_data)
+        gs_obj.resolved_refseq_id = _resolve_refseq_id(genome_id_data, self.cache)
         gs_obj.resolve_attempted = True
 
         if gs_obj.resolved_refseq_id == "":
             # give up on this one
             logger.warning(f"Failed lookup for genome ID {raw_genome_id}")
-            continue
-
-        # if resolved id is valid, try to download and extract antismash data
-        try:
-            download_and_extract_antismash_data(
-                gs_obj.resolved_refseq_id, project_download_root, project_extract_root
-            )
-
-            gs_obj.bgc_path = str(
-                Path(project_download_root, gs_obj.resolved_refseq_id + ".zip").absolute()
-            )
-
-            output_path = Path(project_extract_root, "antismash", gs_obj.resolved_refseq_id)
-            if output_path.exists():
-                Path.touch(output_path / "completed", exist_ok=True)
-
-        except Exception:
-            gs_obj.bgc_path = ""
+        else:
+            # if resolved id is valid, try to download and extract antismash data
+            self._download_and_extract(gs_obj)
+        self._save_status()
+
+    def _download_and_extract(self, gs_obj: GenomeStatus) -> None:
+        """Download and extract the antiSMASH data of a genome with resolved RefSeq ID."""
+        refseq_id = gs_obj.resolved_refseq_id
+        archive = Path(self.download_root, refseq_id + ".zip").absolute()
+        output_path = Path(self.extract_root, "antismash", refseq_id)
+        with self._refseq_locks[refseq_id]:
+            if archive.exists() and (output_path / "completed").exists():
+                # already done for another genome resolved to the same RefSeq ID
+                gs_obj.bgc_path = str(archive)
+                return
+            try:
+                url = antismash_downloader.ANTISMASH_DB_DOWNLOAD_URL.format(refseq_id, "")
+                with _host_slot(url):
+                    download_and_extract_antismash_data(
+                        refseq_id, self.download_root, self.extract_root
+                    )
+                gs_obj.bgc_path = str(archive)
+                if output_path.exists():
+                    Path.touch(output_path / "completed", exist_ok=True)
+            except Exception:
+                gs_obj.bgc_path = ""
+
+    def _save_status(self) -> None:
+        """Save the status of all genomes to the genome status file."""
+        with self._status_lock:
+            GenomeStatus.to_json(self.gs_dict, self.gs_file)
+
+
+# the semaphores limiting the concurrent requests to each host
+_host_semaphores: defaultdict[str, threading.BoundedSemaphore] = defaultdict(
+    lambda: threading.BoundedSemaphore(MAX_REQUESTS_PER_HOST)
+)
+_host_semaphores_lock = threading.Lock()
 
-    # raise and log warning for failed downloads
-    failed_ids = [gs.original_id for gs in gs_dict.values() if not gs.bgc_path]
-    if failed_ids:
-        warning_message = (
-            f"Failed to download antiSMASH data for the following genome IDs: {failed_ids}"
-        )
-        logger.warning(warning_message)
-        warnings.warn(warning_message, UserWarning)
 
-    # save updated genome status to json file
-    GenomeStatus.to_json(gs_dict, gs_file)
+@contextmanager
+def _host_slot(url: str) -> Iterator[None]:
+    """Wait until a request to the host of the url is allowed, and hold it during the request.
 
-    if len(failed_ids) == len(genome_records):
-        raise ValueError("No antiSMASH data found for any genome")
+    At most [MAX_REQUESTS_PER_HOST][nplinker.genomics.antismash.podp_antismash_downloader.MAX_REQUESTS_PER_HOST]
+    requests to the same host are made concurrently.
+    """
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores[urlsplit(url).netloc]
+    with semaphore:
+        yield
 
 
 def get_best_available_genome_id(genome_id_data: Mapping[str, str]) -> str | None:
@@ -252,11 +360,18 @@ def get_best_available_genome_id(genome_id_data: Mapping[str, str]) -> str | Non
 
 
 def _ncbi_genbank_search(genbank_id: str, retry_times: int = 3) -> Tag | NavigableString | None:
+    """Look up the assembly summary of a GenBank accession on NCBI.
+
+    Raises:
+        httpx.HTTPError: if the request fails, or NCBI still responds with a server error or a
+            rate limit error after retrying.
+    """
     url = NCBI_LOOKUP_URL.format(genbank_id)
     retry = 1
     while retry <= retry_times:
         logger.info(f"Looking up GenBank data for {genbank_id} at {url}")
-        resp = httpx.get(url, follow_redirects=True)
+        with _host_slot(url):
+            resp = get_http_client().get(url, follow_redirects=True)
         if resp.status_code == httpx.codes.OK:
             # the page should contain a <dl> element with class "assembly_summary_new". retrieving
             # the page seems to fail occasionally in the middle of lengthy sequences of genome
@@ -268,24 +383,25 @@ def _ncbi_genbank_search(genbank_id: str, retry_times: int = 3) -> Tag | Navigab
             if dl_element is not None:
                 return dl_element
         retry = retry + 1
-        time.sleep(5)
+        if retry <= retry_times:
+            # only this genome waits, the other genomes are processed meanwhile
+            time.sleep(5)
 
+    if resp.is_server_error or resp.status_code == httpx.codes.TOO_MANY_REQUESTS:
+        resp.raise_for_status()
     logger.warning(f"Failed to resolve NCBI genome ID {genbank_id} at URL {url} (after retrying)")
     return None
 
 
-def _resolve_genbank_accession(genbank_id: str) -> str:
+def _resolve_genbank_accession(genbank_id: str) -> str | None:
     """Try to get RefSeq id through given GenBank id.
 
     Args:
         genbank_id: ID for GenBank accession.
 
-    Raises:
-        Exception: "Unknown HTML format" if the search of genbank does not give any results.
-        Exception: "Expected HTML elements not found" if no match with RefSeq assembly accession is found.
-
     Returns:
-        RefSeq ID if the search is successful, otherwise None.
+        RefSeq ID if the search is successful, an empty string if NCBI has no RefSeq ID for the
+        GenBank id, or None if NCBI could not be reached.
     """
     logger.info(f"Attempting to resolve Genbank accession {genbank_id} to RefSeq accession")
     # genbank id => genbank seq => refseq
@@ -310,6 +426,10 @@ def _resolve_genbank_accession(genbank_id: str) -> str:
     # run a search using the GenBank accession ID
     try:
         dl_element = _ncbi_genbank_search(genbank_id)
+    except httpx.HTTPError as e:
+        logger.warning(f"Failed looking up GenBank accession {genbank_id} on NCBI, error {e}")
+        return None
+    try:
         if dl_element is None or isinstance(dl_element, NavigableString):
             raise Exception("Unknown HTML format")
 
@@ -337,25 +457,30 @@ def _resolve_genbank_accession(genbank_id: str) -> str:
     return ""
 
 
-def _resolve_jgi_accession(jgi_id: str) -> str:
+def _resolve_jgi_accession(jgi_id: str) -> str | None:
     """Try to get RefSeq id through given JGI id.
 
     Args:
         jgi_id: JGI_Genome_ID for GenBank accession.
 
     Returns:
-        RefSeq ID if search is successful, otherwise None.
+        RefSeq ID if search is successful, an empty string if JGI or NCBI has no matching
+        accession, or None if JGI or NCBI could not be reached.
     """
     url = JGI_GENOME_LOOKUP_URL.format(jgi_id)
     logger.info(f"Attempting to resolve JGI_Genome_ID {jgi_id} to GenBank accession via {url}")
     # no User-Agent header produces a 403 Forbidden error on this site...
     try:
-        resp = httpx.get(
-            url, headers={"User-Agent": USER_AGENT}, timeout=10.0, follow_redirects=True
-        )
-    except httpx.ReadTimeout:
-        logger.warning("Timed out waiting for result of JGI_Genome_ID lookup")
-        return ""
+        with _host_slot(url):
+            resp = get_http_client().get(
+                url, headers={"User-Agent": USER_AGENT}, timeout=10.0, follow_redirects=True
+            )
+    except httpx.HTTPError as e:
+        logger.warning(f"Failed looking up JGI_Genome_ID {jgi_id}, error {e}")
+        return None
+    if resp.is_server_error or resp.status_code == httpx.codes.TOO_MANY_REQUESTS:
+        logger.warning(f"Failed looking up JGI_Genome_ID {jgi_id}, status {resp.status_code}")
+        return None
 
     soup = BeautifulSoup(resp.content, "html.parser")
     # find the table entry giving the NCBI assembly accession ID
@@ -366,14 +491,21 @@ def _resolve_jgi_accession(jgi_id: str) -> str:
     return _resolve_genbank_accession(link.text)
 
 
-def _resolve_refseq_id(genome_id_data: Mapping[str, str]) -> str:
+def _resolve_refseq_id(
+    genome_id_data: Mapping[str, str], cache: GenomeResolutionCache | None = None
+) -> str:
     """Get the RefSeq ID to which the genome accession is linked.
 
     Check https://pairedomicsdata.bioinformatics.nl/schema.json.
 
+    GenBank and JGI IDs are looked up in the cache first, and their resolutions are added to the
+    cache. A resolution that failed because NCBI or JGI could not be reached is not cached, so it
+    is tried again next time.
+
     Args:
         genome_id_data: dictionary containing information
         for each genome record present.
+        cache: The cache of resolved genome IDs. Defaults to the cache shared by all projects.
 
     Returns:
         RefSeq ID if present, otherwise an empty string.
@@ -381,12 +513,102 @@ def _resolve_refseq_id(genome_id_data: Mapping[str, str]) -> str:
     if "RefSeq_accession" in genome_id_data:
         # best case, can use this directly
         return genome_id_data["RefSeq_accession"]
-    if "GenBank_accession" in genome_id_data:
+    key = _resolution_key(genome_id_data)
+    if key is None:
+        logger.warning(f"Unable to resolve genome_ID: {genome_id_data}")
+        return ""
+
+    id_type, original_id = key
+    if cache is None:
+        cache = GenomeResolutionCache()
+    refseq_id = cache.get(id_type, original_id)
+    if refseq_id is not None:
+        logger.info(f"Resolved {id_type} {original_id} to '{refseq_id}' from cache")
+        return refseq_id
+    if id_type == "GenBank_accession":
         # resolve via NCBI
-        return _resolve_genbank_accession(genome_id_data["GenBank_accession"])
-    if "JGI_Genome_ID" in genome_id_data:
+        refseq_id = _resolve_genbank_accession(original_id)
+    else:
         # resolve via JGI => NCBI
-        return _resolve_jgi_accession(genome_id_data["JGI_Genome_ID"])
+        refseq_id = _resolve_jgi_accession(original_id)
+    if refseq_id is None:
+        return ""
+    cache.set(id_type, original_id, refseq_id)
+    return refseq_id
 
-    logger.warning(f"Unable to resolve genome_ID: {genome_id_data}")
-    return ""
+
+def _resolution_key(genome_id_data: Mapping[str, str]) -> tuple[str, str] | None:
+    """Get the type and value of the ID to resolve to a RefSeq ID.
+
+    Returns:
+        A tuple of the ID type and the ID, or None if the RefSeq ID is given or there is no
+        GenBank or JGI ID.
+    """
+    if "RefSeq_accession" in genome_id_data:
+        return None
+    for id_type in ("GenBank_accession", "JGI_Genome_ID"):
+        if id_type in genome_id_data:
+            return id_type, genome_id_data[id_type]
+    return None
+
+
+def prewarm_genome_resolution_cache(
+    genome_records: Sequence[Mapping[str, Mapping[str, str]]],
+    cache: GenomeResolutionCache | None = None,
+    max_workers: int = 8,
+) -> dict[str, str]:
+    """Resolve the genome IDs of many genome records and add them to the resolution cache.
+
+    The IDs already in the cache are read in bulk, and only the others are looked up, concurrently
+    and with the number of requests to each host limited. Later calls of
+    [podp_download_and_extract_antismash_data][nplinker.genomics.antismash.podp_download_and_extract_antismash_data]
+    for these genomes, in any project, then get the RefSeq IDs from the cache.
+
+    Args:
+        genome_records: list of dicts representing genome records, see
+            `podp_download_and_extract_antismash_data`.
+        cache: The cache of resolved genome IDs. Defaults to the cache shared by all projects.
+        max_workers: The maximum number of genome IDs resolved concurrently. Defaults to 8.
+
+    Returns:
+        A dict with the best available ID of each genome as keys and the resolved RefSeq IDs as
+        values. Genomes that could not be resolved have an empty string as value.
+
+    Examples:
+        >>> with open("paired_datarecord.json") as f:
+        ...     genome_records = json.load(f)["genomes"]
+        >>> resolved = prewarm_genome_resolution_cache(genome_records)
+    """
+    if cache is None:
+        cache = GenomeResolutionCache()
+
+    genomes: dict[str, Mapping[str, str]] = {}
+    for genome_record in genome_records:
+        genome_id_data = genome_record["genome_ID"]
+        raw_genome_id = get_best_available_genome_id(genome_id_data)
+        if raw_genome_id:
+            genomes.setdefault(raw_genome_id, genome_id_data)
+
+    # read the cached resolutions in bulk
+    resolved: dict[str, str] = {}
+    for id_type in ("GenBank_accession", "JGI_Genome_ID"):
+        ids = {}
+        for raw_genome_id, genome_id_data in genomes.items():
+            key = _resolution_key(genome_id_data)
+            if key is None:
+                resolved[raw_genome_id] = genome_id_data.get("RefSeq_accession", "")
+            elif key[0] == id_type:
+                ids[raw_genome_id] = key[1]
+        cached = cache.get_many(id_type, ids.values())
+        resolved.update({k: cached[v] for k, v in ids.items() if v in cached})
+
+    # resolve the others concurrently
+    missing = [raw_genome_id for raw_genome_id in genomes if raw_genome_id not in resolved]
+    logger.info(f"Resolving {len(missing)} genome IDs, {len(resolved)} already resolved")
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nplinker-podp") as pool:
+        for raw_genome_id, refseq_id in zip(
+            missing, pool.map(lambda i: _resolve_refseq_id(genomes[i], cache), missing)
+        ):
+            resolved[raw_genome_id] = refseq_id
+
+    return {raw_genome_id: resolved[raw_genome_id] for raw_genome_id in genomes}
@@ -3,6 +3,7 @@ import logging
 from typing import TYPE_CHECKING
 from deprecated import deprecated
 from nplinker.strain import Strain
+from nplinker.utils import slot_state
 from .aa_pred import predict_aa
 
 
@@ -59,6 +60,20 @@ class BGC:
         strain: The strain of the BGC.
     """
 
+    __slots__ = (
+        "id",
+        "product_prediction",
+        "mibig_bgc_class",
+        "description",
+        "smiles",
+        "antismash_file",
+        "antismash_id",
+        "antismash_region",
+        "parents",
+        "_strain",
+        "_aa_predictions",
+    )
+
     def __init__(self, id: str, /, *product_prediction: str):
         """Initialize the BGC object.
 
@@ -114,7 +129,7 @@ class BGC:
 
     def __reduce__(self) -> tuple:
         """Reduce function for pickling."""
-        return (self.__class__, (self.id, *self.product_prediction), self.__dict__)
+        return (self.__class__, (self.id, *self.product_prediction), (None, slot_state(self)))
 
     def add_parent(self, gcf: GCF) -> None:
         """Add a parent GCF to the BGC.
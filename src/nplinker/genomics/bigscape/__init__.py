@@ -1,6 +1,14 @@
 from .bigscape_loader import BigscapeGCFLoader
+from .bigscape_loader import BigscapeGCFSetLoader
 from .bigscape_loader import BigscapeV2GCFLoader
+from .bigscape_loader import GCFSets
 from .runbigscape import run_bigscape
 
 
-__all__ = ["BigscapeGCFLoader", "BigscapeV2GCFLoader", "run_bigscape"]
+__all__ = [
+    "BigscapeGCFLoader",
+    "BigscapeGCFSetLoader",
+    "BigscapeV2GCFLoader",
+    "GCFSets",
+    "run_bigscape",
+]
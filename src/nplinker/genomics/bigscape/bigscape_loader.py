@@ -1,14 +1,36 @@
 from __future__ import annotations
 import csv
 import logging
+import re
 import sqlite3
+from array import array
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from contextlib import closing
+from contextlib import contextmanager
+from functools import lru_cache
 from os import PathLike
+from pathlib import Path
+import numpy as np
 from ..abc import GCFLoaderBase
 from ..gcf import GCF
 
 
 logger = logging.getLogger(__name__)
 
+# the number of rows fetched from a BiG-SCAPE v2 database at a time
+FETCH_BATCH_SIZE = 10_000
+
+# pragmas of the read-only connections to BiG-SCAPE v2 databases: a larger page cache, memory
+# mapped reads, and temporary tables (e.g. of GROUP BY) in memory
+_READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+)
+
 
 class BigscapeGCFLoader(GCFLoaderBase):
     """Data loader for BiG-SCAPE GCF cluster file.
@@ -64,18 +86,43 @@ class BigscapeGCFLoader(GCFLoaderBase):
 class BigscapeV2GCFLoader(GCFLoaderBase):
     """Data loader for BiG-SCAPE v2 database file.
 
+    The family assignments are read from the database in batches, and the GCFs to load are
+    selected by the query, so only the rows of these GCFs are read into Python:
+
+    - if the database has several runs, only the families of the latest run are loaded;
+    - if `cutoff` is given, only the families of this cutoff are loaded;
+    - MIBiG-only and singleton GCFs are not loaded if `keep_mibig_only` or `keep_singleton` is
+      false. Excluded GCFs are not available from `get_gcfs` either.
+
+    The run and cutoff filters are only applied if the database has the run and cutoff of the
+    families, i.e. the columns `family.run_id` and `family.cutoff`. A `ValueError` listing the
+    available cutoffs is raised if the latest run has no families of `cutoff`.
+
     Attributes:
         db_file: Path to the BiG-SCAPE database file.
     """
 
-    def __init__(self, db_file: str | PathLike, /) -> None:
+    def __init__(
+        self,
+        db_file: str | PathLike,
+        /,
+        cutoff: str | None = None,
+        keep_mibig_only: bool = True,
+        keep_singleton: bool = True,
+    ) -> None:
         """Initialize the BiG-SCAPE v2 GCF loader.
 
         Args:
             db_file: Path to the BiG-SCAPE v2 database file
+            cutoff: The BiG-SCAPE cutoff of the GCFs to load, e.g. "0.30". Defaults to all cutoffs.
+            keep_mibig_only: True to load GCFs that contain only MIBiG BGCs.
+            keep_singleton: True to load singleton GCFs.
+
+        Raises:
+            ValueError: If the latest run in the database has no families of the cutoff.
         """
         self.db_file = str(db_file)
-        self._gcf_list = self._parse_gcf(self.db_file)
+        self._gcf_list = self._parse_gcf(self.db_file, cutoff, keep_mibig_only, keep_singleton)
 
     def get_gcfs(self, keep_mibig_only: bool = False, keep_singleton: bool = False) -> list[GCF]:
         """Get all GCF objects.
@@ -96,39 +143,391 @@ class BigscapeV2GCFLoader(GCFLoaderBase):
         return gcf_list
 
     @staticmethod
-    def _parse_gcf(db_file: str) -> list[GCF]:
+    def _parse_gcf(
+        db_file: str,
+        cutoff: str | None = None,
+        keep_mibig_only: bool = True,
+        keep_singleton: bool = True,
+    ) -> list[GCF]:
         """Get GCF objects from database.
 
         Args:
             db_file: Path to the sqlite3 database file.
+            cutoff: The BiG-SCAPE cutoff of the GCFs to load. Defaults to all cutoffs.
+            keep_mibig_only: True to load GCFs that contain only MIBiG BGCs.
+            keep_singleton: True to load singleton GCFs.
 
         Returns:
             A list of GCF objects
+
+        Raises:
+            ValueError: If the latest run in the database has no families of the cutoff.
         """
-        gcf_dict: dict[str, GCF] = {}
+        gcf_dict: dict[int, GCF] = {}
+        for _, bgc_id, family_id in _read_family_assignments(
+            db_file,
+            cutoff=cutoff,
+            keep_mibig_only=keep_mibig_only,
+            keep_singleton=keep_singleton,
+        ):
+            gcf = gcf_dict.get(family_id)
+            if gcf is None:
+                gcf = gcf_dict[family_id] = GCF(family_id)
+            gcf.bgc_ids.add(bgc_id)
+        if not gcf_dict and cutoff is not None:
+            # tell a cutoff missing from the latest run apart from GCFs removed by the filters
+            run_cutoffs = _read_family_cutoffs(db_file)
+            if run_cutoffs:
+                latest_run = max(run_cutoffs, key=lambda run_id: run_id or 0)
+                latest_cutoffs = run_cutoffs[latest_run]
+                if float(cutoff) not in {float(c) for c in latest_cutoffs}:
+                    raise ValueError(
+                        f"No BiG-SCAPE families of cutoff {cutoff} found in the latest run of "
+                        f"{db_file}, its cutoffs are {', '.join(latest_cutoffs)}. Set the config "
+                        "`bigscape.cutoff` to one of them, or cluster the BGCs again with the "
+                        "cutoff."
+                    )
+        return list(gcf_dict.values())
+
 
-        with sqlite3.connect(db_file) as connection:
-            cursor = connection.cursor()
+class GCFSets:
+    """The GCFs of several BiG-SCAPE cutoffs, stored as compact membership arrays.
 
-            query = """
-            SELECT gbk.path, bgc_record_family.family_id FROM bgc_record_family
+    All sets share one array of BGC ids. The set of each cutoff is stored as two int32 arrays of
+    the same length, which pair the index of a BGC with the index of one of its families in the
+    family ids of the cutoff. A BGC may be in more than one family of a cutoff (e.g. in BiG-SCAPE
+    v2 class bins), and BGCs that are in no family of a cutoff have no pairs.
+
+    GCF objects are only created on request, so keeping many cutoffs in memory is cheap, and the
+    GCFs of another cutoff can be created without reading the BiG-SCAPE output again.
+
+    Attributes:
+        bgc_ids: The ids of the BGCs in any of the sets, as a numpy array of strings.
+
+    Examples:
+        >>> gcf_sets = BigscapeGCFSetLoader("bigscape").get_gcf_sets()
+        >>> gcf_sets.cutoffs
+        ['0.30', '0.50']
+        >>> gcfs = gcf_sets.get_gcfs("0.50")
+    """
+
+    # the key of the set of a BiG-SCAPE v2 database without cutoff information
+    ALL = "all"
+
+    def __init__(
+        self,
+        bgc_ids: np.ndarray,
+        sets: Mapping[str, tuple[np.ndarray, np.ndarray, np.ndarray]],
+    ) -> None:
+        """Initialize the GCF sets.
+
+        Args:
+            bgc_ids: The ids of all BGCs in the sets.
+            sets: For each cutoff, the BGC indexes and family indexes of the membership pairs,
+                and the family ids.
+        """
+        self.bgc_ids = bgc_ids
+        self._sets = dict(sets)
+
+    def __repr__(self) -> str:
+        return f"GCFSets(#bgcs={len(self.bgc_ids)}, cutoffs={self.cutoffs})"
+
+    @property
+    def cutoffs(self) -> list[str]:
+        """Get the cutoffs of the sets."""
+        return list(self._sets)
+
+    @classmethod
+    def from_assignments(cls, assignments: Iterable[tuple[str, str, str | int]]) -> GCFSets:
+        """Build the GCF sets from family assignments in a single pass.
+
+        Args:
+            assignments: Tuples of (cutoff, BGC id, family id), in any order.
+
+        Returns:
+            The GCF sets of all cutoffs in the assignments.
+        """
+        bgc_index: dict[str, int] = {}
+        # per cutoff: BGC indexes, family indexes and the index of each family id
+        pairs: dict[str, tuple[array, array, dict]] = {}
+        for cutoff, bgc_id, family_id in assignments:
+            i = bgc_index.setdefault(bgc_id, len(bgc_index))
+            entry = pairs.get(cutoff)
+            if entry is None:
+                entry = pairs[cutoff] = (array("i"), array("i"), {})
+            bgc_indexes, family_indexes, family_index = entry
+            bgc_indexes.append(i)
+            family_indexes.append(family_index.setdefault(family_id, len(family_index)))
+
+        sets = {}
+        for cutoff, (bgc_indexes, family_indexes, family_index) in pairs.items():
+            family_ids = np.empty(len(family_index), dtype=object)
+            family_ids[:] = list(family_index)
+            sets[cutoff] = (
+                np.frombuffer(bgc_indexes, dtype=np.int32),
+                np.frombuffer(family_indexes, dtype=np.int32),
+                family_ids,
+            )
+        bgc_ids = np.empty(len(bgc_index), dtype=object)
+        bgc_ids[:] = list(bgc_index)
+        return cls(bgc_ids, sets)
+
+    def memberships(self, cutoff: str) -> tuple[np.ndarray, np.ndarray]:
+        """Get the family memberships of the BGCs at a cutoff.
+
+        Args:
+            cutoff: The BiG-SCAPE cutoff, e.g. "0.30".
+
+        Returns:
+            Two int32 arrays of the same length: the indexes of BGCs in `bgc_ids`, and the
+            indexes of their families in `family_ids(cutoff)`.
+
+        Raises:
+            KeyError: If there is no set for the cutoff.
+        """
+        bgc_indexes, family_indexes, _ = self._get(cutoff)
+        return bgc_indexes, family_indexes
+
+    def family_ids(self, cutoff: str) -> np.ndarray:
+        """Get the family ids of a cutoff.
+
+        Args:
+            cutoff: The BiG-SCAPE cutoff, e.g. "0.30".
+
+        Returns:
+            The family ids, in the order of the family indexes of `memberships(cutoff)`.
+
+        Raises:
+            KeyError: If there is no set for the cutoff.
+        """
+        return self._get(cutoff)[2]
+
+    def get_gcfs(
+        self, cutoff: str, keep_mibig_only: bool = False, keep_singleton: bool = False
+    ) -> list[GCF]:
+        """Create the GCF objects of a cutoff.
+
+        Args:
+            cutoff: The BiG-SCAPE cutoff, e.g. "0.30".
+            keep_mibig_only: True to keep GCFs that contain only MIBiG BGCs.
+            keep_singleton: True to keep singleton GCFs. A singleton GCF is a GCF that contains
+                only one BGC.
+
+        Returns:
+            A list of new GCF objects, in the order the families were read.
+
+        Raises:
+            KeyError: If there is no set for the cutoff.
+        """
+        bgc_indexes, family_indexes, family_ids = self._get(cutoff)
+        order = np.argsort(family_indexes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(family_indexes[order])) + 1
+        gcf_list = []
+        for members in np.split(order, boundaries) if len(order) > 0 else []:
+            gcf = GCF(family_ids[family_indexes[members[0]]])
+            gcf.bgc_ids.update(self.bgc_ids[bgc_indexes[members]].tolist())
+            gcf_list.append(gcf)
+        if not keep_mibig_only:
+            gcf_list = [gcf for gcf in gcf_list if not gcf.has_mibig_only()]
+        if not keep_singleton:
+            gcf_list = [gcf for gcf in gcf_list if not gcf.is_singleton()]
+        return gcf_list
+
+    def _get(self, cutoff: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        try:
+            return self._sets[cutoff]
+        except KeyError:
+            raise KeyError(
+                f"No GCFs for BiG-SCAPE cutoff {cutoff!r}, available cutoffs: {self.cutoffs}"
+            ) from None
+
+
+class BigscapeGCFSetLoader:
+    """Data loader for the GCFs of all cutoffs in BiG-SCAPE output.
+
+    For BiG-SCAPE v1 output, all cluster files `mix_clustering_c{cutoff}.tsv` in a directory are
+    read. For a BiG-SCAPE v2 database file, all family assignments are read at once and grouped
+    by the cutoff of their family. If the database has no cutoff information, all assignments
+    form one set with the key `GCFSets.ALL`.
+
+    The GCFs are stored as [`GCFSets`][nplinker.genomics.bigscape.GCFSets], from which the GCF
+    objects of any cutoff can be created.
+
+    Attributes:
+        path: Path to the BiG-SCAPE data directory (v1) or database file (v2).
+    """
+
+    def __init__(self, path: str | PathLike, /) -> None:
+        """Initialize the loader.
+
+        Args:
+            path: Path to the directory with the BiG-SCAPE cluster files
+                `mix_clustering_c{cutoff}.tsv`, or to the BiG-SCAPE v2 database file.
+
+        Raises:
+            FileNotFoundError: If the directory has no cluster files.
+        """
+        self.path = str(path)
+        if Path(path).is_dir():
+            self._gcf_sets = self._parse_cluster_files(Path(path))
+        else:
+            self._gcf_sets = self._parse_database(self.path)
+
+    def get_gcf_sets(self) -> GCFSets:
+        """Get the GCF sets of all cutoffs.
+
+        Returns:
+            The GCF sets.
+        """
+        return self._gcf_sets
+
+    @staticmethod
+    def _parse_cluster_files(bigscape_dir: Path) -> GCFSets:
+        """Read all BiG-SCAPE v1 cluster files in a directory."""
+        files = {}
+        for file in sorted(bigscape_dir.glob("mix_clustering_c*.tsv")):
+            match = re.fullmatch(r"mix_clustering_c(.+)\.tsv", file.name)
+            if match is not None:
+                files[match.group(1)] = file
+        if not files:
+            raise FileNotFoundError(f"No BiG-SCAPE cluster files found in {bigscape_dir}")
+
+        def assignments() -> Iterator[tuple[str, str, str]]:
+            for cutoff, file in files.items():
+                logger.info(f"Loading BigSCAPE cluster file {file}")
+                with open(file, "rt", encoding="utf-8") as f:
+                    reader = csv.reader(f, delimiter="\t")
+                    next(reader)  # skip headers
+                    for bgc_id, family_id in reader:
+                        yield cutoff, bgc_id, family_id
+
+        return GCFSets.from_assignments(assignments())
+
+    @staticmethod
+    def _parse_database(db_file: str) -> GCFSets:
+        """Read all family assignments of a BiG-SCAPE v2 database."""
+        return GCFSets.from_assignments(
+            (GCFSets.ALL if cutoff is None else _format_cutoff(cutoff), bgc_id, family_id)
+            for cutoff, bgc_id, family_id in _read_family_assignments(db_file)
+        )
+
+
+@contextmanager
+def _connect_read_only(db_file: str | PathLike) -> Iterator[sqlite3.Connection]:
+    """Open a read-only connection to a BiG-SCAPE v2 database."""
+    uri = f"{Path(db_file).resolve().as_uri()}?mode=ro"
+    with closing(sqlite3.connect(uri, uri=True)) as connection:
+        for pragma in _READ_PRAGMAS:
+            connection.execute(pragma)
+        yield connection
+
+
+def _read_family_assignments(
+    db_file: str | PathLike,
+    cutoff: str | None = None,
+    keep_mibig_only: bool = True,
+    keep_singleton: bool = True,
+) -> Iterator[tuple[float | None, str, int]]:
+    """Read the family assignments of the BGCs in a BiG-SCAPE v2 database.
+
+    The BGC id is the file name of the GenBank file of the BGC without its extension, which is
+    derived from `gbk.path` in the query. Only the families of the latest run are read, and the
+    families are filtered in the query as well, see `BigscapeV2GCFLoader`.
+
+    Args:
+        db_file: Path to the BiG-SCAPE v2 database file.
+        cutoff: The cutoff of the families to read. Defaults to all cutoffs.
+        keep_mibig_only: True to read families that contain only MIBiG BGCs.
+        keep_singleton: True to read families that contain only one BGC.
+
+    Yields:
+        Tuples of (cutoff, BGC id, family id). The cutoff is None if the database does not have
+        the cutoff of the families.
+    """
+    with _connect_read_only(db_file) as connection:
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(family)")}
+        cutoff_column = "family.cutoff" if "cutoff" in columns else "NULL"
+        family_join = "JOIN family ON family.id = bgc_record_family.family_id" if columns else ""
+        conditions = []
+        params: list[float] = []
+        if "run_id" in columns:
+            conditions.append("family.run_id = (SELECT max(run_id) FROM family)")
+        if cutoff is not None and "cutoff" in columns:
+            conditions.append("family.cutoff = ?")
+            params.append(float(cutoff))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        family_conditions = []
+        if not keep_mibig_only:
+            family_conditions.append("sum(bgc_id NOT GLOB 'BGC*') > 0")
+        if not keep_singleton:
+            family_conditions.append("count(DISTINCT bgc_id) > 1")
+        family_filter = ""
+        if family_conditions:
+            family_filter = (
+                "WHERE family_id IN (SELECT family_id FROM assignment GROUP BY family_id "
+                f"HAVING {' AND '.join(family_conditions)})"
+            )
+
+        # `rtrim(x, y)` strips the characters in `y` from the end of `x`, so stripping all but
+        # "/" (or ".") leaves the part of `x` up to its last "/" (or ".")
+        query = f"""
+        WITH gbk_name AS (
+            SELECT id, substr(path, length(rtrim(path, replace(path, '/', ''))) + 1) AS name
+            FROM gbk
+        ),
+        bgc AS (
+            SELECT id, CASE
+                WHEN instr(name, '.') = 0 THEN name
+                ELSE substr(name, 1, length(rtrim(name, replace(name, '.', ''))) - 1)
+            END AS bgc_id
+            FROM gbk_name
+        ),
+        assignment AS (
+            SELECT {cutoff_column} AS cutoff,
+                bgc.bgc_id AS bgc_id,
+                bgc_record_family.family_id AS family_id
+            FROM bgc_record_family
             JOIN bgc_record ON bgc_record.id = bgc_record_family.record_id
-            JOIN gbk ON gbk.id = bgc_record.gbk_id
-            """
+            JOIN bgc ON bgc.id = bgc_record.gbk_id
+            {family_join}
+            {where}
+        )
+        SELECT cutoff, bgc_id, family_id FROM assignment {family_filter}
+        """
+        cursor = connection.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            yield from rows
 
-            results = cursor.execute(query).fetchall()
 
-            for result in results:
-                gbk_path, family_id = result
+def _read_family_cutoffs(db_file: str | PathLike) -> dict[int | None, list[str]]:
+    """Read the cutoffs of the families of each run in a BiG-SCAPE v2 database.
 
-                # take the filename of the gbk path as the bgc_id
-                # filename
-                bgc_id: str = gbk_path.split("/")[-1]
-                # remove extension
-                bgc_id = bgc_id.rsplit(".", 1)[0]
+    Returns:
+        A dict with the run ids as keys (None if the database has no run of the families) and
+        the sorted, formatted cutoffs of the run as values. Empty if the database has no cutoff
+        of the families.
+    """
+    with _connect_read_only(db_file) as connection:
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(family)")}
+        if "cutoff" not in columns:
+            return {}
+        run_column = "run_id" if "run_id" in columns else "NULL"
+        run_cutoffs: dict[int | None, list[str]] = {}
+        for run_id, cutoff in connection.execute(
+            f"SELECT DISTINCT {run_column}, cutoff FROM family ORDER BY 1, 2"
+        ):
+            run_cutoffs.setdefault(run_id, []).append(_format_cutoff(cutoff))
+        return run_cutoffs
 
-                if family_id not in gcf_dict:
-                    gcf_dict[family_id] = GCF(family_id)
-                gcf_dict[family_id].bgc_ids.add(bgc_id)
 
-        return list(gcf_dict.values())
+@lru_cache(maxsize=None)
+def _format_cutoff(cutoff: float | str) -> str:
+    """Format a BiG-SCAPE v2 cutoff like the cutoffs of the config, e.g. 0.3 as "0.30"."""
+    if isinstance(cutoff, str):
+        return cutoff
+    formatted = f"{cutoff:.2f}"
+    return formatted if float(formatted) == cutoff else str(cutoff)
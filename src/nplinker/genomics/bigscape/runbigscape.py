@@ -3,6 +3,8 @@ import logging
 import os
 import subprocess
 import sys
+import time
+from collections import deque
 from os import PathLike
 from typing import Literal
 
@@ -17,6 +19,7 @@ def run_bigscape(
     output_path: str | PathLike,
     extra_params: str,
     version: Literal[1, 2] = 1,
+    cores: int | None = None,
 ) -> bool:
     """Runs BiG-SCAPE to cluster BGCs.
 
@@ -44,11 +47,15 @@ def run_bigscape(
     By default, only GBK Files with "cluster" or "region" in the filename are
     accepted. GBK Files with "final" in the filename are excluded.
 
+    The output of BiG-SCAPE is streamed to the log line by line while it runs.
+
     Args:
         antismash_path: Path to the antismash output directory.
         output_path: Path to the output directory where BiG-SCAPE will write its results.
         extra_params: Additional parameters to pass to BiG-SCAPE.
         version: The version of BiG-SCAPE to run. Must be 1 or 2.
+        cores: The number of CPU cores for BiG-SCAPE to use, passed as its `--cores` parameter
+            unless `extra_params` already sets it. If None, BiG-SCAPE uses all available cores.
 
     Returns:
         True if BiG-SCAPE ran successfully, False otherwise.
@@ -104,17 +111,30 @@ def run_bigscape(
     if len(extra_params) > 0:
         args.extend(extra_params.split(" "))
 
+    if cores is not None and "--cores" not in args and "-c" not in args:
+        args.extend(["--cores", str(cores)])
+
     logger.info(f"BiG-SCAPE command: {args}")
-    result = subprocess.run(args, stdout=sys.stdout, stderr=sys.stderr)
+    start = time.perf_counter()
+    # the last lines of the output, to report them if BiG-SCAPE fails
+    tail: deque[str] = deque(maxlen=20)
+    with subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+    ) as process:
+        for line in process.stdout:  # type: ignore[union-attr]
+            line = line.rstrip()
+            if line:
+                tail.append(line)
+                logger.info(f"BiG-SCAPE [{time.perf_counter() - start:.0f}s]: {line}")
+    elapsed = time.perf_counter() - start
 
     # return true on any non-error return code
-    if result.returncode == 0:
-        logger.info(f"BiG-SCAPE completed with return code {result.returncode}")
+    if process.returncode == 0:
+        logger.info(f"BiG-SCAPE completed with return code {process.returncode} in {elapsed:.1f}s")
         return True
 
     # otherwise log details and raise a runtime error
-    logger.error(f"BiG-SCAPE failed with return code {result.returncode}")
-    logger.error(f"output: {str(result.stdout)}")
-    logger.error(f"stderr: {str(result.stderr)}")
+    logger.error(f"BiG-SCAPE failed with return code {process.returncode} after {elapsed:.1f}s")
+    logger.error("last output:\n" + "\n".join(tail))
 
-    raise RuntimeError(f"Failed to run BiG-SCAPE with error code {result.returncode}")
+    raise RuntimeError(f"Failed to run BiG-SCAPE with error code {process.returncode}")
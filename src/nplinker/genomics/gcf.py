@@ -3,6 +3,7 @@ import logging
 from typing import TYPE_CHECKING
 from nplinker.strain import Strain
 from nplinker.strain import StrainCollection
+from nplinker.utils import slot_state
 
 
 if TYPE_CHECKING:
@@ -40,6 +41,8 @@ class GCF:
             https://doi.org/10.1038%2Fs41589-019-0400-9.
     """
 
+    __slots__ = ("id", "bgc_ids", "bigscape_class", "_bgcs", "_strains")
+
     def __init__(self, id: str, /) -> None:
         """Initialize the GCF object.
 
@@ -81,7 +84,7 @@ class GCF:
 
     def __reduce__(self) -> tuple:
         """Reduce function for pickling."""
-        return (self.__class__, (self.id,), self.__dict__)
+        return (self.__class__, (self.id,), (None, slot_state(self)))
 
     @property
     def bgcs(self) -> set[BGC]:
@@ -2,11 +2,13 @@ from .mibig_downloader import download_and_extract_mibig_metadata
 from .mibig_loader import MibigLoader
 from .mibig_loader import parse_bgc_metadata_json
 from .mibig_metadata import MibigMetadata
+from .mibig_store import MibigStore
 
 
 __all__ = [
     "download_and_extract_mibig_metadata",
     "MibigLoader",
     "MibigMetadata",
+    "MibigStore",
     "parse_bgc_metadata_json",
 ]
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from os import PathLike
+from pathlib import Path
+from typing import Any
+from nplinker.defaults import DOWNLOADS_DIRNAME
+from nplinker.defaults import MIBIG_STORE_DIRNAME
+from nplinker.defaults import NPLINKER_CACHE_DIR
+from .mibig_downloader import MIBIG_METADATA_URL
+from .mibig_downloader import download_and_extract_mibig_metadata
+
+
+logger = logging.getLogger(__name__)
+
+# the default store directory, shared by all projects
+DEFAULT_STORE_DIR = NPLINKER_CACHE_DIR / MIBIG_STORE_DIRNAME
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class MibigStore:
+    """Store of extracted MIBiG metadata, one directory per MIBiG version, shared by all projects.
+
+    The metadata of a MIBiG version is downloaded and extracted only once, into the directory
+    `<store_dir>/<version>`. The directory contains a manifest file `manifest.json` with the
+    name and size of each metadata file and a checksum of this list. Checking a directory against
+    its manifest only lists the directory, so it is cheap enough to do on every run.
+
+    The metadata is put into the working directory of a project with
+    [`install`][nplinker.genomics.mibig.MibigStore.install], which hard links the files from the
+    store (or copies them if linking is not possible). The metadata files must therefore not be
+    modified in the working directory. If the store cannot be written, e.g. on a read-only file
+    system, the metadata is downloaded and extracted into the working directory instead.
+
+    Attributes:
+        store_dir: The directory of the store.
+
+    Examples:
+        >>> store = MibigStore()
+        >>> store.install("3.1", "/data/nplinker_project/mibig")
+    """
+
+    FORMAT = "nplinker-mibig-store"
+
+    def __init__(self, store_dir: str | PathLike | None = None) -> None:
+        """Initialize the store.
+
+        Args:
+            store_dir: The directory of the store, created if it does not exist. Defaults to the
+                directory `mibig_store` in the NPLinker cache directory, i.e.
+                `$XDG_CACHE_HOME/nplinker` or `~/.cache/nplinker`.
+        """
+        self.store_dir = Path(store_dir if store_dir is not None else DEFAULT_STORE_DIR)
+
+    def get(self, version: str) -> Path:
+        """Get the directory of the metadata of a MIBiG version, adding it to the store if needed.
+
+        If the version is not in the store or its directory does not match its manifest, the
+        metadata is downloaded and extracted again.
+
+        Args:
+            version: The version of MIBiG, e.g. "3.1".
+
+        Returns:
+            The directory of the metadata json files of the version.
+
+        Raises:
+            OSError: If the version must be added to the store but the store cannot be written.
+        """
+        version_dir = self.store_dir / version
+        if _is_valid(version_dir, version):
+            logger.info(f"Using MIBiG {version} metadata from store {self.store_dir}")
+            return version_dir
+
+        logger.info(f"Adding MIBiG {version} metadata to store {self.store_dir}")
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        downloads_dir = self.store_dir / DOWNLOADS_DIRNAME
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=self.store_dir))
+        try:
+            download_and_extract_mibig_metadata(downloads_dir, tmp_dir, version=version)
+            _write_manifest(tmp_dir, version)
+            if version_dir.exists():
+                shutil.rmtree(version_dir)
+            try:
+                os.replace(tmp_dir, version_dir)
+            except OSError:
+                # another process added the version at the same time
+                if not _is_valid(version_dir, version):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        # the extracted metadata is kept, so the archive is not needed anymore
+        archive = downloads_dir / Path(MIBIG_METADATA_URL.format(version=version)).name
+        archive.unlink(missing_ok=True)
+        return version_dir
+
+    def install(
+        self,
+        version: str,
+        target_dir: str | PathLike,
+        downloads_dir: str | PathLike | None = None,
+    ) -> None:
+        """Put the metadata of a MIBiG version into a directory.
+
+        Nothing is done if the directory already has the metadata of the version, as recorded by
+        its manifest. Otherwise, the directory is emptied and the metadata files are linked or
+        copied from the store.
+
+        If the version is not in the store and the store cannot be written, the metadata is
+        downloaded and extracted into the directory directly.
+
+        Args:
+            version: The version of MIBiG, e.g. "3.1".
+            target_dir: The directory to put the metadata json files in, e.g. the `mibig`
+                directory of the working directory.
+            downloads_dir: The directory to download the metadata archive to if the store cannot
+                be written, e.g. the `downloads` directory of the working directory. Defaults to
+                a temporary directory, which is removed afterwards.
+        """
+        target_dir = Path(target_dir)
+        try:
+            version_dir: Path | None = self.get(version)
+        except OSError as e:
+            logger.warning(
+                f"Cannot add MIBiG {version} metadata to store {self.store_dir} ({e}), "
+                f"downloading it into {target_dir} instead"
+            )
+            version_dir = None
+        if _is_valid(target_dir, version):
+            logger.info(f"MIBiG {version} metadata in {target_dir} is up to date")
+            return
+
+        if target_dir.is_symlink() or target_dir.is_file():
+            target_dir.unlink()
+        elif target_dir.exists():
+            shutil.rmtree(target_dir)
+        target_dir.mkdir(parents=True)
+        if version_dir is None:
+            _download(version, target_dir, downloads_dir)
+            return
+        manifest = _read_manifest(version_dir)
+        for name in manifest["files"]:
+            _link_or_copy(version_dir / name, target_dir / name)
+        # the manifest is written last, so an interrupted install is not taken as complete
+        shutil.copyfile(version_dir / MANIFEST_FILENAME, target_dir / MANIFEST_FILENAME)
+
+
+def _download(version: str, target_dir: Path, downloads_dir: str | PathLike | None) -> None:
+    """Download and extract the metadata of a MIBiG version into an empty directory."""
+    if downloads_dir is not None:
+        download_and_extract_mibig_metadata(downloads_dir, target_dir, version=version)
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            download_and_extract_mibig_metadata(tmp_dir, target_dir, version=version)
+    # the manifest is written last, so an interrupted download is not taken as complete
+    _write_manifest(target_dir, version)
+
+
+def _files_checksum(files: dict[str, int]) -> str:
+    """Get the checksum of the file list of a manifest."""
+    content = json.dumps(files, sort_keys=True).encode()
+    return hashlib.md5(content).hexdigest()
+
+
+def _list_files(directory: Path) -> dict[str, int]:
+    """Get the names and sizes of the MIBiG metadata files in a directory."""
+    with os.scandir(directory) as entries:
+        return {
+            entry.name: entry.stat().st_size
+            for entry in entries
+            if entry.name.startswith("BGC") and entry.name.endswith(".json")
+        }
+
+
+def _write_manifest(directory: Path, version: str) -> None:
+    """Write the manifest of the MIBiG metadata files in a directory."""
+    files = _list_files(directory)
+    manifest = {
+        "format": MibigStore.FORMAT,
+        "version": version,
+        "files": files,
+        "checksum": _files_checksum(files),
+    }
+    with open(directory / MANIFEST_FILENAME, "w") as f:
+        json.dump(manifest, f)
+
+
+def _read_manifest(directory: Path) -> dict[str, Any] | None:
+    """Read the manifest of a directory, or get None if it does not exist or is invalid."""
+    try:
+        with open(directory / MANIFEST_FILENAME, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("format") != MibigStore.FORMAT
+        or not isinstance(manifest.get("files"), dict)
+        or manifest.get("checksum") != _files_checksum(manifest["files"])
+    ):
+        return None
+    return manifest
+
+
+def _is_valid(directory: Path, version: str) -> bool:
+    """Check that a directory has the complete MIBiG metadata of a version, as in its manifest."""
+    manifest = _read_manifest(directory)
+    if manifest is None or manifest["version"] != version:
+        return False
+    return _list_files(directory) == manifest["files"]
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard link a file, or copy it if it cannot be linked (e.g. on another file system)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
@@ -1,6 +1,14 @@
 from __future__ import annotations
 import logging
 import os
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any
+from typing import TypeVar
 from deprecated import deprecated
 from dynaconf import Dynaconf
 from nplinker import defaults
@@ -9,7 +17,9 @@ from nplinker.genomics import BGC
 from nplinker.genomics import GCF
 from nplinker.genomics.antismash import AntismashBGCLoader
 from nplinker.genomics.bigscape import BigscapeGCFLoader
+from nplinker.genomics.bigscape import BigscapeGCFSetLoader
 from nplinker.genomics.bigscape import BigscapeV2GCFLoader
+from nplinker.genomics.bigscape import GCFSets
 from nplinker.genomics.mibig import MibigLoader
 from nplinker.genomics.utils import add_bgc_to_gcf
 from nplinker.genomics.utils import add_strain_to_bgc
@@ -28,6 +38,8 @@ from nplinker.strain.utils import load_user_strains
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class DatasetLoader:
     """Load datasets from the working directory with the given configuration.
@@ -39,6 +51,18 @@ class DatasetLoader:
 
     Loaded data are stored in the data containers (attributes), e.g. `self.bgcs`, `self.gcfs`, etc.
 
+    If the config `concurrency.loading` is true, the metabolomics and genomics data are loaded
+    concurrently in worker threads, and so are the independent loaders of each side, i.e.
+    spectra, annotations and molecular families, and antiSMASH, MIBiG and BiG-SCAPE data. The
+    results are joined when the objects are linked to each other and to strains, so the loaded
+    data are the same as in sequential loading. The wall time of each loading stage is logged and
+    stored in `self.timings`.
+
+    If the config `bigscape.all_cutoffs` is true, the GCFs of all cutoffs in the BiG-SCAPE output
+    are loaded into `self.gcf_sets`, and the GCFs of the cutoff `bigscape.cutoff` are used. The
+    GCFs of another cutoff can then be used with `use_gcf_set`, which relinks the loaded BGCs
+    without reading any data file again.
+
     Attributes:
         config: A Dynaconf object that contains the configuration settings.
         bgcs: A list of BGC objects.
@@ -51,6 +75,10 @@ class DatasetLoader:
         strains: A StrainCollection object that contains all strains.
         class_matches: A ClassMatches object that contains class match info.
         chem_classes: A ChemClassPredictions object that contains chemical class predictions.
+        timings: The wall time in seconds of each loading stage of the last `load` call.
+        gcf_sets: The GCFs of all BiG-SCAPE cutoffs, or None if the config
+            `bigscape.all_cutoffs` is false.
+        bigscape_cutoff: The BiG-SCAPE cutoff of the GCFs in `self.gcfs`.
     """
 
     RUN_CANOPUS_DEFAULT = False
@@ -91,6 +119,17 @@ class DatasetLoader:
         self.class_matches = None
         self.chem_classes = None
 
+        self.timings: dict[str, float] = {}
+        self.gcf_sets: GCFSets | None = None
+        self.bigscape_cutoff: str = str(config.bigscape.cutoff)
+        # the strains from input, the antiSMASH BGCs with strain and all BGCs with strain, which
+        # are relinked when switching GCF sets
+        self._input_strains: StrainCollection = StrainCollection()
+        self._antismash_bgcs: list[BGC] = []
+        self._all_bgcs: list[BGC] = []
+        # the worker threads of the leaf loaders in concurrent mode
+        self._executor: ThreadPoolExecutor | None = None
+
     def load(self) -> bool:
         """Load all data from data files in the working directory.
 
@@ -99,23 +138,119 @@ class DatasetLoader:
         Returns:
             True if all data are loaded successfully.
         """
-        if not self._load_strain_mappings():
-            return False
-
-        if not self._load_metabolomics():
-            return False
-
-        if not self._load_genomics():
-            return False
-
-        # set self.strains with all strains from input plus mibig strains in use
-        self.strains = self.strains + self.mibig_strains_in_use
+        self.timings = {}
+        with self._timed("total"):
+            with self._timed("strain mappings"):
+                if not self._load_strain_mappings():
+                    return False
+
+            if self.config.get("concurrency.loading", False):
+                loaded = self._load_concurrently()
+            else:
+                loaded = self._timed_call("metabolomics", self._load_metabolomics)
+                loaded = loaded and self._timed_call("genomics", self._load_genomics)
+            if not loaded:
+                return False
+
+            # set self.strains with all strains from input plus mibig strains in use
+            self._input_strains = self.strains
+            self.strains = self._input_strains + self.mibig_strains_in_use
+
+        logger.info(
+            "Loading stage wall times: "
+            + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.timings.items())
+        )
 
         if len(self.strains) == 0:
             raise Exception("Failed to find *ANY* strains.")
 
         return True
 
+    def _load_concurrently(self) -> bool:
+        """Load the metabolomics and genomics data concurrently.
+
+        The two sides run in their own threads and submit their independent loaders to a
+        separate pool, so a side waiting for its loaders never blocks a loader.
+
+        Returns:
+            True if all data are loaded successfully.
+        """
+        with ThreadPoolExecutor(thread_name_prefix="nplinker-loader") as executor:
+            self._executor = executor
+            try:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="nplinker-side") as sides:
+                    metabolomics = sides.submit(
+                        self._timed_call, "metabolomics", self._load_metabolomics
+                    )
+                    genomics = sides.submit(self._timed_call, "genomics", self._load_genomics)
+                return metabolomics.result() and genomics.result()
+            finally:
+                self._executor = None
+
+    def use_gcf_set(self, cutoff: str) -> None:
+        """Use the GCFs of another BiG-SCAPE cutoff.
+
+        The GCFs of the cutoff are created from `self.gcf_sets` and the loaded BGCs are added to
+        them. `self.gcfs`, `self.bgcs`, `self.mibig_strains_in_use` and `self.strains` are updated
+        accordingly, and the GCF objects of the previous cutoff are not used anymore.
+
+        Args:
+            cutoff: The BiG-SCAPE cutoff, e.g. "0.50".
+
+        Raises:
+            ValueError: If the GCFs of all cutoffs were not loaded, i.e. the config
+                `bigscape.all_cutoffs` is false.
+            KeyError: If there are no GCFs for the cutoff.
+        """
+        if self.gcf_sets is None:
+            raise ValueError(
+                "The GCFs of all BiG-SCAPE cutoffs are not loaded, "
+                "set the config `bigscape.all_cutoffs` to true to load them."
+            )
+        raw_gcfs = self.gcf_sets.get_gcfs(cutoff)
+        for bgc in self._all_bgcs:
+            bgc.parents.clear()
+        self._link_gcfs(raw_gcfs)
+        self.strains = self._input_strains + self.mibig_strains_in_use
+        self.bigscape_cutoff = cutoff
+        logger.info(f"Using {len(self.gcfs)} GCFs of BiG-SCAPE cutoff {cutoff}")
+
+    def _submit(self, stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> Future[T]:
+        """Run a loader of a stage in a worker thread, or right away in sequential mode.
+
+        Args:
+            stage: The name of the loading stage, used for the timings.
+            fn: The loader function.
+            *args: The positional arguments of the function.
+            **kwargs: The keyword arguments of the function.
+
+        Returns:
+            The future of the result of the function.
+        """
+        if self._executor is not None:
+            return self._executor.submit(self._timed_call, stage, fn, *args, **kwargs)
+        future: Future[T] = Future()
+        try:
+            future.set_result(self._timed_call(stage, fn, *args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _timed_call(self, stage: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call a function and store its wall time as the time of a loading stage."""
+        with self._timed(stage):
+            return fn(*args, **kwargs)
+
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """Measure the wall time of a loading stage and store it in `self.timings`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+            logger.debug(f"Loading stage '{stage}' took {self.timings[stage]:.2f}s")
+
     def _load_strain_mappings(self):
         # 1. load strain mappings
         sc = StrainCollection.read_json(self.config.root_dir / defaults.STRAIN_MAPPINGS_FILENAME)
@@ -146,28 +281,37 @@ class DatasetLoader:
         Strain objects added (i.e. `MolecularFamily._strains` updated). This means only Spectra
         objects with updated strains (i.e. `self.spectra`) can be added to MolecularFamily objects.
         """
-        logger.info(f"{'='*40}\nLoading metabolomics data starts...")
+        logger.info(f"{'=' * 40}\nLoading metabolomics data starts...")
 
         gnps_dir = self.config.root_dir / defaults.GNPS_DIRNAME
 
-        # Step 1: load all Spectrum objects
-        raw_spectra = GNPSSpectrumLoader(gnps_dir / defaults.GNPS_SPECTRA_FILENAME).spectra
-        # Step 2: load all GNPS annotations
-        raw_annotations = GNPSAnnotationLoader(
-            gnps_dir / defaults.GNPS_ANNOTATIONS_FILENAME
-        ).annotations
-        # Step 3: load all MolecularFamily objects
-        raw_mfs = GNPSMolecularFamilyLoader(
-            gnps_dir / defaults.GNPS_MOLECULAR_FAMILY_FILENAME
-        ).get_mfs(keep_singleton=False)
-
-        # Step 4: add GNPS annotations to Spectrum.gnps_annotations
-        add_annotation_to_spectrum(raw_annotations, raw_spectra)
-        # Step 5: add strains to Spectrum.strains
-        spectra_with_strains, _ = add_strains_to_spectrum(self.strains, raw_spectra)
-
-        # Step 6: add Spectrum objects to MolecularFamily
-        mf_with_spec, _, _ = add_spectrum_to_mf(spectra_with_strains, raw_mfs)
+        # Step 1-3: load all Spectrum objects, GNPS annotations and MolecularFamily objects
+        spectrum_loader = self._submit(
+            "spectra",
+            GNPSSpectrumLoader,
+            gnps_dir / defaults.GNPS_SPECTRA_FILENAME,
+            lazy=self.config.get("gnps.lazy_peaks", False),
+        )
+        annotation_loader = self._submit(
+            "annotations", GNPSAnnotationLoader, gnps_dir / defaults.GNPS_ANNOTATIONS_FILENAME
+        )
+        mf_loader = self._submit(
+            "molecular families",
+            GNPSMolecularFamilyLoader,
+            gnps_dir / defaults.GNPS_MOLECULAR_FAMILY_FILENAME,
+        )
+        raw_spectra = spectrum_loader.result().spectra
+        raw_annotations = annotation_loader.result().annotations
+        raw_mfs = mf_loader.result().get_mfs(keep_singleton=False)
+
+        with self._timed("metabolomics linking"):
+            # Step 4: add GNPS annotations to Spectrum.gnps_annotations
+            add_annotation_to_spectrum(raw_annotations, raw_spectra)
+            # Step 5: add strains to Spectrum.strains
+            spectra_with_strains, _ = add_strains_to_spectrum(self.strains, raw_spectra)
+
+            # Step 6: add Spectrum objects to MolecularFamily
+            mf_with_spec, _, _ = add_spectrum_to_mf(spectra_with_strains, raw_mfs)
 
         # Step 7: set attributes of self.spectra and self.mfs with valid objects
         self.spectra = spectra_with_strains
@@ -187,48 +331,84 @@ class DatasetLoader:
         added (i.e. `GCF._strains` updated). This means only BGC objects with updated Strain objects
         (i.e. `self.bgcs`) can be added to GCF objects.
         """
-        logger.info(f"{'='*40}\nLoading genomics data starts...")
-
-        # Step 1: load antismash BGC objects & add strain info
-        logger.info("Parsing AntiSMASH directory...")
-        antismash_bgcs = AntismashBGCLoader(
-            str(self.config.root_dir / defaults.ANTISMASH_DIRNAME)
-        ).get_bgcs()
-        antismash_bgcs_with_strain, _ = add_strain_to_bgc(self.strains, antismash_bgcs)
+        logger.info(f"{'=' * 40}\nLoading genomics data starts...")
 
-        # Step 2: load mibig BGC objects (having strain info)
-        if self.config.mibig.to_use:
-            self.mibig_bgcs = MibigLoader(
-                str(self.config.root_dir / defaults.MIBIG_DIRNAME)
-            ).get_bgcs()
-
-        # Step 3: get all BGC objects with strain info
-        all_bgcs_with_strain = antismash_bgcs_with_strain + self.mibig_bgcs
-
-        # Step 4: load all GCF objects
-        bigscape_cluster_file = (
-            self.config.root_dir
-            / defaults.BIGSCAPE_DIRNAME
-            / f"mix_clustering_c{self.config.bigscape.cutoff}.tsv"
-        )
-        bigscape_db_file = self.config.root_dir / defaults.BIGSCAPE_DIRNAME / "data_sqlite.db"
+        # Step 1: find the BiG-SCAPE output to load GCF objects from
+        bigscape_dir = self.config.root_dir / defaults.BIGSCAPE_DIRNAME
+        bigscape_cluster_file = bigscape_dir / f"mix_clustering_c{self.config.bigscape.cutoff}.tsv"
+        bigscape_db_file = bigscape_dir / "data_sqlite.db"
+        all_cutoffs = self.config.get("bigscape.all_cutoffs", False)
 
         # switch depending on found file. prefer V1 if both are found
+        gcf_loader_class: type[BigscapeGCFLoader | BigscapeV2GCFLoader | BigscapeGCFSetLoader]
+        gcf_loader_kwargs: dict[str, Any] = {}
         if bigscape_cluster_file.exists():
-            loader = BigscapeGCFLoader(bigscape_cluster_file)
+            gcf_loader_class, bigscape_file = BigscapeGCFLoader, bigscape_cluster_file
+            if all_cutoffs:
+                gcf_loader_class, bigscape_file = BigscapeGCFSetLoader, bigscape_dir
             logger.info(f"Loading BigSCAPE cluster file {bigscape_cluster_file}")
         elif bigscape_db_file.exists():
-            loader = BigscapeV2GCFLoader(bigscape_db_file)
+            gcf_loader_class, bigscape_file = BigscapeV2GCFLoader, bigscape_db_file
+            if all_cutoffs:
+                gcf_loader_class = BigscapeGCFSetLoader
+            else:
+                # only read the GCFs in use from the database
+                gcf_loader_kwargs = {
+                    "cutoff": str(self.config.bigscape.cutoff),
+                    "keep_mibig_only": False,
+                    "keep_singleton": False,
+                }
             logger.info(f"Loading BigSCAPE database file {bigscape_db_file}")
         else:
             raise FileNotFoundError(
                 f"Neither BigSCAPE cluster file {bigscape_cluster_file} nor database file {bigscape_db_file} were found."
             )
 
-        raw_gcfs = loader.get_gcfs()
+        # Step 2: load antismash BGC objects, mibig BGC objects (having strain info) and all GCF
+        # objects
+        logger.info("Parsing AntiSMASH directory...")
+        antismash_loader = self._submit(
+            "antismash",
+            AntismashBGCLoader,
+            str(self.config.root_dir / defaults.ANTISMASH_DIRNAME),
+        )
+        if self.config.mibig.to_use:
+            mibig_loader = self._submit(
+                "mibig", MibigLoader, str(self.config.root_dir / defaults.MIBIG_DIRNAME)
+            )
+        gcf_loader = self._submit("bigscape", gcf_loader_class, bigscape_file, **gcf_loader_kwargs)
+
+        antismash_bgcs = antismash_loader.result().get_bgcs()
+        if self.config.mibig.to_use:
+            self.mibig_bgcs = mibig_loader.result().get_bgcs()
+        if all_cutoffs:
+            self.gcf_sets = gcf_loader.result().get_gcf_sets()
+            cutoff = str(self.config.bigscape.cutoff)
+            if self.gcf_sets.cutoffs == [GCFSets.ALL]:
+                # a BiG-SCAPE v2 database without cutoff information
+                cutoff = GCFSets.ALL
+            raw_gcfs = self.gcf_sets.get_gcfs(cutoff)
+            self.bigscape_cutoff = cutoff
+        else:
+            raw_gcfs = gcf_loader.result().get_gcfs()
+
+        with self._timed("genomics linking"):
+            # Step 3: add strain info to antismash BGC objects
+            self._antismash_bgcs, _ = add_strain_to_bgc(self.strains, antismash_bgcs)
+
+            # Step 4: get all BGC objects with strain info
+            self._all_bgcs = self._antismash_bgcs + self.mibig_bgcs
+
+            # Step 5-7: add BGC objects to GCF and set attributes with valid objects
+            self._link_gcfs(raw_gcfs)
 
+        logger.info("Loading genomics data completed\n")
+        return True
+
+    def _link_gcfs(self, raw_gcfs: list[GCF]) -> None:
+        """Add the loaded BGC objects with strain info to GCF objects and set the attributes."""
         # Step 5: add BGC objects to GCF
-        all_gcfs_with_bgc, _, _ = add_bgc_to_gcf(all_bgcs_with_strain, raw_gcfs)
+        all_gcfs_with_bgc, _, _ = add_bgc_to_gcf(self._all_bgcs, raw_gcfs)
 
         # Step 6: get mibig bgcs and strains in use from GCFs
         mibig_strains_in_use = StrainCollection()
@@ -238,13 +418,10 @@ class DatasetLoader:
             mibig_bgcs_in_use = []
 
         # Step 7: set attributes with valid objects
-        self.bgcs = antismash_bgcs_with_strain + mibig_bgcs_in_use
+        self.bgcs = self._antismash_bgcs + mibig_bgcs_in_use
         self.gcfs = all_gcfs_with_bgc
         self.mibig_strains_in_use = mibig_strains_in_use
 
-        logger.info("Loading genomics data completed\n")
-        return True
-
     @deprecated(reason="To be refactored. It was used in the `self.load` method before.")
     def _load_class_info(self):
         """Load class match info (based on mibig) and chemical class predictions.
@@ -1,8 +1,12 @@
 from .molecular_family import MolecularFamily
 from .spectrum import Spectrum
+from .spectrum_metadata import MetadataTable
+from .spectrum_metadata import MetadataView
 
 
 __all__ = [
+    "MetadataTable",
+    "MetadataView",
     "MolecularFamily",
     "Spectrum",
 ]
@@ -8,6 +8,7 @@ from .gnps_format import gnps_format_from_file_mapping
 from .gnps_format import gnps_format_from_task_id
 from .gnps_molecular_family_loader import GNPSMolecularFamilyLoader
 from .gnps_spectrum_loader import GNPSSpectrumLoader
+from .gnps_spectrum_loader import MGFIndex
 
 
 __all__ = [
@@ -18,6 +19,7 @@ __all__ = [
     "GNPSFormat",
     "GNPSMolecularFamilyLoader",
     "GNPSSpectrumLoader",
+    "MGFIndex",
     "gnps_format_from_archive",
     "gnps_format_from_file_mapping",
     "gnps_format_from_task_id",
@@ -1,13 +1,20 @@
 from __future__ import annotations
+import json
 import logging
+import os
+from functools import partial
 from os import PathLike
 from pyteomics import mgf
+from nplinker.metabolomics import MetadataTable
 from nplinker.metabolomics import Spectrum
 from nplinker.metabolomics.abc import SpectrumLoaderBase
 
 
 logger = logging.getLogger(__name__)
 
+# parameters required in the local scope of each spectrum
+_REQUIRED_PARAMS = ("scans", "pepmass", "charge")
+
 
 class GNPSSpectrumLoader(SpectrumLoaderBase):
     """Load mass spectra from the given GNPS MGF file.
@@ -15,6 +22,17 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
     ??? info "Concept"
         [GNPS data][gnps-data]
 
+    The metadata of the spectra, i.e. the parameters in the local scope of each spectrum in the
+    MGF file, are stored in one shared [`MetadataTable`][nplinker.metabolomics.MetadataTable], and
+    `Spectrum.metadata` is a view of the spectrum's row in the table.
+
+    In lazy mode, the m/z and intensity values of each spectrum are not loaded, but read from the
+    MGF file on first access (see [`Spectrum.lazy`][nplinker.metabolomics.Spectrum.lazy]). The
+    loader uses an [`MGFIndex`][nplinker.metabolomics.gnps.MGFIndex] of the file, which is built
+    once and saved next to the MGF file, so loading the file again only reads the index. This
+    saves memory and loading time when the peaks are not used, e.g. for Metcalf scoring. The
+    metadata of lazy spectra has JSON values, e.g. `pepmass` is a list instead of a tuple.
+
     The file mappings file is from GNPS output archive, as described below
     for each GNPS workflow type:
 
@@ -26,11 +44,13 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
         - spectra/*.mgf
     """
 
-    def __init__(self, file: str | PathLike) -> None:
+    def __init__(self, file: str | PathLike, lazy: bool = False) -> None:
         """Initialize the GNPSSpectrumLoader.
 
         Args:
             file: path to the MGF file.
+            lazy: whether to load the m/z and intensity values of the spectra on first access.
+                Defaults to False.
 
         Raises:
             ValueError: Raises ValueError if the file is not valid.
@@ -38,12 +58,17 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
         Examples:
             >>> loader = GNPSSpectrumLoader("gnps_spectra.mgf")
             >>> print(loader.spectra[0])
+            >>> loader = GNPSSpectrumLoader("gnps_spectra.mgf", lazy=True)
         """
         self._file = str(file)
         self._spectra: list[Spectrum] = []
+        self._metadata = MetadataTable()
 
-        self._validate()
-        self._load()
+        if lazy:
+            self._load_lazy()
+        else:
+            self._validate()
+            self._load()
 
     @property
     def spectra(self) -> list[Spectrum]:
@@ -63,15 +88,22 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
         # check the local scope of a single MS/MS query (spectrum) has the
         # required parameters. Note that this is not the header of the MGF
         # file, but the local scope of each spectrum.
-        required_params = ["scans", "pepmass", "charge"]
         for spec in mgf.MGF(self._file):
-            for param in required_params:
-                if param not in spec["params"]:
-                    raise ValueError(
-                        f"Invalid MGF file '{self._file}'. "
-                        f"Expected parameter '{param}' not found, "
-                        f"but got '{spec['params']}'."
-                    )
+            self._validate_params(spec["params"])
+
+    def _validate_params(self, params: dict) -> None:
+        """Validate the parameters in the local scope of a spectrum.
+
+        Raises:
+            ValueError: Raises ValueError if a required parameter is missing.
+        """
+        for param in _REQUIRED_PARAMS:
+            if param not in params:
+                raise ValueError(
+                    f"Invalid MGF file '{self._file}'. "
+                    f"Expected parameter '{param}' not found, "
+                    f"but got '{params}'."
+                )
 
     def _load(self) -> None:
         """Load the MGF file into Spectrum objects."""
@@ -84,23 +116,80 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
                 continue
 
             # Load the spectrum
-            spectrum_id: str = spec["params"]["scans"]
-            # calculate precursor m/z from precursor mass and charge
-            precursor_mass = spec["params"]["pepmass"][0]
-            precursor_charge = self._get_precursor_charge(spec["params"]["charge"])
-            precursor_mz: float = precursor_mass / abs(precursor_charge)
-            rt = spec["params"].get("rtinseconds", 0)
-
             spectrum = Spectrum(
-                id=spectrum_id,
+                id=spec["params"]["scans"],
                 mz=list(spec["m/z array"]),
                 intensity=list(spec["intensity array"]),
+                precursor_mz=self._get_precursor_mz(spec["params"]),
+                rt=spec["params"].get("rtinseconds", 0),
+                metadata=self._metadata.append(spec["params"]),
+            )
+            self._spectra.append(spectrum)
+
+    def _load_lazy(self) -> None:
+        """Load the MGF file into Spectrum objects whose peaks are read on first access."""
+        index = MGFIndex.load(self._file)
+        if index is None:
+            index = self._build_index()
+            try:
+                index.save()
+            except OSError as e:
+                logger.warning(f"Failed to save the index of MGF file '{self._file}': {e}")
+
+        for spectrum_id, offset, precursor_mz, rt, params in zip(
+            index.ids, index.offsets, index.precursor_mz, index.rt, index.params
+        ):
+            spectrum = Spectrum.lazy(
+                id=spectrum_id,
+                peak_loader=partial(MGFIndex.read_peaks, self._file, offset),
                 precursor_mz=precursor_mz,
                 rt=rt,
-                metadata=spec["params"],
+                metadata=self._metadata.append(params),
             )
             self._spectra.append(spectrum)
 
+    def _build_index(self) -> MGFIndex:
+        """Validate the MGF file and build the index of its valid spectra.
+
+        Raises:
+            ValueError: Raises ValueError if the file is not valid.
+        """
+        offsets = MGFIndex.scan_offsets(self._file)
+        index = MGFIndex(self._file)
+        n_spectra = 0
+        for n_spectra, (offset, spec) in enumerate(zip(offsets, mgf.MGF(self._file)), start=1):
+            params = spec["params"]
+            self._validate_params(params)
+            # Skip invalid spectra with empty m/z array, the same as in `_load`
+            if len(spec["m/z array"]) == 0:
+                continue
+            index.ids.append(params["scans"])
+            index.offsets.append(offset)
+            index.precursor_mz.append(self._get_precursor_mz(params))
+            index.rt.append(float(params.get("rtinseconds", 0)))
+            # convert the parameter values (e.g. tuples and pyteomics types) to JSON values,
+            # so that the metadata is the same for a new and a saved index
+            index.params.append(json.loads(json.dumps(params)))
+        if n_spectra != len(offsets):
+            raise ValueError(
+                f"Invalid MGF file '{self._file}'. Found {len(offsets)} 'BEGIN IONS' lines, "
+                f"but {n_spectra} spectra."
+            )
+        return index
+
+    def _get_precursor_mz(self, params: dict) -> float:
+        """Calculate the precursor m/z from the precursor mass and charge.
+
+        Args:
+            params: the parameters in the local scope of a spectrum.
+
+        Returns:
+            the precursor m/z.
+        """
+        precursor_mass = params["pepmass"][0]
+        precursor_charge = self._get_precursor_charge(params["charge"])
+        return precursor_mass / abs(precursor_charge)
+
     def _get_precursor_charge(self, charges: list[int]) -> int:
         """Get the precursor charge from the charge list.
 
@@ -118,3 +207,160 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
             )
             charge = 1
         return charge
+
+
+class MGFIndex:
+    """A byte-offset index of the spectra in an MGF file.
+
+    The index has the ID, precursor m/z, retention time and parameters of each spectrum, and the
+    byte offset of its `BEGIN IONS` line in the file, so that the peaks of a single spectrum can
+    be read by seeking directly to its record.
+
+    The index is saved as a JSON file next to the MGF file, i.e. `<MGF file>.index.json`,
+    together with the size and modification time of the MGF file. A saved index is only used
+    while the MGF file has not changed.
+
+    Attributes:
+        file: path to the MGF file.
+        ids: the spectrum IDs.
+        offsets: the byte offsets of the spectra in the MGF file.
+        precursor_mz: the precursor m/z values of the spectra.
+        rt: the retention times of the spectra in seconds.
+        params: the parameters in the local scope of the spectra.
+    """
+
+    FORMAT = "nplinker-mgf-index"
+    VERSION = 1
+    SUFFIX = ".index.json"
+
+    def __init__(self, file: str | PathLike) -> None:
+        """Initialize an empty index.
+
+        Args:
+            file: path to the MGF file.
+        """
+        self.file = str(file)
+        self.ids: list[str] = []
+        self.offsets: list[int] = []
+        self.precursor_mz: list[float] = []
+        self.rt: list[float] = []
+        self.params: list[dict] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index_file(self) -> str:
+        """Get the path to the saved index file."""
+        return self.file + self.SUFFIX
+
+    def save(self) -> None:
+        """Save the index next to the MGF file.
+
+        The index is written to a temporary file first, so that an interrupted save never leaves
+        a partial index behind.
+        """
+        stat = os.stat(self.file)
+        data = {
+            "format": self.FORMAT,
+            "version": self.VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "ids": self.ids,
+            "offsets": self.offsets,
+            "precursor_mz": self.precursor_mz,
+            "rt": self.rt,
+            "params": self.params,
+        }
+        tmp_file = self.index_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.index_file)
+
+    @classmethod
+    def load(cls, file: str | PathLike) -> MGFIndex | None:
+        """Load the saved index of an MGF file.
+
+        Args:
+            file: path to the MGF file.
+
+        Returns:
+            The index, or None if there is no saved index, or it is invalid or outdated, i.e. the
+            MGF file has been changed since the index was saved.
+        """
+        index = cls(file)
+        try:
+            with open(index.index_file) as f:
+                data = json.load(f)
+            stat = os.stat(index.file)
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(data, dict)
+            or data.get("format") != cls.FORMAT
+            or data.get("version") != cls.VERSION
+            or data.get("size") != stat.st_size
+            or data.get("mtime_ns") != stat.st_mtime_ns
+        ):
+            return None
+        index.ids = data["ids"]
+        index.offsets = data["offsets"]
+        index.precursor_mz = data["precursor_mz"]
+        index.rt = data["rt"]
+        index.params = data["params"]
+        return index
+
+    @staticmethod
+    def scan_offsets(file: str | PathLike) -> list[int]:
+        """Get the byte offsets of all spectra, i.e. `BEGIN IONS` lines, in an MGF file.
+
+        Args:
+            file: path to the MGF file.
+
+        Returns:
+            The byte offsets in file order.
+        """
+        offsets = []
+        offset = 0
+        with open(file, "rb") as f:
+            for line in f:
+                if line.strip() == b"BEGIN IONS":
+                    offsets.append(offset)
+                offset += len(line)
+        return offsets
+
+    @staticmethod
+    def read_peaks(file: str | PathLike, offset: int) -> tuple[list[float], list[float]]:
+        """Read the peaks of the spectrum at a byte offset of an MGF file.
+
+        The peak lines are parsed in the same way as by `pyteomics.mgf`.
+
+        Args:
+            file: path to the MGF file.
+            offset: the byte offset of the spectrum, i.e. of its `BEGIN IONS` line.
+
+        Returns:
+            The list of m/z values and the list of intensity values.
+
+        Raises:
+            ValueError: If there is no spectrum at the offset or a peak line is invalid.
+        """
+        mz: list[float] = []
+        intensity: list[float] = []
+        with open(file, "rb") as f:
+            f.seek(offset)
+            if f.readline().strip() != b"BEGIN IONS":
+                raise ValueError(f"No spectrum at offset {offset} of MGF file '{file}'.")
+            for line in f:
+                line = line.strip()
+                # skip empty lines, comments and parameters
+                if not line or line[:1] in b"#;!/" or b"=" in line:
+                    continue
+                if line == b"END IONS":
+                    return mz, intensity
+                values = line.split()
+                if len(values) < 2:
+                    continue
+                mz.append(float(values[0]))
+                intensity.append(float(values[1]))
+        raise ValueError(f"Spectrum at offset {offset} of MGF file '{file}' has no END IONS.")
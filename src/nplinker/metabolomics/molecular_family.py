@@ -2,6 +2,7 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from nplinker.strain import Strain
 from nplinker.strain import StrainCollection
+from nplinker.utils import slot_state
 
 
 if TYPE_CHECKING:
@@ -18,6 +19,8 @@ class MolecularFamily:
         strains: StrainCollection object that contains strains in the molecular family.
     """
 
+    __slots__ = ("id", "spectra_ids", "_spectra", "_strains")
+
     def __init__(self, id: str):
         """Initialize the MolecularFamily.
 
@@ -48,7 +51,7 @@ class MolecularFamily:
 
     def __reduce__(self) -> tuple:
         """Reduce function for pickling."""
-        return (self.__class__, (self.id,), self.__dict__)
+        return (self.__class__, (self.id,), (None, slot_state(self)))
 
     @property
     def spectra(self) -> set[Spectrum]:
@@ -1,9 +1,10 @@
 from __future__ import annotations
-from functools import cached_property
+from collections.abc import Callable
 from typing import TYPE_CHECKING
 import numpy as np
 from nplinker.strain import Strain
 from nplinker.strain import StrainCollection
+from nplinker.utils import slot_state
 
 
 if TYPE_CHECKING:
@@ -26,8 +27,27 @@ class Spectrum:
         strains: the strains that this spectrum belongs to.
         family: the molecular family that this spectrum belongs to.
         peaks: 2D array of peaks, each row is a peak of (m/z, intensity) values.
+
+    The m/z and intensity values of a spectrum created with
+    [`Spectrum.lazy`][nplinker.metabolomics.Spectrum.lazy] are loaded on first access of `mz`,
+    `intensity` or `peaks`.
     """
 
+    __slots__ = (
+        "id",
+        "_mz",
+        "_intensity",
+        "_peak_loader",
+        "precursor_mz",
+        "rt",
+        "metadata",
+        "gnps_annotations",
+        "gnps_id",
+        "strains",
+        "family",
+        "_peaks",
+    )
+
     def __init__(
         self,
         id: str,
@@ -49,8 +69,9 @@ class Spectrum:
                 in the MGF file.
         """
         self.id = id
-        self.mz = mz
-        self.intensity = intensity
+        self._mz = mz
+        self._intensity = intensity
+        self._peak_loader: Callable[[], tuple[list[float], list[float]]] | None = None
         self.precursor_mz = precursor_mz
         self.rt = rt
         self.metadata = metadata or {}
@@ -59,6 +80,39 @@ class Spectrum:
         self.gnps_id: str | None = None
         self.strains: StrainCollection = StrainCollection()
         self.family: MolecularFamily | None = None
+        self._peaks: np.ndarray | None = None
+
+    @classmethod
+    def lazy(
+        cls,
+        id: str,
+        peak_loader: Callable[[], tuple[list[float], list[float]]],
+        precursor_mz: float,
+        rt: float = 0,
+        metadata: dict | None = None,
+    ) -> Spectrum:
+        """Create a spectrum whose m/z and intensity values are loaded on first access.
+
+        Args:
+            id: the spectrum ID.
+            peak_loader: a function without arguments that returns the list of m/z values and
+                the list of intensity values. It is called at most once.
+            precursor_mz: the precursor m/z.
+            rt: the retention time in seconds. Defaults to 0.
+            metadata: the metadata of the spectrum, i.e. the header information
+                in the MGF file.
+
+        Returns:
+            The spectrum without loaded peaks.
+
+        Examples:
+            >>> spec = Spectrum.lazy("1", lambda: ([100.0], [1.0]), 150.0)
+            >>> spec.mz
+            [100.0]
+        """
+        spectrum = cls(id, None, None, precursor_mz, rt, metadata)  # type: ignore[arg-type]
+        spectrum._peak_loader = peak_loader
+        return spectrum
 
     def __str__(self) -> str:
         return f"Spectrum(id={self.id}, #strains={len(self.strains)})"
@@ -75,17 +129,60 @@ class Spectrum:
         return hash((self.id, self.precursor_mz))
 
     def __reduce__(self) -> tuple:
-        """Reduce function for pickling."""
-        return (
-            self.__class__,
-            (self.id, self.mz, self.intensity, self.precursor_mz, self.rt, self.metadata),
-            self.__dict__,
-        )
-
-    @cached_property
+        """Reduce function for pickling.
+
+        The peaks of a lazy spectrum are loaded and pickled, the peak loader is not.
+        """
+        args = (self.id, self.mz, self.intensity, self.precursor_mz, self.rt, self.metadata)
+        state = slot_state(self)
+        state["_peak_loader"] = None
+        return (self.__class__, args, (None, state))
+
+    @property
+    def mz(self) -> list[float]:
+        """Get the list of m/z values."""
+        if self._peak_loader is not None:
+            self._load_peaks()
+        return self._mz
+
+    @mz.setter
+    def mz(self, mz: list[float]) -> None:
+        if self._peak_loader is not None:
+            self._load_peaks()
+        self._mz = mz
+
+    @property
+    def intensity(self) -> list[float]:
+        """Get the list of intensity values."""
+        if self._peak_loader is not None:
+            self._load_peaks()
+        return self._intensity
+
+    @intensity.setter
+    def intensity(self, intensity: list[float]) -> None:
+        if self._peak_loader is not None:
+            self._load_peaks()
+        self._intensity = intensity
+
+    @property
+    def peaks_loaded(self) -> bool:
+        """Whether the m/z and intensity values are loaded, i.e. not waiting for a lazy load."""
+        return self._peak_loader is None
+
+    @property
     def peaks(self) -> np.ndarray:
-        """Get the peaks, a 2D array with each row containing the values of (m/z, intensity)."""
-        return np.array(list(zip(self.mz, self.intensity)))
+        """Get the peaks, a 2D array with each row containing the values of (m/z, intensity).
+
+        The array is created on first access and cached.
+        """
+        if self._peaks is None:
+            self._peaks = np.array(list(zip(self.mz, self.intensity)))
+        return self._peaks
+
+    def _load_peaks(self) -> None:
+        """Load the m/z and intensity values with the peak loader of a lazy spectrum."""
+        self._mz, self._intensity = self._peak_loader()  # type: ignore[misc]
+        self._peak_loader = None
 
     def has_strain(self, strain: Strain) -> bool:
         """Check if the given strain exists in the spectrum.
@@ -0,0 +1,253 @@
+from __future__ import annotations
+from array import array
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import MutableMapping
+from typing import Any
+
+
+# the maximum number of distinct values shared in a column, beyond which the values of the column
+# are stored as they are, as they are (nearly) unique per spectrum, e.g. `scans` or `spectrumid`
+MAX_SHARED_VALUES = 1024
+
+# the types of the values that are shared, alone or as the items of a list or tuple
+_SHARED_TYPES = (str, int, bool, type(None))
+
+
+class _Missing:
+    """Marker of a key that a row does not have."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<missing>"
+
+    def __reduce__(self) -> str:
+        return "_MISSING"
+
+
+_MISSING: Any = _Missing()
+
+
+class _FloatColumn:
+    """A column of float values, stored as a packed array with a mask of the rows that have one."""
+
+    __slots__ = ("_values", "_present")
+
+    def __init__(self, n_rows: int) -> None:
+        self._values = array("d", bytes(8 * n_rows))
+        self._present = bytearray(n_rows)
+
+    def __getitem__(self, row: int) -> Any:
+        return self._values[row] if self._present[row] else _MISSING
+
+    def __setitem__(self, row: int, value: Any) -> None:
+        if value is _MISSING:
+            self._present[row] = 0
+        else:
+            self._values[row] = value
+            self._present[row] = 1
+
+    def __iter__(self) -> Iterator[Any]:
+        return (v if present else _MISSING for v, present in zip(self._values, self._present))
+
+    def append(self, value: Any) -> None:
+        self._values.append(0.0 if value is _MISSING else value)
+        self._present.append(value is not _MISSING)
+
+
+class MetadataTable:
+    """A columnar table of spectrum metadata, e.g. the header information of MGF spectra.
+
+    Each row is the metadata of one spectrum and each distinct metadata key is a column. The table
+    needs less memory than one dict per spectrum, as the spectra usually have the same keys:
+
+    - Columns of float values, e.g. `rtinseconds`, are stored as packed arrays.
+    - Equal strings, ints and lists or tuples of them, e.g. `charge`, `ionmode` or `filename`,
+      are stored once and shared by all rows. A column stops sharing its values when it has more
+      than `MAX_SHARED_VALUES` distinct values, as its values are then (nearly) unique per row.
+    - Other values, e.g. `pepmass`, are stored as they are.
+
+    Rows are accessed through [`MetadataView`][nplinker.metabolomics.MetadataView] objects, which
+    are used as `Spectrum.metadata`. Views return copies of list values, so the shared values
+    cannot be modified in place; set a new value instead.
+
+    Examples:
+        >>> table = MetadataTable()
+        >>> metadata = table.append({"charge": [1], "ionmode": "Positive"})
+        >>> metadata["ionmode"]
+        'Positive'
+        >>> dict(metadata)
+        {'charge': [1], 'ionmode': 'Positive'}
+    """
+
+    __slots__ = ("_columns", "_n_rows", "_values")
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self._columns: dict[str, list | _FloatColumn] = {}
+        self._n_rows: int = 0
+        # the shared object of each distinct value of a column, keyed by (type, value), or None
+        # if the column has too many distinct values to share them
+        self._values: dict[str, dict[tuple, Any] | None] = {}
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    def __repr__(self) -> str:
+        return f"MetadataTable(#rows={self._n_rows}, #columns={len(self._columns)})"
+
+    @property
+    def columns(self) -> list[str]:
+        """Get the names of the columns, i.e. all metadata keys."""
+        return list(self._columns)
+
+    def append(self, metadata: Mapping[str, Any]) -> MetadataView:
+        """Add the metadata of a spectrum as a new row.
+
+        Args:
+            metadata: The metadata of the spectrum.
+
+        Returns:
+            The view of the new row.
+        """
+        row = self._n_rows
+        self._n_rows += 1
+        for column in self._columns.values():
+            column.append(_MISSING)
+        for key, value in metadata.items():
+            self._set(row, key, value)
+        return MetadataView(self, row)
+
+    def row(self, row: int) -> MetadataView:
+        """Get the view of a row.
+
+        Args:
+            row: The index of the row.
+
+        Returns:
+            The view of the row.
+
+        Raises:
+            IndexError: If the row does not exist.
+        """
+        if not 0 <= row < self._n_rows:
+            raise IndexError(f"Row {row} out of range for table with {self._n_rows} rows.")
+        return MetadataView(self, row)
+
+    def column(self, key: str) -> list:
+        """Get the values of a metadata key for all rows.
+
+        Args:
+            key: The metadata key.
+
+        Returns:
+            The values in row order, None for rows that do not have the key. List values are
+            copies.
+
+        Raises:
+            KeyError: If no row has the key.
+        """
+        return [None if v is _MISSING else _copy(v) for v in self._columns[key]]
+
+    def _get(self, row: int, key: str) -> Any:
+        """Get a value of a row, or `_MISSING` if the row does not have the key."""
+        column = self._columns.get(key)
+        return _MISSING if column is None else column[row]
+
+    def _set(self, row: int, key: str, value: Any) -> None:
+        """Set a value of a row, adding the column if needed."""
+        column = self._columns.get(key)
+        if column is None:
+            if type(value) is float:
+                column = self._columns[key] = _FloatColumn(self._n_rows)
+            else:
+                column = self._columns[key] = [_MISSING] * self._n_rows
+        elif type(column) is _FloatColumn and type(value) is not float and value is not _MISSING:
+            column = self._columns[key] = list(column)
+        if type(column) is list:
+            value = self._share(key, value)
+        column[row] = value
+
+    def _share(self, key: str, value: Any) -> Any:
+        """Get the shared object of a value of a column."""
+        values = self._values.get(key, {})
+        if values is None:
+            return value
+        if type(value) in (list, tuple):
+            if not all(type(item) in _SHARED_TYPES for item in value):
+                return value
+            # include the types in the key, as e.g. True == 1 but they must not be merged
+            value_key = (type(value), *((type(item), item) for item in value))
+        elif type(value) in _SHARED_TYPES:
+            value_key = (type(value), value)
+        else:
+            return value
+        shared = values.get(value_key)
+        if shared is not None:
+            return shared
+        if len(values) >= MAX_SHARED_VALUES:
+            # a (nearly) unique value per row, sharing the values would only cost memory
+            self._values[key] = None
+            return value
+        values[value_key] = value
+        self._values[key] = values
+        return value
+
+
+class MetadataView(MutableMapping):
+    """A dict-like view of the metadata of one spectrum in a `MetadataTable`.
+
+    The view does not hold any metadata itself: reading and writing go to the row of the table.
+    List values are returned as copies, as they may be shared with other rows. The view compares
+    equal to a dict with the same items, and is pickled as such a dict, i.e. without the table.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: MetadataTable, row: int) -> None:
+        """Initialize the view.
+
+        Args:
+            table: The metadata table.
+            row: The index of the row of the spectrum.
+        """
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._table._get(self._row, key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return _copy(value)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._table._set(self._row, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if self._table._get(self._row, key) is _MISSING:
+            raise KeyError(key)
+        self._table._columns[key][self._row] = _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._row
+        return (key for key, column in self._table._columns.items() if column[row] is not _MISSING)
+
+    def __len__(self) -> int:
+        row = self._row
+        return sum(column[row] is not _MISSING for column in self._table._columns.values())
+
+    def __contains__(self, key: object) -> bool:
+        return self._table._get(self._row, key) is not _MISSING  # type: ignore[arg-type]
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __reduce__(self) -> tuple:
+        # pickle the items of the row only, not the whole table
+        return dict, (dict(self),)
+
+
+def _copy(value: Any) -> Any:
+    """Copy a list value, which may be shared by several rows."""
+    return list(value) if type(value) is list else value
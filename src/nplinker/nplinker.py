@@ -1,6 +1,7 @@
 from __future__ import annotations
 import logging
 import pickle
+import zipfile
 from collections.abc import Sequence
 from os import PathLike
 from pprint import pformat
@@ -9,6 +10,7 @@ from typing import overload
 from dynaconf import Dynaconf
 from .arranger import DatasetArranger
 from .config import load_config
+from .defaults import DATASET_SNAPSHOT_FILENAME
 from .defaults import OUTPUT_DIRNAME
 from .genomics import BGC
 from .genomics import GCF
@@ -16,8 +18,14 @@ from .loader import DatasetLoader
 from .logger import setup_logging
 from .metabolomics import MolecularFamily
 from .metabolomics import Spectrum
+from .registry import EntityRegistry
 from .scoring.link_graph import LinkGraph
 from .scoring.metcalf_scoring import MetcalfScoring
+from .snapshot import DatasetSnapshot
+from .snapshot import dataset_fingerprint
+from .snapshot import read_snapshot
+from .snapshot import read_snapshot_fingerprint
+from .snapshot import write_snapshot
 from .strain import StrainCollection
 
 
@@ -38,6 +46,7 @@ class NPLinker:
         mibig_bgcs: A list of all MiBIG BGC objects.
         strains: A StrainCollection object containing all Strain objects.
         product_types: A list of all BiGSCAPE product types.
+        registry: The dense integer indexes of all loaded objects.
         scoring_methods: A list of all valid scoring methods.
     """
 
@@ -76,6 +85,10 @@ class NPLinker:
 
             Saving the data to a pickle file:
             >>> npl.save_data("path/to/output.pkl", lg)
+
+            Saving the loaded data to a snapshot file and loading it again:
+            >>> npl.save_snapshot("path/to/dataset.snapshot")
+            >>> npl.load_snapshot("path/to/dataset.snapshot")
         """
         # Load the configuration file
         self.config: Dynaconf = load_config(config_file)
@@ -102,8 +115,11 @@ class NPLinker:
         self._mibig_bgcs: list[BGC] = []
         self._strains: StrainCollection = StrainCollection()
         self._product_types: list = []
+        self._registry: EntityRegistry | None = None
         self._chem_classes = None  # TODO: to be refactored
         self._class_matches = None  # TODO: to be refactored
+        # the loader of the data, kept to switch the BiG-SCAPE cutoff of the GCFs
+        self._loader: DatasetLoader | None = None
 
         # Flags to keep track of whether the scoring methods have been set up
         self._scoring_methods_setup_done = {name: False for name in self._valid_scoring_methods}
@@ -153,6 +169,23 @@ class NPLinker:
         """Get all BiGSCAPE product types."""
         return self._product_types
 
+    @property
+    def registry(self) -> EntityRegistry:
+        """Get the dense integer indexes of all loaded objects.
+
+        The registry is created from the loaded data on first access, see
+        [`EntityRegistry`][nplinker.registry.EntityRegistry].
+        """
+        if self._registry is None:
+            self._registry = EntityRegistry(
+                strains=self.strains,
+                bgcs=self.bgcs,
+                gcfs=self.gcfs,
+                spectra=self.spectra,
+                mfs=self.mfs,
+            )
+        return self._registry
+
     @property
     def chem_classes(self):
         """Returns loaded ChemClassPredictions with the class predictions."""
@@ -163,6 +196,16 @@ class NPLinker:
         """ClassMatches with the matched classes and scoring tables from MIBiG."""
         return self._class_matches
 
+    @property
+    def bigscape_cutoffs(self) -> list[str]:
+        """Get the BiG-SCAPE cutoffs whose GCFs can be used with `use_bigscape_cutoff`.
+
+        The list is empty unless the data was loaded with the config `bigscape.all_cutoffs` true.
+        """
+        if self._loader is None or self._loader.gcf_sets is None:
+            return []
+        return self._loader.gcf_sets.cutoffs
+
     @property
     def scoring_methods(self) -> list[str]:
         """Get names of all valid scoring methods."""
@@ -180,22 +223,164 @@ class NPLinker:
         The loaded data is stored in various data containers for easy access, e.g.
         [`self.bgcs`][nplinker.NPLinker.bgcs] for all BGC objects,
         [`self.strains`][nplinker.NPLinker.strains] for all Strain objects, etc.
+
+        If the config `cache.warm_start` is true (default), the loaded data is also saved to a
+        snapshot file `dataset.snapshot` in the output directory, together with the fingerprint
+        of the input data (see [`dataset_fingerprint`][nplinker.snapshot.dataset_fingerprint]).
+        When the data is loaded again and the fingerprint has not changed, i.e. no input file or
+        config value was changed, the data is restored from the snapshot instead, and arranging
+        and loading the data files are skipped.
+
+        If the config `gnps.lazy_peaks` is true, the peaks of the spectra are loaded on first
+        access, and no snapshot is used, as a snapshot contains the peaks of all spectra.
+
+        If the config `bigscape.all_cutoffs` is true, the GCFs of all BiG-SCAPE cutoffs are
+        loaded and no snapshot is used either, as a snapshot contains the GCFs of one cutoff. See
+        [`use_bigscape_cutoff`][nplinker.NPLinker.use_bigscape_cutoff] to switch the cutoff.
         """
+        warm_start = (
+            self.config.get("cache.warm_start", True)
+            and not self.config.get("gnps.lazy_peaks", False)
+            and not self.config.get("bigscape.all_cutoffs", False)
+        )
+        snapshot_file = self._output_dir / DATASET_SNAPSHOT_FILENAME
+        if warm_start and snapshot_file.exists():
+            fingerprint = dataset_fingerprint(self.config)
+            try:
+                if read_snapshot_fingerprint(snapshot_file) == fingerprint:
+                    self.load_snapshot(snapshot_file)
+                    logger.info(f"Input data not changed, loaded data from {snapshot_file}.")
+                    return
+                logger.info(f"Input data changed since {snapshot_file} was saved, reloading.")
+            except (ValueError, zipfile.BadZipFile) as e:
+                logger.warning(f"Failed to use the snapshot {snapshot_file}, reloading: {e}")
+
         arranger = DatasetArranger(self.config)
         arranger.arrange()
         loader = DatasetLoader(self.config)
         loader.load()
 
-        self._bgc_dict = {bgc.id: bgc for bgc in loader.bgcs}
-        self._gcf_dict = {gcf.id: gcf for gcf in loader.gcfs}
-        self._spec_dict = {spec.id: spec for spec in loader.spectra}
-        self._mf_dict = {mf.id: mf for mf in loader.mfs}
-
-        self._mibig_bgcs = loader.mibig_bgcs
-        self._strains = loader.strains
-        self._product_types = loader.product_types
+        data = self._loader_data(loader)
+        self._set_data(data)
         self._chem_classes = loader.chem_classes
         self._class_matches = loader.class_matches
+        self._loader = loader
+
+        if warm_start:
+            # fingerprint after arranging, as arranging may download or generate input files
+            write_snapshot(snapshot_file, data, fingerprint=dataset_fingerprint(self.config))
+
+    def save_snapshot(self, file: str | PathLike) -> None:
+        """Save the loaded data to a dataset snapshot file.
+
+        The snapshot stores the objects as flat tables with integer references between them
+        and the spectrum peaks as packed arrays, see
+        [`write_snapshot`][nplinker.snapshot.write_snapshot]. It is much faster to write and read
+        than pickling the objects with `save_data`. Links are not included, use
+        [`write_links`][nplinker.scoring.write_links] to save them.
+
+        Args:
+            file: The path to the snapshot file.
+
+        Examples:
+            >>> npl.load_data()
+            >>> npl.save_snapshot("path/to/dataset.snapshot")
+        """
+        write_snapshot(
+            file,
+            DatasetSnapshot(
+                bgcs=self.bgcs,
+                gcfs=self.gcfs,
+                spectra=self.spectra,
+                mfs=self.mfs,
+                mibig_bgcs=self.mibig_bgcs,
+                strains=self.strains,
+                product_types=self.product_types,
+            ),
+        )
+
+    def load_snapshot(self, file: str | PathLike) -> None:
+        """Load the data from a dataset snapshot file written by `save_snapshot`.
+
+        This replaces `load_data` when a snapshot of the dataset is available, the data files in
+        the working directory are not used.
+
+        Args:
+            file: The path to the snapshot file.
+
+        Raises:
+            ValueError: If the file is not a snapshot file or its version is not supported.
+
+        Examples:
+            >>> npl.load_snapshot("path/to/dataset.snapshot")
+            >>> len(npl.gcfs)
+        """
+        self._set_data(read_snapshot(file))
+        self._loader = None
+
+    def use_bigscape_cutoff(self, cutoff: str) -> None:
+        """Use the GCFs of another BiG-SCAPE cutoff.
+
+        The GCFs of the cutoff are created from the GCFs of all cutoffs kept in memory, and the
+        loaded BGCs are added to them, so no data file is read again. The GCFs, BGCs and strains
+        are replaced, and the scoring methods are set up again on the next `get_links` call.
+
+        Args:
+            cutoff: The BiG-SCAPE cutoff, one of
+                [`bigscape_cutoffs`][nplinker.NPLinker.bigscape_cutoffs].
+
+        Raises:
+            ValueError: If the data was not loaded with `load_data` and the config
+                `bigscape.all_cutoffs` true.
+            KeyError: If there are no GCFs for the cutoff.
+
+        Examples:
+            >>> npl.load_data()
+            >>> npl.bigscape_cutoffs
+            ['0.30', '0.50']
+            >>> npl.use_bigscape_cutoff("0.50")
+            >>> lg = npl.get_links(npl.gcfs, "metcalf")
+        """
+        if self._loader is None:
+            raise ValueError(
+                "The GCFs of all BiG-SCAPE cutoffs are not loaded, set the config "
+                "`bigscape.all_cutoffs` to true and load the data with `load_data`."
+            )
+        self._loader.use_gcf_set(cutoff)
+        self._set_data(self._loader_data(self._loader))
+
+    @staticmethod
+    def _loader_data(loader: DatasetLoader) -> DatasetSnapshot:
+        """Get the data loaded by a dataset loader."""
+        return DatasetSnapshot(
+            bgcs=loader.bgcs,
+            gcfs=loader.gcfs,
+            spectra=loader.spectra,
+            mfs=loader.mfs,
+            mibig_bgcs=loader.mibig_bgcs,
+            strains=loader.strains,
+            product_types=loader.product_types,
+        )
+
+    def _set_data(self, data: DatasetSnapshot) -> None:
+        """Set the data containers with the loaded data."""
+        self._bgc_dict = {bgc.id: bgc for bgc in data.bgcs}
+        self._gcf_dict = {gcf.id: gcf for gcf in data.gcfs}
+        self._spec_dict = {spec.id: spec for spec in data.spectra}
+        self._mf_dict = {mf.id: mf for mf in data.mfs}
+
+        self._mibig_bgcs = data.mibig_bgcs
+        self._strains = data.strains
+        self._product_types = data.product_types
+        self._registry = None
+
+        # objects with the same strains share the storage of their strain collections
+        StrainCollection.intern(
+            obj.strains for objects in (data.gcfs, data.spectra, data.mfs) for obj in objects
+        )
+
+        # the scoring methods must be set up again for the new data
+        self._scoring_methods_setup_done = {name: False for name in self._valid_scoring_methods}
 
     @overload
     def get_links(
@@ -24,6 +24,12 @@ logger = logging.getLogger(__name__)
 # and allow the number to be extracted easily
 CLUSTER_REGION_REGEX = re.compile("(.+?)\\.(cluster|region)(\\d+).gbk$")
 
+# used by the streaming JSON scanner below
+_CLUSTERBLAST_MODULE = "antismash.modules.clusterblast"
+_WHITESPACE = " \t\n\r"
+_VALUE_DELIMITERS = _WHITESPACE + ',:{}[]"'
+_STRING_SPECIAL_CHARS = re.compile(r'["\\]')
+
 # This module contains a couple of parsers for antiSMASH knownclusterblast output
 # files: one for the newer per-directory .JSON blob and one for the legacy
 # format with one text file per gbk.
@@ -45,6 +51,7 @@ class KCBJSONParser:
             if not os.path.exists(bgc.antismash_file):
                 raise Exception('KCBJSONParser failed to find file "{}"'.format(bgc.antismash_file))
 
+        self.bgcs = bgcs
         logger.info(f"KCBJSONParser({len(bgcs)} BGCs)")
 
         # find the JSON file: TODO is the assumption of there only being a single .json
@@ -69,11 +76,10 @@ class KCBJSONParser:
         self.collected_hits = {}
 
         # NOTE: since some of these JSON files are ridiculously large (>50MB in some cases)
-        # it can cause OOM errors (with the stdlib json module and a couple of other
-        # 3rd party ones). Best way to avoid this is by using 64-bit Python.
-        # TODO: catch exception and print message recommending 64-bit
-        logger.info("Loading antiSMASH JSON data from {}".format(self.json_filename))
-        data = json.load(open(self.json_filename))
+        # loading them with the stdlib json module can cause OOM errors. Instead the file is
+        # streamed and only the "antismash.modules.clusterblast" section of each record is
+        # materialized, see `_iter_clusterblast_records`.
+        logger.info("Streaming antiSMASH JSON data from {}".format(self.json_filename))
 
         # JSON data structure: depending on the gbks in the source folder, the
         # structure of the results may be different from one to the next. from
@@ -134,10 +140,12 @@ class KCBJSONParser:
         #  for each one that has clusterblast results iterate over those, matching
         #  things up to the BGC objects created by nplinker as we go along.
 
-        for i, rec in enumerate(data["records"]):
-            hits = self._parse(rec)
-            if hits is not None:
-                self.collected_hits.update(hits)
+        wanted_ids = {bgc.antismash_id for bgc in self.bgcs}
+        with open(self.json_filename, "rt") as f:
+            for rec in _iter_clusterblast_records(f):
+                hits = self._parse(rec, wanted_ids)
+                if hits is not None:
+                    self.collected_hits.update(hits)
 
         logger.info(
             "KCBJSONParser: collected {} total hit entries".format(len(self.collected_hits))
@@ -145,8 +153,11 @@ class KCBJSONParser:
 
         return self.collected_hits
 
-    def _parse(self, record):
-        """Parses the knownclusterblast data for a single 'record' entry."""
+    def _parse(self, record, wanted_ids=None):
+        """Parses the knownclusterblast data for a single 'record' entry.
+
+        Records whose id is not in `wanted_ids` are ignored, unless `wanted_ids` is None.
+        """
         modules = record.get("modules", None)
         if modules is None or "antismash.modules.clusterblast" not in modules:
             # this probably isn't an error, the JSON often seems to contain entries
@@ -155,6 +166,8 @@ class KCBJSONParser:
 
         kcb = modules["antismash.modules.clusterblast"]["knowncluster"]
         record_id = kcb["record_id"]
+        if wanted_ids is not None and record_id not in wanted_ids:
+            return None
 
         # each 'record' may contain multiple results, and each 'result' may be
         # linked to a different BGC and region number, so need to keep track of
@@ -228,6 +241,181 @@ class KCBJSONParser:
         return {record_id: record_hits}
 
 
+class _JSONStream:
+    """Minimal incremental JSON scanner over a text file.
+
+    It walks through objects and arrays key by key, and can skip a value without building any
+    Python object for it. Only keys and the values explicitly requested with `read_value` are
+    decoded. The consumed part of the buffer is dropped as the scan goes on, so memory use is
+    bounded by the chunk size plus the size of the largest requested value, not the file size.
+    """
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        # start of the value being read, the buffer is kept from this position when set
+        self._mark: int | None = None
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Read the next chunk into the buffer. Returns False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        keep = min(self._pos if self._mark is None else self._mark, len(self._buf))
+        self._buf = self._buf[keep:] + chunk
+        self._pos -= keep
+        if self._mark is not None:
+            self._mark -= keep
+        return True
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' in JSON data")
+        self._pos += 1
+
+    def _skip_string(self) -> None:
+        """Skip a string value, the current position must be at the opening quote."""
+        self._pos += 1
+        while True:
+            while self._pos >= len(self._buf):
+                if not self._fill():
+                    raise ValueError("Unterminated string in JSON data")
+            match = _STRING_SPECIAL_CHARS.search(self._buf, self._pos)
+            if match is None:
+                self._pos = len(self._buf)
+            elif match.group() == '"':
+                self._pos = match.end()
+                return
+            else:
+                # skip the backslash together with the escaped character
+                self._pos = match.end() + 1
+
+    def _skip_literal(self) -> None:
+        """Skip a number or a literal (true, false, null)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] not in _VALUE_DELIMITERS:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def skip_value(self) -> None:
+        """Skip the next value of any type."""
+        depth = 0
+        while True:
+            char = self._peek()
+            if char == '"':
+                self._skip_string()
+            elif char in "{[":
+                depth += 1
+                self._pos += 1
+            elif char in "}]":
+                depth -= 1
+                self._pos += 1
+            elif char in ",:" and depth > 0:
+                self._pos += 1
+                continue
+            else:
+                self._skip_literal()
+            if depth == 0:
+                return
+
+    def read_key(self) -> str:
+        """Read an object key and the following colon."""
+        if self._peek() != '"':
+            raise ValueError("Expected a string key in JSON data")
+        self._mark = self._pos
+        self._skip_string()
+        key = json.loads(self._buf[self._mark : self._pos])
+        self._mark = None
+        self._expect(":")
+        return key
+
+    def read_value(self):
+        """Decode and return the next value."""
+        self._peek()
+        self._mark = self._pos
+        self.skip_value()
+        value = json.loads(self._buf[self._mark : self._pos])
+        self._mark = None
+        return value
+
+    def iter_object(self):
+        """Iterate over the keys of an object; the caller must consume each value."""
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            yield self.read_key()
+            char = self._peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError(f"Unexpected character '{char}' in JSON object")
+
+    def iter_array(self):
+        """Iterate over the items of an array; the caller must consume each item."""
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield
+            char = self._peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"Unexpected character '{char}' in JSON array")
+
+
+def _iter_clusterblast_records(f):
+    """Stream the records of an antiSMASH JSON file, keeping only clusterblast results.
+
+    Args:
+        f: the antiSMASH JSON file opened in text mode
+
+    Yields:
+        A minimal record dict of the form `{"modules": {"antismash.modules.clusterblast": ...}}`
+        for each record, where the "modules" key is missing if the record has no clusterblast
+        results. All other parts of the records are skipped without being decoded.
+    """
+    stream = _JSONStream(f)
+    for key in stream.iter_object():
+        if key != "records":
+            stream.skip_value()
+            continue
+        for _ in stream.iter_array():
+            record: dict = {}
+            for rec_key in stream.iter_object():
+                if rec_key != "modules":
+                    stream.skip_value()
+                    continue
+                for module in stream.iter_object():
+                    if module == _CLUSTERBLAST_MODULE:
+                        record["modules"] = {module: stream.read_value()}
+                    else:
+                        stream.skip_value()
+            yield record
+
+
 class KCBTextParser:
     """Parser for antismash knownclusterblast text output files."""
 
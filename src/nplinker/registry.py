@@ -0,0 +1,290 @@
+from __future__ import annotations
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import Generic
+from typing import TypeVar
+from typing import Union
+import numpy as np
+import pandas as pd
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.strain import Strain
+
+
+T = TypeVar("T", Strain, BGC, GCF, Spectrum, MolecularFamily)
+
+Entity = Union[Strain, BGC, GCF, Spectrum, MolecularFamily]
+
+
+class EntityIndex(Generic[T]):
+    """A dense integer index of the objects of one type.
+
+    The objects are numbered 0, 1, ..., n-1 in the given order, so that data about the objects
+    can be stored in arrays with one row per object. The index maps between object ids, integer
+    indexes and objects, and all mappings have vectorized versions for many objects at once.
+
+    Attributes:
+        objects: The indexed objects, the position of each object is its index.
+        ids: The ids of the objects, as a numpy array of strings.
+
+    Examples:
+        >>> index = EntityIndex(npl.gcfs)
+        >>> index.indexes(npl.gcfs[:2])
+        array([0, 1])
+        >>> index.take([1, 0])
+        [GCF(id=gcf2, ...), GCF(id=gcf1, ...)]
+    """
+
+    def __init__(self, objects: Iterable[T]) -> None:
+        """Initialize the index.
+
+        Args:
+            objects: The objects to index. Each object must have a unique `id`.
+
+        Raises:
+            ValueError: If the ids of the objects are not unique.
+        """
+        self.objects: list[T] = list(objects)
+        self.ids: np.ndarray = np.array([obj.id for obj in self.objects], dtype=object)
+        self._id_index = pd.Index(self.ids)
+        if not self._id_index.is_unique:
+            duplicates = self._id_index[self._id_index.duplicated()].unique().tolist()
+            raise ValueError(f"Ids of the objects must be unique, duplicates found: {duplicates}")
+        # indexes by object identity, to avoid hashing the objects
+        self._positions = {id(obj): i for i, obj in enumerate(self.objects)}
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(self.objects)
+
+    def __contains__(self, obj: T) -> bool:
+        return id(obj) in self._positions or obj.id in self._id_index
+
+    def __repr__(self) -> str:
+        return f"EntityIndex(n={len(self)})"
+
+    def index(self, obj: T) -> int:
+        """Get the index of an object.
+
+        Objects are matched by identity first and then by id, so an object equal to an indexed
+        object (e.g. a copy) gets the same index.
+
+        Args:
+            obj: The object to look up.
+
+        Returns:
+            The index of the object.
+
+        Raises:
+            KeyError: If the object is not in the index.
+        """
+        i = self._positions.get(id(obj))
+        if i is None:
+            i = self._id_index.get_loc(obj.id)
+        return i
+
+    def indexes(self, objects: Sequence[T]) -> np.ndarray:
+        """Get the indexes of objects.
+
+        Args:
+            objects: The objects to look up.
+
+        Returns:
+            An int64 array of the indexes of the objects, with -1 for objects not in the index.
+        """
+        positions = self._positions
+        indexes = np.fromiter(
+            (positions.get(id(obj), -1) for obj in objects), dtype=np.int64, count=len(objects)
+        )
+        missing = np.flatnonzero(indexes < 0)
+        if len(missing) > 0:
+            indexes[missing] = self.indexes_of_ids([objects[i].id for i in missing.tolist()])
+        return indexes
+
+    def indexes_of_ids(self, ids: Sequence[str] | np.ndarray) -> np.ndarray:
+        """Get the indexes of objects by their ids.
+
+        Args:
+            ids: The ids of the objects.
+
+        Returns:
+            An int64 array of the indexes of the objects, with -1 for ids not in the index.
+        """
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64)
+        return self._id_index.get_indexer(ids).astype(np.int64, copy=False)
+
+    def take(self, indexes: Iterable[int] | np.ndarray) -> list[T]:
+        """Get the objects at the given indexes.
+
+        Args:
+            indexes: The indexes of the objects.
+
+        Returns:
+            The objects at the indexes, in the same order.
+        """
+        objects = self.objects
+        if isinstance(indexes, np.ndarray):
+            indexes = indexes.tolist()
+        return [objects[i] for i in indexes]
+
+
+class EntityRegistry:
+    """The dense integer indexes of all loaded objects, shared by the NPLinker subsystems.
+
+    The registry holds one [`EntityIndex`][nplinker.registry.EntityIndex] per type of object, i.e.
+    strains, BGCs, GCFs, spectra and molecular families. With the registry, data about objects
+    can be kept in arrays indexed by integers (e.g. the strain presence matrices used for
+    scoring) instead of in structures keyed by the objects themselves.
+
+    Attributes:
+        strains: The index of Strain objects.
+        bgcs: The index of BGC objects.
+        gcfs: The index of GCF objects.
+        spectra: The index of Spectrum objects.
+        mfs: The index of MolecularFamily objects.
+
+    Examples:
+        >>> registry = npl.registry
+        >>> registry[GCF].indexes(npl.gcfs[:2])
+        array([0, 1])
+        >>> presence = registry.strain_presence(GCF)
+        >>> presence.shape
+        (64, 46)
+    """
+
+    def __init__(
+        self,
+        strains: Iterable[Strain] = (),
+        bgcs: Iterable[BGC] = (),
+        gcfs: Iterable[GCF] = (),
+        spectra: Iterable[Spectrum] = (),
+        mfs: Iterable[MolecularFamily] = (),
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            strains: The Strain objects.
+            bgcs: The BGC objects.
+            gcfs: The GCF objects.
+            spectra: The Spectrum objects.
+            mfs: The MolecularFamily objects.
+
+        Raises:
+            ValueError: If the ids of the objects of a type are not unique.
+        """
+        self.strains: EntityIndex[Strain] = EntityIndex(strains)
+        self.bgcs: EntityIndex[BGC] = EntityIndex(bgcs)
+        self.gcfs: EntityIndex[GCF] = EntityIndex(gcfs)
+        self.spectra: EntityIndex[Spectrum] = EntityIndex(spectra)
+        self.mfs: EntityIndex[MolecularFamily] = EntityIndex(mfs)
+        self._presence: dict[type, np.ndarray] = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"EntityRegistry(#strains={len(self.strains)}, #bgcs={len(self.bgcs)}, "
+            f"#gcfs={len(self.gcfs)}, #spectra={len(self.spectra)}, #mfs={len(self.mfs)})"
+        )
+
+    def __getitem__(self, entity_type: type[T]) -> EntityIndex[T]:
+        """Get the index of a type of objects.
+
+        Args:
+            entity_type: The type of objects, i.e. `Strain`, `BGC`, `GCF`, `Spectrum` or
+                `MolecularFamily`.
+
+        Returns:
+            The index of the objects of the type.
+
+        Raises:
+            TypeError: If the type is not a supported type.
+        """
+        indexes = {
+            Strain: self.strains,
+            BGC: self.bgcs,
+            GCF: self.gcfs,
+            Spectrum: self.spectra,
+            MolecularFamily: self.mfs,
+        }
+        try:
+            return indexes[entity_type]  # type: ignore[return-value]
+        except KeyError:
+            raise TypeError(
+                f"Invalid type {entity_type}. Type must be Strain, BGC, GCF, Spectrum or "
+                "MolecularFamily."
+            ) from None
+
+    def strain_presence(self, entity_type: type[GCF | Spectrum | MolecularFamily]) -> np.ndarray:
+        """Get the presence of the objects of a type in the strains.
+
+        The matrix is computed once and cached, so it must not be modified.
+
+        Args:
+            entity_type: The type of objects, i.e. `GCF`, `Spectrum` or `MolecularFamily`.
+
+        Returns:
+            An int64 array of shape (number of objects, number of strains). The value at [i, j]
+            is 1 if the object with index i has the strain with index j, 0 otherwise.
+
+        Raises:
+            TypeError: If the type is not GCF, Spectrum or MolecularFamily.
+        """
+        if entity_type not in (GCF, Spectrum, MolecularFamily):
+            raise TypeError(
+                f"Invalid type {entity_type}. Type must be GCF, Spectrum or MolecularFamily."
+            )
+        if entity_type not in self._presence:
+            self._presence[entity_type] = strain_presence(self[entity_type].objects, self.strains)
+        return self._presence[entity_type]
+
+    def strain_counts(self, entity_type: type[GCF | Spectrum | MolecularFamily]) -> np.ndarray:
+        """Get the number of strains of each object of a type.
+
+        Unlike the row sums of `strain_presence`, the counts include strains that are not in
+        the registry.
+
+        Args:
+            entity_type: The type of objects, i.e. `GCF`, `Spectrum` or `MolecularFamily`.
+
+        Returns:
+            An int64 array with the number of strains of each object, in index order.
+        """
+        objects = self[entity_type].objects
+        return np.fromiter(
+            (len(obj.strains) for obj in objects), dtype=np.int64, count=len(objects)
+        )
+
+
+def strain_presence(
+    objects: Sequence[GCF | Spectrum | MolecularFamily], strains: EntityIndex[Strain]
+) -> np.ndarray:
+    """Get the presence of objects in strains as a dense matrix.
+
+    The presence is the same as `obj.has_strain(strain)`, i.e. a strain is present in an object if
+    its id is a name (id or alias) of one of the strains of the object.
+
+    Args:
+        objects: The GCF, Spectrum or MolecularFamily objects, one row per object.
+        strains: The index of strains, one column per strain.
+
+    Returns:
+        An int64 array of shape (len(objects), len(strains)), with 1 where the object has the
+        strain and 0 otherwise.
+    """
+    presence = np.zeros((len(objects), len(strains)), dtype=np.int64)
+    rows: list[int] = []
+    names: list[str] = []
+    for i, obj in enumerate(objects):
+        for strain in obj.strains:
+            for name in strain.names:
+                rows.append(i)
+                names.append(name)
+    cols = strains.indexes_of_ids(names)
+    found = cols >= 0
+    presence[np.asarray(rows, dtype=np.int64)[found], cols[found]] = 1
+    return presence
@@ -1,12 +1,22 @@
+from .array_link_graph import ArrayLinkGraph
 from .link_graph import LinkGraph
+from .link_io import LinkWriter
+from .link_io import read_links
+from .link_io import read_links_metadata
+from .link_io import write_links
 from .metcalf_scoring import MetcalfScoring
 from .score import Score
 from .scoring_method import ScoringMethod
 
 
 __all__ = [
+    "ArrayLinkGraph",
     "LinkGraph",
+    "LinkWriter",
     "MetcalfScoring",
     "Score",
     "ScoringMethod",
+    "read_links",
+    "read_links_metadata",
+    "write_links",
 ]
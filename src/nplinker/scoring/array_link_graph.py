@@ -0,0 +1,523 @@
+from __future__ import annotations
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+import numpy as np
+from .link_graph import LINK
+from .link_graph import LINK_DATA
+from .link_graph import Entity
+from .link_graph import LinkGraph
+from .link_graph import validate_filter_nodes
+from .link_graph import validate_links
+from .link_graph import validate_u
+from .link_graph import validate_uv
+from .score import Score
+from .scoring_method import ScoringMethod
+
+
+class ArrayLinkGraph(LinkGraph):
+    """LinkGraph backend that stores the links as columnar arrays.
+
+    The [`LinkGraph`][nplinker.scoring.LinkGraph] class stores every link as a `networkx` edge with
+    a dict of `Score` objects, each with its own `parameter` dict. For millions of links this takes
+    a lot of memory and time to build.
+
+    This class has the same API as `LinkGraph`, but stores the links in numpy arrays: one column
+    for the index of the first object, one for the index of the second object, and one float
+    column per scoring method (NaN where a link has no score of that method). The parameters of a
+    scoring method are stored only once, so all links must share the same parameters for a given
+    scoring method. `Score` objects are created on the fly when link data is accessed.
+
+    Only numeric score values are supported.
+
+    Examples:
+        >>> lg = ArrayLinkGraph()
+        >>> lg.add_link(gcf, spectrum, metcalf=Score("metcalf", 1.0, {"cutoff": 0.5}))
+        >>> lg.get_link_data(gcf, spectrum)
+        {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})}
+    """
+
+    def __init__(self) -> None:
+        """Initialize an ArrayLinkGraph object."""
+        # objects and their indexes
+        self._nodes: list[Entity] = []
+        self._node_ids: dict[Entity, int] = {}
+
+        # link columns, the first `self._n_rows` rows are in use
+        self._n_rows = 0
+        self._u = np.empty(0, dtype=np.int64)
+        self._v = np.empty(0, dtype=np.int64)
+        self._scores: dict[str, np.ndarray] = {}
+        # scoring parameters, one dict per scoring method
+        self._parameters: dict[str, dict] = {}
+
+        # indexes built lazily from the link columns, reset when links are added
+        self._indexed = False
+        self._sorted_keys = np.empty(0, dtype=np.int64)
+        self._sorted_edges = np.empty(0, dtype=np.int64)
+        self._adj_indptr = np.zeros(1, dtype=np.int64)
+        self._adj_nodes = np.empty(0, dtype=np.int64)
+        self._adj_edges = np.empty(0, dtype=np.int64)
+        # positions in the adjacency arrays ordering each object's neighbours by score, per
+        # scoring method
+        self._sorted_adj: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        """Get the number of objects."""
+        return len(self._nodes)
+
+    def __getstate__(self) -> dict:
+        """Drop the unused capacity and the indexes when pickling."""
+        self._build_index()
+        state = self.__dict__.copy()
+        state["_u"] = self._u[: self._n_rows].copy()
+        state["_v"] = self._v[: self._n_rows].copy()
+        state["_scores"] = {name: col[: self._n_rows].copy() for name, col in self._scores.items()}
+        state["_node_ids"] = None
+        state["_indexed"] = False
+        for name in ("_sorted_keys", "_sorted_edges", "_adj_nodes", "_adj_edges"):
+            state[name] = np.empty(0, dtype=np.int64)
+        state["_adj_indptr"] = np.zeros(1, dtype=np.int64)
+        state["_sorted_adj"] = {}
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._node_ids = {node: i for i, node in enumerate(self._nodes)}
+
+    @validate_u
+    def __getitem__(self, u: Entity) -> Mapping[Entity, LINK_DATA]:
+        """Get all links for a given object.
+
+        Args:
+            u: the given object
+
+        Returns:
+            A read-only dictionary-like view of the links for the given object, with the linked
+            objects as keys and the link data as values. The link data is created on access.
+
+        Raises:
+            KeyError: if the input object is not found in the link graph.
+        """
+        if u not in self._node_ids:
+            raise KeyError(f"{u} not found in the link graph.")
+
+        return _NeighbourView(self, u)
+
+    @property
+    def num_links(self) -> int:
+        """Get the number of links."""
+        self._build_index()
+        return self._n_rows
+
+    def _iter_links(self) -> Iterator[LINK]:
+        """Iterate over all links, creating the link data on the fly."""
+        self._build_index()
+        for e, (i, j) in enumerate(
+            zip(self._u[: self._n_rows].tolist(), self._v[: self._n_rows].tolist())
+        ):
+            yield self._nodes[i], self._nodes[j], self._link_data(e)
+
+    @validate_uv
+    def add_link(
+        self,
+        u: Entity,
+        v: Entity,
+        **data: Score,
+    ) -> None:
+        """Add a link between two objects.
+
+        If the link already exists, its scores are updated with the given data.
+
+        Args:
+            u: the first object, either a GCF, Spectrum, or MolecularFamily
+            v: the second object, either a GCF, Spectrum, or MolecularFamily
+            data: keyword arguments. At least one scoring method and its data must be provided.
+                The key must be the name of the scoring method defined in `ScoringMethod`, and the
+                value is a `Score` object, e.g. `metcalf=Score("metcalf", 1.0, {"cutoff": 0.5})`.
+
+        Raises:
+            ValueError: if no scoring data is given, if the name of a scoring method is invalid,
+                or if the score parameters differ from those of the existing links of the same
+                scoring method.
+            TypeError: if a value of `data` is not a `Score` object or its value is not numeric.
+        """
+        if not data:
+            raise ValueError("At least one scoring method and its data must be provided.")
+        # validate all scores before changing the graph
+        for key, value in data.items():
+            if not ScoringMethod.has_value(key):
+                raise ValueError(
+                    f"{key} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+                )
+            if not isinstance(value, Score):
+                raise TypeError(f"{value} is not a Score object.")
+            if not isinstance(value.value, (int, float, np.number)):
+                raise TypeError(f"{value} has a non-numeric value, which is not supported.")
+            self._check_parameter(key, value.parameter)
+
+        for key, value in data.items():
+            self._store_parameter(key, value.parameter)
+        self._append_rows(
+            np.array([self._add_node(u)], dtype=np.int64),
+            np.array([self._add_node(v)], dtype=np.int64),
+            {key: np.array([value.value], dtype=np.float64) for key, value in data.items()},
+        )
+
+    def add_links(
+        self,
+        u_nodes: Sequence[Entity],
+        v_nodes: Sequence[Entity],
+        values: Sequence | np.ndarray,
+        name: str,
+        parameter: dict,
+    ) -> None:
+        """Add links of one scoring method in bulk.
+
+        See [`LinkGraph.add_links`][nplinker.scoring.LinkGraph.add_links] for the details. The
+        values are stored as a column directly, no `Score` objects are created.
+
+        Args:
+            u_nodes: the first objects of the links, either GCF, Spectrum, or MolecularFamily
+            v_nodes: the second objects of the links, either GCF, Spectrum, or MolecularFamily
+            values: the numeric score values of the links
+            name: the name of the scoring method defined in `ScoringMethod`
+            parameter: the parameters of the scoring method, shared by all links
+
+        Raises:
+            ValueError: if the lengths of the inputs differ, if the name of the scoring method is
+                invalid, or if the parameters differ from those of the existing links of the same
+                scoring method.
+            TypeError: if any pair of objects cannot be linked or the values are not numeric.
+        """
+        validate_links(u_nodes, v_nodes, values, name)
+        try:
+            values = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise TypeError("Score values must be numeric.")
+        self._check_parameter(name, parameter)
+
+        self._store_parameter(name, parameter)
+        add_node = self._add_node
+        self._append_rows(
+            np.fromiter((add_node(u) for u in u_nodes), dtype=np.int64, count=len(u_nodes)),
+            np.fromiter((add_node(v) for v in v_nodes), dtype=np.int64, count=len(v_nodes)),
+            {name: values},
+        )
+
+    @validate_uv
+    def has_link(self, u: Entity, v: Entity) -> bool:
+        """Check if there is a link between two objects.
+
+        Args:
+            u: the first object, either a GCF, Spectrum, or MolecularFamily
+            v: the second object, either a GCF, Spectrum, or MolecularFamily
+
+        Returns:
+            True if there is a link between the two objects, False otherwise
+        """
+        return self._find_edge(u, v) is not None
+
+    @validate_uv
+    def get_link_data(
+        self,
+        u: Entity,
+        v: Entity,
+    ) -> LINK_DATA | None:
+        """Get the data for a link between two objects.
+
+        Args:
+            u: the first object, either a GCF, Spectrum, or MolecularFamily
+            v: the second object, either a GCF, Spectrum, or MolecularFamily
+
+        Returns:
+            A dictionary of scoring methods and their data for the link between the two objects, or
+            None if there is no link between the two objects.
+        """
+        e = self._find_edge(u, v)
+        if e is None:
+            return None
+        return self._link_data(e)
+
+    @validate_u
+    def top_links(
+        self, u: Entity, name: str, n: int | None = None
+    ) -> list[tuple[Entity, LINK_DATA]]:
+        """Get the links of an object sorted by the score of a scoring method.
+
+        See [`LinkGraph.top_links`][nplinker.scoring.LinkGraph.top_links] for the details. The
+        neighbours of all objects are sorted at once per scoring method, and only the link data
+        of the returned links is created.
+
+        Args:
+            u: the given object
+            name: the name of the scoring method defined in `ScoringMethod`
+            n: the maximum number of links to return. If None, return all links.
+
+        Returns:
+            A list of `(v, link_data)` tuples sorted by the score in descending order.
+
+        Raises:
+            ValueError: if the name of the scoring method is invalid.
+            KeyError: if the input object is not found in the link graph.
+        """
+        if not ScoringMethod.has_value(name):
+            raise ValueError(
+                f"{name} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+            )
+        if u not in self._node_ids:
+            raise KeyError(f"{u} not found in the link graph.")
+        if name not in self._scores:
+            return []
+
+        i = self._node_ids[u]
+        order = self._sorted_adjacency(name)
+        positions = order[self._adj_indptr[i] : self._adj_indptr[i + 1]]
+        edges = self._adj_edges[positions]
+        # links without a score of this method are sorted to the end
+        count = int(np.count_nonzero(~np.isnan(self._scores[name][edges])))
+        if n is not None:
+            count = min(n, count)
+        return [
+            (self._nodes[j], self._link_data(e))
+            for j, e in zip(self._adj_nodes[positions[:count]].tolist(), edges[:count].tolist())
+        ]
+
+    def _sorted_adjacency(self, name: str) -> np.ndarray:
+        """Get the adjacency positions with each object's neighbours sorted by score."""
+        self._build_index()
+        order = self._sorted_adj.get(name)
+        if order is None:
+            owners = np.repeat(np.arange(len(self._nodes)), np.diff(self._adj_indptr))
+            # sort by owner, then by descending score; NaN sorts last and ties keep link order
+            order = np.lexsort((-self._scores[name][self._adj_edges], owners))
+            self._sorted_adj[name] = order
+        return order
+
+    def filter(
+        self, u_nodes: Sequence[Entity], v_nodes: Sequence[Entity] = [], /
+    ) -> ArrayLinkGraph:
+        """Return a new ArrayLinkGraph object with the filtered links between the given objects.
+
+        See [`LinkGraph.filter`][nplinker.scoring.LinkGraph.filter] for the details.
+
+        Args:
+            u_nodes: a sequence of objects used as the first object in the links
+            v_nodes: a sequence of objects used as the second object in the links
+
+        Returns:
+            A new ArrayLinkGraph object with the filtered links between the given objects.
+        """
+        # exchange u_nodes and v_nodes if u_nodes is empty but v_nodes not
+        if len(u_nodes) == 0 and len(v_nodes) != 0:
+            u_nodes = v_nodes
+            v_nodes = []
+        validate_filter_nodes(u_nodes, v_nodes)
+
+        self._build_index()
+        u_ids = self._node_indexes(u_nodes)
+        if len(v_nodes) == 0:
+            _, edges = self._incident_links(u_ids)
+        else:
+            # slice the links of the side with fewer links and keep those linked to the other side
+            v_ids = self._node_indexes(v_nodes)
+            degree = np.diff(self._adj_indptr)
+            if degree[u_ids].sum() > degree[v_ids].sum():
+                u_ids, v_ids = v_ids, u_ids
+            neighbours, edges = self._incident_links(u_ids)
+            edges = edges[np.isin(neighbours, v_ids)]
+
+        return self._subgraph(np.unique(edges))
+
+    def _node_indexes(self, nodes: Sequence[Entity]) -> np.ndarray:
+        """Get the unique indexes of the given objects that are in the link graph."""
+        node_ids = self._node_ids
+        return np.unique(
+            np.fromiter((node_ids[node] for node in nodes if node in node_ids), dtype=np.int64)
+        )
+
+    def _incident_links(self, node_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Get the neighbours and links of the given objects from the adjacency arrays."""
+        starts = self._adj_indptr[node_ids]
+        lengths = self._adj_indptr[node_ids + 1] - starts
+        # positions of all adjacency segments, concatenated
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        return self._adj_nodes[positions], self._adj_edges[positions]
+
+    def _subgraph(self, edges: np.ndarray) -> ArrayLinkGraph:
+        """Create a new ArrayLinkGraph object with the given links."""
+        lg = ArrayLinkGraph()
+        u = self._u[edges]
+        v = self._v[edges]
+        node_ids, inverse = np.unique(np.concatenate((u, v)), return_inverse=True)
+        lg._nodes = [self._nodes[i] for i in node_ids.tolist()]
+        lg._node_ids = {node: i for i, node in enumerate(lg._nodes)}
+        lg._parameters = dict(self._parameters)
+        lg._append_rows(
+            inverse[: len(edges)],
+            inverse[len(edges) :],
+            {name: col[edges] for name, col in self._scores.items()},
+        )
+        return lg
+
+    def _add_node(self, node: Entity) -> int:
+        """Get the index of the object, adding the object if it does not exist."""
+        i = self._node_ids.get(node)
+        if i is None:
+            i = len(self._nodes)
+            self._node_ids[node] = i
+            self._nodes.append(node)
+        return i
+
+    def _check_parameter(self, name: str, parameter: dict) -> None:
+        """Check that the parameters agree with those stored for the scoring method."""
+        stored = self._parameters.get(name)
+        if stored is not None and stored != parameter:
+            raise ValueError(
+                f"All links of scoring method {name} must have the same parameters, "
+                f"got {parameter} but {stored} exists."
+            )
+
+    def _store_parameter(self, name: str, parameter: dict) -> None:
+        """Store the parameters of a scoring method, if not stored yet.
+
+        A copy is stored, so changing the caller's dict later does not change the links.
+        """
+        if name not in self._parameters:
+            self._parameters[name] = dict(parameter)
+
+    def _append_rows(self, u: np.ndarray, v: np.ndarray, scores: dict[str, np.ndarray]) -> None:
+        """Append links to the link columns.
+
+        Args:
+            u: indexes of the first objects
+            v: indexes of the second objects
+            scores: score columns of the new links by scoring method name, columns of the scoring
+                methods not given are filled with NaN.
+        """
+        n_new = len(u)
+        n_total = self._n_rows + n_new
+        if n_total > len(self._u):
+            capacity = max(n_total, 2 * len(self._u), 16)
+            self._u = np.resize(self._u, capacity)
+            self._v = np.resize(self._v, capacity)
+            for name, col in self._scores.items():
+                self._scores[name] = np.resize(col, capacity)
+        for name in scores:
+            if name not in self._scores:
+                self._scores[name] = np.full(len(self._u), np.nan)
+
+        self._u[self._n_rows : n_total] = u
+        self._v[self._n_rows : n_total] = v
+        for name, col in self._scores.items():
+            col[self._n_rows : n_total] = scores.get(name, np.nan)
+        self._n_rows = n_total
+        self._indexed = False
+
+    def _build_index(self) -> None:
+        """Merge duplicate links and build the lookup and adjacency indexes."""
+        if self._indexed:
+            return
+
+        n = self._n_rows
+        u = self._u[:n]
+        v = self._v[:n]
+        keys = (np.minimum(u, v) << 32) | np.maximum(u, v)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        is_first = np.ones(n, dtype=bool)
+        is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+
+        if not is_first.all():
+            # the same link was added more than once: keep the position of its first row and,
+            # per scoring method, the last score added
+            group = np.cumsum(is_first) - 1
+            first_rows = order[is_first]
+            keep = np.argsort(first_rows, kind="stable")
+            for name in self._scores:
+                col = self._scores[name][:n][order]
+                valid = ~np.isnan(col)
+                merged = np.full(len(first_rows), np.nan)
+                last_valid = np.full(len(first_rows), -1)
+                np.maximum.at(last_valid, group[valid], np.flatnonzero(valid))
+                has_value = last_valid >= 0
+                merged[has_value] = col[last_valid[has_value]]
+                self._scores[name] = merged[keep]
+            rows = first_rows[keep]
+            self._u = u[rows]
+            self._v = v[rows]
+            self._n_rows = n = len(rows)
+            u, v = self._u, self._v
+            keys = (np.minimum(u, v) << 32) | np.maximum(u, v)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+
+        self._sorted_keys = sorted_keys
+        self._sorted_edges = order
+
+        # adjacency lists in CSR layout, neighbours of each object keep the link order
+        edges = np.arange(n, dtype=np.int64)
+        ends = np.concatenate((u, v))
+        adj_order = np.argsort(ends, kind="stable")
+        self._adj_nodes = np.concatenate((v, u))[adj_order]
+        self._adj_edges = np.concatenate((edges, edges))[adj_order]
+        self._adj_indptr = np.zeros(len(self._nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ends, minlength=len(self._nodes)), out=self._adj_indptr[1:])
+
+        self._sorted_adj = {}
+        self._indexed = True
+
+    def _find_edge(self, u: Entity, v: Entity) -> int | None:
+        """Get the row of the link between two objects, or None if there is no link."""
+        i = self._node_ids.get(u)
+        j = self._node_ids.get(v)
+        if i is None or j is None:
+            return None
+        self._build_index()
+        key = (min(i, j) << 32) | max(i, j)
+        pos = int(np.searchsorted(self._sorted_keys, key))
+        if pos < len(self._sorted_keys) and self._sorted_keys[pos] == key:
+            return int(self._sorted_edges[pos])
+        return None
+
+    def _link_data(self, e: int) -> LINK_DATA:
+        """Create the `Score` objects of a link."""
+        data = {}
+        for name, col in self._scores.items():
+            value = col[e]
+            if not np.isnan(value):
+                data[name] = Score(name, float(value), self._parameters[name])
+        return data
+
+
+class _NeighbourView(Mapping):
+    """Read-only view of the links of one object in an ArrayLinkGraph."""
+
+    def __init__(self, lg: ArrayLinkGraph, u: Entity) -> None:
+        self._lg = lg
+        self._u = u
+
+    def _neighbours(self) -> np.ndarray:
+        lg = self._lg
+        lg._build_index()
+        i = lg._node_ids[self._u]
+        return lg._adj_nodes[lg._adj_indptr[i] : lg._adj_indptr[i + 1]]
+
+    def __getitem__(self, v: Entity) -> LINK_DATA:
+        e = self._lg._find_edge(self._u, v)
+        if e is None:
+            raise KeyError(v)
+        return self._lg._link_data(e)
+
+    def __iter__(self) -> Iterator[Entity]:
+        return (self._lg._nodes[j] for j in self._neighbours().tolist())
+
+    def __len__(self) -> int:
+        return len(self._neighbours())
+
+    def __contains__(self, v: object) -> bool:
+        return self._lg._find_edge(self._u, v) is not None  # type: ignore
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
@@ -1,7 +1,11 @@
 from __future__ import annotations
+from collections.abc import Collection
+from collections.abc import Iterator
+from collections.abc import Mapping
 from collections.abc import Sequence
 from functools import wraps
 from typing import Union
+import numpy as np
 from networkx import Graph
 from tabulate import tabulate
 from nplinker.genomics import GCF
@@ -41,20 +45,123 @@ def validate_uv(func):
         *args,
         **kwargs,
     ):
-        if isinstance(u, GCF):
-            if not isinstance(v, (Spectrum, MolecularFamily)):
-                raise TypeError(f"{v} is not a Spectrum or MolecularFamily object.")
-        elif isinstance(u, (Spectrum, MolecularFamily)):
-            if not isinstance(v, GCF):
-                raise TypeError(f"{v} is not a GCF object.")
-        else:
-            raise TypeError(f"{u} is not a GCF, Spectrum, or MolecularFamily object.")
-
+        _check_uv(u, v)
         return func(self, u, v, *args, **kwargs)
 
     return wrapper
 
 
+def _check_uv(u: Entity, v: Entity) -> None:
+    """Check that the u and v objects can be linked."""
+    if isinstance(u, GCF):
+        if not isinstance(v, (Spectrum, MolecularFamily)):
+            raise TypeError(f"{v} is not a Spectrum or MolecularFamily object.")
+    elif isinstance(u, (Spectrum, MolecularFamily)):
+        if not isinstance(v, GCF):
+            raise TypeError(f"{v} is not a GCF object.")
+    else:
+        raise TypeError(f"{u} is not a GCF, Spectrum, or MolecularFamily object.")
+
+
+def validate_links(
+    u_nodes: Sequence[Entity], v_nodes: Sequence[Entity], values: Sequence, name: str
+) -> None:
+    """Validate a batch of links to be added to a LinkGraph.
+
+    The object types are checked per distinct type instead of per link, so the cost is independent
+    of the number of links as long as all links go in the same direction (e.g. GCF to Spectrum).
+
+    Args:
+        u_nodes: the first objects of the links
+        v_nodes: the second objects of the links
+        values: the score values of the links
+        name: the name of the scoring method
+
+    Raises:
+        ValueError: if the lengths of the inputs differ or the name of the scoring method is
+            invalid.
+        TypeError: if any pair of objects cannot be linked.
+    """
+    if not (len(u_nodes) == len(v_nodes) == len(values)):
+        raise ValueError("u_nodes, v_nodes and values must have the same length.")
+    if not ScoringMethod.has_value(name):
+        raise ValueError(
+            f"{name} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+        )
+
+    u_types = set(map(type, u_nodes))
+    v_types = set(map(type, v_nodes))
+    gcf_types = (GCF,)
+    met_types = (Spectrum, MolecularFamily)
+    u_gcf = all(issubclass(t, gcf_types) for t in u_types)
+    v_gcf = all(issubclass(t, gcf_types) for t in v_types)
+    u_met = all(issubclass(t, met_types) for t in u_types)
+    v_met = all(issubclass(t, met_types) for t in v_types)
+    if (u_gcf and v_met) or (u_met and v_gcf):
+        return
+    # mixed directions or invalid objects, check each link to find the offending one
+    for u, v in zip(u_nodes, v_nodes):
+        _check_uv(u, v)
+
+
+def validate_filter_nodes(u_nodes: Sequence[Entity], v_nodes: Sequence[Entity]) -> None:
+    """Validate the objects used to filter a LinkGraph.
+
+    The objects are checked per distinct type: all objects must be GCF, Spectrum, or
+    MolecularFamily objects, and if both `u_nodes` and `v_nodes` are given, each type in `u_nodes`
+    must be linkable with each type in `v_nodes`.
+
+    Args:
+        u_nodes: the objects used as the first object in the links
+        v_nodes: the objects used as the second object in the links
+
+    Raises:
+        TypeError: if any object is invalid or cannot be linked with the other side.
+    """
+    u_types = {type(u): u for u in u_nodes}
+    v_types = {type(v): v for v in v_nodes}
+    for node in (*u_types.values(), *v_types.values()):
+        if not isinstance(node, (GCF, Spectrum, MolecularFamily)):
+            raise TypeError(f"{node} is not a GCF, Spectrum, or MolecularFamily object.")
+    for u in u_types.values():
+        for v in v_types.values():
+            _check_uv(u, v)
+
+
+class LinkView(Collection):
+    """A lazy, read-only view of all links in a LinkGraph.
+
+    The view does not copy the links. Its length is the number of links and is computed in
+    constant time; iterating over it yields the links as `(u, v, link_data)` tuples; and
+    `(u, v) in view` checks if there is a link between `u` and `v`.
+    """
+
+    def __init__(self, lg: LinkGraph) -> None:
+        """Initialize a LinkView object.
+
+        Args:
+            lg: the LinkGraph object to view.
+        """
+        self._lg = lg
+
+    def __len__(self) -> int:
+        """Get the number of links."""
+        return self._lg.num_links
+
+    def __iter__(self) -> Iterator[LINK]:
+        """Iterate over the links."""
+        return self._lg._iter_links()
+
+    def __contains__(self, link: object) -> bool:
+        """Check if the link `(u, v)` exists."""
+        if not isinstance(link, tuple) or len(link) != 2:
+            return False
+        try:
+            return self._lg.has_link(*link)
+        except TypeError:
+            return False
+
+
 class LinkGraph:
     """Class to represent the links between objects in NPLinker.
 
@@ -103,8 +210,15 @@ class LinkGraph:
             Get the link data between two objects:
             >>> lg.get_link_data(gcf, spectrum)
             {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})}
+
+            Get the best linked objects of an object by Metcalf score:
+            >>> lg.top_links(gcf, "metcalf", 10)
+            [(spectrum, {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})})]
         """
         self._g: Graph = Graph()
+        self._n_links = 0
+        # neighbours of objects sorted by score, cached per scoring method and object
+        self._sorted_links: dict[str, dict[Entity, list[tuple[Entity, LINK_DATA]]]] = {}
 
     def __repr__(self) -> str:
         """Return a string representation of the LinkGraph."""
@@ -114,15 +228,25 @@ class LinkGraph:
         """Get the number of objects."""
         return len(self._g)
 
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # LinkGraph objects pickled by older versions have no link count or sorting cache
+        if "_n_links" not in state:
+            self._n_links = self._g.number_of_edges()
+        if "_sorted_links" not in state:
+            self._sorted_links = {}
+
     @validate_u
-    def __getitem__(self, u: Entity) -> dict[Entity, LINK_DATA]:
+    def __getitem__(self, u: Entity) -> Mapping[Entity, LINK_DATA]:
         """Get all links for a given object.
 
         Args:
             u: the given object
 
         Returns:
-            A dictionary of links for the given object.
+            A read-only dictionary-like view of the links for the given object, with the linked
+            objects as keys and the link data as values. The view is not a copy, it reflects
+            later changes of the link graph.
 
         Raises:
             KeyError: if the input object is not found in the link graph.
@@ -132,7 +256,7 @@ class LinkGraph:
         except KeyError:
             raise KeyError(f"{u} not found in the link graph.")
 
-        return {**links}  # type: ignore
+        return links  # type: ignore
 
     @property
     def links(
@@ -147,7 +271,31 @@ class LinkGraph:
             >>> lg.links
             [(gcf, spectrum, {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})})]
         """
-        return list(self._g.edges(data=True))
+        return list(self._iter_links())
+
+    @property
+    def link_view(self) -> LinkView:
+        """Get a lazy view of all links.
+
+        Unlike `links`, the view does not copy the links, and its length is computed in
+        constant time.
+
+        Examples:
+            >>> len(lg.link_view)
+            1
+            >>> for u, v, data in lg.link_view:
+            ...     print(u, v, data)
+        """
+        return LinkView(self)
+
+    @property
+    def num_links(self) -> int:
+        """Get the number of links."""
+        return self._n_links
+
+    def _iter_links(self) -> Iterator[LINK]:
+        """Iterate over all links without copying them."""
+        return iter(self._g.edges(data=True))  # type: ignore
 
     @validate_uv
     def add_link(
@@ -182,7 +330,50 @@ class LinkGraph:
             if not isinstance(value, Score):
                 raise TypeError(f"{value} is not a Score object.")
 
+        if not self._g.has_edge(u, v):
+            self._n_links += 1
         self._g.add_edge(u, v, **data)
+        self._sorted_links.clear()
+
+    def add_links(
+        self,
+        u_nodes: Sequence[Entity],
+        v_nodes: Sequence[Entity],
+        values: Sequence | np.ndarray,
+        name: str,
+        parameter: dict,
+    ) -> None:
+        """Add links of one scoring method in bulk.
+
+        This is equivalent to calling `add_link(u, v, **{name: Score(name, value, parameter)})` for
+        each `u`, `v` and `value` in the inputs, but the inputs are validated once per batch and
+        the links are added in a single pass.
+
+        Args:
+            u_nodes: the first objects of the links, either GCF, Spectrum, or MolecularFamily
+            v_nodes: the second objects of the links, either GCF, Spectrum, or MolecularFamily
+            values: the score values of the links
+            name: the name of the scoring method defined in `ScoringMethod`
+            parameter: the parameters of the scoring method, shared by all links
+
+        Raises:
+            ValueError: if the lengths of the inputs differ or the name of the scoring method is
+                invalid.
+            TypeError: if any pair of objects cannot be linked.
+
+        Examples:
+            >>> lg.add_links([gcf1, gcf2], [spectrum1, spectrum2], [1.0, 2.0], "metcalf", {"cutoff": 0.5})
+        """
+        validate_links(u_nodes, v_nodes, values, name)
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        n_edges = self._g.number_of_edges()
+        self._g.add_edges_from(
+            (u, v, {name: Score(name, value, parameter)})
+            for u, v, value in zip(u_nodes, v_nodes, values)
+        )
+        self._n_links += self._g.number_of_edges() - n_edges
+        self._sorted_links.clear()
 
     @validate_uv
     def has_link(self, u: Entity, v: Entity) -> bool:
@@ -223,6 +414,51 @@ class LinkGraph:
         """
         return self._g.get_edge_data(u, v)  # type: ignore
 
+    @validate_u
+    def top_links(
+        self, u: Entity, name: str, n: int | None = None
+    ) -> list[tuple[Entity, LINK_DATA]]:
+        """Get the links of an object sorted by the score of a scoring method.
+
+        The links of each object are sorted once per scoring method and cached until links are
+        added, so repeated queries do not sort the links again. Links without a score of the
+        scoring method are not included.
+
+        Args:
+            u: the given object
+            name: the name of the scoring method defined in `ScoringMethod`
+            n: the maximum number of links to return. If None, return all links.
+
+        Returns:
+            A list of `(v, link_data)` tuples sorted by the score in descending order, where `v`
+            is the linked object. Links with equal scores keep the order they were added in.
+
+        Raises:
+            ValueError: if the name of the scoring method is invalid.
+            KeyError: if the input object is not found in the link graph.
+
+        Examples:
+            >>> lg.top_links(gcf, "metcalf", 10)
+            [(spectrum, {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})})]
+        """
+        if not ScoringMethod.has_value(name):
+            raise ValueError(
+                f"{name} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+            )
+        if u not in self._g:
+            raise KeyError(f"{u} not found in the link graph.")
+
+        cache = self._sorted_links.setdefault(name, {})
+        ranked = cache.get(u)
+        if ranked is None:
+            ranked = sorted(
+                ((v, data) for v, data in self._g[u].items() if name in data),
+                key=lambda link: link[1][name].value,
+                reverse=True,
+            )
+            cache[u] = ranked
+        return ranked[:n]
+
     def filter(self, u_nodes: Sequence[Entity], v_nodes: Sequence[Entity] = [], /) -> LinkGraph:
         """Return a new LinkGraph object with the filtered links between the given objects.
 
@@ -235,6 +471,9 @@ class LinkGraph:
         Note that not all objects in `u_nodes` and `v_nodes` need to be present in the original
         LinkGraph.
 
+        The cost scales with the number of links of the given objects, not with the number of
+        pairs between `u_nodes` and `v_nodes`.
+
         Args:
             u_nodes: a sequence of objects used as the first object in the links
             v_nodes: a sequence of objects used as the second object in the links
@@ -250,40 +489,30 @@ class LinkGraph:
             Filter the links between two lists of objects:
             >>> new_lg = lg.filter([gcf1, gcf2], [spectrum1, spectrum2])
         """
-        lg = LinkGraph()
-
         # exchange u_nodes and v_nodes if u_nodes is empty but v_nodes not
         if len(u_nodes) == 0 and len(v_nodes) != 0:
             u_nodes = v_nodes
             v_nodes = []
+        validate_filter_nodes(u_nodes, v_nodes)
 
+        g = self._g
         if len(v_nodes) == 0:
-            for u in u_nodes:
-                self._filter_one_node(u, lg)
-
-        for u in u_nodes:
-            for v in v_nodes:
-                self._filter_two_nodes(u, v, lg)
-
-        return lg
-
-    @validate_u
-    def _filter_one_node(self, u: Entity, lg: LinkGraph) -> None:
-        """Filter the links for a given object and add them to the new LinkGraph object."""
-        try:
-            links = self[u]
-        except KeyError:
-            pass
+            links = (
+                (u, v, data) for u in dict.fromkeys(u_nodes) if u in g for v, data in g[u].items()
+            )
         else:
-            for node2, value in links.items():
-                lg.add_link(u, node2, **value)
+            # iterate the links of the side with fewer links and look up the other side in a set
+            u_set = {u for u in u_nodes if u in g}
+            v_set = {v for v in v_nodes if v in g}
+            if sum(map(g.degree, u_set)) <= sum(map(g.degree, v_set)):
+                links = ((u, v, data) for u in u_set for v, data in g[u].items() if v in v_set)
+            else:
+                links = ((u, v, data) for v in v_set for u, data in g[v].items() if u in u_set)
 
-    @validate_uv
-    def _filter_two_nodes(self, u: Entity, v: Entity, lg: LinkGraph) -> None:
-        """Filter the links between two objects and add them to the new LinkGraph object."""
-        link_data = self.get_link_data(u, v)
-        if link_data is not None:
-            lg.add_link(u, v, **link_data)
+        lg = LinkGraph()
+        lg._g.add_edges_from(links)
+        lg._n_links = lg._g.number_of_edges()
+        return lg
 
     def _get_table_repr(self) -> str:
         """Generate a table representation of the LinkGraph.
@@ -294,7 +523,7 @@ class LinkGraph:
         table_data = []
         display_limit = 60
 
-        for index, (u, v, data) in enumerate(self.links, start=1):
+        for index, (u, v, data) in enumerate(self.link_view, start=1):
             metcalf_score = data.get("metcalf")
             rosetta_score = data.get("rosetta")
 
@@ -312,8 +541,9 @@ class LinkGraph:
 
         table = tabulate(table_data, headers=headers, tablefmt="github", stralign="right")
 
-        if len(self.links) > display_limit:
-            truncated_info = f"...\n[ {len(self.links)} links ]"
+        num_links = self.num_links
+        if num_links > display_limit:
+            truncated_info = f"...\n[ {num_links} links ]"
             return f"{table}\n{truncated_info}"
 
         return table
@@ -0,0 +1,375 @@
+from __future__ import annotations
+import json
+import logging
+import zipfile
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from itertools import islice
+from os import PathLike
+import numpy as np
+from nplinker.genomics import GCF
+from nplinker.metabolomics import Spectrum
+from .array_link_graph import ArrayLinkGraph
+from .link_graph import LINK
+from .link_graph import LinkGraph
+
+
+logger = logging.getLogger(__name__)
+
+LINK_FILE_FORMAT = "nplinker-links"
+LINK_FILE_VERSION = 1
+# columns of the object ids, the other columns are scores named by scoring method
+ID_COLUMNS = ("gcf_id", "met_type", "met_id")
+# values of the `met_type` column
+MET_TYPES = ("spectrum", "mf")
+METADATA_FILE = "metadata.json"
+
+
+class LinkWriter:
+    """Streaming writer of links to a compact columnar file.
+
+    The links are written to a zip archive of `.npy` arrays (the layout of numpy `.npz` files) in
+    chunks of a fixed number of links. Each chunk holds the columns:
+
+    - `gcf_id`: the id of the GCF of the link,
+    - `met_type`: the type of the other object, either `"spectrum"` or `"mf"`,
+    - `met_id`: the id of the Spectrum or MolecularFamily of the link,
+    - one float column per scoring method, named by the scoring method, with NaN for links without
+        a score of the method.
+
+    The scoring parameters are stored once per scoring method in the metadata of the file. Only
+    full chunks are kept in memory, so links can be written without holding all of them.
+
+    Use [`read_links`][nplinker.scoring.read_links] to read the file.
+
+    Examples:
+        >>> with LinkWriter("links.npz") as writer:
+        ...     writer.write_link_graph(lg)
+    """
+
+    def __init__(
+        self, file: str | PathLike, chunk_size: int = 100_000, compress: bool = True
+    ) -> None:
+        """Initialize the writer and create the file.
+
+        Args:
+            file: the path to the file to write.
+            chunk_size: the number of links per chunk.
+            compress: whether to compress the arrays with deflate.
+
+        Raises:
+            ValueError: if `chunk_size` is not positive.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer.")
+        self.file = str(file)
+        self.chunk_size = chunk_size
+        self._zip = zipfile.ZipFile(
+            self.file, "w", compression=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        )
+        self._parameters: dict[str, dict] = {}
+        self._chunks: list[dict] = []
+        self._num_links = 0
+        # columns not written yet, always fewer than `chunk_size` links after a write
+        self._pending: list[dict[str, np.ndarray]] = []
+        self._num_pending = 0
+
+    def __enter__(self) -> LinkWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, links: Iterable[LINK]) -> None:
+        """Write links given as `(u, v, link_data)` tuples, e.g. the items of `LinkGraph.links`.
+
+        Args:
+            links: the links to write.
+
+        Raises:
+            TypeError: if a score value is not numeric.
+            ValueError: if the parameters of a scoring method differ between links.
+        """
+        links = iter(links)
+        while batch := list(islice(links, self.chunk_size)):
+            gcf_ids, met_types, met_ids = [], [], []
+            scores: dict[str, np.ndarray] = {}
+            for i, (u, v, data) in enumerate(batch):
+                gcf, met = (u, v) if isinstance(u, GCF) else (v, u)
+                gcf_ids.append(gcf.id)
+                met_types.append("spectrum" if isinstance(met, Spectrum) else "mf")
+                met_ids.append(met.id)
+                for name, score in data.items():
+                    self._check_parameter(name, score.parameter)
+                    if name not in scores:
+                        scores[name] = np.full(len(batch), np.nan)
+                    try:
+                        scores[name][i] = score.value
+                    except (TypeError, ValueError):
+                        raise TypeError(f"{score} has a non-numeric value, which is not supported.")
+            self._append(
+                {
+                    "gcf_id": np.array(gcf_ids, dtype=str),
+                    "met_type": np.array(met_types, dtype=str),
+                    "met_id": np.array(met_ids, dtype=str),
+                    **scores,
+                }
+            )
+
+    def write_link_graph(self, lg: LinkGraph) -> None:
+        """Write all links of a LinkGraph.
+
+        The columns of an [`ArrayLinkGraph`][nplinker.scoring.ArrayLinkGraph] are written directly,
+        without creating the link data of each link.
+
+        Args:
+            lg: the LinkGraph object.
+
+        Raises:
+            TypeError: if a score value is not numeric.
+            ValueError: if the parameters of a scoring method differ between links.
+        """
+        if not isinstance(lg, ArrayLinkGraph):
+            self.write(lg.link_view)
+            return
+
+        lg._build_index()
+        for name, parameter in lg._parameters.items():
+            self._check_parameter(name, parameter)
+        node_ids = np.array([node.id for node in lg._nodes], dtype=str)
+        is_gcf = np.array([isinstance(node, GCF) for node in lg._nodes], dtype=bool)
+        met_types = np.where(
+            np.array([isinstance(node, Spectrum) for node in lg._nodes], dtype=bool),
+            "spectrum",
+            "mf",
+        )
+        for start in range(0, lg._n_rows, self.chunk_size):
+            end = min(start + self.chunk_size, lg._n_rows)
+            u = lg._u[start:end]
+            v = lg._v[start:end]
+            gcf = np.where(is_gcf[u], u, v)
+            met = np.where(is_gcf[u], v, u)
+            self._append(
+                {
+                    "gcf_id": node_ids[gcf],
+                    "met_type": met_types[met],
+                    "met_id": node_ids[met],
+                    **{name: col[start:end] for name, col in lg._scores.items()},
+                }
+            )
+
+    def close(self) -> None:
+        """Write the remaining links and the metadata, and close the file."""
+        if self._zip.fp is None:
+            return
+        if self._num_pending:
+            self._write_chunk(self._num_pending)
+        metadata = {
+            "format": LINK_FILE_FORMAT,
+            "version": LINK_FILE_VERSION,
+            "chunk_size": self.chunk_size,
+            "num_links": self._num_links,
+            "methods": self._parameters,
+            "chunks": self._chunks,
+        }
+        self._zip.writestr(METADATA_FILE, json.dumps(metadata, default=str))
+        self._zip.close()
+        logger.info(f"Wrote {self._num_links} links in {len(self._chunks)} chunks to {self.file}")
+
+    def _check_parameter(self, name: str, parameter: dict) -> None:
+        """Check that the parameters agree with those stored for the scoring method."""
+        stored = self._parameters.setdefault(name, parameter)
+        if stored is not parameter and stored != parameter:
+            raise ValueError(
+                f"All links of scoring method {name} must have the same parameters, "
+                f"got {parameter} but {stored} exists."
+            )
+
+    def _append(self, columns: dict[str, np.ndarray]) -> None:
+        """Add columns of links and write all full chunks."""
+        self._pending.append(columns)
+        self._num_pending += len(columns["gcf_id"])
+        while self._num_pending >= self.chunk_size:
+            self._write_chunk(self.chunk_size)
+
+    def _write_chunk(self, size: int) -> None:
+        """Write the first `size` pending links as a chunk."""
+        if len(self._pending) == 1:
+            columns = self._pending[0]
+        else:
+            names = dict.fromkeys(name for cols in self._pending for name in cols)
+            columns = {
+                name: np.concatenate(
+                    [
+                        cols[name] if name in cols else np.full(len(cols["gcf_id"]), np.nan)
+                        for cols in self._pending
+                    ]
+                )
+                for name in names
+            }
+
+        chunk_name = f"chunk{len(self._chunks):05d}"
+        for name, col in columns.items():
+            with self._zip.open(f"{chunk_name}/{name}.npy", "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(col[:size]), allow_pickle=False)
+        self._chunks.append({"name": chunk_name, "num_links": size, "columns": list(columns)})
+        self._num_links += size
+
+        self._num_pending -= size
+        self._pending = [{name: col[size:] for name, col in columns.items()}]
+        if self._num_pending == 0:
+            self._pending = []
+
+
+def write_links(lg: LinkGraph, file: str | PathLike, chunk_size: int = 100_000) -> None:
+    """Write all links of a LinkGraph to a columnar file.
+
+    See [`LinkWriter`][nplinker.scoring.LinkWriter] for the file format.
+
+    Args:
+        lg: the LinkGraph object.
+        file: the path to the file to write.
+        chunk_size: the number of links per chunk.
+
+    Examples:
+        >>> write_links(lg, "links.npz")
+    """
+    with LinkWriter(file, chunk_size) as writer:
+        writer.write_link_graph(lg)
+
+
+def read_links_metadata(file: str | PathLike) -> dict:
+    """Read the metadata of a file written by `LinkWriter`.
+
+    Args:
+        file: the path to the file.
+
+    Returns:
+        A dict with the keys `num_links`, `chunk_size`, `methods` (parameters by scoring method
+        name) and `chunks`, among others.
+
+    Raises:
+        ValueError: if the file is not a link file.
+    """
+    with zipfile.ZipFile(file) as zf:
+        return _read_metadata(zf)
+
+
+def read_links(
+    file: str | PathLike,
+    columns: Sequence[str] | None = None,
+    gcf_ids: Iterable[str] | None = None,
+    met_ids: Iterable[str] | None = None,
+    met_type: str | None = None,
+) -> dict[str, np.ndarray]:
+    """Read links from a file written by `LinkWriter`.
+
+    Only the requested columns are read, plus the id columns needed to select the requested
+    objects. The file is read chunk by chunk.
+
+    Args:
+        file: the path to the file.
+        columns: the columns to read, `gcf_id`, `met_type`, `met_id` or the name of a scoring
+            method. If None, read all columns.
+        gcf_ids: if given, only read the links of the GCFs with these ids.
+        met_ids: if given, only read the links of the Spectra or MolecularFamilies with these ids.
+            The ids are matched across both types, so a Spectrum and a MolecularFamily with the
+            same id are both selected unless `met_type` is given.
+        met_type: if given, only read the links of this type of object, `"spectrum"` or `"mf"`.
+
+    Returns:
+        A dict with column names as keys and numpy arrays as values. Score columns have NaN for
+        links without a score of the scoring method.
+
+    Raises:
+        ValueError: if the file is not a link file, a column is not found or `met_type` is
+            invalid.
+
+    Examples:
+        Read the Metcalf scores of the links of two GCFs:
+        >>> links = read_links("links.npz", ["gcf_id", "met_id", "metcalf"], gcf_ids=["1", "2"])
+        >>> links["metcalf"]
+        array([2.3, 1.5])
+    """
+    gcf_id_array = None if gcf_ids is None else np.array(list(gcf_ids), dtype=str)
+    met_id_array = None if met_ids is None else np.array(list(met_ids), dtype=str)
+    if met_type is not None and met_type not in MET_TYPES:
+        raise ValueError(f"Invalid met_type {met_type}, expected one of {MET_TYPES}.")
+
+    with zipfile.ZipFile(file) as zf:
+        metadata = _read_metadata(zf)
+        all_columns = [*ID_COLUMNS, *metadata["methods"]]
+        if columns is None:
+            columns = all_columns
+        for name in columns:
+            if name not in all_columns:
+                raise ValueError(f"Column {name} not found, available columns are {all_columns}.")
+
+        parts: dict[str, list[np.ndarray]] = {name: [] for name in columns}
+        for chunk in _iter_chunks(zf, metadata, columns, gcf_id_array, met_id_array, met_type):
+            for name in columns:
+                parts[name].append(chunk[name])
+
+    return {
+        name: np.concatenate(arrays)
+        if arrays
+        else np.empty(0, dtype=np.float64 if name not in ID_COLUMNS else str)
+        for name, arrays in parts.items()
+    }
+
+
+def _read_metadata(zf: zipfile.ZipFile) -> dict:
+    """Read and check the metadata of a link file."""
+    try:
+        metadata = json.loads(zf.read(METADATA_FILE))
+    except KeyError:
+        raise ValueError(f"{zf.filename} is not a link file, {METADATA_FILE} not found.")
+    if metadata.get("format") != LINK_FILE_FORMAT:
+        raise ValueError(f"{zf.filename} is not a link file.")
+    if metadata.get("version") != LINK_FILE_VERSION:
+        raise ValueError(
+            f"Unsupported link file version {metadata.get('version')}, "
+            f"expected {LINK_FILE_VERSION}."
+        )
+    return metadata
+
+
+def _iter_chunks(
+    zf: zipfile.ZipFile,
+    metadata: dict,
+    columns: Sequence[str],
+    gcf_ids: np.ndarray | None,
+    met_ids: np.ndarray | None,
+    met_type: str | None,
+) -> Iterator[dict[str, np.ndarray]]:
+    """Iterate over the chunks of a link file, yielding the selected links of each chunk."""
+
+    def read_column(chunk: dict, name: str) -> np.ndarray:
+        if name not in chunk["columns"]:
+            return np.full(chunk["num_links"], np.nan)
+        with zf.open(f"{chunk['name']}/{name}.npy") as f:
+            return np.lib.format.read_array(f, allow_pickle=False)
+
+    for chunk in metadata["chunks"]:
+        loaded: dict[str, np.ndarray] = {}
+        mask = None
+        if gcf_ids is not None:
+            loaded["gcf_id"] = read_column(chunk, "gcf_id")
+            mask = np.isin(loaded["gcf_id"], gcf_ids)
+        if met_ids is not None:
+            loaded["met_id"] = read_column(chunk, "met_id")
+            met_mask = np.isin(loaded["met_id"], met_ids)
+            mask = met_mask if mask is None else mask & met_mask
+        if met_type is not None:
+            loaded["met_type"] = read_column(chunk, "met_type")
+            type_mask = loaded["met_type"] == met_type
+            mask = type_mask if mask is None else mask & type_mask
+        if mask is not None and not mask.any():
+            continue
+
+        selected = {}
+        for name in columns:
+            col = loaded[name] if name in loaded else read_column(chunk, name)
+            selected[name] = col if mask is None else col[mask]
+        yield selected
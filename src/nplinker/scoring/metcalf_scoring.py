@@ -11,13 +11,10 @@ from scipy.stats import hypergeom
 from nplinker.genomics import GCF
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
+from nplinker.registry import EntityRegistry
 from .abc import ScoringBase
 from .link_graph import LinkGraph
-from .link_graph import Score
 from .scoring_method import ScoringMethod
-from .utils import get_presence_gcf_strain
-from .utils import get_presence_mf_strain
-from .utils import get_presence_spec_strain
 
 
 if TYPE_CHECKING:
@@ -72,6 +69,10 @@ class MetcalfScoring(ScoringBase):
         metcalf_std: A numpy array to store the standard deviation value used for standardising
             Metcalf scores. The array has shape (n_strains+1, n_strains+1), where n_strains is the
             number of strains.
+
+    The scores are computed and looked up as integer arrays indexed by the dense indexes of
+    [`npl.registry`][nplinker.NPLinker.registry], the DataFrames above are views of the same data
+    keyed by objects.
     """
 
     name = ScoringMethod.METCALF.value
@@ -90,6 +91,12 @@ class MetcalfScoring(ScoringBase):
     metcalf_mean: np.ndarray | None = None
     metcalf_std: np.ndarray | None = None
 
+    # the registry of the objects and the raw score matrices indexed by the registry indexes,
+    # shape (n_spectra, n_gcfs) and (n_mfs, n_gcfs)
+    _registry: EntityRegistry | None = None
+    _raw_score_spec_gcf: np.ndarray = np.empty((0, 0), dtype=np.int64)
+    _raw_score_mf_gcf: np.ndarray = np.empty((0, 0), dtype=np.int64)
+
     @classmethod
     def setup(cls, npl: NPLinker) -> None:
         """Setup the MetcalfScoring object.
@@ -108,23 +115,36 @@ class MetcalfScoring(ScoringBase):
             f"#spectra={len(npl.spectra)}, #mfs={len(npl.mfs)}, #strains={npl.strains}"
         )
         cls.npl = npl
+        registry = npl.registry
+        cls._registry = registry
+        gcfs = registry.gcfs.objects
+        spectra = registry.spectra.objects
+        mfs = registry.mfs.objects
+        strains = registry.strains.objects
 
         # calculate presence of gcfs/spectra/mfs with respect to strains
-        cls.presence_gcf_strain = get_presence_gcf_strain(npl.gcfs, npl.strains)
-        cls.presence_spec_strain = get_presence_spec_strain(npl.spectra, npl.strains)
-        cls.presence_mf_strain = get_presence_mf_strain(npl.mfs, npl.strains)
+        presence_gcf_strain = registry.strain_presence(GCF)
+        presence_spec_strain = registry.strain_presence(Spectrum)
+        presence_mf_strain = registry.strain_presence(MolecularFamily)
+        cls.presence_gcf_strain = pd.DataFrame(presence_gcf_strain, index=gcfs, columns=strains)
+        cls.presence_spec_strain = pd.DataFrame(
+            presence_spec_strain, index=spectra, columns=strains
+        )
+        cls.presence_mf_strain = pd.DataFrame(presence_mf_strain, index=mfs, columns=strains)
 
         # calculate raw Metcalf scores for spec-gcf links
-        raw_score_spec_gcf = cls._calc_raw_score(
-            cls.presence_spec_strain, cls.presence_gcf_strain, cls.metcalf_weights
+        cls._raw_score_spec_gcf = cls._calc_raw_score(
+            presence_spec_strain, presence_gcf_strain, cls.metcalf_weights
         )
+        raw_score_spec_gcf = pd.DataFrame(cls._raw_score_spec_gcf, index=spectra, columns=gcfs)
         cls.raw_score_spec_gcf = raw_score_spec_gcf.reset_index().melt(id_vars="index")
         cls.raw_score_spec_gcf.columns = ["spec", "gcf", "score"]  # type: ignore
 
-        # calculate raw Metcalf scores for spec-gcf links
-        raw_score_mf_gcf = cls._calc_raw_score(
-            cls.presence_mf_strain, cls.presence_gcf_strain, cls.metcalf_weights
+        # calculate raw Metcalf scores for mf-gcf links
+        cls._raw_score_mf_gcf = cls._calc_raw_score(
+            presence_mf_strain, presence_gcf_strain, cls.metcalf_weights
         )
+        raw_score_mf_gcf = pd.DataFrame(cls._raw_score_mf_gcf, index=mfs, columns=gcfs)
         cls.raw_score_mf_gcf = raw_score_mf_gcf.reset_index().melt(id_vars="index")
         cls.raw_score_mf_gcf.columns = ["mf", "gcf", "score"]  # type: ignore
 
@@ -185,28 +205,26 @@ class MetcalfScoring(ScoringBase):
             f"MetcalfScoring: #objects={len(objects)}, type={obj_type}, cutoff={self._cutoff}, "
             f"standardised={self._standardised}"
         )
-        if not self._standardised:
-            scores_list = self._get_links(*objects, obj_type=obj_type, score_cutoff=self._cutoff)
-        else:
-            if self.metcalf_mean is None or self.metcalf_std is None:
-                raise ValueError(
-                    "MetcalfScoring.metcalf_mean and metcalf_std are not set. Run MetcalfScoring.setup first."
-                )
-            # use negative infinity as the score cutoff to ensure we get all links
-            scores_list = self._get_links(*objects, obj_type=obj_type, score_cutoff=-np.inf)
-            scores_list = self._calc_standardised_score(scores_list)
+        if self._standardised and (self.metcalf_mean is None or self.metcalf_std is None):
+            raise ValueError(
+                "MetcalfScoring.metcalf_mean and metcalf_std are not set. Run MetcalfScoring.setup first."
+            )
+        scores_list = self._get_links(*objects, obj_type=obj_type, score_cutoff=self._cutoff)
 
         links = LinkGraph()
-        for score_df in scores_list:
-            for row in score_df.itertuples(index=False):  # row has attributes: spec/mf, gcf, score
-                met = row.spec if score_df.name == LinkType.SPEC_GCF else row.mf
-                links.add_link(
-                    row.gcf,
-                    met,
-                    metcalf=Score(self.name, row.score, parameters),
-                )
-
-        logger.info(f"MetcalfScoring: completed! Found {len(links.links)} links in total.")
+        for link_type, gcf_indexes, met_indexes, scores in scores_list:
+            met_index = (
+                self._registry.spectra if link_type == LinkType.SPEC_GCF else self._registry.mfs  # type: ignore
+            )
+            links.add_links(
+                self._registry.gcfs.take(gcf_indexes),  # type: ignore
+                met_index.take(met_indexes),
+                scores,
+                self.name,
+                parameters,
+            )
+
+        logger.info(f"MetcalfScoring: completed! Found {links.num_links} links in total.")
         return links
 
     # TODO CG: refactor this method
@@ -223,17 +241,17 @@ class MetcalfScoring(ScoringBase):
 
     @staticmethod
     def _calc_raw_score(
-        p1: pd.DataFrame, p2: pd.DataFrame, weights: tuple[int, int, int, int]
-    ) -> pd.DataFrame:
+        p1: np.ndarray, p2: np.ndarray, weights: tuple[int, int, int, int]
+    ) -> np.ndarray:
         """Calculate non-standardised Metcalf scores.
 
         Args:
-            p1: A DataFrame containing the presence of objects in strains.
-            p2: A DataFrame containing the presence of objects in strains.
+            p1: A matrix containing the presence of objects (rows) in strains (columns).
+            p2: A matrix containing the presence of objects (rows) in strains (columns).
             weights: The weights to use for Metcalf scoring.
 
         Returns:
-            A DataFrame containing the non-standardised Metcalf scores.
+            A matrix of shape (len(p1), len(p2)) containing the non-standardised Metcalf scores.
         """
         nop1 = 1 - p1
         nop2 = 1 - p2
@@ -296,11 +314,14 @@ class MetcalfScoring(ScoringBase):
     def _get_links(
         self,
         *objects: Entity,
-        obj_type: Entity,
+        obj_type: type[Entity],
         score_cutoff: float = 0,
-    ) -> list[pd.DataFrame]:
+    ) -> list[tuple[LinkType, np.ndarray, np.ndarray, np.ndarray]]:
         """Get links and scores for the given objects.
 
+        Scores are standardised if `self._standardised` is True, and the cutoff is applied to the
+        standardised scores. Objects that are not in the registry have no links.
+
         Args:
             objects: A list of GCF, Spectrum or MolecularFamily objects and all objects must be of
                 the same type.
@@ -308,76 +329,58 @@ class MetcalfScoring(ScoringBase):
             score_cutoff: Minimum score to consider a link (≥score_cutoff). Default is 0.
 
         Returns:
-            List of data frames containing the ids of the linked objects and the score.
-
-            The data frame is named by link types, see `LinkType`. It has column names of
-            ['spec', 'gcf', 'score'] or ['mf', 'gcf', 'score'] depending on the link type:
-
-            - the 'spec', 'mf' or 'gcf' column contains the Spectrum, MolecularFamily or GCF objects,
-            - the 'score' column contains the scores.
+            List of links, one item per link type (see `LinkType`). Each item is a tuple of the
+            link type, the registry indexes of the GCFs, the registry indexes of the spectra or
+            molecular families and the scores of the links.
         """
-        links = []
-        col_name = (
-            "spec" if obj_type == Spectrum else "mf" if obj_type == MolecularFamily else "gcf"
-        )
+        registry = self._registry
+        indexes = registry[obj_type].indexes(objects)  # type: ignore
+        indexes = indexes[indexes >= 0]
 
-        # spec-gcf link
-        if obj_type in (GCF, Spectrum):
-            df = self.raw_score_spec_gcf[
-                self.raw_score_spec_gcf[col_name].isin(objects)
-                & (self.raw_score_spec_gcf["score"] >= score_cutoff)
-            ]
-            df.name = LinkType.SPEC_GCF
-            links.append(df)
-
-        # mf-gcf link
-        if obj_type in (GCF, MolecularFamily):
-            df = self.raw_score_mf_gcf[
-                self.raw_score_mf_gcf[col_name].isin(objects)
-                & (self.raw_score_mf_gcf["score"] >= score_cutoff)
-            ]
-            df.name = LinkType.MF_GCF
-            links.append(df)
+        links = []
+        for link_type, met_type, raw_score in (
+            (LinkType.SPEC_GCF, Spectrum, self._raw_score_spec_gcf),
+            (LinkType.MF_GCF, MolecularFamily, self._raw_score_mf_gcf),
+        ):
+            if obj_type not in (GCF, met_type):
+                continue
+            n_met, n_gcf = raw_score.shape
+            gcf_indexes = indexes if obj_type == GCF else np.arange(n_gcf)
+            met_indexes = indexes if obj_type == met_type else np.arange(n_met)
+
+            # scores with one row per gcf and one column per spectrum or molecular family
+            scores = raw_score.T[np.ix_(gcf_indexes, met_indexes)]
+            if self._standardised:
+                scores = self._calc_standardised_score(scores, gcf_indexes, met_indexes, met_type)
+
+            rows, cols = np.nonzero(scores >= score_cutoff)
+            links.append((link_type, gcf_indexes[rows], met_indexes[cols], scores[rows, cols]))
 
         return links
 
-    def _calc_standardised_score(self, raw_scores: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    def _calc_standardised_score(
+        self,
+        raw_scores: np.ndarray,
+        gcf_indexes: np.ndarray,
+        met_indexes: np.ndarray,
+        met_type: type[Spectrum] | type[MolecularFamily],
+    ) -> np.ndarray:
         """Calculate standardised Metcalf scores.
 
         Args:
-            raw_scores: A list of DataFrames containing the raw Metcalf scores.
+            raw_scores: A matrix of raw Metcalf scores, with one row per gcf and one column per
+                spectrum or molecular family.
+            gcf_indexes: The registry indexes of the GCFs of the rows.
+            met_indexes: The registry indexes of the spectra or molecular families of the columns.
+            met_type: The type of the objects of the columns, `Spectrum` or `MolecularFamily`.
 
         Returns:
-            A list of DataFrames containing the standardised Metcalf scores.
+            A matrix of the standardised Metcalf scores, in the same shape as `raw_scores`.
         """
-        standardised_scores = []
-        for raw_score_df in raw_scores:
-            # create a new DataFrame to store the standardised scores, with the same columns
-            # and name as the raw score DataFrame
-            standardised_score_df = pd.DataFrame(columns=raw_score_df.columns)
-
-            for row in raw_score_df.itertuples(index=False):
-                met = row.spec if raw_score_df.name == LinkType.SPEC_GCF else row.mf
-                n_gcf_strains = len(row.gcf.strains)  # type: ignore
-                n_met_strains = len(met.strains)  # type: ignore
-
-                mean = self.metcalf_mean[n_met_strains][n_gcf_strains]  # type: ignore
-                sqrt = self.metcalf_std[n_met_strains][n_gcf_strains]  # type: ignore
-
-                z_score = (row.score - mean) / sqrt
-
-                if z_score >= self._cutoff:
-                    # add the row to the standardised score DataFrame with the z-score as score value
-                    data = {col_name: getattr(row, col_name) for col_name in raw_score_df.columns}
-                    data["score"] = z_score
-                    new_row = pd.DataFrame(data, index=[0])
-                    standardised_score_df = pd.concat(
-                        (standardised_score_df, new_row), ignore_index=True
-                    )
-                else:
-                    continue
-
-            standardised_score_df.name = raw_score_df.name
-            standardised_scores.append(standardised_score_df)
-
-        return standardised_scores
+        n_gcf_strains = self._registry.strain_counts(GCF)[gcf_indexes]  # type: ignore
+        n_met_strains = self._registry.strain_counts(met_type)[met_indexes]  # type: ignore
+
+        mean = self.metcalf_mean[n_met_strains[np.newaxis, :], n_gcf_strains[:, np.newaxis]]  # type: ignore
+        sqrt = self.metcalf_std[n_met_strains[np.newaxis, :], n_gcf_strains[:, np.newaxis]]  # type: ignore
+
+        return (raw_scores - mean) / sqrt
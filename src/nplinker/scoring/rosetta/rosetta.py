@@ -14,13 +14,16 @@
 import csv
 import logging
 import os
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import nullcontext
 from nplinker.defaults import NPLINKER_APP_DATA_DIR
 from nplinker.scoring.rosetta.rosetta_hit import RosettaHit
 from ...genomics import BGC
 from ...parsers.kcb import KCBJSONParser
 from ...parsers.kcb import KCBTextParser
-from ...pickler import load_pickled_data
-from ...pickler import save_pickled_data
+from .rosetta_cache import RosettaCache
 from .spec_lib import SpecLib
 
 
@@ -35,8 +38,14 @@ class Rosetta:
 
     PARAM_VERSION = 1
 
-    def __init__(self, nplinker, ignore_genomic_cache=False):
+    # the number of spectra whose scores are stored in the cache at once
+    SPEC_SCORES_BATCH_SIZE = 1000
+
+    def __init__(self, nplinker, ignore_genomic_cache=False, max_workers=None):
         self._nplinker = nplinker
+        # number of worker threads used to collect BGC hits, None for the default of
+        # ThreadPoolExecutor
+        self._max_workers = max_workers
         self._mgf_data = {}
         self._csv_data = {}
         self._mgf_path = os.path.join(NPLINKER_APP_DATA_DIR, "matched_mibig_gnps_update.mgf")
@@ -45,14 +54,11 @@ class Rosetta:
         self._root_path = nplinker.root_dir
         self._dataset_id = nplinker.dataset_id
         self._ignore_genomic_cache = ignore_genomic_cache
-        self._pickle_dir = os.path.join(nplinker.root_dir, "rosetta")
-        if not os.path.exists(self._pickle_dir):
-            os.makedirs(self._pickle_dir, exist_ok=True)
-        self._speclib_pickle_path = os.path.join(self._pickle_dir, "SpecLib.pckl")
-        self._spechits_pickle_path = os.path.join(self._pickle_dir, "spec_hits.pckl")
-        self._bgchits_pickle_path = os.path.join(self._pickle_dir, "bgc_hits.pckl")
-        self._rhits_pickle_path = os.path.join(self._pickle_dir, "RosettaHits.pckl")
-        self._params_pickle_path = os.path.join(self._pickle_dir, "RosettaParams.pckl")
+        self._cache_dir = os.path.join(nplinker.root_dir, "rosetta")
+        if not os.path.exists(self._cache_dir):
+            os.makedirs(self._cache_dir, exist_ok=True)
+        self._cache_path = os.path.join(self._cache_dir, "rosetta_cache.sqlite")
+        self._cache = None
 
         if not os.path.exists(self._mgf_path):
             logger.warning(
@@ -74,6 +80,13 @@ class Rosetta:
         self._spec_hits = None
         self._bgc_hits = None
 
+        # the cache is invalidated when the Rosetta data version or the spectral library changes
+        mgf_stat = os.stat(self._mgf_path)
+        self._cache = RosettaCache(
+            self._cache_path,
+            f"{Rosetta.PARAM_VERSION}:{mgf_stat.st_size}:{mgf_stat.st_mtime_ns}",
+        )
+
     @property
     def bgc_hits(self):
         return self._bgc_hits
@@ -104,35 +117,44 @@ class Rosetta:
                     self._mibig2gnps[mibig] = [gnps]
 
     def _generate_spec_hits(self, spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        spec_hits = {}
+        """Score the given spectra against the SpecLib and store the scores in the cache."""
+        param_key = RosettaCache.param_key(ms1_tol, ms2_tol, min_match_peaks)
+        # the scores are stored in batches, so that an interrupted run keeps most of its work
+        spec_scores = {}
         for i, sp in enumerate(spectra):
-            hits = self.speclib.spectral_match(
+            spec_scores[sp.id] = self.speclib.spectral_match(
                 sp,
                 ms2_tol=ms2_tol,
                 min_match_peaks=min_match_peaks,
                 ms1_tol=ms1_tol,
                 score_thresh=score_thresh,
             )
-            if len(hits) > 0:
-                spec_hits[sp] = hits
+            if len(spec_scores) >= self.SPEC_SCORES_BATCH_SIZE:
+                self._cache.add_spec_scores(spec_scores, param_key, score_thresh)
+                spec_scores = {}
             if i % 100 == 0:
                 logger.info("Searching for spectral hits {}/{}".format(i, len(spectra)))
-
-        save_pickled_data(spec_hits, self._spechits_pickle_path)
-        return spec_hits
+        if spec_scores:
+            self._cache.add_spec_scores(spec_scores, param_key, score_thresh)
 
     def _generate_speclib(self):
-        logger.warning("No pickle SpecLib found, generating (this will take some time!)...")
+        logger.warning("No cached SpecLib found, generating (this will take some time!)...")
         self.speclib = SpecLib(self._mgf_path)
         self.speclib._load_mgf()
         self.speclib.filter()
 
         logger.info("Finished generating SpecLib")
 
-        save_pickled_data(self.speclib, self._speclib_pickle_path)
+        self._cache.set_speclib(self.speclib)
 
     def _generate_bgc_hits(self, bgcs):
-        self._bgc_hits = {}
+        """Collect knownclusterblast hits for the given BGCs and store them in the cache.
+
+        Returns:
+            The number of knownclusterblast files or directories that could not be parsed.
+        """
+        bgc_hits = {}
+        failed_bgcs = set()
         errors = 0
 
         # this method is a bit messy because it tries to handle a couple of different
@@ -156,10 +178,10 @@ class Rosetta:
         # go through the list of all available BGCs (ignoring MiBIGBGC instances) and
         # group them by the directory they appear in
         bgc_groups = {}
-        skipped, errors = 0, 0
+        skipped = 0
 
         for bgc in bgcs:
-            if bgc.antismash_file is None or isinstance(bgc, BGC):
+            if bgc.antismash_file is None or bgc.is_mibig():
                 skipped += 1
                 continue
 
@@ -171,159 +193,80 @@ class Rosetta:
 
         logger.debug("{} BGC groups based on filenames".format(len(bgc_groups)))
 
-        for prefix, prefix_bgcs in bgc_groups.items():
-            logger.debug(
-                "Attempting to parse JSON data for prefix {} with {} BGCs".format(
-                    prefix, len(prefix_bgcs)
-                )
-            )
-            # preferred option is to parse the results for the whole group using the
-            # JSON file, but this may not be available...
-            json_hits = KCBJSONParser(prefix_bgcs).parse_hits()
-            matched_bgcs = {}
-
-            if json_hits is not None:
-                # number of hits can often be less than number of BGCs (e.g. if no significant hits found)
-                sum_hits = sum(len(json_hits[x]) for x in json_hits)
-                logger.debug(
-                    "JSON parsing was successful! Returned {} hits from {} BGCs".format(
-                        sum_hits, len(prefix_bgcs)
-                    )
-                )
-
-                # unlike the KCBTextParser where each set of results is easy to link
-                # back to the appropriate BGC object, here we need to do some extra work
-                # to ensure we have everything matched up correctly.
-                #
-                # seems like the best way to do this is to rely on the BGC attributes
-                # parsed from the .gbks during the loading process (including region
-                # numbers) as these should match up directly with the JSON data.
-
-                for pbgc in prefix_bgcs:
-                    # the "normal" case appears to be that you'll have a directory
-                    # containing multiple gbks with the same accession and different
-                    # region numbers, e.g. ABC123.region001, ABC123.region002, ...
-                    # and should be able to expect that every "hit" comes from a
-                    # .gbk that exists in the directory.
-                    #
-                    # in ideal circumstances, the json_hits structure will end up
-                    # containing a single top level accession (ABC123) and then
-                    # at the next level down one region number for each of the
-                    # BGCs with signficant hits. this makes matching BGC objects
-                    # quite simple.
-                    #
-                    # however in other cases there appear to be a mix of accession
-                    # IDs in the same antiSMASH directory. so you can have collections
-                    # where the filenames are e.g. ABC123.region001, DEF456.region001,
-                    # GHI789.region001, ... (including multiple regions for the same
-                    # accession). this is more difficult to handle because the JSON
-                    # data isn't a direct match with that parsed from the .gbks
-                    # themselves. for example, the gbk might report a region number of
-                    # 7 while the corresponding JSON result has a region number of 1.
-                    # possible workaround is to take the gbk region number and check
-                    # if it appears in the filename of the gbk???
-
-                    if pbgc.antismash_id in json_hits:
-                        # simplest case where there's a direct match on region number
-                        if pbgc.antismash_region in json_hits[pbgc.antismash_id]:
-                            logger.debug(
-                                "Matched {} using {} + region{:03d}!".format(
-                                    pbgc.antismash_file, pbgc.antismash_id, pbgc.antismash_region
-                                )
-                            )
-                            if pbgc not in matched_bgcs:
-                                matched_bgcs[pbgc] = {}
-
-                            hit = json_hits[pbgc.antismash_id][pbgc.antismash_region]
-                            matched_bgcs[pbgc][hit["mibig_id"]] = hit
-                            continue
-                        else:
-                            # if the above case doesn't apply, check through every
-                            # region number available for the antismash ID we have,
-                            # and check if the original filename contains that region
-                            # number. if so assume it is the correct match.
-                            for region in json_hits[pbgc.antismash_id]:
-                                if pbgc.antismash_file.endswith(
-                                    "region{:03d}.gbk".format(pbgc.antismash_region)
-                                ):
-                                    logger.debug(
-                                        "Matched {} using fallback {} + region{:03d} (orig={})".format(
-                                            pbgc.antismash_file,
-                                            pbgc.antismash_id,
-                                            region,
-                                            pbgc.antismash_region,
-                                        )
-                                    )
-                                    if pbgc not in matched_bgcs:
-                                        matched_bgcs[pbgc] = {}
-
-                                    hit = json_hits[pbgc.antismash_id][region]
-                                    matched_bgcs[pbgc][hit["mibig_id"]] = hit
-                                    break
-                    else:
-                        # this could simply mean no significant hits found
-                        logger.info(
-                            "Found no matching hits for BGC ID={}, region={}, file={}".format(
-                                pbgc.antismash_id, pbgc.antismash_region, pbgc.antismash_file
-                            )
-                        )
+        bgc_dict = {bgc.id: bgc for bgc in bgcs}
 
-            else:
-                # ... if JSON parsing failed, fall back to the original text parser. this
-                # must be called on each BGC individually
-                logger.debug("JSON parsing failed, falling back to text instead")
-                for i, bgc in enumerate(prefix_bgcs):
-                    kcb_name = KCBTextParser.get_kcb_filename_from_bgc(bgc)
-                    if kcb_name is not None:
-                        try:
-                            parser = KCBTextParser(kcb_name)
-                            if len(parser.hits) > 0:
-                                matched_bgcs[bgc] = parser.hits
-                        except Exception as e:
-                            logger.warning(e)
-                            errors += 1
-
-            logger.debug("Found matches for {}/{} bgcs".format(len(matched_bgcs), len(prefix_bgcs)))
-            if len(matched_bgcs) != len(prefix_bgcs):
-                # not necessarily fatal but probably not good either
-                logger.warning(
-                    "Failed to match {} BGCs to hits in directory {}!".format(
-                        len(prefix_bgcs) - len(matched_bgcs), prefix
-                    )
-                )
-
-            # now insert the matched hits into the _bgc_hits structure so the original code
-            # below can parse them in the same way as the text parser results
-            self._bgc_hits.update(matched_bgcs)
-
-        # make reverse dict
-        self._mibig2bgc = {}
-        for bgc, hits in self._bgc_hits.items():
-            for mibig_bgc_id in hits:
-                if mibig_bgc_id not in self._mibig2bgc:
-                    self._mibig2bgc[mibig_bgc_id] = set()
-                self._mibig2bgc[mibig_bgc_id].add(bgc)
+        def submit(executor, prefix, prefix_bgcs):
+            bgc_attrs = [
+                (bgc.id, bgc.antismash_file, bgc.antismash_id, bgc.antismash_region)
+                for bgc in prefix_bgcs
+            ]
+            if executor is not None:
+                return executor.submit(_collect_group_hits, prefix, bgc_attrs)
+            future = Future()
+            try:
+                future.set_result(_collect_group_hits(prefix, bgc_attrs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        # the groups are independent of each other, so parse them concurrently. the parsing is
+        # mostly reading files, so threads are used. a failure in one group only affects the
+        # BGCs of that group
+        pool = (
+            ThreadPoolExecutor(max_workers=self._max_workers)
+            if len(bgc_groups) > 1
+            else nullcontext()
+        )
+        with pool as executor:
+            futures = {
+                submit(executor, prefix, prefix_bgcs): (prefix, prefix_bgcs)
+                for prefix, prefix_bgcs in bgc_groups.items()
+            }
+            for future in as_completed(futures):
+                prefix, prefix_bgcs = futures[future]
+                try:
+                    group_hits, group_failed_ids, group_errors = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to collect BGC hits in directory {prefix}: {e}")
+                    failed_bgcs.update(prefix_bgcs)
+                    errors += 1
+                    continue
+                bgc_hits.update({bgc_dict[bgc_id]: hits for bgc_id, hits in group_hits.items()})
+                failed_bgcs.update(bgc_dict[bgc_id] for bgc_id in group_failed_ids)
+                errors += group_errors
 
-        logger.info(f"Completed, {len(self._bgc_hits)} BGC hits found")
+        logger.info(f"Completed, {len(bgc_hits)} BGC hits found")
         if errors > 0:
             logger.warning(
                 "Some knownclusterblast files could not be loaded, results may be incomplete"
             )
-        save_pickled_data((self._bgc_hits, self._mibig2bgc), self._bgchits_pickle_path)
+
+        # BGCs that failed to parse are not marked as scanned, so they are retried next time
+        self._cache.add_bgc_hits(
+            {bgc.id: hits for bgc, hits in bgc_hits.items()},
+            (bgc.id for bgc in bgcs if bgc not in failed_bgcs),
+        )
+        return errors
 
     def _collect_rosetta_hits(self):
         self._rosetta_hits = []
         bgc_summary_scores = self.generate_bgc_summary_scores()
+
+        # the (mibig_id, bgc, bgc_score) targets of a GNPS library spectrum are the same for
+        # every spectrum that hits it, so they are only looked up once per GNPS id
+        gnps_targets = {}
         for spec, data in self._spec_hits.items():
             for gnps_id, score in data:
-                for mibig_id in self._gnps2mibig[gnps_id]:
-                    if mibig_id in self._mibig2bgc:
-                        for bgc in self._mibig2bgc[mibig_id]:
-                            # get the bgc score
-                            bgc_score = bgc_summary_scores[bgc][mibig_id]
-                            self._rosetta_hits.append(
-                                RosettaHit(spec, gnps_id, mibig_id, bgc, score, bgc_score)
-                            )
+                if gnps_id not in gnps_targets:
+                    gnps_targets[gnps_id] = [
+                        (mibig_id, bgc, bgc_summary_scores[bgc][mibig_id])
+                        for mibig_id in self._gnps2mibig.get(gnps_id, [])
+                        for bgc in self._mibig2bgc.get(mibig_id, [])
+                    ]
+                for mibig_id, bgc, bgc_score in gnps_targets[gnps_id]:
+                    self._rosetta_hits.append(
+                        RosettaHit(spec, gnps_id, mibig_id, bgc, score, bgc_score)
+                    )
         logger.info(f"Found {len(self._rosetta_hits)} rosetta hits!")
 
     def generate_bgc_summary_scores(self):
@@ -362,33 +305,20 @@ class Rosetta:
         return processed
 
     def run(self, spectra, bgcs, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        """Function which actually computes the rosetta score somehow."""
-        params_ok = self._load_cached_params(ms1_tol, ms2_tol, score_thresh, min_match_peaks)
-
-        # if any parameters have been changed or version mismatch found, delete all cached files
-        if not params_ok:
-            self._clear_cache(ms1_tol, ms2_tol, score_thresh, min_match_peaks)
-
-            self.speclib = None
-            self._spec_hits = None
-            self._bgc_hits = None
-            self._rosetta_hits = []
-
-        # next, try to load the cached rosetta_hits list. if parameters were invalidated above,
-        # the file will have been deleted and this will fail
-        logger.info("Trying to load cached Rosetta hits data")
-        cached_rosetta_hits = load_pickled_data(self._nplinker, self._rhits_pickle_path)
-        if cached_rosetta_hits is not None:
-            logger.info(
-                "Loaded cached Rosetta hits for dataset {} at {}".format(
-                    self._dataset_id, self._rhits_pickle_path
-                )
+        """Function which actually computes the rosetta score somehow.
+
+        Intermediate results are cached per spectrum and per BGC (see `RosettaCache`), so only
+        spectra and BGCs that have not been processed before are scored or parsed. Changing
+        `score_thresh` only re-filters the cached spectral scores, unless it is lowered below the
+        threshold used to generate them.
+        """
+        logger.debug(
+            "ms1_tol={:.3f}, ms2_tol={:.3f}, score_thresh={:.3f}, min_match_peaks={:d}".format(
+                ms1_tol, ms2_tol, score_thresh, min_match_peaks
             )
-            self._rosetta_hits = cached_rosetta_hits
-            return self._rosetta_hits
+        )
+        self._rosetta_hits = []
 
-        # if we get this far, it means regenerating some/all of the required data structures.
-        #
         # create the _gnps2mibig and _mibig2gnps dicts if not already done
         if self._mibig2gnps is None or self._gnps2mibig is None:
             logger.info("Constructing GNPS/MiBIG dicts")
@@ -400,28 +330,17 @@ class Rosetta:
         if len(self._bgc_hits) == 0:
             logger.warning("Aborting Rosetta scoring data generation, no BGC hits were found!")
             # create an empty rosetta_hits.csv file
-            self.export_to_csv(os.path.join(self._pickle_dir, "rosetta_hits.csv"))
+            self.export_to_csv(os.path.join(self._cache_dir, "rosetta_hits.csv"))
             return self._rosetta_hits
 
-        logger.info("No cached Rosetta hits data found")
-
-        self._init_speclib(spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks)
-
         self._init_spec_hits(spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks)
 
         # finally construct the list of rosetta hits
         self._collect_rosetta_hits()
 
-        # export cached data for future runs
-        save_pickled_data(self._rosetta_hits, self._rhits_pickle_path)
-        save_pickled_data(
-            (Rosetta.PARAM_VERSION, ms1_tol, ms2_tol, score_thresh, min_match_peaks),
-            self._params_pickle_path,
-        )
-
         # automatically export CSV file containing hit data to <dataset>/rosetta
-        # along with the pickled data
-        self.export_to_csv(os.path.join(self._pickle_dir, "rosetta_hits.csv"))
+        # along with the cached data
+        self.export_to_csv(os.path.join(self._cache_dir, "rosetta_hits.csv"))
 
         return self._rosetta_hits
 
@@ -429,105 +348,72 @@ class Rosetta:
         """Collect BGC hits. this is done first because the SpecLib generation below can take
         several minutes and is a waste of time if the knownclusterblast files required for
         the genomics data aren't available in the current dataset.
+
+        Only BGCs that are not in the cache yet are parsed.
         """
-        cached_bgc_hits = load_pickled_data(self._nplinker, self._bgchits_pickle_path)
-        if cached_bgc_hits is not None and not self._ignore_genomic_cache:
-            logger.info("Found pickled bgc_hits for dataset {}!".format(self._dataset_id))
-            self._bgc_hits, self._mibig2bgc = cached_bgc_hits
+        if self._ignore_genomic_cache:
+            self._cache.clear_bgc_hits()
+
+        scanned_ids = self._cache.get_scanned_bgc_ids()
+        new_bgcs = [bgc for bgc in bgcs if bgc.id not in scanned_ids]
+        if new_bgcs:
+            logger.info(f"Generating BGC hits for {len(new_bgcs)} BGCs")
+            self._generate_bgc_hits(new_bgcs)
         else:
-            logger.info("Generating BGC hits")
-            self._generate_bgc_hits(bgcs)
+            logger.info("Found cached bgc_hits for dataset {}!".format(self._dataset_id))
+
+        bgc_dict = {bgc.id: bgc for bgc in bgcs}
+        self._bgc_hits = {
+            bgc_dict[bgc_id]: hits
+            for bgc_id, hits in self._cache.get_bgc_hits().items()
+            if bgc_id in bgc_dict
+        }
+
+        # make reverse dict
+        self._mibig2bgc = {}
+        for bgc, hits in self._bgc_hits.items():
+            for mibig_bgc_id in hits:
+                if mibig_bgc_id not in self._mibig2bgc:
+                    self._mibig2bgc[mibig_bgc_id] = set()
+                self._mibig2bgc[mibig_bgc_id].add(bgc)
 
     def _init_spec_hits(self, spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        spec_hits = load_pickled_data(self._nplinker, self._spechits_pickle_path)
-        if spec_hits is not None:
-            logger.info(
-                "Found pickled spectral hits for dataset {} at {}".format(
-                    self._dataset_id, self._spechits_pickle_path
-                )
+        """Get the spectral hits, scoring only the spectra without usable cached scores."""
+        param_key = RosettaCache.param_key(ms1_tol, ms2_tol, min_match_peaks)
+        spec_ids = self._cache.get_spectra_to_score(
+            (sp.id for sp in spectra), param_key, score_thresh
+        )
+        if spec_ids:
+            # no cached spectral hits available for some spectra, generate (and cache)
+            logger.info(f"Generating spectral hits for {len(spec_ids)} spectra")
+            self._init_speclib()
+            spec_ids = set(spec_ids)
+            self._generate_spec_hits(
+                [sp for sp in spectra if sp.id in spec_ids],
+                ms1_tol,
+                ms2_tol,
+                score_thresh,
+                min_match_peaks,
             )
-            self._spec_hits = spec_hits
+        else:
+            logger.info("Found cached spectral hits for dataset {}".format(self._dataset_id))
 
-        if self._spec_hits is None:
-            # no cached spectral hits available, generate (and cache)
-            logger.info("Generating spectral hits")
-            self._spec_hits = self._generate_spec_hits(
-                spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks
-            )
+        spec_hits = self._cache.get_spec_hits(param_key, score_thresh)
+        self._spec_hits = {sp: spec_hits[sp.id] for sp in spectra if sp.id in spec_hits}
 
-        logger.info(
-            "SpecLib has {} spectra, {} hits".format(
-                self.speclib.get_n_spec(), len(self._spec_hits)
-            )
-        )
+        logger.info("Found {} spectra with spectral hits".format(len(self._spec_hits)))
 
-    def _init_speclib(self, spectra, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        """Next is the metabolomic part. check if we have a pickled SpecLib object..."""
-        speclib = load_pickled_data(self._nplinker, self._speclib_pickle_path)
-        if speclib is not None:
-            logger.info(
-                "Found pickled SpecLib for dataset {} at {}!".format(
-                    self._dataset_id, self._speclib_pickle_path
-                )
-            )
-            self.speclib = speclib
+    def _init_speclib(self):
+        """Next is the metabolomic part. check if we have a cached SpecLib object..."""
+        if self.speclib is None:
+            self.speclib = self._cache.get_speclib()
+            if self.speclib is not None:
+                logger.info("Found cached SpecLib for dataset {}!".format(self._dataset_id))
 
         if self.speclib is None:
             # no cached speclib available, generate (and cache)
             logger.info("Generating SpecLib")
-            self._generate_speclib(spectra)
-
-    def _load_cached_params(self, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        """Check if cached parameters exist, and if so check they match the
-        supplied ones. if not, need to regenerate any pickled data files.
-        """
-        params = load_pickled_data(self._nplinker, self._params_pickle_path)
-        params_ok = False
-
-        if params is not None:
-            try:
-                if params[0] != Rosetta.PARAM_VERSION:
-                    logger.warning(
-                        "Rosetta: pickled data version mismatch (old {}, new {})".format(
-                            params[0], Rosetta.PARAM_VERSION
-                        )
-                    )
-                else:
-                    _version, _ms1_tol, _ms2_tol, _score_thresh, _min_match_peaks = params
-
-                    if (
-                        ms1_tol == _ms1_tol
-                        and ms2_tol == _ms2_tol
-                        and score_thresh == _score_thresh
-                        and min_match_peaks == _min_match_peaks
-                    ):
-                        # params only valid if all of these match up
-                        params_ok = True
-
-            except Exception as e:
-                logger.warning(f"Failed to parse pickled Rosetta parameters: {e}")
-
-        return params_ok
-
-    def _clear_cache(self, ms1_tol, ms2_tol, score_thresh, min_match_peaks):
-        logger.info(
-            "SpecLib parameters have been changed or do not exist, regenerating cached data files!"
-        )
-        logger.debug(
-            "ms1_tol={:.3f}, ms2_tol={:.3f}, score_thresh={:.3f}, min_match_peaks={:d}".format(
-                ms1_tol, ms2_tol, score_thresh, min_match_peaks
-            )
-        )
-        for path in [
-            self._bgchits_pickle_path,
-            self._spechits_pickle_path,
-            self._rhits_pickle_path,
-            self._params_pickle_path,
-            self._speclib_pickle_path,
-            os.path.join(self._pickle_dir, "rosetta_hits.csv"),
-        ]:
-            if os.path.exists(path):
-                os.unlink(path)
+            self._generate_speclib()
 
     def export_to_csv(self, filename):
         # convenience method for exporting a full set of rosetta hits to a CSV file
@@ -556,3 +442,156 @@ class Rosetta:
                         hit.bgc_match_score,
                     ]
                 )
+
+
+def _collect_group_hits(prefix, bgc_attrs):
+    """Collect knownclusterblast hits for the BGCs from one antiSMASH directory.
+
+    This function runs in a worker thread, so it takes the BGC attributes it needs and parses
+    them with its own BGC objects, instead of using the loaded BGC objects from several threads.
+
+    Args:
+        prefix: the antiSMASH directory
+        bgc_attrs: a list of (id, antismash_file, antismash_id, antismash_region) tuples, one for
+            each BGC in the directory
+
+    Returns:
+        A tuple of (hits keyed by BGC id, ids of BGCs whose files could not be parsed, the
+        number of parsing errors).
+    """
+    prefix_bgcs = []
+    for bgc_id, antismash_file, antismash_id, antismash_region in bgc_attrs:
+        bgc = BGC(bgc_id)
+        bgc.antismash_file = antismash_file
+        bgc.antismash_id = antismash_id
+        bgc.antismash_region = antismash_region
+        prefix_bgcs.append(bgc)
+
+    failed_bgcs = set()
+    errors = 0
+
+    logger.debug(
+        "Attempting to parse JSON data for prefix {} with {} BGCs".format(prefix, len(prefix_bgcs))
+    )
+    # preferred option is to parse the results for the whole group using the
+    # JSON file, but this may not be available...
+    json_hits = KCBJSONParser(prefix_bgcs).parse_hits()
+    matched_bgcs = {}
+
+    if json_hits is not None:
+        # number of hits can often be less than number of BGCs (e.g. if no significant hits found)
+        sum_hits = sum(len(json_hits[x]) for x in json_hits)
+        logger.debug(
+            "JSON parsing was successful! Returned {} hits from {} BGCs".format(
+                sum_hits, len(prefix_bgcs)
+            )
+        )
+
+        # unlike the KCBTextParser where each set of results is easy to link
+        # back to the appropriate BGC object, here we need to do some extra work
+        # to ensure we have everything matched up correctly.
+        #
+        # seems like the best way to do this is to rely on the BGC attributes
+        # parsed from the .gbks during the loading process (including region
+        # numbers) as these should match up directly with the JSON data.
+
+        for pbgc in prefix_bgcs:
+            # the "normal" case appears to be that you'll have a directory
+            # containing multiple gbks with the same accession and different
+            # region numbers, e.g. ABC123.region001, ABC123.region002, ...
+            # and should be able to expect that every "hit" comes from a
+            # .gbk that exists in the directory.
+            #
+            # in ideal circumstances, the json_hits structure will end up
+            # containing a single top level accession (ABC123) and then
+            # at the next level down one region number for each of the
+            # BGCs with signficant hits. this makes matching BGC objects
+            # quite simple.
+            #
+            # however in other cases there appear to be a mix of accession
+            # IDs in the same antiSMASH directory. so you can have collections
+            # where the filenames are e.g. ABC123.region001, DEF456.region001,
+            # GHI789.region001, ... (including multiple regions for the same
+            # accession). this is more difficult to handle because the JSON
+            # data isn't a direct match with that parsed from the .gbks
+            # themselves. for example, the gbk might report a region number of
+            # 7 while the corresponding JSON result has a region number of 1.
+            # possible workaround is to take the gbk region number and check
+            # if it appears in the filename of the gbk???
+
+            if pbgc.antismash_id in json_hits:
+                # simplest case where there's a direct match on region number
+                if pbgc.antismash_region in json_hits[pbgc.antismash_id]:
+                    logger.debug(
+                        "Matched {} using {} + region{:03d}!".format(
+                            pbgc.antismash_file, pbgc.antismash_id, pbgc.antismash_region
+                        )
+                    )
+                    if pbgc not in matched_bgcs:
+                        matched_bgcs[pbgc] = {}
+
+                    hit = json_hits[pbgc.antismash_id][pbgc.antismash_region]
+                    matched_bgcs[pbgc][hit["mibig_id"]] = hit
+                    continue
+                else:
+                    # if the above case doesn't apply, check through every
+                    # region number available for the antismash ID we have,
+                    # and check if the original filename contains that region
+                    # number. if so assume it is the correct match.
+                    for region in json_hits[pbgc.antismash_id]:
+                        if pbgc.antismash_file.endswith(
+                            "region{:03d}.gbk".format(pbgc.antismash_region)
+                        ):
+                            logger.debug(
+                                "Matched {} using fallback {} + region{:03d} (orig={})".format(
+                                    pbgc.antismash_file,
+                                    pbgc.antismash_id,
+                                    region,
+                                    pbgc.antismash_region,
+                                )
+                            )
+                            if pbgc not in matched_bgcs:
+                                matched_bgcs[pbgc] = {}
+
+                            hit = json_hits[pbgc.antismash_id][region]
+                            matched_bgcs[pbgc][hit["mibig_id"]] = hit
+                            break
+            else:
+                # this could simply mean no significant hits found
+                logger.info(
+                    "Found no matching hits for BGC ID={}, region={}, file={}".format(
+                        pbgc.antismash_id, pbgc.antismash_region, pbgc.antismash_file
+                    )
+                )
+
+    else:
+        # ... if JSON parsing failed, fall back to the original text parser. this
+        # must be called on each BGC individually
+        logger.debug("JSON parsing failed, falling back to text instead")
+        for i, bgc in enumerate(prefix_bgcs):
+            kcb_name = KCBTextParser.get_kcb_filename_from_bgc(bgc)
+            if kcb_name is not None:
+                try:
+                    parser = KCBTextParser(kcb_name)
+                    if len(parser.hits) > 0:
+                        matched_bgcs[bgc] = parser.hits
+                except Exception as e:
+                    logger.warning(e)
+                    failed_bgcs.add(bgc)
+                    errors += 1
+
+    logger.debug("Found matches for {}/{} bgcs".format(len(matched_bgcs), len(prefix_bgcs)))
+    if len(matched_bgcs) != len(prefix_bgcs):
+        # not necessarily fatal but probably not good either
+        logger.warning(
+            "Failed to match {} BGCs to hits in directory {}!".format(
+                len(prefix_bgcs) - len(matched_bgcs), prefix
+            )
+        )
+
+    # key the results by BGC id, as the BGC objects here are only copies of the originals
+    return (
+        {bgc.id: hits for bgc, hits in matched_bgcs.items()},
+        [bgc.id for bgc in failed_bgcs],
+        errors,
+    )
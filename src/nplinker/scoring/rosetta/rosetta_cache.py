@@ -0,0 +1,253 @@
+from __future__ import annotations
+import json
+import logging
+import pickle
+import sqlite3
+from collections.abc import Iterable
+from collections.abc import Mapping
+from os import PathLike
+
+
+logger = logging.getLogger(__name__)
+
+
+class RosettaCache:
+    """Persistent store of Rosetta spectral scores, BGC hits and the spectral library.
+
+    The data is kept in a SQLite database with one row per spectrum or BGC, so the cache can be
+    updated incrementally instead of being regenerated as a whole.
+
+    Spectral scores are keyed by the spectrum id and the parameters that decide which library
+    spectra are compared and how (`ms1_tol`, `ms2_tol` and `min_match_peaks`). The score threshold
+    is not part of the key. Each scored spectrum records the lowest threshold (`score_floor`) used
+    to generate its scores, and all scores above that floor are stored. A later request with an
+    equal or higher `score_thresh` is served by filtering the stored scores; only a lower
+    threshold requires rescoring.
+
+    BGC hits (parsed knownclusterblast results) do not depend on any scoring parameter and are
+    stored per BGC id.
+
+    Attributes:
+        db_file: Path to the SQLite database file.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS scored_spectra (
+        spec_id TEXT NOT NULL,
+        param_key TEXT NOT NULL,
+        score_floor REAL NOT NULL,
+        PRIMARY KEY (spec_id, param_key)
+    );
+    CREATE TABLE IF NOT EXISTS spec_scores (
+        spec_id TEXT NOT NULL,
+        param_key TEXT NOT NULL,
+        gnps_id TEXT NOT NULL,
+        score REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_spec_scores ON spec_scores (param_key, spec_id);
+    CREATE TABLE IF NOT EXISTS scanned_bgcs (
+        bgc_id TEXT PRIMARY KEY
+    );
+    CREATE TABLE IF NOT EXISTS bgc_hits (
+        bgc_id TEXT NOT NULL,
+        mibig_id TEXT NOT NULL,
+        hit TEXT NOT NULL,
+        PRIMARY KEY (bgc_id, mibig_id)
+    );
+    CREATE TABLE IF NOT EXISTS speclib (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        data BLOB NOT NULL
+    );
+    """
+
+    def __init__(self, db_file: str | PathLike, version: str) -> None:
+        """Open (and create if needed) the Rosetta cache.
+
+        Args:
+            db_file: Path to the SQLite database file.
+            version: A string identifying the inputs the cache was built from, e.g. the Rosetta
+                data version and the fingerprint of the spectral library file. If it does not match
+                the version stored in an existing database, all cached data is removed.
+        """
+        self.db_file = str(db_file)
+        self._conn = sqlite3.connect(self.db_file)
+        self._conn.executescript(self.SCHEMA)
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is not None and row[0] != version:
+            logger.info(f"Rosetta cache version changed ({row[0]} -> {version}), clearing cache")
+            self.clear()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,)
+            )
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def clear(self) -> None:
+        """Remove all cached data."""
+        with self._conn:
+            for table in ("scored_spectra", "spec_scores", "scanned_bgcs", "bgc_hits", "speclib"):
+                self._conn.execute(f"DELETE FROM {table}")
+
+    def clear_bgc_hits(self) -> None:
+        """Remove all cached BGC hits."""
+        with self._conn:
+            self._conn.execute("DELETE FROM scanned_bgcs")
+            self._conn.execute("DELETE FROM bgc_hits")
+
+    @staticmethod
+    def param_key(ms1_tol: float, ms2_tol: float, min_match_peaks: int) -> str:
+        """Build the key of the parameters that spectral scores depend on."""
+        return json.dumps([float(ms1_tol), float(ms2_tol), int(min_match_peaks)])
+
+    # Spectral scores
+
+    def get_spectra_to_score(
+        self, spec_ids: Iterable[str], param_key: str, score_thresh: float
+    ) -> list[str]:
+        """Get the ids of spectra whose scores are not available in the cache.
+
+        A spectrum needs scoring if it has never been scored with the given parameters, or if it
+        has only been scored with a threshold higher than `score_thresh`.
+
+        Args:
+            spec_ids: Ids of the spectra to check.
+            param_key: The parameter key, see `param_key`.
+            score_thresh: The score threshold to be applied.
+
+        Returns:
+            A list of spectrum ids, in the same order as the input.
+        """
+        floors = dict(
+            self._conn.execute(
+                "SELECT spec_id, score_floor FROM scored_spectra WHERE param_key = ?", (param_key,)
+            )
+        )
+        return [
+            spec_id
+            for spec_id in spec_ids
+            if spec_id not in floors or floors[spec_id] > score_thresh
+        ]
+
+    def add_spec_scores(
+        self,
+        spec_scores: Mapping[str, Iterable[tuple[str, float]]],
+        param_key: str,
+        score_floor: float,
+    ) -> None:
+        """Store the scores of spectra, replacing any scores of these spectra cached before.
+
+        All spectra are written in a single transaction, so storing the scores of many spectra
+        at once is much faster than storing them one by one.
+
+        Args:
+            spec_scores: A dict with spectrum ids as keys and lists of (GNPS library id, score)
+                as values, all scores must be ≥ `score_floor`.
+            param_key: The parameter key, see `param_key`.
+            score_floor: The score threshold used to generate the scores.
+        """
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM spec_scores WHERE spec_id = ? AND param_key = ?",
+                ((spec_id, param_key) for spec_id in spec_scores),
+            )
+            self._conn.executemany(
+                "INSERT INTO spec_scores (spec_id, param_key, gnps_id, score) VALUES (?, ?, ?, ?)",
+                (
+                    (spec_id, param_key, gnps_id, float(score))
+                    for spec_id, scores in spec_scores.items()
+                    for gnps_id, score in scores
+                ),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scored_spectra (spec_id, param_key, score_floor) "
+                "VALUES (?, ?, ?)",
+                ((spec_id, param_key, score_floor) for spec_id in spec_scores),
+            )
+
+    def get_spec_hits(
+        self, param_key: str, score_thresh: float
+    ) -> dict[str, list[tuple[str, float]]]:
+        """Get the cached spectral hits with scores ≥ `score_thresh`.
+
+        Args:
+            param_key: The parameter key, see `param_key`.
+            score_thresh: The minimum score of a hit.
+
+        Returns:
+            A dict with spectrum ids as keys and lists of (GNPS library id, score) as values.
+            Spectra without any hits are not included.
+        """
+        spec_hits: dict[str, list[tuple[str, float]]] = {}
+        rows = self._conn.execute(
+            "SELECT spec_id, gnps_id, score FROM spec_scores "
+            "WHERE param_key = ? AND score >= ? ORDER BY rowid",
+            (param_key, score_thresh),
+        )
+        for spec_id, gnps_id, score in rows:
+            spec_hits.setdefault(spec_id, []).append((gnps_id, score))
+        return spec_hits
+
+    # BGC hits
+
+    def get_scanned_bgc_ids(self) -> set[str]:
+        """Get the ids of all BGCs whose knownclusterblast results have been collected."""
+        return {row[0] for row in self._conn.execute("SELECT bgc_id FROM scanned_bgcs")}
+
+    def add_bgc_hits(self, bgc_hits: dict[str, dict], scanned_bgc_ids: Iterable[str]) -> None:
+        """Store BGC hits and mark BGCs as scanned.
+
+        Args:
+            bgc_hits: A dict with BGC ids as keys and dicts of {MIBiG id: hit} as values.
+            scanned_bgc_ids: Ids of all BGCs that were processed, including those without hits.
+        """
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scanned_bgcs (bgc_id) VALUES (?)",
+                ((bgc_id,) for bgc_id in scanned_bgc_ids),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bgc_hits (bgc_id, mibig_id, hit) VALUES (?, ?, ?)",
+                (
+                    (bgc_id, mibig_id, json.dumps(hit, default=list))
+                    for bgc_id, hits in bgc_hits.items()
+                    for mibig_id, hit in hits.items()
+                ),
+            )
+
+    def get_bgc_hits(self) -> dict[str, dict]:
+        """Get all cached BGC hits.
+
+        Returns:
+            A dict with BGC ids as keys and dicts of {MIBiG id: hit} as values.
+        """
+        bgc_hits: dict[str, dict] = {}
+        for bgc_id, mibig_id, hit in self._conn.execute(
+            "SELECT bgc_id, mibig_id, hit FROM bgc_hits"
+        ):
+            bgc_hits.setdefault(bgc_id, {})[mibig_id] = json.loads(hit)
+        return bgc_hits
+
+    # Spectral library
+
+    def get_speclib(self):
+        """Get the cached spectral library, or None if not cached."""
+        row = self._conn.execute("SELECT data FROM speclib WHERE id = 0").fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def set_speclib(self, speclib) -> None:
+        """Cache the spectral library."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO speclib (id, data) VALUES (0, ?)",
+                (pickle.dumps(speclib, protocol=pickle.HIGHEST_PROTOCOL),),
+            )
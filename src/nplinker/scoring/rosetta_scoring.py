@@ -1,5 +1,6 @@
 import itertools
 import logging
+from collections import defaultdict
 from nplinker.genomics.bgc import BGC
 from nplinker.genomics.gcf import GCF
 from nplinker.metabolomics import MolecularFamily
@@ -17,8 +18,14 @@ class RosettaScoring(ScoringBase):
     name = ScoringMethod.ROSETTA.value
     ROSETTA_OBJ = None
 
+    # indexes of Rosetta hits, built once in `setup` so that looking up links for a set of
+    # objects only touches the hits of these objects
+    HITS_BY_SPEC: dict = {}
+    HITS_BY_BGC: dict = {}
+    HITS_BY_GCF: dict = {}
+
     def __init__(self, npl):
-        super().__init__(npl)
+        self.npl = npl
         self.bgc_to_gcf = True
 
         self.spec_score_cutoff = 0.0
@@ -42,8 +49,24 @@ class RosettaScoring(ScoringBase):
         )
 
         cls.ROSETTA_OBJ.run(npl.spectra, npl.bgcs, ms1_tol, ms2_tol, score_thresh, min_match_peaks)
+        cls._build_hit_indexes(cls.ROSETTA_OBJ._rosetta_hits)
         logger.info("RosettaScoring setup completed")
 
+    @classmethod
+    def _build_hit_indexes(cls, hits):
+        """Index the Rosetta hits by spectrum id, BGC id and GCF id."""
+        hits_by_spec = defaultdict(list)
+        hits_by_bgc = defaultdict(list)
+        hits_by_gcf = defaultdict(list)
+        for hit in hits:
+            hits_by_spec[hit.spec.id].append(hit)
+            hits_by_bgc[hit.bgc.id].append(hit)
+            for gcf in hit.bgc.parents:
+                hits_by_gcf[gcf.id].append(hit)
+        cls.HITS_BY_SPEC = dict(hits_by_spec)
+        cls.HITS_BY_BGC = dict(hits_by_bgc)
+        cls.HITS_BY_GCF = dict(hits_by_gcf)
+
     @staticmethod
     def _init_from_config(config):
         """Allow overridding params via config file."""
@@ -70,8 +93,7 @@ class RosettaScoring(ScoringBase):
             results[src] = {}
         # Rosetta can produce multiple "hits" per link
         if hit.spec in results[src]:
-            original_data = results[src][hit.spec].data(self)
-            results[src][hit.spec].set_data(self, original_data + [hit])
+            results[src][hit.spec].value.append(hit)
         else:
             results[src][hit.spec] = Score(name=self.name, value=[hit], parameter=self._params)
 
@@ -82,8 +104,7 @@ class RosettaScoring(ScoringBase):
             results[spec] = {}
         # Rosetta can produce multiple "hits" per link
         if target in results[spec]:
-            original_data = results[spec][target].data(self)
-            results[spec][target].set_data(self, original_data + [hit])
+            results[spec][target].value.append(hit)
         else:
             results[spec][target] = Score(name=self.name, value=[hit], parameter=self._params)
 
@@ -95,63 +116,70 @@ class RosettaScoring(ScoringBase):
 
         self._validate_inputs(objects)
 
+        results = {}
         if isinstance(objects[0], GCF):
-            # assume user wants to use all BGCs from these GCFs
-            bgcs = list(set(itertools.chain.from_iterable(x.bgcs for x in objects)))
-            logger.info(
-                "RosettaScoring got {} GCFs input, converted to {} BGCs".format(
-                    len(objects), len(bgcs)
+            if self.bgc_to_gcf:
+                # the GCF index directly gives the hits of all BGCs in these GCFs
+                results = self._collect_results_gcf(objects, results)
+            else:
+                # assume user wants to use all BGCs from these GCFs
+                bgcs = list(set(itertools.chain.from_iterable(x.bgcs for x in objects)))
+                logger.info(
+                    "RosettaScoring got {} GCFs input, converted to {} BGCs".format(
+                        len(objects), len(bgcs)
+                    )
                 )
-            )
-            objects = bgcs
-
-        # list of RosettaHit objects which satisfy the current cutoffs
-        ro_hits = list(
-            filter(lambda hit: self._include_hit(hit), RosettaScoring.ROSETTA_OBJ._rosetta_hits)
-        )
-
-        # TODO this might need to be faster
-        results = {}
-        if isinstance(objects[0], BGC):
-            results = self._collect_results_bgc(objects, ro_hits, results)
+                results = self._collect_results_bgc(bgcs, results)
+        elif isinstance(objects[0], BGC):
+            results = self._collect_results_bgc(objects, results)
         else:  # Spectrum
-            results = self._collect_results_spectra(objects, ro_hits, results)
+            results = self._collect_results_spectra(objects, results)
         logger.debug(f"RosettaScoring found {len(results)} results")
 
         lg = LinkGraph()
         for src, links in results.items():
             for target, score in links.items():
-                lg.add_link(src, target, score)
+                lg.add_link(src, target, **{self.name: score})
         return lg
 
-    def _collect_results_spectra(self, objects, ro_hits, results):
+    def _collect_results_spectra(self, objects, results):
         for spec in objects:
-            for hit in ro_hits:
-                if spec.id == hit.spec.id:
-                    if not self.bgc_to_gcf:
-                        # can use the BGC directly
-                        results = self._insert_result_met(results, spec, hit.bgc, hit)
-                    else:
-                        # if we want the results to contain GCFs instead, need
-                        # to iterate over the set of bgc.parents (most will only
-                        # have one, hybrid BGCs will have more)
-                        for gcf in hit.bgc.parents:
-                            results = self._insert_result_met(results, spec, gcf, hit)
+            # only the hits which satisfy the current cutoffs are used
+            for hit in RosettaScoring.HITS_BY_SPEC.get(spec.id, []):
+                if not self._include_hit(hit):
+                    continue
+                if not self.bgc_to_gcf:
+                    # can use the BGC directly
+                    results = self._insert_result_met(results, spec, hit.bgc, hit)
+                else:
+                    # if we want the results to contain GCFs instead, need
+                    # to iterate over the set of bgc.parents (most will only
+                    # have one, hybrid BGCs will have more)
+                    for gcf in hit.bgc.parents:
+                        results = self._insert_result_met(results, spec, gcf, hit)
         return results
 
-    def _collect_results_bgc(self, objects, ro_hits, results):
+    def _collect_results_bgc(self, objects, results):
         for bgc in objects:
-            for hit in ro_hits:
-                if bgc.id == hit.bgc.id:
-                    if not self.bgc_to_gcf:
-                        # can use the BGC directly
-                        results = self._insert_result_gen(results, bgc, hit)
-                    else:
-                        # if we want the results to contain GCFs instead, need
-                        # to iterate over the set of bgc.parents (most will only
-                        # have one, hybrid BGCs will have more)
-                        for gcf in bgc.parents:
-                            results = self._insert_result_gen(results, gcf, hit)
+            for hit in RosettaScoring.HITS_BY_BGC.get(bgc.id, []):
+                if not self._include_hit(hit):
+                    continue
+                if not self.bgc_to_gcf:
+                    # can use the BGC directly
+                    results = self._insert_result_gen(results, bgc, hit)
+                else:
+                    # if we want the results to contain GCFs instead, need
+                    # to iterate over the set of bgc.parents (most will only
+                    # have one, hybrid BGCs will have more)
+                    for gcf in bgc.parents:
+                        results = self._insert_result_gen(results, gcf, hit)
+        return results
+
+    def _collect_results_gcf(self, objects, results):
+        for gcf in objects:
+            for hit in RosettaScoring.HITS_BY_GCF.get(gcf.id, []):
+                if self._include_hit(hit):
+                    results = self._insert_result_gen(results, gcf, hit)
         return results
 
     def _validate_inputs(self, objects):
@@ -4,6 +4,8 @@ import pandas as pd
 from nplinker.genomics import GCF
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
+from nplinker.registry import EntityIndex
+from nplinker.registry import strain_presence
 from nplinker.strain import StrainCollection
 
 
@@ -13,17 +15,12 @@ def get_presence_gcf_strain(gcfs: Sequence[GCF], strains: StrainCollection) -> p
     The occurrence is a DataFrame with GCF objects as index and Strain objects as columns, and the
     values are 1 if the gcf occurs in the strain,  0 otherwise.
     """
-    df_gcf_strain = pd.DataFrame(
-        0,
+    strain_list = list(strains)
+    return pd.DataFrame(
+        strain_presence(gcfs, EntityIndex(strain_list)),
         index=gcfs,
-        columns=list(strains),
-        dtype=int,
+        columns=strain_list,
     )  # type: ignore
-    for gcf in gcfs:
-        for strain in strains:
-            if gcf.has_strain(strain):
-                df_gcf_strain.loc[gcf, strain] = 1
-    return df_gcf_strain  # type: ignore
 
 
 def get_presence_spec_strain(
@@ -34,17 +31,12 @@ def get_presence_spec_strain(
     The occurrence is a DataFrame with Spectrum objects as index and Strain objects as columns, and
     the values are 1 if the spectrum occurs in the strain, 0 otherwise.
     """
-    df_spec_strain = pd.DataFrame(
-        0,
+    strain_list = list(strains)
+    return pd.DataFrame(
+        strain_presence(spectra, EntityIndex(strain_list)),
         index=spectra,
-        columns=list(strains),
-        dtype=int,
+        columns=strain_list,
     )  # type: ignore
-    for spectrum in spectra:
-        for strain in strains:
-            if spectrum.has_strain(strain):
-                df_spec_strain.loc[spectrum, strain] = 1
-    return df_spec_strain  # type: ignore
 
 
 def get_presence_mf_strain(
@@ -55,14 +47,9 @@ def get_presence_mf_strain(
     The occurrence is a DataFrame with MolecularFamily objects as index and Strain objects as
     columns, and the values are 1 if the molecular family occurs in the strain, 0 otherwise.
     """
-    df_mf_strain = pd.DataFrame(
-        0,
+    strain_list = list(strains)
+    return pd.DataFrame(
+        strain_presence(mfs, EntityIndex(strain_list)),
         index=mfs,
-        columns=list(strains),
-        dtype=int,
+        columns=strain_list,
     )  # type: ignore
-    for mf in mfs:
-        for strain in strains:
-            if mf.has_strain(strain):
-                df_mf_strain.loc[mf, strain] = 1
-    return df_mf_strain  # type: ignore
@@ -0,0 +1,546 @@
+from __future__ import annotations
+import gc
+import hashlib
+import json
+import logging
+import os
+import zipfile
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from os import PathLike
+from pathlib import Path
+from typing import Any
+import numpy as np
+from dynaconf import Dynaconf
+from nplinker import defaults
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MetadataTable
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.strain import Strain
+from nplinker.strain import StrainCollection
+
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "nplinker-snapshot"
+SNAPSHOT_VERSION = 1
+METADATA_FILE = "metadata.json"
+
+
+@dataclass
+class DatasetSnapshot:
+    """The loaded dataset of an NPLinker instance.
+
+    Attributes:
+        bgcs: A list of BGC objects.
+        gcfs: A list of GCF objects.
+        spectra: A list of Spectrum objects.
+        mfs: A list of MolecularFamily objects.
+        mibig_bgcs: A list of all loaded MIBiG BGC objects.
+        strains: A StrainCollection object that contains all strains.
+        product_types: A list of product types.
+    """
+
+    bgcs: list[BGC] = field(default_factory=list)
+    gcfs: list[GCF] = field(default_factory=list)
+    spectra: list[Spectrum] = field(default_factory=list)
+    mfs: list[MolecularFamily] = field(default_factory=list)
+    mibig_bgcs: list[BGC] = field(default_factory=list)
+    strains: StrainCollection = field(default_factory=StrainCollection)
+    product_types: list = field(default_factory=list)
+
+
+def write_snapshot(
+    file: str | PathLike, snapshot: DatasetSnapshot, fingerprint: str | None = None
+) -> None:
+    """Write a dataset snapshot to a file.
+
+    The snapshot is a zip archive of flat tables, one member per column. Each type of object
+    (strains, BGCs, GCFs, spectra and molecular families) is a table, and the relations between
+    objects (e.g. the BGCs of a GCF or the strains of a spectrum) are tables of pairs of integer
+    row indexes. Numeric columns and relations are stored as `.npy` arrays, other columns as JSON
+    arrays. The peaks of all spectra are packed into two float arrays with an offset array.
+
+    Unlike pickling the objects, writing and reading a snapshot does not recurse through the
+    references between objects, and the format does not depend on the class definitions.
+
+    The snapshot is written to a temporary file next to `file` and then renamed, so an
+    interrupted write never leaves a partial snapshot behind.
+
+    Args:
+        file: The path to the snapshot file.
+        snapshot: The dataset to write.
+        fingerprint: The fingerprint of the input data the dataset was loaded from, see
+            `dataset_fingerprint`. It can be read back with `read_snapshot_fingerprint`.
+
+    Examples:
+        >>> write_snapshot("dataset.snapshot", DatasetSnapshot(bgcs=npl.bgcs, gcfs=npl.gcfs))
+    """
+    # collect all objects, including those only referenced by other objects
+    bgcs = _unique(
+        [*snapshot.bgcs, *snapshot.mibig_bgcs, *(b for g in snapshot.gcfs for b in g.bgcs)]
+    )
+    gcfs = _unique(snapshot.gcfs)
+    spectra = _unique([*snapshot.spectra, *(s for mf in snapshot.mfs for s in mf.spectra)])
+    mfs = _unique(snapshot.mfs)
+    # strains are equal by id, so keep one strain object per id
+    strains = _unique(
+        [
+            *snapshot.strains,
+            *(bgc.strain for bgc in bgcs if bgc.strain is not None),
+            *(s for obj in [*gcfs, *spectra, *mfs] for s in obj.strains),
+        ],
+        key=lambda strain: strain.id,
+    )
+
+    bgc_index = {id(bgc): i for i, bgc in enumerate(bgcs)}
+    gcf_index = {id(gcf): i for i, gcf in enumerate(gcfs)}
+    spec_index = {id(spec): i for i, spec in enumerate(spectra)}
+    mf_index = {id(mf): i for i, mf in enumerate(mfs)}
+    strain_index = {strain.id: i for i, strain in enumerate(strains)}
+
+    tmp_file = Path(f"{file}.tmp")
+    with zipfile.ZipFile(tmp_file, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+        def write_json(name: str, value: Any) -> None:
+            zf.writestr(name, json.dumps(value, default=_json_default))
+
+        def write_array(name: str, array: np.ndarray) -> None:
+            # numeric columns compress poorly, store them so reading is a plain copy
+            info = zipfile.ZipInfo(name)
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+        def write_pairs(name: str, pairs: Iterable[tuple[int, int]]) -> None:
+            array = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+            write_array(f"{name}.npy", array)
+
+        # strains
+        write_json("strains/id.json", [s.id for s in strains])
+        write_json("strains/aliases.json", [sorted(s.aliases) for s in strains])
+
+        # BGCs
+        write_json("bgcs/id.json", [bgc.id for bgc in bgcs])
+        for attr in (
+            "product_prediction",
+            "mibig_bgc_class",
+            "description",
+            "smiles",
+            "antismash_file",
+            "antismash_id",
+            "antismash_region",
+        ):
+            write_json(f"bgcs/{attr}.json", [getattr(bgc, attr) for bgc in bgcs])
+        write_array(
+            "bgcs/strain.npy",
+            np.array(
+                [-1 if bgc.strain is None else strain_index[bgc.strain.id] for bgc in bgcs],
+                dtype=np.int64,
+            ),
+        )
+
+        # GCFs
+        write_json("gcfs/id.json", [gcf.id for gcf in gcfs])
+        write_json("gcfs/bigscape_class.json", [gcf.bigscape_class for gcf in gcfs])
+        write_json("gcfs/bgc_ids.json", [sorted(gcf.bgc_ids) for gcf in gcfs])
+        write_pairs(
+            "gcf_bgcs",
+            ((i, bgc_index[id(bgc)]) for i, gcf in enumerate(gcfs) for bgc in gcf.bgcs),
+        )
+        write_pairs(
+            "gcf_strains",
+            ((i, strain_index[s.id]) for i, gcf in enumerate(gcfs) for s in gcf.strains),
+        )
+
+        # spectra
+        write_json("spectra/id.json", [spec.id for spec in spectra])
+        write_array("spectra/precursor_mz.npy", np.array([s.precursor_mz for s in spectra], float))
+        write_array("spectra/rt.npy", np.array([s.rt for s in spectra], dtype=np.float64))
+        write_json("spectra/metadata.json", [dict(spec.metadata) for spec in spectra])
+        write_json("spectra/gnps_annotations.json", [spec.gnps_annotations for spec in spectra])
+        write_json("spectra/gnps_id.json", [spec.gnps_id for spec in spectra])
+        lengths = np.array([len(spec.mz) for spec in spectra], dtype=np.int64)
+        offsets = np.zeros(len(spectra) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        write_array("spectra/peak_offsets.npy", offsets)
+        write_array(
+            "spectra/mz.npy",
+            np.concatenate([np.asarray(s.mz, dtype=np.float64) for s in spectra] or [[]]),
+        )
+        write_array(
+            "spectra/intensity.npy",
+            np.concatenate([np.asarray(s.intensity, dtype=np.float64) for s in spectra] or [[]]),
+        )
+        write_pairs(
+            "spectrum_strains",
+            ((i, strain_index[s.id]) for i, spec in enumerate(spectra) for s in spec.strains),
+        )
+
+        # molecular families
+        write_json("mfs/id.json", [mf.id for mf in mfs])
+        write_json("mfs/spectra_ids.json", [sorted(mf.spectra_ids) for mf in mfs])
+        write_pairs(
+            "mf_spectra",
+            ((i, spec_index[id(spec)]) for i, mf in enumerate(mfs) for spec in mf.spectra),
+        )
+        write_pairs(
+            "mf_strains",
+            ((i, strain_index[s.id]) for i, mf in enumerate(mfs) for s in mf.strains),
+        )
+
+        # the dataset lists, as row indexes of the tables
+        write_array("dataset/bgcs.npy", _indexes(snapshot.bgcs, bgc_index))
+        write_array("dataset/mibig_bgcs.npy", _indexes(snapshot.mibig_bgcs, bgc_index))
+        write_array("dataset/gcfs.npy", _indexes(snapshot.gcfs, gcf_index))
+        write_array("dataset/spectra.npy", _indexes(snapshot.spectra, spec_index))
+        write_array("dataset/mfs.npy", _indexes(snapshot.mfs, mf_index))
+        write_array(
+            "dataset/strains.npy",
+            np.array([strain_index[s.id] for s in snapshot.strains], dtype=np.int64),
+        )
+
+        write_json(
+            METADATA_FILE,
+            {
+                "format": SNAPSHOT_FORMAT,
+                "version": SNAPSHOT_VERSION,
+                "counts": {
+                    "strains": len(strains),
+                    "bgcs": len(bgcs),
+                    "gcfs": len(gcfs),
+                    "spectra": len(spectra),
+                    "mfs": len(mfs),
+                },
+                "product_types": snapshot.product_types,
+                "fingerprint": fingerprint,
+            },
+        )
+    os.replace(tmp_file, file)
+
+    logger.info(
+        f"Wrote dataset snapshot to {file}: {len(bgcs)} BGCs, {len(gcfs)} GCFs, "
+        f"{len(spectra)} spectra, {len(mfs)} molecular families, {len(strains)} strains"
+    )
+
+
+def read_snapshot(file: str | PathLike) -> DatasetSnapshot:
+    """Read a dataset snapshot written by `write_snapshot` and rebuild the objects.
+
+    The references between objects (e.g. `BGC.parents`, `GCF.bgcs`, `Spectrum.family` and
+    `MolecularFamily.spectra`) are restored, and each strain is a single shared `Strain` object.
+
+    The metadata of all spectra is restored into one shared
+    [`MetadataTable`][nplinker.metabolomics.MetadataTable]. Note that the values of
+    `Spectrum.metadata` and `Spectrum.gnps_annotations` are restored as JSON types, e.g. tuples
+    become lists.
+
+    Args:
+        file: The path to the snapshot file.
+
+    Returns:
+        The dataset with the rebuilt objects.
+
+    Raises:
+        ValueError: If the file is not a snapshot file or its version is not supported.
+
+    Examples:
+        >>> snapshot = read_snapshot("dataset.snapshot")
+        >>> len(snapshot.gcfs)
+        64
+    """
+    with zipfile.ZipFile(file) as zf, _gc_paused():
+        metadata = _read_metadata(zf, file)
+
+        def read_json(name: str) -> Any:
+            return json.loads(zf.read(name))
+
+        def read_array(name: str) -> np.ndarray:
+            with zf.open(name) as f:
+                return np.lib.format.read_array(f, allow_pickle=False)
+
+        def read_pairs(name: str) -> np.ndarray:
+            return read_array(f"{name}.npy")
+
+        # strains
+        strains = []
+        for strain_id, aliases in zip(
+            read_json("strains/id.json"), read_json("strains/aliases.json")
+        ):
+            strain = Strain(strain_id)
+            strain.aliases.update(aliases)
+            strains.append(strain)
+        names = {id(strain): list(strain.names) for strain in strains}
+
+        # BGCs
+        bgcs = [
+            BGC(bgc_id, *products)
+            for bgc_id, products in zip(
+                read_json("bgcs/id.json"), read_json("bgcs/product_prediction.json")
+            )
+        ]
+        for attr in ("mibig_bgc_class", "smiles"):
+            for bgc, value in zip(bgcs, read_json(f"bgcs/{attr}.json")):
+                setattr(bgc, attr, None if value is None else tuple(value))
+        for attr in ("description", "antismash_file", "antismash_id", "antismash_region"):
+            for bgc, value in zip(bgcs, read_json(f"bgcs/{attr}.json")):
+                setattr(bgc, attr, value)
+        for bgc, i in zip(bgcs, read_array("bgcs/strain.npy").tolist()):
+            if i >= 0:
+                bgc.strain = strains[i]
+
+        # GCFs
+        gcfs = [GCF(gcf_id) for gcf_id in read_json("gcfs/id.json")]
+        for gcf, bigscape_class, bgc_ids in zip(
+            gcfs, read_json("gcfs/bigscape_class.json"), read_json("gcfs/bgc_ids.json")
+        ):
+            gcf.bigscape_class = bigscape_class
+            gcf.bgc_ids = set(bgc_ids)
+        for i, j in read_pairs("gcf_bgcs").tolist():
+            gcfs[i].bgcs.add(bgcs[j])
+            bgcs[j].parents.add(gcfs[i])
+        _set_strains(gcfs, read_pairs("gcf_strains"), strains, names)
+
+        # spectra
+        offsets = read_array("spectra/peak_offsets.npy").tolist()
+        mz = read_array("spectra/mz.npy").tolist()
+        intensity = read_array("spectra/intensity.npy").tolist()
+        metadata_table = MetadataTable()
+        spectra = [
+            Spectrum(
+                spec_id,
+                mz[offsets[i] : offsets[i + 1]],
+                intensity[offsets[i] : offsets[i + 1]],
+                precursor_mz,
+                rt,
+                metadata_table.append(spec_metadata),
+            )
+            for i, (spec_id, precursor_mz, rt, spec_metadata) in enumerate(
+                zip(
+                    read_json("spectra/id.json"),
+                    read_array("spectra/precursor_mz.npy").tolist(),
+                    read_array("spectra/rt.npy").tolist(),
+                    read_json("spectra/metadata.json"),
+                )
+            )
+        ]
+        for spec, annotations, gnps_id in zip(
+            spectra, read_json("spectra/gnps_annotations.json"), read_json("spectra/gnps_id.json")
+        ):
+            spec.gnps_annotations = annotations
+            spec.gnps_id = gnps_id
+        _set_strains(spectra, read_pairs("spectrum_strains"), strains, names)
+
+        # molecular families
+        mfs = [MolecularFamily(mf_id) for mf_id in read_json("mfs/id.json")]
+        for mf, spectra_ids in zip(mfs, read_json("mfs/spectra_ids.json")):
+            mf.spectra_ids = set(spectra_ids)
+        for i, j in read_pairs("mf_spectra").tolist():
+            mfs[i].spectra.add(spectra[j])
+            spectra[j].family = mfs[i]
+        _set_strains(mfs, read_pairs("mf_strains"), strains, names)
+
+        snapshot = DatasetSnapshot(
+            bgcs=[bgcs[i] for i in read_array("dataset/bgcs.npy").tolist()],
+            gcfs=[gcfs[i] for i in read_array("dataset/gcfs.npy").tolist()],
+            spectra=[spectra[i] for i in read_array("dataset/spectra.npy").tolist()],
+            mfs=[mfs[i] for i in read_array("dataset/mfs.npy").tolist()],
+            mibig_bgcs=[bgcs[i] for i in read_array("dataset/mibig_bgcs.npy").tolist()],
+            strains=_strain_collection(
+                strains[i] for i in read_array("dataset/strains.npy").tolist()
+            ),
+            product_types=metadata["product_types"],
+        )
+
+    logger.info(f"Read dataset snapshot from {file}")
+    return snapshot
+
+
+def read_snapshot_fingerprint(file: str | PathLike) -> str | None:
+    """Read the fingerprint of the input data stored in a dataset snapshot.
+
+    Only the metadata of the snapshot is read.
+
+    Args:
+        file: The path to the snapshot file.
+
+    Returns:
+        The fingerprint given to `write_snapshot`, or None if the snapshot has no fingerprint.
+
+    Raises:
+        ValueError: If the file is not a snapshot file or its version is not supported.
+    """
+    with zipfile.ZipFile(file) as zf:
+        return _read_metadata(zf, file).get("fingerprint")
+
+
+def dataset_fingerprint(config: Dynaconf) -> str:
+    """Compute the fingerprint of the input data of a working directory.
+
+    The fingerprint is a hash of the path, size and modification time of every file that the
+    [`DatasetLoader`][nplinker.loader.DatasetLoader] reads, i.e. the strain mappings, the
+    selected strains and the files in the MIBiG, GNPS, antiSMASH and BiG-SCAPE directories, and
+    of the config values except the logging and cache settings. File contents are not read, so
+    computing the fingerprint only takes a directory walk.
+
+    Any change to the input files or the config gives a different fingerprint, so a snapshot
+    with the same fingerprint holds the same data as loading the working directory again.
+
+    Args:
+        config: A Dynaconf object that contains the configuration settings.
+
+    Returns:
+        The hex digest of the fingerprint.
+
+    Examples:
+        >>> dataset_fingerprint(npl.config)
+        '5c4a6f...'
+    """
+    from nplinker import __version__
+
+    root_dir = Path(config.root_dir)
+    entries: list[tuple[str, int, int]] = []
+    for name in (defaults.STRAIN_MAPPINGS_FILENAME, defaults.STRAINS_SELECTED_FILENAME):
+        path = root_dir / name
+        if path.is_file():
+            stat = path.stat()
+            entries.append((name, stat.st_size, stat.st_mtime_ns))
+    for dirname in (
+        defaults.MIBIG_DIRNAME,
+        defaults.GNPS_DIRNAME,
+        defaults.ANTISMASH_DIRNAME,
+        defaults.BIGSCAPE_DIRNAME,
+    ):
+        for dirpath, _, filenames in os.walk(root_dir / dirname):
+            for filename in filenames:
+                # the validation manifests of the arranger are not input data
+                if filename.startswith(defaults.VALIDATION_MANIFEST_FILENAME):
+                    continue
+                path = Path(dirpath) / filename
+                stat = path.stat()
+                entries.append(
+                    (path.relative_to(root_dir).as_posix(), stat.st_size, stat.st_mtime_ns)
+                )
+    entries.sort()
+
+    settings = {k: v for k, v in config.as_dict().items() if k not in ("LOG", "CACHE")}
+
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            {
+                "nplinker_version": __version__,
+                "snapshot_version": SNAPSHOT_VERSION,
+                "config": settings,
+                "files": entries,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    return h.hexdigest()
+
+
+def _read_metadata(zf: zipfile.ZipFile, file: str | PathLike) -> dict:
+    """Read and check the metadata of an open snapshot file."""
+    try:
+        metadata = json.loads(zf.read(METADATA_FILE))
+    except KeyError:
+        raise ValueError(f"{file} is not a dataset snapshot, {METADATA_FILE} not found.")
+    if metadata.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{file} is not a dataset snapshot.")
+    if metadata.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported dataset snapshot version {metadata.get('version')}, "
+            f"expected {SNAPSHOT_VERSION}."
+        )
+    return metadata
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Pause the cyclic garbage collector while creating many objects that all stay alive."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _unique(objects: Iterable, key: Callable[[Any], Any] = id) -> list:
+    """Get the unique objects, by identity by default, keeping the first of each in order."""
+    unique: dict = {}
+    for obj in objects:
+        unique.setdefault(key(obj), obj)
+    return list(unique.values())
+
+
+def _indexes(objects: Iterable, index: dict[int, int]) -> np.ndarray:
+    """Get the row indexes of the objects."""
+    return np.array([index[id(obj)] for obj in objects], dtype=np.int64)
+
+
+def _strain_collection(strains: Iterable[Strain]) -> StrainCollection:
+    """Create a StrainCollection object from unique strains without checking for duplicates."""
+    sc = StrainCollection()
+    _fill_strains(sc, strains)
+    return sc
+
+
+def _fill_strains(
+    sc: StrainCollection,
+    strains: Iterable[Strain],
+    names: dict[int, list[str]] | None = None,
+) -> None:
+    """Add unique strains to an empty StrainCollection without checking for duplicates.
+
+    Args:
+        sc: The empty strain collection to fill.
+        strains: The unique strains to add.
+        names: Optional cache of the names of each strain, keyed by `id(strain)`.
+    """
+    strain_list = sc._strains
+    name_dict = sc._strain_dict_name
+    for strain in strains:
+        strain_list.append(strain)
+        strain_names = names[id(strain)] if names is not None else strain.names
+        for name in strain_names:
+            name_dict.setdefault(name, []).append(strain)
+
+
+def _set_strains(
+    objects: list[GCF] | list[Spectrum] | list[MolecularFamily],
+    pairs: np.ndarray,
+    strains: list[Strain],
+    names: dict[int, list[str]],
+) -> None:
+    """Fill the (empty) strains of the objects from pairs of (object index, strain index)."""
+    if len(pairs) == 0:
+        return
+    pairs = pairs[np.argsort(pairs[:, 0], kind="stable")]
+    owners, starts = np.unique(pairs[:, 0], return_index=True)
+    strain_indexes = pairs[:, 1].tolist()
+    bounds = [*starts.tolist(), len(pairs)]
+    for k, i in enumerate(owners.tolist()):
+        _fill_strains(
+            objects[i].strains,
+            [strains[j] for j in strain_indexes[bounds[k] : bounds[k + 1]]],
+            names,
+        )
+
+
+def _json_default(obj: Any) -> Any:
+    """Convert numpy scalars and other non-JSON types found in metadata."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    return str(obj)
@@ -18,6 +18,8 @@ class Strain:
         aliases: A set of aliases associated with the strain.
     """
 
+    __slots__ = ("id", "_aliases")
+
     def __init__(self, id: str) -> None:
         """To model the mapping between strain id and its aliases.
 
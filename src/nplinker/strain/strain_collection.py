@@ -1,6 +1,7 @@
 from __future__ import annotations
 import json
 import logging
+from collections.abc import Iterable
 from collections.abc import Iterator
 from os import PathLike
 from jsonschema import validate
@@ -14,10 +15,14 @@ logger = logging.getLogger(__name__)
 class StrainCollection:
     """A collection of `Strain` objects."""
 
+    __slots__ = ("_strains", "_strain_dict_name", "_shared")
+
     def __init__(self) -> None:
         # the order of strains is needed for scoring part, so use a list
         self._strains: list[Strain] = []
         self._strain_dict_name: dict[str, list[Strain]] = {}
+        # whether the list and dict above are shared with other collections, see `intern`
+        self._shared: bool = False
 
     def __repr__(self) -> str:
         return str(self)
@@ -66,7 +71,8 @@ class StrainCollection:
         Args:
             strain: The strain to add.
         """
-        if strain in self._strains:
+        self._unshare()
+        if self._has_id(strain.id):
             # only one strain object per id
             strain_ref = self._strain_dict_name[strain.id][0]
             new_aliases = [alias for alias in strain.aliases if alias not in strain_ref.aliases]
@@ -96,7 +102,8 @@ class StrainCollection:
         Raises:
             ValueError: If the strain is not found in the collection.
         """
-        if strain in self._strains:
+        self._unshare()
+        if self._has_id(strain.id):
             self._strains.remove(strain)
             # only one strain object per id
             strain_ref = self._strain_dict_name[strain.id][0]
@@ -163,6 +170,36 @@ class StrainCollection:
             return self._strain_dict_name[name]
         raise ValueError(f"Strain {name} not found in the strain collection.")
 
+    @staticmethod
+    def intern(collections: Iterable[StrainCollection]) -> int:
+        """Share the storage of the collections that contain the same strains.
+
+        Objects like spectra often have the same set of strains, and each of them holds its own
+        collection. After interning, collections with the same Strain objects share one list and
+        one dict of strains, which saves memory when there are many objects. A shared collection
+        copies the storage before it is modified, so modifying one collection never changes the
+        others.
+
+        Args:
+            collections: The strain collections to intern.
+
+        Returns:
+            The number of distinct collections after interning.
+
+        Examples:
+            >>> StrainCollection.intern(spectrum.strains for spectrum in npl.spectra)
+            42
+        """
+        canonical: dict[tuple, StrainCollection] = {}
+        for sc in collections:
+            key = (len(sc._strain_dict_name), *map(id, sc._strains))
+            ref = canonical.setdefault(key, sc)
+            if ref is not sc and sc._strains is not ref._strains:
+                sc._strains = ref._strains
+                sc._strain_dict_name = ref._strain_dict_name
+                sc._shared = ref._shared = True
+        return len(canonical)
+
     @staticmethod
     def read_json(file: str | PathLike) -> StrainCollection:
         """Read a strain mappings JSON file and return a `StrainCollection` object.
@@ -210,3 +247,16 @@ class StrainCollection:
                 json.dump(json_data, f)
             return None
         return json.dumps(json_data)
+
+    def _has_id(self, strain_id: str) -> bool:
+        """Check if the collection contains a strain with the given id."""
+        return any(s.id == strain_id for s in self._strain_dict_name.get(strain_id, ()))
+
+    def _unshare(self) -> None:
+        """Copy the storage shared with other collections before modifying it."""
+        if self._shared:
+            self._strains = self._strains.copy()
+            self._strain_dict_name = {
+                name: strains.copy() for name, strains in self._strain_dict_name.items()
+            }
+            self._shared = False
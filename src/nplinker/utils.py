@@ -2,8 +2,10 @@ from __future__ import annotations
 import bz2
 import csv
 import functools
+import glob
 import gzip
 import hashlib
+import io
 import logging
 import lzma
 import os
@@ -11,10 +13,12 @@ import os.path
 import shutil
 import sys
 import tarfile
+import threading
 import warnings
 import zipfile
 from collections.abc import Callable
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from os import PathLike
 from pathlib import Path
 from typing import IO
@@ -22,6 +26,7 @@ import httpx
 from rich.progress import BarColumn
 from rich.progress import DownloadColumn
 from rich.progress import Progress
+from rich.progress import TaskID
 from rich.progress import TextColumn
 from rich.progress import TimeElapsedColumn
 from rich.progress import TimeRemainingColumn
@@ -62,26 +67,38 @@ def check_disk_space(func):
 #
 
 
-def is_file_format(file: str | PathLike, format: str = "tsv") -> bool:
+def is_file_format(
+    file: str | PathLike, format: str = "tsv", sample_size: int = 1024 * 1024
+) -> bool:
     """Check if the file is in the given format.
 
+    Only the head of the file is parsed, i.e. the first `sample_size` characters cut at the end
+    of the last complete line, so checking a large file takes as long as checking a small one.
+
     Args:
         file: Path to the file to check.
         format: The format to check for, either "tsv" or "csv".
+        sample_size: The number of characters to read from the head of the file.
+            Defaults to 1024*1024.
 
     Returns:
-        True if the file is in the given format, False otherwise.
+        True if the head of the file is in the given format, False otherwise.
     """
+    if format == "tsv":
+        delimiter = "\t"
+    elif format == "csv":
+        delimiter = ","
+    else:
+        raise ValueError(f"Unknown format '{format}'.")
+
+    with open(file, "rt") as f:
+        sample = f.read(sample_size)
+        # drop the last line if it is cut off, unless the sample is a single line
+        if f.read(1) and "\n" in sample:
+            sample = sample[: sample.rindex("\n") + 1]
     try:
-        with open(file, "rt") as f:
-            if format == "tsv":
-                reader = csv.reader(f, delimiter="\t")
-            elif format == "csv":
-                reader = csv.reader(f, delimiter=",")
-            else:
-                raise ValueError(f"Unknown format '{format}'.")
-            for _ in reader:
-                pass
+        for _ in csv.reader(io.StringIO(sample), delimiter=delimiter):
+            pass
         return True
     except csv.Error:
         return False
@@ -96,6 +113,13 @@ def is_file_format(file: str | PathLike, format: str = "tsv") -> bool:
 #    https://github.com/pytorch/vision/blob/main/LICENSE
 
 
+def _new_md5() -> hashlib._Hash:
+    """Create an MD5 hash object, which is not used for security."""
+    if sys.version_info >= (3, 9):
+        return hashlib.md5(usedforsecurity=False)
+    return hashlib.md5()
+
+
 def calculate_md5(fpath: str | PathLike, chunk_size: int = 1024 * 1024) -> str:
     """Calculate the MD5 checksum of a file.
 
@@ -106,10 +130,7 @@ def calculate_md5(fpath: str | PathLike, chunk_size: int = 1024 * 1024) -> str:
     Returns:
         MD5 checksum of the file.
     """
-    if sys.version_info >= (3, 9):
-        md5 = hashlib.md5(usedforsecurity=False)
-    else:
-        md5 = hashlib.md5()
+    md5 = _new_md5()
     with open(fpath, "rb") as f:
         for chunk in iter(lambda: f.read(chunk_size), b""):
             md5.update(chunk)
@@ -129,6 +150,39 @@ def check_md5(fpath: str | PathLike, md5: str) -> bool:
     return md5 == calculate_md5(fpath)
 
 
+# the HTTP client shared by all downloads, created on first use
+_http_client: httpx.Client | None = None
+_http_client_lock = threading.Lock()
+
+# held by the download that shows the progress bar
+_progress_lock = threading.Lock()
+
+# the minimum size in bytes of a byte range downloaded in parallel
+PARALLEL_CHUNK_MIN_SIZE = 16 * 1024 * 1024
+
+# downloads ask for the unencoded body, as sizes and byte ranges refer to the encoded body
+_IDENTITY_ENCODING = {"Accept-Encoding": "identity"}
+
+
+def get_http_client() -> httpx.Client:
+    """Get the HTTP client shared by all downloads.
+
+    The client keeps connections to the servers open and reuses them (connection pooling), so
+    that repeated requests to the same host do not set up a new connection and TLS handshake each
+    time. The client can be used from several threads at the same time.
+
+    Returns:
+        The shared HTTP client.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+        return _http_client
+
+
 @check_disk_space
 def download_url(
     url: str,
@@ -137,9 +191,20 @@ def download_url(
     md5: str | None = None,
     http_method: str = "GET",
     allow_http_redirect: bool = True,
+    resume: bool = True,
+    parallel_chunks: int = 1,
 ) -> None:
     """Download a file from a url and place it in root.
 
+    The file is first downloaded to a partial file `<filename>.part` in root, which is renamed to
+    `filename` when the download is complete. If a download is interrupted, the partial file is
+    kept and the next download of the same file requests only the missing bytes with an HTTP Range
+    request. If the server does not support range requests, the download starts from the
+    beginning.
+
+    The MD5 checksum is computed from the downloaded data while it is written, so the file is not
+    read again to verify it.
+
     Args:
         url: URL to download file from
         root: Directory to place downloaded file in. If it doesn't exist, it will be created.
@@ -149,6 +214,14 @@ def download_url(
         http_method: HTTP request method, e.g. "GET", "POST".
             Defaults to "GET".
         allow_http_redirect: If true, enable following redirects for all HTTP ("http:") methods.
+        resume: If true, resume an interrupted download from its partial file. Defaults to True.
+        parallel_chunks: The number of byte ranges of the file to download in parallel. Ranges
+            are only used if the server supports range requests, and each range is at least
+            `PARALLEL_CHUNK_MIN_SIZE` bytes, so small files are downloaded in one request.
+            Defaults to 1, i.e. no parallel download.
+
+    Raises:
+        RuntimeError: If the download fails or the MD5 checksum does not match.
     """
     root = transform_to_full_path(root)
     # create the download directory if not exist
@@ -162,38 +235,271 @@ def download_url(
         logger.info("Using downloaded and verified file: " + str(fpath))
         return
 
+    part_file = root / f"{filename}.part"
+    if not resume:
+        part_file.unlink(missing_ok=True)
+        for range_file in root.glob(f"{glob.escape(filename)}.part.*"):
+            range_file.unlink()
+
     # download the file
     logger.info(f"Downloading {filename} to {root}")
-    with open(fpath, "wb") as fh:
-        with httpx.stream(http_method, url, follow_redirects=allow_http_redirect) as response:
-            if not response.is_success:
-                fpath.unlink(missing_ok=True)
+    # rich allows only one live progress bar at a time, so concurrent downloads in other threads
+    # are done without progress bar
+    show_progress = _progress_lock.acquire(blocking=False)
+    try:
+        digest = _download(
+            part_file,
+            url,
+            http_method,
+            allow_http_redirect,
+            show_progress,
+            parallel_chunks,
+            with_md5=md5 is not None,
+        )
+    finally:
+        if show_progress:
+            _progress_lock.release()
+
+    # check integrity of downloaded file
+    if md5 is not None and digest != md5:
+        # a corrupt partial file must not be resumed
+        part_file.unlink()
+        raise RuntimeError("MD5 validation failed.")
+    os.replace(part_file, fpath)
+
+
+def _parse_content_range(content_range: str) -> tuple[int, int | None]:
+    """Get the first byte and total size from a `Content-Range` header, e.g. `bytes 0-99/1234`.
+
+    The total size is None if it is unknown (`*`).
+    """
+    unit, _, spec = content_range.partition(" ")
+    byte_range, _, total = spec.partition("/")
+    if unit != "bytes" or "-" not in byte_range:
+        raise RuntimeError(f"Invalid Content-Range header '{content_range}'")
+    start = int(byte_range.split("-")[0])
+    return start, None if total == "*" else int(total)
+
+
+def _download(
+    part_file: Path,
+    url: str,
+    http_method: str,
+    allow_http_redirect: bool,
+    show_progress: bool,
+    parallel_chunks: int,
+    with_md5: bool,
+) -> str | None:
+    """Download a url to a partial file, resuming it if it exists.
+
+    Returns:
+        The MD5 checksum of the complete file if `with_md5` is true, otherwise None.
+    """
+    offset = part_file.stat().st_size if part_file.is_file() else 0
+    headers = dict(_IDENTITY_ENCODING)
+    if offset > 0:
+        headers["Range"] = f"bytes={offset}-"
+    elif parallel_chunks > 1:
+        # learn whether the server supports ranges and the size of the file
+        headers["Range"] = "bytes=0-"
+
+    client = get_http_client()
+    with client.stream(
+        http_method, url, headers=headers, follow_redirects=allow_http_redirect
+    ) as response:
+        if response.status_code == httpx.codes.PARTIAL_CONTENT and _is_encoded(response):
+            # the byte range is of the encoded body, which cannot be joined with the decoded
+            # part, so download the whole file again
+            response.close()
+            part_file.unlink(missing_ok=True)
+            return _download(
+                part_file, url, http_method, allow_http_redirect, show_progress, 1, with_md5
+            )
+        if (
+            response.status_code != httpx.codes.REQUESTED_RANGE_NOT_SATISFIABLE
+            or "Range" not in headers
+        ):
+            if response.status_code == httpx.codes.PARTIAL_CONTENT:
+                start, total = _parse_content_range(response.headers.get("Content-Range", ""))
+                if start != offset:
+                    raise RuntimeError(f"Server sent bytes from {start} instead of {offset}")
+            elif response.is_success:
+                # the server sends the whole file, as it does not support range requests
+                offset = 0
+                length = response.headers.get("Content-Length")
+                total = int(length) if length is not None else None
+                if _is_encoded(response):
+                    # the server ignored `Accept-Encoding: identity`, so the body is decoded
+                    # while it is written and its length is not the decoded size
+                    total = None
+            else:
                 raise RuntimeError(
                     f"Failed to download url {url} with status code {response.status_code}"
                 )
-            total = int(response.headers.get("Content-Length", 0))
-
-            with Progress(
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(bar_width=None),
-                "[progress.percentage]{task.percentage:>3.1f}%",
-                "•",
-                DownloadColumn(),
-                "•",
-                TransferSpeedColumn(),
-                "•",
-                TimeRemainingColumn(),
-                "•",
-                TimeElapsedColumn(),
-            ) as progress:
-                task = progress.add_task(f"[hot_pink]Downloading {fpath.name}", total=total)
-                for chunk in response.iter_bytes():
-                    fh.write(chunk)
-                    progress.update(task, advance=len(chunk))
+            if offset > 0:
+                logger.info(f"Resuming download of {part_file.name} from byte {offset}")
 
-    # check integrity of downloaded file
-    if md5 is not None and not check_md5(fpath, md5):
-        raise RuntimeError("MD5 validation failed.")
+            with _progress_bar(show_progress) as progress:
+                task = progress.add_task(
+                    f"[hot_pink]Downloading {part_file.stem}", total=total, completed=offset
+                )
+                if (
+                    response.status_code == httpx.codes.PARTIAL_CONTENT
+                    and offset == 0
+                    and total is not None
+                    and parallel_chunks > 1
+                    and total >= 2 * PARALLEL_CHUNK_MIN_SIZE
+                ):
+                    response.close()
+                    return _download_ranges(
+                        part_file,
+                        url,
+                        http_method,
+                        allow_http_redirect,
+                        total,
+                        parallel_chunks,
+                        with_md5,
+                        progress,
+                        task,
+                    )
+
+                md5 = _new_md5() if with_md5 else None
+                if md5 is not None and offset > 0:
+                    # only the part downloaded before has to be read to continue the checksum
+                    with open(part_file, "rb") as f:
+                        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                            md5.update(chunk)
+                with open(part_file, "ab" if offset > 0 else "wb") as f:
+                    _write_response(response, f, md5, progress, task)
+
+            if total is not None and part_file.stat().st_size != total:
+                raise RuntimeError(
+                    f"Incomplete download of url {url}: got {part_file.stat().st_size} of "
+                    f"{total} bytes"
+                )
+            return md5.hexdigest() if md5 is not None else None
+
+    # the range is not satisfiable, i.e. the partial file is not a part of the remote file
+    # (anymore), so download the file again
+    part_file.unlink(missing_ok=True)
+    return _download(part_file, url, http_method, allow_http_redirect, show_progress, 1, with_md5)
+
+
+def _download_ranges(
+    part_file: Path,
+    url: str,
+    http_method: str,
+    allow_http_redirect: bool,
+    total: int,
+    parallel_chunks: int,
+    with_md5: bool,
+    progress: Progress,
+    task: TaskID,
+) -> str | None:
+    """Download byte ranges of a url in parallel and join them into the partial file.
+
+    Each range is written to its own file `<part_file>.<first byte>-<last byte>`, which is
+    resumed if it exists. The ranges are joined in order, and the MD5 checksum is computed while
+    they are joined.
+
+    Returns:
+        The MD5 checksum of the complete file if `with_md5` is true, otherwise None.
+    """
+    size = max(-(-total // parallel_chunks), PARALLEL_CHUNK_MIN_SIZE)
+    ranges = [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+    range_files = [part_file.with_name(f"{part_file.name}.{start}-{end}") for start, end in ranges]
+    client = get_http_client()
+
+    def download_range(start: int, end: int, range_file: Path) -> None:
+        done = range_file.stat().st_size if range_file.is_file() else 0
+        if done > end - start + 1:
+            done = 0
+        progress.update(task, advance=done)
+        if start + done > end:
+            return
+        with client.stream(
+            http_method,
+            url,
+            headers={**_IDENTITY_ENCODING, "Range": f"bytes={start + done}-{end}"},
+            follow_redirects=allow_http_redirect,
+        ) as response:
+            if response.status_code != httpx.codes.PARTIAL_CONTENT:
+                raise RuntimeError(
+                    f"Failed to download bytes {start + done}-{end} of url {url} with status "
+                    f"code {response.status_code}"
+                )
+            with open(range_file, "ab" if done > 0 else "wb") as f:
+                _write_response(response, f, None, progress, task, end - start + 1 - done)
+        if range_file.stat().st_size != end - start + 1:
+            raise RuntimeError(f"Incomplete download of bytes {start}-{end} of url {url}")
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(download_range, start, end, range_file)
+            for (start, end), range_file in zip(ranges, range_files)
+        ]
+        for future in futures:
+            future.result()
+
+    md5 = _new_md5() if with_md5 else None
+    with open(part_file, "wb") as out:
+        for range_file in range_files:
+            with open(range_file, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    out.write(chunk)
+                    if md5 is not None:
+                        md5.update(chunk)
+    for range_file in range_files:
+        range_file.unlink()
+    return md5.hexdigest() if md5 is not None else None
+
+
+def _is_encoded(response: httpx.Response) -> bool:
+    """Check if the body of a response has a content encoding, e.g. gzip."""
+    return response.headers.get("Content-Encoding", "identity").lower() != "identity"
+
+
+def _write_response(
+    response: httpx.Response,
+    f: IO[bytes],
+    md5: hashlib._Hash | None,
+    progress: Progress,
+    task: TaskID,
+    limit: int | None = None,
+) -> None:
+    """Write the body of a response to a file, updating the checksum and the progress bar.
+
+    If `limit` is given, at most `limit` bytes are written.
+    """
+    written = 0
+    for chunk in response.iter_bytes():
+        if limit is not None and written + len(chunk) > limit:
+            chunk = chunk[: limit - written]
+        f.write(chunk)
+        if md5 is not None:
+            md5.update(chunk)
+        progress.update(task, advance=len(chunk))
+        written += len(chunk)
+        if limit is not None and written >= limit:
+            break
+
+
+def _progress_bar(show_progress: bool) -> Progress:
+    """Create the progress bar of a download, which is disabled if `show_progress` is false."""
+    return Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(bar_width=None),
+        "[progress.percentage]{task.percentage:>3.1f}%",
+        "•",
+        DownloadColumn(),
+        "•",
+        TransferSpeedColumn(),
+        "•",
+        TimeRemainingColumn(),
+        "•",
+        TimeElapsedColumn(),
+        disable=not show_progress,
+    )
 
 
 def list_dirs(root: str | PathLike, keep_parent: bool = True) -> list[str]:
@@ -481,3 +787,24 @@ def transform_to_full_path(p: str | PathLike) -> Path:
     p = Path(p).expanduser()
     p = Path(p).resolve()
     return Path(p)
+
+
+def slot_state(obj: object) -> dict:
+    """Get the values of the `__slots__` attributes of an object, for pickling.
+
+    The slots of all classes in the MRO are included, and slots that are not set are left out.
+    Use the returned dict as the slot state of `__reduce__`, i.e. `(None, slot_state(obj))`.
+
+    Args:
+        obj: The object with `__slots__`.
+
+    Returns:
+        A dict of the attribute names and values.
+    """
+    state = {}
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    return state
@@ -1,10 +1,16 @@
+import gc
 import os
 import pickle
+import tracemalloc
 import pytest
+from nplinker.arranger import DatasetArranger
 from nplinker.genomics import GCF
+from nplinker.loader import DatasetLoader
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
 from nplinker.nplinker import NPLinker
+from nplinker.snapshot import read_snapshot
+from nplinker.strain import StrainCollection
 from . import DATA_DIR
 
 
@@ -56,6 +62,49 @@ def test_load_data(npl: NPLinker):
     assert len(npl.strains) == 46
 
 
+def test_load_data_concurrently(npl):
+    loader = DatasetLoader(npl.config)
+    npl.config.set("concurrency.loading", True)
+    try:
+        assert loader.load()
+    finally:
+        npl.config.set("concurrency.loading", False)
+
+    # the same data as loaded sequentially
+    assert {bgc.id for bgc in loader.bgcs} == {bgc.id for bgc in npl.bgcs}
+    assert {gcf.id for gcf in loader.gcfs} == {gcf.id for gcf in npl.gcfs}
+    assert {spec.id for spec in loader.spectra} == {spec.id for spec in npl.spectra}
+    assert {mf.id for mf in loader.mfs} == {mf.id for mf in npl.mfs}
+    assert loader.strains == npl.strains
+    for stage in ("total", "metabolomics", "genomics", "spectra", "antismash", "bigscape"):
+        assert loader.timings[stage] > 0
+
+
+def test_load_data_all_cutoffs(npl):
+    loader = DatasetLoader(npl.config)
+    npl.config.set("bigscape.all_cutoffs", True)
+    try:
+        assert loader.load()
+    finally:
+        npl.config.set("bigscape.all_cutoffs", False)
+
+    # the GCFs of the configured cutoff are used
+    assert loader.gcf_sets.cutoffs == ["0.30"]
+    assert loader.bigscape_cutoff == "0.30"
+    assert {gcf.id for gcf in loader.gcfs} == {gcf.id for gcf in npl.gcfs}
+    assert loader.strains == npl.strains
+
+    # switching the GCF set relinks the same BGCs to new GCF objects
+    old_gcfs = loader.gcfs
+    loader.use_gcf_set("0.30")
+    assert {gcf.id for gcf in loader.gcfs} == {gcf.id for gcf in npl.gcfs}
+    assert {id(gcf) for gcf in loader.gcfs}.isdisjoint(id(gcf) for gcf in old_gcfs)
+    assert len(loader.bgcs) == 390
+    assert len(loader.strains) == 46
+    for bgc in loader.bgcs:
+        assert all(gcf in loader.gcfs for gcf in bgc.parents)
+
+
 def test_get_links(npl):
     # default scoring parameters are used (cutoff=0, standardised=False),
     # so all score values should be >= 0
@@ -106,3 +155,71 @@ def test_save_data(npl):
             assert obj1 in mfs
         else:
             assert False
+
+
+def test_save_load_snapshot(npl):
+    snapshot_file = os.path.join(npl.output_dir, "npl.snapshot")
+    npl.save_snapshot(snapshot_file)
+
+    npl2 = NPLinker(DATA_DIR / "nplinker_local_mode.toml")
+    npl2.load_snapshot(snapshot_file)
+
+    # tests from `test_load_data`
+    assert len(npl2.bgcs) == 390
+    assert len(npl2.gcfs) == 64
+    assert len(npl2.spectra) == 24652
+    assert len(npl2.mfs) == 29
+    assert len(npl2.strains) == 46
+
+    assert npl2.gcfs == npl.gcfs
+    assert npl2.spectra == npl.spectra
+    assert [gcf.strains for gcf in npl2.gcfs] == [gcf.strains for gcf in npl.gcfs]
+    assert [spec.peaks.shape for spec in npl2.spectra] == [spec.peaks.shape for spec in npl.spectra]
+
+
+def test_load_data_warm_start(npl, monkeypatch):
+    # the fixture `npl` loaded the data from files and saved the snapshot of the dataset
+    assert os.path.exists(os.path.join(npl.output_dir, "dataset.snapshot"))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Data files should not be loaded")
+
+    monkeypatch.setattr(DatasetArranger, "arrange", fail)
+    monkeypatch.setattr(DatasetLoader, "load", fail)
+    npl2 = NPLinker(DATA_DIR / "nplinker_local_mode.toml")
+    npl2.load_data()
+
+    # tests from `test_load_data`
+    assert len(npl2.bgcs) == 390
+    assert len(npl2.gcfs) == 64
+    assert len(npl2.spectra) == 24652
+    assert len(npl2.mfs) == 29
+    assert len(npl2.strains) == 46
+
+
+def test_memory_benchmark(npl, tmp_path):
+    """Benchmark the memory of the loaded objects, with and without interning strain collections.
+
+    Run with `pytest -s` to see the memory per object.
+    """
+    snapshot_file = tmp_path / "npl.snapshot"
+    npl.save_snapshot(snapshot_file)
+
+    def measure(intern: bool) -> int:
+        gc.collect()
+        tracemalloc.start()
+        data = read_snapshot(snapshot_file)
+        if intern:
+            StrainCollection.intern(
+                obj.strains for objects in (data.gcfs, data.spectra, data.mfs) for obj in objects
+            )
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        n_objects = sum(len(objects) for objects in (data.bgcs, data.gcfs, data.spectra, data.mfs))
+        for objects in (data.bgcs, data.gcfs, data.spectra, data.mfs, data.strains):
+            assert all(not hasattr(obj, "__dict__") for obj in objects)
+        print(f"intern={intern}: {size / 1e6:.1f} MB, {size / n_objects:.0f} bytes per object")
+        return size
+
+    assert measure(intern=True) < measure(intern=False)
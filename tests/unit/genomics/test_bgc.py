@@ -1,3 +1,4 @@
+import pickle
 from nplinker.genomics import BGC
 from nplinker.genomics import GCF
 from nplinker.strain import Strain
@@ -24,3 +25,21 @@ def test_add_and_detach_parent():
     assert bgc.parents == {gcf}
     bgc.detach_parent(gcf)
     assert bgc.parents == set()
+
+
+def test_pickle():
+    """Test pickling and unpickling the slot-based BGC object."""
+    bgc = BGC("BGC0000001", "Polyketide", "NRP")
+    bgc.strain = Strain("strain001")
+    bgc.antismash_region = 1
+    gcf = GCF("1")
+    bgc.add_parent(gcf)
+    assert not hasattr(bgc, "__dict__")
+
+    bgc_copy = pickle.loads(pickle.dumps(bgc))
+    assert bgc_copy == bgc
+    assert bgc_copy.product_prediction == ("Polyketide", "NRP")
+    assert bgc_copy.strain == bgc.strain
+    assert bgc_copy.antismash_region == 1
+    assert [p.id for p in bgc_copy.parents] == ["1"]
+    assert list(bgc_copy.parents)[0].bgcs == {bgc_copy}
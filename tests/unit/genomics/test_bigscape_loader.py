@@ -1,7 +1,14 @@
+import shutil
+import sqlite3
+from contextlib import closing
+import numpy as np
 import pytest
 from nplinker.genomics import GCF
 from nplinker.genomics.abc import GCFLoaderBase
 from nplinker.genomics.bigscape import BigscapeGCFLoader
+from nplinker.genomics.bigscape import BigscapeGCFSetLoader
+from nplinker.genomics.bigscape import GCFSets
+from nplinker.genomics.bigscape import bigscape_loader
 from nplinker.genomics.bigscape.bigscape_loader import BigscapeV2GCFLoader
 from .. import DATA_DIR
 
@@ -70,3 +77,132 @@ class TestBigscapeV2GCFLoader:
         assert len(gcf_list) == 4
         for gcf in gcf_list:
             assert isinstance(gcf, GCF)
+
+    def test_parse_gcf_v2_batches(self, loader, monkeypatch):
+        expected = _families(BigscapeV2GCFLoader._parse_gcf(loader.db_file))
+        monkeypatch.setattr(bigscape_loader, "FETCH_BATCH_SIZE", 2)
+        assert _families(BigscapeV2GCFLoader._parse_gcf(loader.db_file)) == expected
+        # the BGC id is the file name of the GenBank file without extension
+        assert all(
+            "/" not in bgc_id and not bgc_id.endswith(".gbk")
+            for _, ids in expected
+            for bgc_id in ids
+        )
+
+    @pytest.mark.parametrize(
+        "keep_mibig_only, keep_singleton, expected",
+        [(False, False, 1), (True, False, 2), (False, True, 2), (True, True, 4)],
+    )
+    def test_init_filters(self, loader, keep_mibig_only, keep_singleton, expected):
+        filtered_loader = BigscapeV2GCFLoader(
+            loader.db_file, keep_mibig_only=keep_mibig_only, keep_singleton=keep_singleton
+        )
+        gcfs = filtered_loader.get_gcfs(keep_mibig_only=True, keep_singleton=True)
+        assert _families(gcfs) == _families(loader.get_gcfs(keep_mibig_only, keep_singleton))
+        assert len(gcfs) == expected
+
+    def test_cutoff_and_run(self, tmp_path):
+        db_file = tmp_path / "data_sqlite.db"
+        shutil.copy(DATA_DIR / "bigscape" / "mix" / "data_sqlite.db", db_file)
+        all_families = _families(BigscapeV2GCFLoader._parse_gcf(str(db_file)))
+        with closing(sqlite3.connect(db_file)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE family (id INTEGER PRIMARY KEY, cutoff REAL, run_id INTEGER)"
+            )
+            family_ids = [
+                row[0]
+                for row in connection.execute("SELECT DISTINCT family_id FROM bgc_record_family")
+            ]
+            # the first family is of an old run
+            connection.executemany(
+                "INSERT INTO family VALUES (?, ?, ?)",
+                [
+                    (family_id, 0.3 if i % 2 else 0.5, 1 if i else 0)
+                    for i, family_id in enumerate(family_ids)
+                ],
+            )
+        mtime = db_file.stat().st_mtime_ns
+
+        gcfs_030 = BigscapeV2GCFLoader(db_file, cutoff="0.30").get_gcfs(True, True)
+        gcfs_050 = BigscapeV2GCFLoader(db_file, cutoff="0.50").get_gcfs(True, True)
+        assert {gcf.id for gcf in gcfs_030} == set(family_ids[1::2])
+        assert {gcf.id for gcf in gcfs_050} == set(family_ids[2::2])
+        assert _families(gcfs_030 + gcfs_050) < all_families
+
+        # a cutoff that the latest run does not have
+        with pytest.raises(ValueError, match="cutoff 0.70 .* its cutoffs are 0.30, 0.50"):
+            BigscapeV2GCFLoader(db_file, cutoff="0.70")
+        # the database is opened read-only
+        assert db_file.stat().st_mtime_ns == mtime
+
+
+def _families(gcfs):
+    return {(gcf.id, frozenset(gcf.bgc_ids)) for gcf in gcfs}
+
+
+class TestBigscapeGCFSetLoader:
+    @pytest.fixture
+    def bigscape_dir(self, tmp_path):
+        shutil.copy(DATA_DIR / "bigscape" / "mix" / "mix_clustering_c0.30.tsv", tmp_path)
+        with open(tmp_path / "mix_clustering_c0.50.tsv", "w") as f:
+            f.write("#BGC Name\tFamily Number\n")
+            f.write("BGC0000145\t1\nNC_009380.1.region004\t1\nBGC0001041\t3\n")
+        return tmp_path
+
+    def test_cluster_files(self, bigscape_dir):
+        gcf_sets = BigscapeGCFSetLoader(bigscape_dir).get_gcf_sets()
+        assert gcf_sets.cutoffs == ["0.30", "0.50"]
+        # the BGC ids are shared by the sets
+        assert len(gcf_sets.bgc_ids) == 8
+
+        expected = BigscapeGCFLoader._parse_gcf(str(bigscape_dir / "mix_clustering_c0.30.tsv"))
+        assert _families(gcf_sets.get_gcfs("0.30", True, True)) == _families(expected)
+        assert _families(gcf_sets.get_gcfs("0.50", True, True)) == {
+            ("1", frozenset({"BGC0000145", "NC_009380.1.region004"})),
+            ("3", frozenset({"BGC0001041"})),
+        }
+        assert [gcf.id for gcf in gcf_sets.get_gcfs("0.50")] == ["1"]
+
+        bgc_indexes, family_indexes = gcf_sets.memberships("0.50")
+        assert bgc_indexes.dtype == family_indexes.dtype == np.int32
+        assert gcf_sets.bgc_ids[bgc_indexes].tolist() == [
+            "BGC0000145",
+            "NC_009380.1.region004",
+            "BGC0001041",
+        ]
+        assert gcf_sets.family_ids("0.50")[family_indexes].tolist() == ["1", "1", "3"]
+
+        with pytest.raises(KeyError, match="0.70"):
+            gcf_sets.get_gcfs("0.70")
+
+    def test_no_cluster_files(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            BigscapeGCFSetLoader(tmp_path)
+
+    def test_database(self):
+        db_file = DATA_DIR / "bigscape" / "mix" / "data_sqlite.db"
+        gcf_sets = BigscapeGCFSetLoader(db_file).get_gcf_sets()
+        # the test database has no cutoff information
+        assert gcf_sets.cutoffs == [GCFSets.ALL]
+        expected = BigscapeV2GCFLoader._parse_gcf(str(db_file))
+        assert _families(gcf_sets.get_gcfs(GCFSets.ALL, True, True)) == _families(expected)
+        assert len(gcf_sets.get_gcfs(GCFSets.ALL)) == 1
+
+    def test_database_cutoffs(self, tmp_path):
+        db_file = tmp_path / "data_sqlite.db"
+        shutil.copy(DATA_DIR / "bigscape" / "mix" / "data_sqlite.db", db_file)
+        with closing(sqlite3.connect(db_file)) as connection, connection:
+            connection.execute("CREATE TABLE family (id INTEGER PRIMARY KEY, cutoff REAL)")
+            family_ids = [
+                row[0]
+                for row in connection.execute("SELECT DISTINCT family_id FROM bgc_record_family")
+            ]
+            connection.executemany(
+                "INSERT OR IGNORE INTO family VALUES (?, ?)",
+                [(family_id, 0.3 if family_id % 2 else 0.5) for family_id in family_ids],
+            )
+
+        gcf_sets = BigscapeGCFSetLoader(db_file).get_gcf_sets()
+        assert sorted(gcf_sets.cutoffs) == ["0.30", "0.50"]
+        gcfs = gcf_sets.get_gcfs("0.30", True, True) + gcf_sets.get_gcfs("0.50", True, True)
+        assert _families(gcfs) == _families(BigscapeV2GCFLoader._parse_gcf(str(db_file)))
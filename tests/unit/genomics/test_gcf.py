@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from nplinker.genomics import BGC
 from nplinker.genomics import GCF
@@ -116,3 +117,17 @@ def test_is_singleton():
     assert gcf.is_singleton() is False
     gcf.detach_bgc(bgc1)
     assert gcf.is_singleton() is True
+
+
+def test_pickle(bgc_with_strain):
+    """Test pickling and unpickling the slot-based GCF object."""
+    gcf = GCF("1")
+    gcf.bigscape_class = "NRPS"
+    gcf.add_bgc(bgc_with_strain)
+    assert not hasattr(gcf, "__dict__")
+
+    gcf_copy = pickle.loads(pickle.dumps(gcf))
+    assert gcf_copy == gcf
+    assert gcf_copy.bigscape_class == "NRPS"
+    assert gcf_copy.bgc_ids == {"S0001"}
+    assert gcf_copy.strains == gcf.strains
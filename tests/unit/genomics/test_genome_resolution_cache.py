@@ -0,0 +1,56 @@
+import time
+import pytest
+from nplinker.genomics.antismash import GenomeResolutionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    # the directory of the database file is created
+    return GenomeResolutionCache(tmp_path / "nplinker" / "cache.sqlite")
+
+
+def test_get_set(cache):
+    assert cache.get("GenBank_accession", "GCA_1") is None
+
+    cache.set("GenBank_accession", "GCA_1", "GCF_1")
+    assert cache.get("GenBank_accession", "GCA_1") == "GCF_1"
+    # the ID type is part of the key
+    assert cache.get("JGI_Genome_ID", "GCA_1") is None
+
+    # persisted in the database file
+    assert GenomeResolutionCache(cache.db_file).get("GenBank_accession", "GCA_1") == "GCF_1"
+
+
+def test_get_many(cache):
+    cache.set("GenBank_accession", "GCA_1", "GCF_1")
+    cache.set("GenBank_accession", "GCA_2", "")
+    cache.set("JGI_Genome_ID", "GCA_3", "GCF_3")
+    ids = ["GCA_1", "GCA_2", "GCA_3"] + [f"GCA_x{i}" for i in range(1000)]
+    assert cache.get_many("GenBank_accession", ids) == {"GCA_1": "GCF_1", "GCA_2": ""}
+
+
+def test_negative_ttl(cache, monkeypatch):
+    cache.set("GenBank_accession", "GCA_1", "GCF_1")
+    cache.set("GenBank_accession", "GCA_2", "")
+    assert cache.get("GenBank_accession", "GCA_2") == ""
+
+    # failed resolutions expire, successful ones not
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + cache.negative_ttl + 1)
+    assert cache.get("GenBank_accession", "GCA_1") == "GCF_1"
+    assert cache.get("GenBank_accession", "GCA_2") is None
+
+
+def test_clear(cache):
+    cache.set("GenBank_accession", "GCA_1", "GCF_1")
+    cache.clear()
+    assert cache.get("GenBank_accession", "GCA_1") is None
+
+
+def test_unusable_database(tmp_path, caplog):
+    # the directory of the database file cannot be created below a file
+    (tmp_path / "file").write_text("")
+    cache = GenomeResolutionCache(tmp_path / "file" / "cache.sqlite")
+    cache.set("GenBank_accession", "GCA_1", "GCF_1")
+    assert cache.get("GenBank_accession", "GCA_1") is None
+    assert "is not usable" in caplog.text
@@ -0,0 +1,129 @@
+import json
+from pathlib import Path
+import pytest
+from nplinker.genomics.mibig import MibigStore
+from nplinker.genomics.mibig import mibig_store
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Replace the download of MIBiG metadata and record the downloaded versions."""
+    versions = []
+
+    def fake_download(download_root, extract_path, version="3.1"):
+        versions.append(version)
+        download_root = Path(download_root)
+        download_root.mkdir(parents=True, exist_ok=True)
+        (download_root / f"mibig_json_{version}.tar.gz").write_text("archive")
+        for i in (1, 2):
+            (extract_path / f"BGC000000{i}.json").write_text(json.dumps({"version": version}))
+
+    monkeypatch.setattr(mibig_store, "download_and_extract_mibig_metadata", fake_download)
+    return versions
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MibigStore(tmp_path / "store")
+
+
+def test_get(store, downloads):
+    version_dir = store.get("3.1")
+    assert version_dir == store.store_dir / "3.1"
+    assert sorted(p.name for p in version_dir.iterdir()) == [
+        "BGC0000001.json",
+        "BGC0000002.json",
+        "manifest.json",
+    ]
+    # the archive is removed after extraction
+    assert not (store.store_dir / "downloads" / "mibig_json_3.1.tar.gz").exists()
+
+    # a version in the store is not downloaded again
+    assert store.get("3.1") == version_dir
+    assert downloads == ["3.1"]
+
+    # an incomplete version is downloaded again
+    (version_dir / "BGC0000002.json").unlink()
+    store.get("3.1")
+    assert downloads == ["3.1", "3.1"]
+    assert (version_dir / "BGC0000002.json").is_file()
+
+
+def test_install(store, downloads, tmp_path):
+    target_dir = tmp_path / "mibig"
+    store.install("3.1", target_dir)
+    assert json.loads((target_dir / "BGC0000001.json").read_text()) == {"version": "3.1"}
+    assert (target_dir / "manifest.json").is_file()
+    # the files are linked from the store
+    assert (target_dir / "BGC0000001.json").samefile(store.store_dir / "3.1" / "BGC0000001.json")
+
+    # an up-to-date directory is not changed
+    mtime = (target_dir / "manifest.json").stat().st_mtime_ns
+    store.install("3.1", target_dir)
+    assert (target_dir / "manifest.json").stat().st_mtime_ns == mtime
+    assert downloads == ["3.1"]
+
+
+def test_install_other_version(store, downloads, tmp_path):
+    target_dir = tmp_path / "mibig"
+    target_dir.mkdir()
+    (target_dir / "BGC0000003.json").write_text("{}")
+    store.install("3.1", target_dir)
+    store.install("2.0", target_dir)
+    assert downloads == ["3.1", "2.0"]
+    assert sorted(p.name for p in target_dir.iterdir()) == [
+        "BGC0000001.json",
+        "BGC0000002.json",
+        "manifest.json",
+    ]
+    assert json.loads((target_dir / "BGC0000001.json").read_text()) == {"version": "2.0"}
+
+
+def test_install_copy(store, downloads, tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("Invalid cross-device link")
+
+    monkeypatch.setattr(mibig_store.os, "link", fail)
+    target_dir = tmp_path / "mibig"
+    store.install("3.1", target_dir)
+    assert not (target_dir / "BGC0000001.json").samefile(
+        store.store_dir / "3.1" / "BGC0000001.json"
+    )
+    assert json.loads((target_dir / "BGC0000001.json").read_text()) == {"version": "3.1"}
+
+
+def test_corrupt_manifest(store, downloads, tmp_path):
+    target_dir = tmp_path / "mibig"
+    store.install("3.1", target_dir)
+    manifest = json.loads((target_dir / "manifest.json").read_text())
+    manifest["files"]["BGC0000009.json"] = 10
+    (target_dir / "manifest.json").write_text(json.dumps(manifest))
+
+    store.install("3.1", target_dir)
+    manifest = json.loads((target_dir / "manifest.json").read_text())
+    assert sorted(manifest["files"]) == ["BGC0000001.json", "BGC0000002.json"]
+    assert downloads == ["3.1"]
+
+
+def test_install_unwritable_store(downloads, tmp_path):
+    # the store cannot be created below a file, even by root
+    (tmp_path / "file").write_text("")
+    store = MibigStore(tmp_path / "file" / "store")
+    target_dir = tmp_path / "mibig"
+    target_dir.mkdir()
+    (target_dir / "BGC0000003.json").write_text("{}")
+
+    store.install("3.1", target_dir, tmp_path / "downloads")
+    assert sorted(p.name for p in target_dir.iterdir()) == [
+        "BGC0000001.json",
+        "BGC0000002.json",
+        "manifest.json",
+    ]
+    assert (tmp_path / "downloads" / "mibig_json_3.1.tar.gz").is_file()
+
+    # the downloaded metadata is kept while it is up to date
+    store.install("3.1", target_dir)
+    assert downloads == ["3.1"]
+    store.install("2.0", target_dir)
+    assert downloads == ["3.1", "2.0"]
+    assert json.loads((target_dir / "BGC0000001.json").read_text()) == {"version": "2.0"}
@@ -1,13 +1,35 @@
+import io
 import json
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 from pathlib import Path
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
 import pytest
 from nplinker import setup_logging
 from nplinker.defaults import GENOME_STATUS_FILENAME
+from nplinker.genomics.antismash import GenomeResolutionCache
 from nplinker.genomics.antismash import GenomeStatus
+from nplinker.genomics.antismash import antismash_downloader
+from nplinker.genomics.antismash import genome_resolution_cache
+from nplinker.genomics.antismash import podp_antismash_downloader
 from nplinker.genomics.antismash import podp_download_and_extract_antismash_data
+from nplinker.genomics.antismash import prewarm_genome_resolution_cache
+from nplinker.genomics.antismash.podp_antismash_downloader import MAX_REQUESTS_PER_HOST
 from nplinker.utils import list_files
 
 
+@pytest.fixture(autouse=True)
+def resolution_cache_file(tmp_path, monkeypatch):
+    """Use a genome resolution cache of the test instead of the shared one."""
+    file = tmp_path / "genome_resolution_cache.sqlite"
+    monkeypatch.setattr(genome_resolution_cache, "DEFAULT_CACHE_FILE", file)
+    return file
+
+
 @pytest.fixture
 def download_root(tmp_path):
     return tmp_path / "download"
@@ -433,3 +455,222 @@ def test_genbank_jgi_id(download_root, extract_root, genome_status_file):
     )
     assert genome_status_file.is_file()
     assert len(genome_status) == 1
+
+
+# Test the concurrent pipeline of `podp_download_and_extract_antismash_data` function against a
+# local stand-in server of NCBI, JGI and antiSMASH database
+class _StandInHandler(BaseHTTPRequestHandler):
+    # JGI ID => GenBank accession
+    jgi = {"640427140": "GCA_000016425.1"}
+    # GenBank accession => RefSeq accession
+    ncbi = {"gca_000016425.1": "GCF_000016425.1", "gca_000000001.1": "GCF_000000001.1"}
+    # antiSMASH archives available for download
+    antismash = {"GCF_000016425.1", "GCF_000000001.1", "GCF_000000002.1"}
+    # JGI IDs of which the lookup fails with a server error
+    jgi_errors: set[str] = set()
+
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    paths: list[str] = []
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.paths.append(self.path)
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            time.sleep(0.1)
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/assembly/" and query["term"][0] in cls.ncbi:
+                refseq_id = cls.ncbi[query["term"][0]]
+                self._send(
+                    "<dl class='assembly_summary_new'><dt>RefSeq assembly accession:</dt>"
+                    f"<dd>{refseq_id} (latest)</dd></dl>".encode()
+                )
+            elif url.path == "/jgi" and query["taxon_oid"][0] in cls.jgi_errors:
+                self.send_error(503)
+            elif url.path == "/jgi" and query["taxon_oid"][0] in cls.jgi:
+                genbank_id = cls.jgi[query["taxon_oid"][0]]
+                self._send(
+                    f"<a href='https://www.ncbi.nlm.nih.gov/nuccore/{genbank_id}'>{genbank_id}</a>".encode()
+                )
+            elif url.path.startswith("/antismash/") and url.path.split("/")[2] in cls.antismash:
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w") as zf:
+                    zf.writestr("genome.region001.gbk", "LOCUS")
+                    zf.writestr("genome.json", "{}")
+                    zf.writestr("index.html", "<html></html>")
+                self._send(buffer.getvalue())
+            else:
+                self.send_error(404)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server(monkeypatch):
+    _StandInHandler.paths = []
+    _StandInHandler.max_active = 0
+    _StandInHandler.jgi_errors = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(
+        podp_antismash_downloader, "NCBI_LOOKUP_URL", base_url + "/assembly/?term={}"
+    )
+    monkeypatch.setattr(
+        podp_antismash_downloader, "JGI_GENOME_LOOKUP_URL", base_url + "/jgi?taxon_oid={}"
+    )
+    monkeypatch.setattr(
+        antismash_downloader, "ANTISMASH_DB_DOWNLOAD_URL", base_url + "/antismash/{}/{}"
+    )
+    yield _StandInHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_pipeline(stand_in_server, download_root, extract_root, genome_status_file):
+    genome_records = [
+        {"genome_ID": {"genome_type": "genome", "RefSeq_accession": "GCF_000000002.1"}},
+        {"genome_ID": {"genome_type": "genome", "GenBank_accession": "GCA_000000001.1"}},
+        {"genome_ID": {"genome_type": "genome", "JGI_Genome_ID": "640427140"}},
+        # resolved to the same RefSeq ID as the JGI genome
+        {"genome_ID": {"genome_type": "genome", "GenBank_accession": "NC_000016425.1"}},
+        # not in the antiSMASH database
+        {"genome_ID": {"genome_type": "genome", "RefSeq_accession": "GCF_000000003.1"}},
+    ]
+    stand_in_server.ncbi["nc_000016425.1"] = "GCF_000016425.1"
+
+    with pytest.warns(UserWarning, match=r"Failed to download .*\['GCF_000000003.1'\]"):
+        podp_download_and_extract_antismash_data(genome_records, download_root, extract_root)
+
+    genome_status = GenomeStatus.read_json(genome_status_file)
+    assert {gs_id: gs.resolved_refseq_id for gs_id, gs in genome_status.items()} == {
+        "GCF_000000002.1": "GCF_000000002.1",
+        "GCA_000000001.1": "GCF_000000001.1",
+        "640427140": "GCF_000016425.1",
+        "NC_000016425.1": "GCF_000016425.1",
+        "GCF_000000003.1": "GCF_000000003.1",
+    }
+    assert genome_status["GCF_000000003.1"].bgc_path == ""
+    for refseq_id in ("GCF_000000002.1", "GCF_000000001.1", "GCF_000016425.1"):
+        assert (download_root / f"{refseq_id}.zip").is_file()
+        extracted_folder = extract_root / "antismash" / refseq_id
+        assert sorted(list_files(extracted_folder, keep_parent=False)) == [
+            "completed",
+            "genome.json",
+            "genome.region001.gbk",
+        ]
+    # the shared archive is downloaded only once
+    assert len([p for p in stand_in_server.paths if "GCF_000016425.1.zip" in p]) == 1
+    # the requests are concurrent, but limited per host
+    assert 1 < stand_in_server.max_active <= MAX_REQUESTS_PER_HOST
+
+
+def test_pipeline_resume(stand_in_server, download_root, extract_root, monkeypatch):
+    genome_records = [
+        {"genome_ID": {"genome_type": "genome", "RefSeq_accession": "GCF_000000002.1"}},
+        {"genome_ID": {"genome_type": "genome", "RefSeq_accession": "GCF_000000001.1"}},
+    ]
+    resolve_refseq_id = podp_antismash_downloader._resolve_refseq_id
+
+    def interrupted(genome_id_data, cache=None):
+        if genome_id_data["RefSeq_accession"] == "GCF_000000001.1":
+            raise RuntimeError("interrupted")
+        return resolve_refseq_id(genome_id_data, cache)
+
+    # the status of the processed genome is saved before the run is interrupted
+    monkeypatch.setattr(podp_antismash_downloader, "_resolve_refseq_id", interrupted)
+    with pytest.raises(RuntimeError, match="interrupted"):
+        podp_download_and_extract_antismash_data(
+            genome_records, download_root, extract_root, max_workers=1
+        )
+    monkeypatch.setattr(podp_antismash_downloader, "_resolve_refseq_id", resolve_refseq_id)
+
+    stand_in_server.paths.clear()
+    podp_download_and_extract_antismash_data(genome_records, download_root, extract_root)
+    assert stand_in_server.paths == ["/antismash/GCF_000000001.1/GCF_000000001.1.zip"]
+
+
+def test_pipeline_resolution_cache(stand_in_server, tmp_path, resolution_cache_file):
+    genome_records = [
+        {"genome_ID": {"genome_type": "genome", "GenBank_accession": "GCA_000000001.1"}},
+        {"genome_ID": {"genome_type": "genome", "JGI_Genome_ID": "640427140"}},
+        {"genome_ID": {"genome_type": "genome", "JGI_Genome_ID": "non_existing_ID"}},
+    ]
+    podp_download_and_extract_antismash_data(
+        genome_records, tmp_path / "project1" / "download", tmp_path / "project1" / "extracted"
+    )
+    cache = GenomeResolutionCache(resolution_cache_file)
+    assert cache.get("GenBank_accession", "GCA_000000001.1") == "GCF_000000001.1"
+    assert cache.get("JGI_Genome_ID", "640427140") == "GCF_000016425.1"
+    assert cache.get("JGI_Genome_ID", "non_existing_ID") == ""
+
+    # another project with the same genomes does not look up the genome IDs again
+    stand_in_server.paths.clear()
+    podp_download_and_extract_antismash_data(
+        genome_records, tmp_path / "project2" / "download", tmp_path / "project2" / "extracted"
+    )
+    assert all(path.startswith("/antismash/") for path in stand_in_server.paths)
+
+
+def test_prewarm_genome_resolution_cache(stand_in_server, tmp_path):
+    cache = GenomeResolutionCache(tmp_path / "cache.sqlite")
+    cache.set("JGI_Genome_ID", "640427140", "GCF_000016425.1")
+    genome_records = [
+        {"genome_ID": {"genome_type": "genome", "RefSeq_accession": "GCF_000000002.1"}},
+        {"genome_ID": {"genome_type": "genome", "GenBank_accession": "GCA_000000001.1"}},
+        {"genome_ID": {"genome_type": "genome", "JGI_Genome_ID": "640427140"}},
+        {"genome_ID": {"genome_type": "genome", "JGI_Genome_ID": "non_existing_ID"}},
+    ]
+
+    resolved = prewarm_genome_resolution_cache(genome_records, cache)
+
+    assert resolved == {
+        "GCF_000000002.1": "GCF_000000002.1",
+        "GCA_000000001.1": "GCF_000000001.1",
+        "640427140": "GCF_000016425.1",
+        "non_existing_ID": "",
+    }
+    # only the IDs not in the cache are looked up
+    assert not any("640427140" in path for path in stand_in_server.paths)
+    assert cache.get("GenBank_accession", "GCA_000000001.1") == "GCF_000000001.1"
+    assert cache.get("JGI_Genome_ID", "non_existing_ID") == ""
+    assert prewarm_genome_resolution_cache(genome_records, cache) == resolved
+
+
+def test_resolution_network_errors_not_cached(stand_in_server, tmp_path, monkeypatch):
+    cache = GenomeResolutionCache(tmp_path / "cache.sqlite")
+    jgi_record = {"genome_type": "genome", "JGI_Genome_ID": "640427140"}
+    genbank_record = {"genome_type": "genome", "GenBank_accession": "GCA_000000001.1"}
+
+    # JGI responds with a server error, and NCBI cannot be reached
+    stand_in_server.jgi_errors.add("640427140")
+    ncbi_url = podp_antismash_downloader.NCBI_LOOKUP_URL
+    monkeypatch.setattr(
+        podp_antismash_downloader, "NCBI_LOOKUP_URL", "http://127.0.0.1:1/assembly/?term={}"
+    )
+    assert podp_antismash_downloader._resolve_refseq_id(jgi_record, cache) == ""
+    assert podp_antismash_downloader._resolve_refseq_id(genbank_record, cache) == ""
+    assert cache.get("JGI_Genome_ID", "640427140") is None
+    assert cache.get("GenBank_accession", "GCA_000000001.1") is None
+
+    # the IDs are resolved once the services are back
+    stand_in_server.jgi_errors.clear()
+    monkeypatch.setattr(podp_antismash_downloader, "NCBI_LOOKUP_URL", ncbi_url)
+    assert podp_antismash_downloader._resolve_refseq_id(jgi_record, cache) == "GCF_000016425.1"
+    assert podp_antismash_downloader._resolve_refseq_id(genbank_record, cache) == "GCF_000000001.1"
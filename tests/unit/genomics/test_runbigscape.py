@@ -1,4 +1,6 @@
+import logging
 import os
+import sys
 import pytest
 from nplinker.genomics import bigscape
 from .. import DATA_DIR
@@ -66,3 +68,45 @@ def test_bad_parameters(tmp_path, version):
         )
 
     assert "BiG-SCAPE" in e.value.args[0]
+
+
+@pytest.fixture
+def fake_bigscape(tmp_path, monkeypatch):
+    """Put a fake BiG-SCAPE v1 executable, which prints its arguments, first on the PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "bigscape.py"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "print('args:', ' '.join(sys.argv[1:]))\n"
+        "print('Processing BGCs', file=sys.stderr)\n"
+        "sys.exit(3 if '--fail' in sys.argv else 0)\n"
+    )
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_run_bigscape_output_to_log(tmp_path, fake_bigscape, caplog):
+    caplog.set_level(logging.INFO)
+    result = bigscape.run_bigscape(tmp_path, tmp_path, "--mix", version=1, cores=3)
+    assert result is True
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        message.startswith("BiG-SCAPE [") and message.endswith("--mix --cores 3")
+        for message in messages
+    )
+    # stderr is streamed to the log as well
+    assert any(message.endswith("]: Processing BGCs") for message in messages)
+
+
+def test_run_bigscape_cores_in_params(tmp_path, fake_bigscape, caplog):
+    caplog.set_level(logging.INFO)
+    bigscape.run_bigscape(tmp_path, tmp_path, "--mix --cores 2", version=1, cores=3)
+    assert any(record.getMessage().endswith("--mix --cores 2") for record in caplog.records)
+
+
+def test_run_bigscape_failure_output(tmp_path, fake_bigscape, caplog):
+    with pytest.raises(RuntimeError, match="error code 3"):
+        bigscape.run_bigscape(tmp_path, tmp_path, "--fail", version=1)
+    assert "Processing BGCs" in caplog.records[-1].getMessage()
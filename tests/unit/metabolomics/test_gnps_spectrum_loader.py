@@ -1,6 +1,7 @@
 import pytest
 from nplinker.metabolomics.gnps import GNPSFormat
 from nplinker.metabolomics.gnps import GNPSSpectrumLoader
+from nplinker.metabolomics.gnps import MGFIndex
 
 
 @pytest.mark.parametrize(
@@ -10,3 +11,83 @@ from nplinker.metabolomics.gnps import GNPSSpectrumLoader
 def test_gnps_spectrum_loader(workflow, num_spectra, gnps_spectra_files):
     loader = GNPSSpectrumLoader(gnps_spectra_files[workflow])
     assert len(loader.spectra) == num_spectra
+
+
+MGF = """\
+BEGIN IONS
+PEPMASS=413.2
+CHARGE=1+
+SCANS=1
+RTINSECONDS=12.5
+100.1\t5
+200.2\t7
+END IONS
+
+BEGIN IONS
+PEPMASS=500.0
+CHARGE=2+
+SCANS=2
+END IONS
+
+BEGIN IONS
+PEPMASS=600.0 30
+CHARGE=2+
+SCANS=3
+# comment
+101 1
+102 2 1+
+END IONS
+"""
+
+
+@pytest.fixture
+def mgf_file(tmp_path):
+    file = tmp_path / "spectra.mgf"
+    file.write_text(MGF)
+    return file
+
+
+def test_gnps_spectrum_loader_lazy(mgf_file):
+    expected = GNPSSpectrumLoader(mgf_file).spectra
+    spectra = GNPSSpectrumLoader(mgf_file, lazy=True).spectra
+
+    # the spectrum without peaks is skipped
+    assert [spec.id for spec in spectra] == ["1", "3"]
+    assert [spec.precursor_mz for spec in spectra] == [413.2, 300.0]
+    assert [spec.rt for spec in spectra] == [12.5, 0]
+    assert spectra[1].metadata == {"pepmass": [600.0, 30.0], "charge": [2], "scans": "3"}
+    assert not spectra[0].peaks_loaded
+
+    for spec, expected_spec in zip(spectra, expected):
+        assert spec == expected_spec
+        assert spec.mz == expected_spec.mz
+        assert spec.intensity == expected_spec.intensity
+
+
+def test_gnps_spectrum_loader_lazy_index(mgf_file, monkeypatch):
+    index_file = mgf_file.with_name("spectra.mgf.index.json")
+    GNPSSpectrumLoader(mgf_file, lazy=True)
+    index = MGFIndex.load(mgf_file)
+    assert index_file.exists()
+    assert index.ids == ["1", "3"]
+    assert index.offsets == [0, MGF.index("BEGIN IONS\nPEPMASS=600.0")]
+
+    # the saved index is used instead of parsing the file
+    monkeypatch.setattr(GNPSSpectrumLoader, "_build_index", None)
+    spectra = GNPSSpectrumLoader(mgf_file, lazy=True).spectra
+    assert spectra[1].mz == [101.0, 102.0]
+    monkeypatch.undo()
+
+    # the index is rebuilt when the file has changed
+    mgf_file.write_text(MGF.replace("SCANS=3", "SCANS=4"))
+    assert MGFIndex.load(mgf_file) is None
+    spectra = GNPSSpectrumLoader(mgf_file, lazy=True).spectra
+    assert [spec.id for spec in spectra] == ["1", "4"]
+
+
+def test_gnps_spectrum_loader_lazy_invalid(tmp_path):
+    file = tmp_path / "spectra.mgf"
+    file.write_text(MGF.replace("SCANS=3\n", ""))
+    with pytest.raises(ValueError, match="Expected parameter 'scans' not found"):
+        GNPSSpectrumLoader(file, lazy=True)
+    assert not (tmp_path / "spectra.mgf.index.json").exists()
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
@@ -124,3 +125,18 @@ def test_is_singleton(spectrum1, spectrum2):
     assert mf.is_singleton()
     mf.add_spectrum(spectrum2)
     assert not mf.is_singleton()
+
+
+def test_pickle(spectrum1, spectrum2):
+    """Test pickling and unpickling the slot-based MolecularFamily object."""
+    mf = MolecularFamily("mf001")
+    mf.add_spectrum(spectrum1)
+    mf.add_spectrum(spectrum2)
+    assert not hasattr(mf, "__dict__")
+
+    mf_copy = pickle.loads(pickle.dumps(mf))
+    assert mf_copy == mf
+    assert mf_copy.spectra == mf.spectra
+    assert mf_copy.spectra_ids == mf.spectra_ids
+    assert mf_copy.strains == mf.strains
+    assert all(spec.family is mf_copy for spec in mf_copy.spectra)
@@ -1,3 +1,4 @@
+import pickle
 import numpy as np
 import pytest
 from nplinker.metabolomics import Spectrum
@@ -68,3 +69,50 @@ def test_has_strain():
     spec.strains.add(strain1)
     assert spec.has_strain(strain1)
     assert not spec.has_strain(strain2)
+
+
+def test_pickle():
+    """Test pickling and unpickling the slot-based Spectrum object."""
+    spec = Spectrum("spec1", [100, 200], [0.1, 0.2], 150, 10, {"info": "test"})
+    spec.strains.add(Strain("strain1"))
+    spec.gnps_id = "CCMSLIB1"
+    assert not hasattr(spec, "__dict__")
+
+    spec_copy = pickle.loads(pickle.dumps(spec))
+    assert spec_copy == spec
+    assert spec_copy.mz == [100, 200]
+    assert spec_copy.rt == 10
+    assert spec_copy.metadata == {"info": "test"}
+    assert spec_copy.gnps_id == "CCMSLIB1"
+    assert spec_copy.strains == spec.strains
+    assert np.array_equal(spec_copy.peaks, spec.peaks)
+
+
+def test_lazy():
+    """Test the spectrum with peaks loaded on first access."""
+    calls = []
+
+    def peak_loader():
+        calls.append(1)
+        return [100, 200], [0.1, 0.2]
+
+    spec = Spectrum.lazy("spec1", peak_loader, 150, 10, {"info": "test"})
+    assert not spec.peaks_loaded
+    assert spec.precursor_mz == 150
+    assert spec.metadata == {"info": "test"}
+    assert calls == []
+
+    assert spec.intensity == [0.1, 0.2]
+    assert spec.mz == [100, 200]
+    assert np.array_equal(spec.peaks, np.array([[100, 0.1], [200, 0.2]]))
+    assert spec.peaks_loaded
+    assert calls == [1]
+
+
+def test_lazy_pickle():
+    """Test pickling a lazy spectrum loads its peaks."""
+    spec = Spectrum.lazy("spec1", lambda: ([100, 200], [0.1, 0.2]), 150)
+    spec_copy = pickle.loads(pickle.dumps(spec))
+    assert spec_copy.peaks_loaded
+    assert spec_copy.mz == [100, 200]
+    assert spec_copy.intensity == [0.1, 0.2]
@@ -0,0 +1,109 @@
+import pickle
+import pytest
+from nplinker.metabolomics import MetadataTable
+from nplinker.metabolomics import MetadataView
+from nplinker.metabolomics import Spectrum
+from nplinker.metabolomics import spectrum_metadata
+
+
+@pytest.fixture
+def table() -> MetadataTable:
+    table = MetadataTable()
+    table.append({"charge": [1], "ionmode": "Positive", "filename": "a.mzXML"})
+    table.append({"charge": [1], "ionmode": "Positive", "rtinseconds": 12.5})
+    return table
+
+
+def test_append(table):
+    assert len(table) == 2
+    assert table.columns == ["charge", "ionmode", "filename", "rtinseconds"]
+    assert table.column("filename") == ["a.mzXML", None]
+
+    view = table.append({"ionmode": "Negative"})
+    assert isinstance(view, MetadataView)
+    assert len(table) == 3
+    assert view == {"ionmode": "Negative"}
+    assert table.column("charge") == [[1], [1], None]
+
+
+def test_values_are_shared(table):
+    charge = table._columns["charge"]
+    assert charge[0] is charge[1]
+    assert table.row(0)["ionmode"] is table.row(1)["ionmode"]
+
+    # equal values of different types are not merged
+    view = table.append({"charge": [True], "rtinseconds": 12.5, "scans": 1})
+    assert type(view["charge"][0]) is bool
+    view = table.append({"scans": True})
+    assert type(view["scans"]) is bool
+
+    # values with floats are not shared
+    table.append({"pepmass": (150.5, None)})
+    table.append({"pepmass": (150.5, None)})
+    assert "pepmass" not in table._values
+
+
+def test_unique_values_are_not_shared(table, monkeypatch):
+    monkeypatch.setattr(spectrum_metadata, "MAX_SHARED_VALUES", 3)
+    for i in range(5):
+        table.append({"scans": str(i), "ionmode": "Positive"})
+    assert table._values["scans"] is None
+    assert table.column("scans") == [None, None, "0", "1", "2", "3", "4"]
+    assert table.row(2)["ionmode"] is table.row(6)["ionmode"]
+
+
+def test_float_column(table):
+    assert type(table._columns["rtinseconds"]) is spectrum_metadata._FloatColumn
+    assert table.column("rtinseconds") == [None, 12.5]
+    assert type(table.row(1)["rtinseconds"]) is float
+
+    # a value of another type turns the column into a list
+    table.append({"rtinseconds": "n/a"})
+    assert table.column("rtinseconds") == [None, 12.5, "n/a"]
+    del table.row(1)["rtinseconds"]
+    assert table.column("rtinseconds") == [None, None, "n/a"]
+
+
+def test_list_values_are_copies(table):
+    view = table.row(0)
+    view["charge"].append(2)
+    assert view["charge"] == [1]
+    assert table.row(1)["charge"] == [1]
+    assert dict(view)["charge"] is not view["charge"]
+
+
+def test_view(table):
+    view = table.row(1)
+    assert view == {"charge": [1], "ionmode": "Positive", "rtinseconds": 12.5}
+    assert len(view) == 3
+    assert list(view) == ["charge", "ionmode", "rtinseconds"]
+    assert "filename" not in view
+    assert view.get("filename") is None
+    with pytest.raises(KeyError):
+        view["filename"]
+    with pytest.raises(IndexError):
+        table.row(2)
+
+    # writes go to the table
+    view["filename"] = "b.mzXML"
+    view["new_key"] = "value"
+    del view["rtinseconds"]
+    assert table.row(1) == {
+        "charge": [1],
+        "ionmode": "Positive",
+        "filename": "b.mzXML",
+        "new_key": "value",
+    }
+    assert "new_key" not in table.row(0)
+    with pytest.raises(KeyError):
+        del view["rtinseconds"]
+
+
+def test_spectrum_metadata_pickle(table):
+    spec = Spectrum("spec1", [100.0], [1.0], 150.0, metadata=table.row(0))
+    spec_copy = pickle.loads(pickle.dumps(spec))
+    assert spec_copy.metadata == {"charge": [1], "ionmode": "Positive", "filename": "a.mzXML"}
+
+    # only the row is pickled, not the whole table
+    assert type(spec_copy.metadata) is dict
+    assert b"rtinseconds" not in pickle.dumps(spec)
@@ -0,0 +1,108 @@
+import io
+import json
+import pytest
+from nplinker.genomics import BGC
+from nplinker.parsers.kcb import KCBJSONParser
+from nplinker.parsers.kcb import _iter_clusterblast_records
+
+
+def _knowncluster(record_id):
+    return {
+        "record_id": record_id,
+        "results": [
+            {
+                "region_number": 1,
+                "total_hits": 1,
+                "ranking": [
+                    [
+                        {
+                            "accession": "BGC0000001",
+                            "description": "abyssomicin",
+                            "proteins": ["gene_a", "gene_b"],
+                        },
+                        {
+                            "pairings": [
+                                [
+                                    "input|c1|0-100|-|locus_1|desc",
+                                    0,
+                                    {"name": "gene_a", "perc_ident": 80, "blastscore": 300},
+                                ]
+                            ]
+                        },
+                    ]
+                ],
+            }
+        ],
+        "mibig_entries": {"1": {"locus_1": []}},
+    }
+
+
+@pytest.fixture
+def antismash_json():
+    return {
+        "version": "7.0.0",
+        "input_file": 'path with "quotes" and \\ backslash',
+        "records": [
+            {
+                "id": "rec1",
+                "seq": {"data": "ACGT" * 10000},
+                "features": [{"location": "[0:100]", "qualifiers": {"note": ["}]"]}}],
+                "modules": {
+                    "antismash.detection.hmm_detection": {"rule": [1, 2.5, True, None]},
+                    "antismash.modules.clusterblast": {"knowncluster": _knowncluster("rec1")},
+                },
+            },
+            {"id": "rec2", "features": [], "modules": {}},
+            {
+                "id": "rec3",
+                "modules": {
+                    "antismash.modules.clusterblast": {"knowncluster": _knowncluster("rec3")}
+                },
+            },
+        ],
+        "timings": {},
+    }
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_clusterblast_records(antismash_json, indent):
+    f = io.StringIO(json.dumps(antismash_json, indent=indent))
+    records = list(_iter_clusterblast_records(f))
+
+    assert len(records) == 3
+    assert records[0] == {
+        "modules": {"antismash.modules.clusterblast": {"knowncluster": _knowncluster("rec1")}}
+    }
+    assert records[1] == {}
+    assert records[2] == {
+        "modules": {"antismash.modules.clusterblast": {"knowncluster": _knowncluster("rec3")}}
+    }
+
+
+def test_kcb_json_parser(antismash_json, tmp_path):
+    gbk_file = tmp_path / "rec1.region001.gbk"
+    gbk_file.touch()
+    with open(tmp_path / "rec1.json", "w") as f:
+        json.dump(antismash_json, f)
+
+    bgc = BGC("rec1.region001")
+    bgc.antismash_file = str(gbk_file)
+    bgc.antismash_id = "rec1"
+    bgc.antismash_region = 1
+
+    hits = KCBJSONParser([bgc]).parse_hits()
+
+    # rec3 is not one of the wanted records
+    assert list(hits) == ["rec1"]
+    hit = hits["rec1"][1]
+    assert hit["mibig_id"] == "BGC0000001"
+    assert hit["all_bgc_genes"] == ["locus_1"]
+    assert hit["all_mibig_genes"] == ["gene_a", "gene_b"]
+    assert hit["individual_hits"] == [
+        {
+            "source_bgc_gene": "locus_1",
+            "mibig_bgc_gene": "gene_a",
+            "identity_percent": 80,
+            "blast_score": 300,
+        }
+    ]
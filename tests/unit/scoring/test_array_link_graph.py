@@ -0,0 +1,251 @@
+import pickle
+import numpy as np
+import pytest
+from pytest import fixture
+from nplinker.scoring import ArrayLinkGraph
+from nplinker.scoring import LinkGraph
+from nplinker.scoring import Score
+
+
+@fixture(scope="module")
+def score():
+    return Score("metcalf", 1.0, {"cutoff": 0.5})
+
+
+@fixture
+def lg(gcfs, spectra, score):
+    lg = ArrayLinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=score)
+    return lg
+
+
+def test_init():
+    lg = ArrayLinkGraph()
+    assert isinstance(lg, LinkGraph)
+    assert len(lg) == 0
+    assert lg.links == []
+
+
+def test_len(lg):
+    assert len(lg) == 2  # 2 objects or nodes
+
+
+def test_getitem(lg, gcfs, spectra, score):
+    assert lg[gcfs[0]] == {spectra[0]: {"metcalf": score}}
+    assert lg[spectra[0]] == {gcfs[0]: {"metcalf": score}}
+
+    with pytest.raises(KeyError, match=".* not found in the link graph."):
+        lg[gcfs[1]]
+
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg["gcf"]
+
+
+def test_links(lg, gcfs, spectra, score):
+    assert lg.links == [(gcfs[0], spectra[0], {"metcalf": score})]
+
+
+def test_link_view(lg, gcfs, spectra, score):
+    view = lg.link_view
+    assert len(view) == lg.num_links == 1
+    assert list(view) == [(gcfs[0], spectra[0], {"metcalf": score})]
+    assert (gcfs[0], spectra[0]) in view
+    assert (gcfs[1], spectra[0]) not in view
+
+    # the view reflects links added later
+    lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    assert len(view) == lg.num_links == 2
+
+
+def test_top_links(gcfs, spectra, mfs):
+    lg = ArrayLinkGraph()
+    parameter = {"cutoff": 0.5}
+    lg.add_links([gcfs[0]] * 3, list(spectra), [1.0, 3.0, 2.0], "metcalf", parameter)
+    lg.add_link(gcfs[0], mfs[0], rosetta=Score("rosetta", 1.0, {}))
+
+    assert [v for v, _ in lg.top_links(gcfs[0], "metcalf")] == [spectra[1], spectra[2], spectra[0]]
+    assert lg.top_links(gcfs[0], "metcalf", 1) == [
+        (spectra[1], {"metcalf": Score("metcalf", 3.0, parameter)})
+    ]
+    assert lg.top_links(gcfs[0], "rosetta") == [(mfs[0], {"rosetta": Score("rosetta", 1.0, {})})]
+    assert lg.top_links(spectra[0], "rosetta") == []
+
+    # the sorted links are updated after adding links
+    lg.add_link(gcfs[0], mfs[1], metcalf=Score("metcalf", 5.0, parameter))
+    assert lg.top_links(gcfs[0], "metcalf", 1)[0][0] == mfs[1]
+
+    with pytest.raises(ValueError, match=".* is not a valid name of scoring method.*"):
+        lg.top_links(gcfs[0], "invalid")
+
+    with pytest.raises(KeyError, match=".* not found in the link graph."):
+        lg.top_links(gcfs[1], "metcalf")
+
+
+def test_add_link(gcfs, spectra, score):
+    lg = ArrayLinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=score)
+
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.add_link(gcfs[0], gcfs[0], metcalf=score)
+
+    with pytest.raises(
+        ValueError, match="At least one scoring method and its data must be provided."
+    ):
+        lg.add_link(gcfs[0], spectra[0])
+
+    with pytest.raises(ValueError, match=".* is not a valid name of scoring method.*"):
+        lg.add_link(gcfs[0], spectra[0], invalid=score)
+
+    with pytest.raises(TypeError, match=".* is not a Score object."):
+        lg.add_link(gcfs[0], spectra[0], metcalf="score")
+
+    with pytest.raises(TypeError, match=".* has a non-numeric value.*"):
+        lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", "1.0", {"cutoff": 0.5}))
+
+    with pytest.raises(ValueError, match="All links of scoring method metcalf must have .*"):
+        lg.add_link(gcfs[0], spectra[1], metcalf=Score("metcalf", 1.0, {"cutoff": 0.8}))
+
+
+def test_add_link_invalid_unchanged(gcfs, spectra):
+    lg = ArrayLinkGraph()
+    # the invalid rosetta score must not leave the metcalf parameters behind
+    with pytest.raises(TypeError, match=".* has a non-numeric value.*"):
+        lg.add_link(
+            gcfs[0],
+            spectra[0],
+            metcalf=Score("metcalf", 1.0, {"cutoff": 0.5}),
+            rosetta=Score("rosetta", "1.0", {}),
+        )
+    assert lg.links == []
+
+    lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", 1.0, {"cutoff": 0.8}))
+    assert lg.get_link_data(gcfs[0], spectra[0])["metcalf"].parameter == {"cutoff": 0.8}
+
+
+def test_add_link_parameter_copied(gcfs, spectra):
+    lg = ArrayLinkGraph()
+    parameter = {"cutoff": 0.5}
+    lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", 1.0, parameter))
+    lg.add_links([gcfs[1]], [spectra[1]], [2.0], "rosetta", parameter)
+    parameter["cutoff"] = 0.8
+
+    assert lg.get_link_data(gcfs[0], spectra[0])["metcalf"].parameter == {"cutoff": 0.5}
+    assert lg.get_link_data(gcfs[1], spectra[1])["rosetta"].parameter == {"cutoff": 0.5}
+
+
+def test_add_link_existing(lg, gcfs, spectra, mfs, score):
+    lg.add_link(gcfs[1], mfs[0], metcalf=score)
+    new_score = Score("metcalf", 2.0, {"cutoff": 0.5})
+    lg.add_link(spectra[0], gcfs[0], metcalf=new_score)
+
+    assert len(lg) == 4
+    assert lg.links == [
+        (gcfs[0], spectra[0], {"metcalf": new_score}),
+        (gcfs[1], mfs[0], {"metcalf": score}),
+    ]
+    assert lg[spectra[0]] == {gcfs[0]: {"metcalf": new_score}}
+
+
+def test_add_links(lg, gcfs, spectra, mfs, score):
+    lg.add_links(
+        [gcfs[1], spectra[2], gcfs[0]],
+        [mfs[1], gcfs[2], spectra[0]],
+        np.array([2.0, 3.0, 4.0]),
+        "metcalf",
+        {"cutoff": 0.5},
+    )
+    lg.add_links([gcfs[1]], [mfs[1]], [5.0], "rosetta", {})
+
+    assert len(lg) == 6
+    assert lg.get_link_data(gcfs[0], spectra[0]) == {
+        "metcalf": Score("metcalf", 4.0, {"cutoff": 0.5})
+    }
+    assert lg.get_link_data(gcfs[1], mfs[1]) == {
+        "metcalf": Score("metcalf", 2.0, {"cutoff": 0.5}),
+        "rosetta": Score("rosetta", 5.0, {}),
+    }
+    assert lg[gcfs[2]] == {spectra[2]: {"metcalf": Score("metcalf", 3.0, {"cutoff": 0.5})}}
+
+    with pytest.raises(TypeError, match="Score values must be numeric."):
+        lg.add_links([gcfs[0]], [spectra[1]], ["a"], "metcalf", {"cutoff": 0.5})
+
+    with pytest.raises(ValueError, match="All links of scoring method metcalf must have .*"):
+        lg.add_links([gcfs[0]], [spectra[1]], [1.0], "metcalf", {"cutoff": 0.8})
+
+
+def test_has_link(lg, gcfs, spectra):
+    assert lg.has_link(gcfs[0], spectra[0]) is True
+    assert lg.has_link(spectra[0], gcfs[0]) is True
+    assert lg.has_link(gcfs[0], spectra[1]) is False
+    assert lg.has_link(gcfs[1], spectra[1]) is False
+
+
+def test_get_link_data(lg, gcfs, spectra, score):
+    assert lg.get_link_data(gcfs[0], spectra[0]) == {"metcalf": score}
+    assert lg.get_link_data(gcfs[0], spectra[1]) is None
+
+
+def test_filter(gcfs, spectra, score):
+    lg = ArrayLinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=score)
+    lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    lg.add_link(gcfs[2], spectra[2], metcalf=score)
+
+    lg_filtered = lg.filter([gcfs[0], gcfs[1]])
+    assert isinstance(lg_filtered, ArrayLinkGraph)
+    assert len(lg_filtered) == 4
+    assert lg_filtered.links == [
+        (gcfs[0], spectra[0], {"metcalf": score}),
+        (gcfs[1], spectra[1], {"metcalf": score}),
+    ]
+
+    lg_filtered = lg.filter([], [spectra[2]])
+    assert lg_filtered.links == [(gcfs[2], spectra[2], {"metcalf": score})]
+
+    assert len(lg.filter([], [])) == 0
+
+    lg_filtered = lg.filter([gcfs[0], gcfs[1]], [spectra[1], spectra[2]])
+    assert lg_filtered.links == [(gcfs[1], spectra[1], {"metcalf": score})]
+
+
+def test_pickle(lg, gcfs, spectra, score):
+    lg_loaded = pickle.loads(pickle.dumps(lg))
+    assert lg_loaded.links == lg.links
+    assert lg_loaded.has_link(gcfs[0], spectra[0]) is True
+
+
+def test_filter_links(gcfs, spectra, mfs, score):
+    lg = ArrayLinkGraph()
+    lg.add_links(
+        [gcfs[0], gcfs[0], gcfs[1], gcfs[2]],
+        [spectra[0], mfs[0], spectra[1], spectra[2]],
+        [1.0] * 4,
+        "metcalf",
+        {"cutoff": 0.5},
+    )
+
+    def link_pairs(lg):
+        return {frozenset((u, v)) for u, v, _ in lg.links}
+
+    # only links between the two sides are kept, regardless of which side is smaller
+    assert link_pairs(lg.filter([gcfs[0], gcfs[1]], [spectra[0], spectra[1], spectra[2]])) == {
+        frozenset((gcfs[0], spectra[0])),
+        frozenset((gcfs[1], spectra[1])),
+    }
+    assert link_pairs(lg.filter([spectra[0], spectra[1], spectra[2]], [gcfs[0]])) == {
+        frozenset((gcfs[0], spectra[0]))
+    }
+    assert link_pairs(lg.filter([gcfs[0], gcfs[0]])) == {
+        frozenset((gcfs[0], spectra[0])),
+        frozenset((gcfs[0], mfs[0])),
+    }
+    assert lg.filter([gcfs[0]], [spectra[0]]).get_link_data(gcfs[0], spectra[0]) == {
+        "metcalf": score
+    }
+
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg.filter(["gcf"])
+
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.filter([gcfs[0]], [gcfs[1]])
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from pytest import fixture
 from nplinker.scoring import LinkGraph
@@ -44,6 +45,43 @@ def test_links(lg, gcfs, spectra, score):
     assert lg.links == [(gcfs[0], spectra[0], {"metcalf": score})]
 
 
+def test_link_view(lg, gcfs, spectra, score):
+    view = lg.link_view
+    assert len(view) == lg.num_links == 1
+    assert list(view) == [(gcfs[0], spectra[0], {"metcalf": score})]
+    assert (gcfs[0], spectra[0]) in view
+    assert (gcfs[1], spectra[0]) not in view
+
+    # the view reflects links added later
+    lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    assert len(view) == lg.num_links == 2
+
+
+def test_top_links(gcfs, spectra, mfs):
+    lg = LinkGraph()
+    parameter = {"cutoff": 0.5}
+    lg.add_links([gcfs[0]] * 3, list(spectra), [1.0, 3.0, 2.0], "metcalf", parameter)
+    lg.add_link(gcfs[0], mfs[0], rosetta=Score("rosetta", 1.0, {}))
+
+    assert [v for v, _ in lg.top_links(gcfs[0], "metcalf")] == [spectra[1], spectra[2], spectra[0]]
+    assert lg.top_links(gcfs[0], "metcalf", 1) == [
+        (spectra[1], {"metcalf": Score("metcalf", 3.0, parameter)})
+    ]
+    assert lg.top_links(gcfs[0], "rosetta") == [(mfs[0], {"rosetta": Score("rosetta", 1.0, {})})]
+    assert lg.top_links(spectra[0], "rosetta") == []
+
+    # the sorted links are updated after adding links
+    lg.add_link(gcfs[0], mfs[1], metcalf=Score("metcalf", 5.0, parameter))
+    assert lg.top_links(gcfs[0], "metcalf", 1)[0][0] == mfs[1]
+
+    with pytest.raises(ValueError, match=".* is not a valid name of scoring method.*"):
+        lg.top_links(gcfs[0], "invalid")
+
+    with pytest.raises(KeyError, match=".* not found in the link graph."):
+        lg.top_links(gcfs[1], "metcalf")
+
+
 def test_add_link(gcfs, spectra, score):
     lg = LinkGraph()
     lg.add_link(gcfs[0], spectra[0], metcalf=score)
@@ -74,6 +112,35 @@ def test_add_link(gcfs, spectra, score):
         lg.add_link(gcfs[0], spectra[0], metcalf="score")
 
 
+def test_add_links(gcfs, spectra, mfs):
+    lg = LinkGraph()
+    parameter = {"cutoff": 0.5}
+    lg.add_links([gcfs[0], gcfs[1]], [spectra[0], mfs[1]], [1.0, 2.0], "metcalf", parameter)
+    lg.add_links([spectra[2]], [gcfs[2]], np.array([3.0]), "metcalf", parameter)
+
+    assert len(lg) == 6
+    assert lg.get_link_data(gcfs[0], spectra[0]) == {"metcalf": Score("metcalf", 1.0, parameter)}
+    assert lg.get_link_data(gcfs[1], mfs[1]) == {"metcalf": Score("metcalf", 2.0, parameter)}
+    assert lg.get_link_data(gcfs[2], spectra[2]) == {"metcalf": Score("metcalf", 3.0, parameter)}
+
+    # test mixed directions
+    lg.add_links([gcfs[0], spectra[1]], [mfs[0], gcfs[1]], [4.0, 5.0], "metcalf", parameter)
+    assert lg.has_link(gcfs[1], spectra[1]) is True
+
+    # test invalid inputs
+    with pytest.raises(ValueError, match=".* must have the same length."):
+        lg.add_links([gcfs[0]], [spectra[0], spectra[1]], [1.0], "metcalf", parameter)
+
+    with pytest.raises(ValueError, match=".* is not a valid name of scoring method.*"):
+        lg.add_links([gcfs[0]], [spectra[0]], [1.0], "invalid", parameter)
+
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.add_links([gcfs[0], gcfs[1]], [spectra[0], gcfs[0]], [1.0, 1.0], "metcalf", parameter)
+
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg.add_links(["gcf"], [spectra[0]], [1.0], "metcalf", parameter)
+
+
 def test_has_link(lg, gcfs, spectra):
     assert lg.has_link(gcfs[0], spectra[0]) is True
     assert lg.has_link(gcfs[0], spectra[1]) is False
@@ -112,3 +179,39 @@ def test_filter(gcfs, spectra, score):
     # test filtering with GCFs and Spectra
     lg_filtered = lg.filter(u_nodes, v_nodes)
     assert len(lg_filtered) == 4
+
+
+def test_filter_links(gcfs, spectra, mfs, score):
+    lg = LinkGraph()
+    lg.add_links(
+        [gcfs[0], gcfs[0], gcfs[1], gcfs[2]],
+        [spectra[0], mfs[0], spectra[1], spectra[2]],
+        [1.0] * 4,
+        "metcalf",
+        {"cutoff": 0.5},
+    )
+
+    def link_pairs(lg):
+        return {frozenset((u, v)) for u, v, _ in lg.links}
+
+    # only links between the two sides are kept, regardless of which side is smaller
+    assert link_pairs(lg.filter([gcfs[0], gcfs[1]], [spectra[0], spectra[1], spectra[2]])) == {
+        frozenset((gcfs[0], spectra[0])),
+        frozenset((gcfs[1], spectra[1])),
+    }
+    assert link_pairs(lg.filter([spectra[0], spectra[1], spectra[2]], [gcfs[0]])) == {
+        frozenset((gcfs[0], spectra[0]))
+    }
+    assert link_pairs(lg.filter([gcfs[0], gcfs[0]])) == {
+        frozenset((gcfs[0], spectra[0])),
+        frozenset((gcfs[0], mfs[0])),
+    }
+    assert lg.filter([gcfs[0]], [spectra[0]]).get_link_data(gcfs[0], spectra[0]) == {
+        "metcalf": score
+    }
+
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg.filter(["gcf"])
+
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.filter([gcfs[0]], [gcfs[1]])
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.scoring import ArrayLinkGraph
+from nplinker.scoring import LinkGraph
+from nplinker.scoring import LinkWriter
+from nplinker.scoring import Score
+from nplinker.scoring import read_links
+from nplinker.scoring import read_links_metadata
+from nplinker.scoring import write_links
+
+
+@pytest.fixture(params=[LinkGraph, ArrayLinkGraph])
+def lg(request, gcfs, spectra, mfs):
+    lg = request.param()
+    parameter = {"cutoff": 0, "standardised": False}
+    lg.add_links(
+        [gcfs[0], spectra[1], gcfs[1], gcfs[2]],
+        [spectra[0], gcfs[0], mfs[1], spectra[2]],
+        [1.0, 2.0, 3.0, 4.0],
+        "metcalf",
+        parameter,
+    )
+    lg.add_link(gcfs[1], mfs[1], rosetta=Score("rosetta", 5.0, {}))
+    return lg
+
+
+def sorted_rows(links):
+    """Sort the rows of the read links, with NaN replaced by None for comparison."""
+    rows = zip(*(links[name].tolist() for name in links))
+    return sorted((tuple(None if x != x else x for x in row) for row in rows), key=str)
+
+
+def test_write_read_links(lg, tmp_path):
+    file = tmp_path / "links.npz"
+    write_links(lg, file, chunk_size=3)
+
+    metadata = read_links_metadata(file)
+    assert metadata["num_links"] == 4
+    assert [chunk["num_links"] for chunk in metadata["chunks"]] == [3, 1]
+    assert metadata["methods"] == {
+        "metcalf": {"cutoff": 0, "standardised": False},
+        "rosetta": {},
+    }
+
+    links = read_links(file)
+    assert list(links) == ["gcf_id", "met_type", "met_id", "metcalf", "rosetta"]
+    assert sorted_rows(links) == sorted(
+        [
+            ("gcf1", "spectrum", "spectrum1", 1.0, None),
+            ("gcf1", "spectrum", "spectrum2", 2.0, None),
+            ("gcf2", "mf", "mf2", 3.0, 5.0),
+            ("gcf3", "spectrum", "spectrum3", 4.0, None),
+        ],
+        key=str,
+    )
+
+
+def test_read_links_subset(lg, tmp_path):
+    file = tmp_path / "links.npz"
+    write_links(lg, file, chunk_size=2)
+
+    links = read_links(file, ["met_id", "metcalf"], gcf_ids=["gcf1"])
+    assert list(links) == ["met_id", "metcalf"]
+    assert sorted_rows(links) == [("spectrum1", 1.0), ("spectrum2", 2.0)]
+
+    links = read_links(file, ["gcf_id"], gcf_ids=["gcf1", "gcf2"], met_ids=["mf2"])
+    assert links["gcf_id"].tolist() == ["gcf2"]
+
+    links = read_links(file, ["metcalf"], gcf_ids=["gcf4"])
+    assert links["metcalf"].shape == (0,)
+
+    with pytest.raises(ValueError, match="Column invalid not found.*"):
+        read_links(file, ["invalid"])
+
+
+def test_read_links_met_type(gcfs, tmp_path):
+    # a Spectrum and a MolecularFamily with the same id
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], Spectrum("1", [1], [1], 10.0), metcalf=Score("metcalf", 1.0, {}))
+    lg.add_link(gcfs[0], MolecularFamily("1"), metcalf=Score("metcalf", 2.0, {}))
+    file = tmp_path / "links.npz"
+    write_links(lg, file)
+
+    links = read_links(file, ["met_type", "metcalf"], met_ids=["1"])
+    assert sorted_rows(links) == [("mf", 2.0), ("spectrum", 1.0)]
+
+    links = read_links(file, ["metcalf"], met_ids=["1"], met_type="spectrum")
+    assert links["metcalf"].tolist() == [1.0]
+    links = read_links(file, ["metcalf"], met_type="mf")
+    assert links["metcalf"].tolist() == [2.0]
+
+    with pytest.raises(ValueError, match="Invalid met_type invalid.*"):
+        read_links(file, met_type="invalid")
+
+
+def test_link_writer_streaming(gcfs, spectra, tmp_path):
+    file = tmp_path / "links.npz"
+    score = Score("metcalf", 1.0, {"cutoff": 0})
+    with LinkWriter(file, chunk_size=2) as writer:
+        writer.write([(gcfs[0], spectra[0], {"metcalf": score})])
+        writer.write([(spectra[1], gcfs[1], {"metcalf": score})] * 4)
+
+        with pytest.raises(ValueError, match="All links of scoring method metcalf .*"):
+            writer.write([(gcfs[2], spectra[2], {"metcalf": Score("metcalf", 1.0, {})})])
+
+    metadata = read_links_metadata(file)
+    assert [chunk["num_links"] for chunk in metadata["chunks"]] == [2, 2, 1]
+    assert read_links(file, ["gcf_id"])["gcf_id"].tolist() == ["gcf1"] + ["gcf2"] * 4
+
+
+def test_read_invalid_file(tmp_path):
+    file = tmp_path / "links.npz"
+    np.savez(file, a=np.arange(3))
+    with pytest.raises(ValueError, match=".* is not a link file.*"):
+        read_links(file)
@@ -0,0 +1,83 @@
+import pytest
+from nplinker.genomics import BGC
+from nplinker.scoring.rosetta import rosetta
+from nplinker.scoring.rosetta.rosetta import Rosetta
+from nplinker.scoring.rosetta.rosetta_cache import RosettaCache
+
+
+def _hit(mibig_id):
+    return {mibig_id: {"all_bgc_genes": [], "all_mibig_genes": ["gene1"], "individual_hits": []}}
+
+
+@pytest.fixture
+def bgcs():
+    bgcs = []
+    for prefix in ("dir1", "dir2", "dir3"):
+        for i in (1, 2):
+            bgc = BGC(f"{prefix}_bgc{i}")
+            bgc.antismash_file = f"/antismash/{prefix}/{prefix}.region00{i}.gbk"
+            bgcs.append(bgc)
+    return bgcs
+
+
+@pytest.fixture
+def rosetta_obj(tmp_path):
+    # the Rosetta data files are not needed to collect the BGC hits
+    obj = Rosetta.__new__(Rosetta)
+    obj._max_workers = None
+    obj._ignore_genomic_cache = False
+    obj._dataset_id = "test"
+    obj._cache = RosettaCache(tmp_path / "rosetta_cache.sqlite", "v1")
+    yield obj
+    obj._cache.close()
+
+
+@pytest.fixture
+def collect_group_hits(monkeypatch):
+    """Replace the parsing of the knownclusterblast files of a directory and record the calls."""
+    calls = []
+
+    def fake_collect_group_hits(prefix, bgc_attrs):
+        calls.append(prefix)
+        if prefix == "/antismash/dir2":
+            raise ValueError("broken JSON file")
+        bgc_ids = [bgc_id for bgc_id, *_ in bgc_attrs]
+        # the first BGC has a hit, the second failed to parse
+        return {bgc_ids[0]: _hit("BGC0000001")}, {bgc_ids[1]}, 2
+
+    monkeypatch.setattr(rosetta, "_collect_group_hits", fake_collect_group_hits)
+    return calls
+
+
+def test_generate_bgc_hits(rosetta_obj, bgcs, collect_group_hits):
+    errors = rosetta_obj._generate_bgc_hits(bgcs)
+
+    # 2 errors in each of the two parsed directories and 1 for the failed directory
+    assert errors == 5
+    assert sorted(collect_group_hits) == ["/antismash/dir1", "/antismash/dir2", "/antismash/dir3"]
+    # the hits of the other directories are stored, and only the parsed BGCs are marked as
+    # scanned, so the failed ones are retried next time
+    assert sorted(rosetta_obj._cache.get_bgc_hits()) == ["dir1_bgc1", "dir3_bgc1"]
+    assert rosetta_obj._cache.get_scanned_bgc_ids() == {"dir1_bgc1", "dir3_bgc1"}
+
+
+def test_generate_bgc_hits_single_group(rosetta_obj, bgcs, collect_group_hits, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("No thread pool should be started for a single directory")
+
+    monkeypatch.setattr(rosetta, "ThreadPoolExecutor", fail)
+    assert rosetta_obj._generate_bgc_hits(bgcs[:2]) == 2
+    assert rosetta_obj._generate_bgc_hits([]) == 0
+    assert list(rosetta_obj._cache.get_bgc_hits()) == ["dir1_bgc1"]
+
+
+def test_init_bgc_hits(rosetta_obj, bgcs, collect_group_hits):
+    rosetta_obj._init_bgc_hits(bgcs)
+
+    assert rosetta_obj.bgc_hits == {bgcs[0]: _hit("BGC0000001"), bgcs[4]: _hit("BGC0000001")}
+    assert rosetta_obj._mibig2bgc == {"BGC0000001": {bgcs[0], bgcs[4]}}
+
+    # only the BGCs that were not scanned are parsed again
+    collect_group_hits.clear()
+    rosetta_obj._init_bgc_hits(bgcs)
+    assert sorted(collect_group_hits) == ["/antismash/dir1", "/antismash/dir2", "/antismash/dir3"]
@@ -0,0 +1,88 @@
+import pytest
+from nplinker.scoring.rosetta.rosetta_cache import RosettaCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RosettaCache(tmp_path / "rosetta_cache.sqlite", "v1")
+    yield cache
+    cache.close()
+
+
+def test_param_key():
+    assert RosettaCache.param_key(100, 0.2, 1) == RosettaCache.param_key(100.0, 0.2, 1)
+    assert RosettaCache.param_key(100, 0.2, 1) != RosettaCache.param_key(100, 0.2, 2)
+
+
+def test_spec_scores_refilter(cache):
+    key = RosettaCache.param_key(100, 0.2, 1)
+    assert cache.get_spectra_to_score(["spec1", "spec2"], key, 0.5) == ["spec1", "spec2"]
+
+    cache.add_spec_scores({"spec1": [("gnps1", 0.6), ("gnps2", 0.9)], "spec2": []}, key, 0.5)
+
+    # both spectra are cached for the same or a higher threshold
+    assert cache.get_spectra_to_score(["spec1", "spec2"], key, 0.5) == []
+    assert cache.get_spectra_to_score(["spec1", "spec2"], key, 0.8) == []
+    assert cache.get_spec_hits(key, 0.5) == {"spec1": [("gnps1", 0.6), ("gnps2", 0.9)]}
+    assert cache.get_spec_hits(key, 0.8) == {"spec1": [("gnps2", 0.9)]}
+
+    # a lower threshold or new spectra or different parameters require scoring
+    assert cache.get_spectra_to_score(["spec1", "spec3"], key, 0.3) == ["spec1", "spec3"]
+    other_key = RosettaCache.param_key(50, 0.2, 1)
+    assert cache.get_spectra_to_score(["spec1"], other_key, 0.5) == ["spec1"]
+
+
+def test_spec_scores_replace(cache):
+    key = RosettaCache.param_key(100, 0.2, 1)
+    cache.add_spec_scores({"spec1": [("gnps1", 0.6)], "spec2": [("gnps3", 0.7)]}, key, 0.5)
+    cache.add_spec_scores({"spec1": [("gnps1", 0.6), ("gnps2", 0.4)]}, key, 0.3)
+    assert cache.get_spectra_to_score(["spec1", "spec2"], key, 0.3) == ["spec2"]
+    assert cache.get_spec_hits(key, 0.3) == {
+        "spec1": [("gnps1", 0.6), ("gnps2", 0.4)],
+        "spec2": [("gnps3", 0.7)],
+    }
+
+
+def test_spec_scores_single_transaction(cache):
+    key = RosettaCache.param_key(100, 0.2, 1)
+    commits = []
+    cache._conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+    cache.add_spec_scores({f"spec{i}": [("gnps1", 0.6)] for i in range(100)}, key, 0.5)
+    assert commits == ["COMMIT"]
+    assert len(cache.get_spec_hits(key, 0.5)) == 100
+
+
+def test_bgc_hits(cache):
+    hit = {"all_bgc_genes": {"gene1"}, "all_mibig_genes": ["mgene1"], "individual_hits": []}
+    cache.add_bgc_hits({"bgc1": {"BGC0000001": hit}}, ["bgc1", "bgc2"])
+
+    assert cache.get_scanned_bgc_ids() == {"bgc1", "bgc2"}
+    bgc_hits = cache.get_bgc_hits()
+    assert list(bgc_hits) == ["bgc1"]
+    assert bgc_hits["bgc1"]["BGC0000001"]["all_bgc_genes"] == ["gene1"]
+
+    cache.clear_bgc_hits()
+    assert cache.get_scanned_bgc_ids() == set()
+    assert cache.get_bgc_hits() == {}
+
+
+def test_speclib(cache):
+    assert cache.get_speclib() is None
+    cache.set_speclib({"spectra": [1, 2, 3]})
+    assert cache.get_speclib() == {"spectra": [1, 2, 3]}
+
+
+def test_version_change_clears_cache(tmp_path):
+    db_file = tmp_path / "rosetta_cache.sqlite"
+    key = RosettaCache.param_key(100, 0.2, 1)
+    cache = RosettaCache(db_file, "v1")
+    cache.add_spec_scores({"spec1": [("gnps1", 0.6)]}, key, 0.5)
+    cache.close()
+
+    cache = RosettaCache(db_file, "v1")
+    assert cache.get_spec_hits(key, 0.5) == {"spec1": [("gnps1", 0.6)]}
+    cache.close()
+
+    cache = RosettaCache(db_file, "v2")
+    assert cache.get_spec_hits(key, 0.5) == {}
+    cache.close()
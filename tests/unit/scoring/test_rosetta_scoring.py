@@ -0,0 +1,110 @@
+import pytest
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import Spectrum
+from nplinker.scoring.rosetta.rosetta_hit import RosettaHit
+from nplinker.scoring.rosetta_scoring import RosettaScoring
+
+
+@pytest.fixture
+def objects():
+    spectra = [Spectrum(f"spec{i}", [100.0], [1.0], 150.0) for i in (1, 2, 3)]
+    bgcs = [BGC(f"bgc{i}") for i in (1, 2, 3)]
+    gcfs = [GCF(f"gcf{i}") for i in (1, 2, 3)]
+    # bgc1 is a hybrid BGC in gcf1 and gcf2, gcf3 has no hits
+    gcfs[0].add_bgc(bgcs[0])
+    gcfs[0].add_bgc(bgcs[1])
+    gcfs[1].add_bgc(bgcs[0])
+    gcfs[2].add_bgc(bgcs[2])
+    return spectra, bgcs, gcfs
+
+
+@pytest.fixture
+def hits(objects):
+    spectra, bgcs, _ = objects
+    return [
+        RosettaHit(spectra[0], "gnps1", "BGC0000001", bgcs[0], 0.9, 0.8),
+        RosettaHit(spectra[0], "gnps2", "BGC0000002", bgcs[0], 0.6, 0.3),
+        RosettaHit(spectra[1], "gnps3", "BGC0000003", bgcs[1], 0.7, 0.5),
+    ]
+
+
+@pytest.fixture
+def scoring(hits, monkeypatch):
+    # the indexes are class attributes, restore them after the test
+    for attr in ("HITS_BY_SPEC", "HITS_BY_BGC", "HITS_BY_GCF"):
+        monkeypatch.setattr(RosettaScoring, attr, {})
+    RosettaScoring._build_hit_indexes(hits)
+    return RosettaScoring(None)
+
+
+def _links(lg):
+    # the links are not directed, so key them by the sorted ids, i.e. (BGC or GCF, spectrum)
+    return {tuple(sorted((u.id, v.id))): data["rosetta"].value for u, v, data in lg.links}
+
+
+def test_build_hit_indexes(scoring, hits):
+    assert RosettaScoring.HITS_BY_SPEC == {"spec1": hits[:2], "spec2": hits[2:]}
+    assert RosettaScoring.HITS_BY_BGC == {"bgc1": hits[:2], "bgc2": hits[2:]}
+    assert RosettaScoring.HITS_BY_GCF == {"gcf1": hits, "gcf2": hits[:2]}
+
+
+def _results(results):
+    return {
+        (src.id, target.id): score.value
+        for src, targets in results.items()
+        for target, score in targets.items()
+    }
+
+
+def test_get_links_spectra(scoring, objects, hits):
+    spectra, _, _ = objects
+    lg = scoring.get_links(*spectra)
+    assert _links(lg) == {
+        ("gcf1", "spec1"): hits[:2],
+        ("gcf2", "spec1"): hits[:2],
+        ("gcf1", "spec2"): hits[2:],
+    }
+
+    # the links to the BGCs, which a LinkGraph cannot hold
+    scoring.bgc_to_gcf = False
+    results = scoring._collect_results_spectra(spectra, {})
+    assert _results(results) == {("spec1", "bgc1"): hits[:2], ("spec2", "bgc2"): hits[2:]}
+
+
+def test_get_links_bgcs(scoring, objects, hits):
+    _, bgcs, _ = objects
+    lg = scoring.get_links(*bgcs)
+    assert _links(lg) == {
+        ("gcf1", "spec1"): hits[:2],
+        ("gcf2", "spec1"): hits[:2],
+        ("gcf1", "spec2"): hits[2:],
+    }
+
+    scoring.bgc_to_gcf = False
+    results = scoring._collect_results_bgc(bgcs, {})
+    assert _results(results) == {("bgc1", "spec1"): hits[:2], ("bgc2", "spec2"): hits[2:]}
+
+
+def test_get_links_gcfs(scoring, objects, hits):
+    _, _, gcfs = objects
+    lg = scoring.get_links(*gcfs)
+    # the hits of all BGCs of a GCF, and no links for gcf3 without hits
+    assert _links(lg) == {
+        ("gcf1", "spec1"): hits[:2],
+        ("gcf1", "spec2"): hits[2:],
+        ("gcf2", "spec1"): hits[:2],
+    }
+    assert lg.get_link_data(gcfs[2], objects[0][0]) is None
+
+
+def test_get_links_cutoffs(scoring, objects, hits):
+    spectra, _, gcfs = objects
+    scoring.spec_score_cutoff = 0.65
+    scoring.bgc_score_cutoff = 0.4
+    assert _links(scoring.get_links(*gcfs)) == {
+        ("gcf1", "spec1"): hits[:1],
+        ("gcf1", "spec2"): hits[2:],
+        ("gcf2", "spec1"): hits[:1],
+    }
+    assert _links(scoring.get_links(spectra[2])) == {}
@@ -245,3 +245,31 @@ def test_to_json(collection: StrainCollection, tmp_path):
     with open(file_path, "r") as f:
         actual_data = json.load(f)
     assert actual_data == expected_data
+
+
+def test_intern(strain: Strain):
+    strain2 = Strain("strain_2")
+    collections = [StrainCollection() for _ in range(4)]
+    for sc in collections[:3]:
+        sc.add(strain)
+    collections[2].add(strain2)
+
+    assert StrainCollection.intern(collections) == 3
+    assert collections[0]._strains is collections[1]._strains
+    assert collections[0]._strain_dict_name is collections[1]._strain_dict_name
+    assert collections[0]._strains is not collections[2]._strains
+
+    # modifying a shared collection does not change the others
+    collections[1].add(strain2)
+    assert len(collections[1]) == 2
+    assert len(collections[0]) == 1
+    assert not collections[0].has_name("strain_2")
+    collections[0].remove(strain)
+    assert len(collections[0]) == 0
+    assert collections[3] == collections[0]
+    assert collections[1] == collections[2]
+
+
+def test_slots(collection: StrainCollection, strain: Strain):
+    assert not hasattr(collection, "__dict__")
+    assert not hasattr(strain, "__dict__")
@@ -0,0 +1,195 @@
+import threading
+import time
+import pytest
+from dynaconf import Dynaconf
+from nplinker import arranger
+from nplinker.arranger import DatasetArranger
+from nplinker.arranger import validate_antismash
+from nplinker.arranger import validate_bigscape
+from nplinker.arranger import validate_gnps
+from nplinker.defaults import VALIDATION_MANIFEST_FILENAME
+
+
+STEPS = {
+    "arrange_mibig": "mibig",
+    "arrange_gnps": "gnps",
+    "arrange_antismash": "antismash",
+    "arrange_bigscape": "bigscape",
+    "arrange_strain_mappings": "strain mappings",
+    "arrange_strains_selected": "strains selected",
+}
+
+
+@pytest.fixture
+def events(monkeypatch):
+    """Replace the arranging steps and record when each of them starts and ends."""
+    events = []
+    lock = threading.Lock()
+
+    def make_step(step):
+        def arrange(self):
+            with lock:
+                events.append(("start", step))
+            time.sleep(0.05)
+            with lock:
+                events.append(("end", step))
+
+        return arrange
+
+    for method, step in STEPS.items():
+        monkeypatch.setattr(DatasetArranger, method, make_step(step))
+    return events
+
+
+def make_arranger(tmp_path, arranging):
+    config = Dynaconf(root_dir=tmp_path, mode="local", concurrency={"arranging": arranging})
+    return DatasetArranger(config)
+
+
+def test_arrange_sequentially(tmp_path, events):
+    arranger = make_arranger(tmp_path, arranging=False)
+    arranger.arrange()
+    assert events == [(event, step) for step in STEPS.values() for event in ("start", "end")]
+    assert set(arranger.timings) == {*STEPS.values(), "total"}
+
+
+def test_arrange_concurrently(tmp_path, events):
+    arranger = make_arranger(tmp_path, arranging=True)
+    arranger.arrange()
+    assert len(events) == 2 * len(STEPS)
+    assert set(arranger.timings) == {*STEPS.values(), "total"}
+
+    # the independent steps start at the same time
+    assert {step for _, step in events[:4]} == {"mibig", "gnps", "antismash", "strains selected"}
+    assert all(event == "start" for event, _ in events[:4])
+
+    # dependent steps start after the steps they depend on
+    def index(event, step):
+        return events.index((event, step))
+
+    assert index("start", "bigscape") > index("end", "antismash")
+    assert index("start", "strain mappings") > index("end", "antismash")
+    assert index("start", "strain mappings") > index("end", "gnps")
+
+
+def test_arrange_concurrently_error(tmp_path, events, monkeypatch):
+    def fail(self):
+        raise FileNotFoundError("antiSMASH data directory not found")
+
+    monkeypatch.setattr(DatasetArranger, "arrange_antismash", fail)
+    arranger = make_arranger(tmp_path, arranging=True)
+    with pytest.raises(FileNotFoundError, match="antiSMASH data directory not found"):
+        arranger.arrange()
+    # the steps depending on antiSMASH are not started
+    steps = {step for _, step in events}
+    assert "bigscape" not in steps
+    assert "strain mappings" not in steps
+
+
+@pytest.fixture
+def antismash_dir(tmp_path):
+    antismash_dir = tmp_path / "antismash"
+    for genome in ("GCF_1", "GCF_2"):
+        (antismash_dir / genome).mkdir(parents=True)
+        (antismash_dir / genome / "NZ_1.region001.gbk").write_text("LOCUS")
+    return antismash_dir
+
+
+def test_validate_antismash_manifest(antismash_dir, monkeypatch):
+    validate_antismash(antismash_dir)
+    assert (antismash_dir / VALIDATION_MANIFEST_FILENAME).is_file()
+
+    # an unchanged directory is not validated again
+    def fail(*args, **kwargs):
+        raise AssertionError("Directory should not be validated again")
+
+    monkeypatch.setattr(arranger, "list_dirs", fail)
+    validate_antismash(antismash_dir)
+    monkeypatch.undo()
+
+    # a changed directory is validated again
+    (antismash_dir / "GCF_2" / "NZ_1.region001.gbk").rename(antismash_dir / "GCF_2" / "NZ_1.gbk")
+    with pytest.raises(FileNotFoundError, match="No BGC files found"):
+        validate_antismash(antismash_dir)
+
+
+def test_validate_gnps_manifest(tmp_path):
+    gnps_dir = tmp_path / "gnps"
+    gnps_dir.mkdir()
+    for name in ("file_mappings.tsv", "spectra.mgf", "molecular_families.tsv", "annotations.tsv"):
+        (gnps_dir / name).write_text("")
+    validate_gnps(gnps_dir)
+    assert (gnps_dir / VALIDATION_MANIFEST_FILENAME).is_file()
+    validate_gnps(gnps_dir)
+
+    (gnps_dir / "file_mappings.csv").write_text("")
+    with pytest.raises(ValueError, match="only one is allowed"):
+        validate_gnps(gnps_dir)
+    (gnps_dir / "file_mappings.csv").unlink()
+    (gnps_dir / "spectra.mgf").unlink()
+    with pytest.raises(FileNotFoundError, match="spectra.mgf"):
+        validate_gnps(gnps_dir)
+
+
+def test_validate_bigscape_manifest(tmp_path):
+    bigscape_dir = tmp_path / "bigscape"
+    bigscape_dir.mkdir()
+    (bigscape_dir / "mix_clustering_c0.30.tsv").write_text("")
+    validate_bigscape(bigscape_dir, "0.30")
+    # the manifest of one cutoff is not used for another cutoff
+    with pytest.raises(FileNotFoundError, match="BiG-SCAPE data not found"):
+        validate_bigscape(bigscape_dir, "0.50")
+    validate_bigscape(bigscape_dir, "0.30")
+
+
+@pytest.fixture
+def bigscape_runs(monkeypatch):
+    """Replace BiG-SCAPE and record its runs."""
+    runs = []
+
+    def fake_run_bigscape(antismash_path, output_path, extra_params, version, cores=None):
+        runs.append(cores)
+        mix_dir = output_path / "network_files" / f"run{len(runs)}" / "mix"
+        mix_dir.mkdir(parents=True)
+        (mix_dir / "mix_clustering_c0.30.tsv").write_text(f"run {len(runs)}")
+        return True
+
+    monkeypatch.setattr(arranger, "run_bigscape", fake_run_bigscape)
+    monkeypatch.setattr(DatasetArranger, "arrange_podp_project_json", lambda self: None)
+    return runs
+
+
+def test_arrange_bigscape_fingerprint(tmp_path, antismash_dir, bigscape_runs):
+    config = Dynaconf(
+        root_dir=tmp_path,
+        mode="podp",
+        bigscape={"version": 1, "parameters": "--mix", "cutoff": "0.30", "cores": 2},
+    )
+    dataset_arranger = DatasetArranger(config)
+    clustering_file = dataset_arranger.bigscape_dir / "mix_clustering_c0.30.tsv"
+
+    dataset_arranger.arrange_bigscape()
+    assert bigscape_runs == [2]
+    assert clustering_file.read_text() == "run 1"
+
+    # unchanged inputs
+    dataset_arranger.arrange_bigscape()
+    assert bigscape_runs == [2]
+
+    # the results are copied again from the running output with the same fingerprint
+    clustering_file.unlink()
+    dataset_arranger.arrange_bigscape()
+    assert bigscape_runs == [2]
+    assert clustering_file.read_text() == "run 1"
+
+    # new antiSMASH data, the results of the latest run are used
+    (antismash_dir / "GCF_3").mkdir()
+    (antismash_dir / "GCF_3" / "NZ_3.region001.gbk").write_text("LOCUS")
+    dataset_arranger.arrange_bigscape()
+    assert bigscape_runs == [2, 2]
+    assert clustering_file.read_text() == "run 2"
+
+    # changed parameters
+    config.bigscape.parameters = "--mix --clans-off"
+    dataset_arranger.arrange_bigscape()
+    assert len(bigscape_runs) == 3
@@ -25,6 +25,14 @@ def test_config(tmp_path):
         == "--mibig --clans-off --mix --include_singletons --cutoffs 0.30"
     )
     assert config.bigscape.cutoff == "0.30"
+    assert config.bigscape.all_cutoffs is False
     assert config.bigscape.version == 1
 
+    assert config.gnps.lazy_peaks is False
+
     assert config.scoring.methods == ["metcalf"]
+
+    assert config.cache.warm_start is True
+
+    assert config.concurrency.loading is False
+    assert config.concurrency.arranging is False
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.registry import EntityIndex
+from nplinker.registry import EntityRegistry
+from nplinker.strain import Strain
+
+
+@pytest.fixture
+def strains() -> list[Strain]:
+    strain1 = Strain("strain1")
+    strain1.add_alias("alias1")
+    return [strain1, Strain("strain2"), Strain("strain3")]
+
+
+@pytest.fixture
+def registry(strains) -> EntityRegistry:
+    gcf1 = GCF("gcf1")
+    gcf1.strains.add(strains[0])
+    gcf2 = GCF("gcf2")
+    gcf2.strains.add(strains[1])
+    gcf2.strains.add(strains[2])
+    spec = Spectrum("spec1", [1.0], [1.0], 100.0)
+    # a different strain object that has the id of strain2 as alias
+    strain_x = Strain("strain_x")
+    strain_x.add_alias("strain2")
+    spec.strains.add(strain_x)
+    spec.strains.add(Strain("strain_not_registered"))
+    mf = MolecularFamily("mf1")
+    return EntityRegistry(
+        strains=strains,
+        bgcs=[BGC("bgc1", "NRPS")],
+        gcfs=[gcf1, gcf2],
+        spectra=[spec],
+        mfs=[mf],
+    )
+
+
+def test_entity_index(strains):
+    index = EntityIndex(strains)
+    assert len(index) == 3
+    assert list(index) == strains
+    assert index.ids.tolist() == ["strain1", "strain2", "strain3"]
+
+    assert index.index(strains[1]) == 1
+    # an equal object is found by id
+    assert index.index(Strain("strain3")) == 2
+    assert Strain("strain3") in index
+    assert Strain("strain4") not in index
+    with pytest.raises(KeyError):
+        index.index(Strain("strain4"))
+
+    indexes = index.indexes([strains[2], Strain("strain4"), Strain("strain1")])
+    assert indexes.dtype == np.int64
+    assert indexes.tolist() == [2, -1, 0]
+    assert index.indexes_of_ids(["strain2", "x"]).tolist() == [1, -1]
+    assert index.indexes_of_ids([]).tolist() == []
+
+    assert index.take(np.array([2, 0])) == [strains[2], strains[0]]
+    assert index.take([]) == []
+
+
+def test_entity_index_duplicate_ids():
+    with pytest.raises(ValueError, match="Ids of the objects must be unique.*strain1"):
+        EntityIndex([Strain("strain1"), Strain("strain1")])
+
+
+def test_registry_getitem(registry):
+    assert registry[Strain] is registry.strains
+    assert registry[BGC] is registry.bgcs
+    assert registry[GCF] is registry.gcfs
+    assert registry[Spectrum] is registry.spectra
+    assert registry[MolecularFamily] is registry.mfs
+    with pytest.raises(TypeError, match="Invalid type"):
+        registry[str]
+
+
+def test_registry_strain_presence(registry):
+    presence = registry.strain_presence(GCF)
+    assert presence.tolist() == [[1, 0, 0], [0, 1, 1]]
+    assert registry.strain_presence(GCF) is presence
+
+    # the presence of strains is matched by strain names, same as `has_strain`
+    spec = registry.spectra.objects[0]
+    assert registry.strain_presence(Spectrum).tolist() == [[0, 1, 0]]
+    assert [spec.has_strain(strain) for strain in registry.strains] == [False, True, False]
+    assert registry.strain_presence(MolecularFamily).tolist() == [[0, 0, 0]]
+
+    with pytest.raises(TypeError, match="Invalid type"):
+        registry.strain_presence(BGC)
+
+
+def test_registry_strain_counts(registry):
+    assert registry.strain_counts(GCF).tolist() == [1, 2]
+    # including strains that are not registered
+    assert registry.strain_counts(Spectrum).tolist() == [2]
@@ -0,0 +1,170 @@
+import os
+import zipfile
+import pytest
+from dynaconf import Dynaconf
+from nplinker.genomics import BGC
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.snapshot import DatasetSnapshot
+from nplinker.snapshot import dataset_fingerprint
+from nplinker.snapshot import read_snapshot
+from nplinker.snapshot import read_snapshot_fingerprint
+from nplinker.snapshot import write_snapshot
+from nplinker.strain import Strain
+from nplinker.strain import StrainCollection
+
+
+@pytest.fixture
+def snapshot() -> DatasetSnapshot:
+    strain1 = Strain("strain1")
+    strain1.add_alias("alias1")
+    strain2 = Strain("strain2")
+    strains = StrainCollection()
+    strains.add(strain1)
+    strains.add(strain2)
+
+    bgc1 = BGC("bgc1", "NRPS", "PKS")
+    bgc1.strain = strain1
+    bgc1.antismash_id = "NZ_1"
+    bgc1.antismash_region = 1
+    bgc1.smiles = ("CCO",)
+    bgc2 = BGC("BGC0000001", "Polyketide")
+    bgc2.strain = strain2
+    bgc2.mibig_bgc_class = ("Polyketide",)
+    mibig_unused = BGC("BGC0000002", "NRP")
+
+    gcf = GCF("gcf1")
+    gcf.bigscape_class = "NRPS"
+    gcf.add_bgc(bgc1)
+    gcf.add_bgc(bgc2)
+    gcf.bgc_ids.add("bgc_not_loaded")
+
+    spec1 = Spectrum("spec1", [100.0, 200.5], [1.0, 0.5], 300.0, 12.5, {"charge": 1})
+    spec1.strains.add(strain1)
+    spec1.gnps_id = "CCMSLIB1"
+    spec1.gnps_annotations = {"Compound_Name": "x"}
+    spec2 = Spectrum("spec2", [50.0], [2.0], 150.0)
+    spec2.strains.add(strain2)
+    mf = MolecularFamily("mf1")
+    mf.add_spectrum(spec1)
+    mf.add_spectrum(spec2)
+
+    return DatasetSnapshot(
+        bgcs=[bgc1, bgc2],
+        gcfs=[gcf],
+        spectra=[spec1, spec2],
+        mfs=[mf],
+        mibig_bgcs=[bgc2, mibig_unused],
+        strains=strains,
+        product_types=["NRPS", "PKS"],
+    )
+
+
+def test_write_read_snapshot(snapshot, tmp_path):
+    file = tmp_path / "dataset.snapshot"
+    write_snapshot(file, snapshot)
+    loaded = read_snapshot(file)
+
+    assert loaded.bgcs == snapshot.bgcs
+    assert loaded.gcfs == snapshot.gcfs
+    assert loaded.spectra == snapshot.spectra
+    assert loaded.mfs == snapshot.mfs
+    assert loaded.mibig_bgcs == snapshot.mibig_bgcs
+    assert loaded.strains == snapshot.strains
+    assert loaded.product_types == ["NRPS", "PKS"]
+
+    # BGC attributes and references
+    bgc1, bgc2 = loaded.bgcs
+    assert bgc1.product_prediction == ("NRPS", "PKS")
+    assert bgc1.antismash_id == "NZ_1"
+    assert bgc1.antismash_region == 1
+    assert bgc1.smiles == ("CCO",)
+    assert bgc2.mibig_bgc_class == ("Polyketide",)
+    assert bgc1.strain.aliases == {"alias1"}
+    assert bgc1.parents == {loaded.gcfs[0]}
+    assert loaded.mibig_bgcs[0] is bgc2
+
+    # GCF attributes and references
+    gcf = loaded.gcfs[0]
+    assert gcf.bigscape_class == "NRPS"
+    assert gcf.bgcs == {bgc1, bgc2}
+    assert gcf.bgc_ids == {"bgc1", "BGC0000001", "bgc_not_loaded"}
+    assert gcf.strains == snapshot.gcfs[0].strains
+
+    # spectrum attributes and references
+    spec1, spec2 = loaded.spectra
+    assert spec1.mz == [100.0, 200.5]
+    assert spec1.intensity == [1.0, 0.5]
+    assert spec1.rt == 12.5
+    assert spec1.metadata == {"charge": 1}
+    assert spec1.gnps_id == "CCMSLIB1"
+    assert spec1.gnps_annotations == {"Compound_Name": "x"}
+    assert spec2.mz == [50.0]
+    assert spec1.family is loaded.mfs[0]
+    assert spec1.strains == snapshot.spectra[0].strains
+
+    # molecular family attributes and references
+    mf = loaded.mfs[0]
+    assert mf.spectra == {spec1, spec2}
+    assert mf.spectra_ids == {"spec1", "spec2"}
+    assert mf.strains == snapshot.mfs[0].strains
+
+    # strains are shared objects
+    assert bgc1.strain is spec1.strains.lookup("strain1")[0]
+    assert loaded.strains.lookup("alias1")[0] is bgc1.strain
+
+
+def test_write_read_empty_snapshot(tmp_path):
+    file = tmp_path / "dataset.snapshot"
+    write_snapshot(file, DatasetSnapshot())
+    assert read_snapshot(file) == DatasetSnapshot()
+
+
+def test_read_invalid_snapshot(tmp_path):
+    file = tmp_path / "dataset.snapshot"
+    with zipfile.ZipFile(file, "w") as zf:
+        zf.writestr("data.json", "{}")
+    with pytest.raises(ValueError, match=".* is not a dataset snapshot.*"):
+        read_snapshot(file)
+
+
+def test_snapshot_fingerprint(snapshot, tmp_path):
+    file = tmp_path / "dataset.snapshot"
+    write_snapshot(file, snapshot)
+    assert read_snapshot_fingerprint(file) is None
+
+    write_snapshot(file, snapshot, fingerprint="abc")
+    assert read_snapshot_fingerprint(file) == "abc"
+    assert not (tmp_path / "dataset.snapshot.tmp").exists()
+
+
+def test_dataset_fingerprint(tmp_path):
+    (tmp_path / "strain_mappings.json").write_text("{}")
+    (tmp_path / "gnps").mkdir()
+    (tmp_path / "gnps" / "spectra.mgf").write_text("BEGIN IONS")
+    (tmp_path / "output").mkdir()
+    config = Dynaconf(root_dir=tmp_path, mode="local", log={"level": "INFO"})
+    fingerprint = dataset_fingerprint(config)
+    assert fingerprint == dataset_fingerprint(config)
+
+    # files not read by the loader and logging settings are ignored
+    (tmp_path / "output" / "npl.pkl").write_text("data")
+    config.log.level = "DEBUG"
+    assert dataset_fingerprint(config) == fingerprint
+
+    # changed config values
+    config.mode = "podp"
+    assert dataset_fingerprint(config) != fingerprint
+    config.mode = "local"
+    assert dataset_fingerprint(config) == fingerprint
+
+    # changed, new and removed input files
+    os.utime(tmp_path / "gnps" / "spectra.mgf", ns=(0, 0))
+    assert dataset_fingerprint(config) != fingerprint
+    fingerprint = dataset_fingerprint(config)
+    (tmp_path / "antismash").mkdir()
+    (tmp_path / "antismash" / "bgc.gbk").write_text("LOCUS")
+    assert dataset_fingerprint(config) != fingerprint
+    (tmp_path / "antismash" / "bgc.gbk").unlink()
+    assert dataset_fingerprint(config) == fingerprint
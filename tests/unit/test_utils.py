@@ -1,3 +1,9 @@
+import gzip
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 from shutil import rmtree
 from tempfile import mkdtemp
@@ -30,6 +36,159 @@ class TestDownloadUrl:
         assert f.is_file()
 
 
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve a file of random bytes, with support for HTTP Range requests."""
+
+    data = os.urandom(100_000)
+    support_ranges = True
+    # when to gzip the body: "accepted" if the request accepts gzip, "always", or None
+    gzip = None
+    # the Range headers of the requests, None for requests without range
+    ranges = []
+    # the Accept-Encoding headers of the requests
+    encodings = []
+
+    def do_GET(self):
+        cls = type(self)
+        range_header = self.headers.get("Range")
+        cls.ranges.append(range_header)
+        cls.encodings.append(self.headers.get("Accept-Encoding"))
+        if range_header is None or not cls.support_ranges:
+            self._send(200, cls.data)
+            return
+        start, _, end = range_header.removeprefix("bytes=").partition("-")
+        start, end = int(start), int(end) if end else len(cls.data) - 1
+        if start >= len(cls.data):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(cls.data)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = {"Content-Range": f"bytes {start}-{end}/{len(cls.data)}"}
+        self._send(206, cls.data[start : end + 1], headers)
+
+    def _send(self, status, body, headers=None):
+        cls = type(self)
+        accepted = "gzip" in self.headers.get("Accept-Encoding", "")
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        if cls.gzip == "always" or (cls.gzip == "accepted" and accepted):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def file_server():
+    _RangeHandler.support_ranges = True
+    _RangeHandler.gzip = None
+    _RangeHandler.ranges = []
+    _RangeHandler.encodings = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/data.bin"
+    server.shutdown()
+    server.server_close()
+
+
+class TestDownloadUrlLocal:
+    """Test utils.download_url against a local server."""
+
+    md5 = hashlib.md5(_RangeHandler.data).hexdigest()
+
+    @pytest.fixture(autouse=True)
+    def no_md5_reread(self, monkeypatch):
+        # the checksum of a download must be computed while the data is streamed
+        def fail(*args, **kwargs):
+            raise AssertionError("Downloaded file should not be read again")
+
+        monkeypatch.setattr(utils, "calculate_md5", fail)
+
+    def test_download(self, file_server, tmp_path):
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert not (tmp_path / "data.bin.part").exists()
+        assert _RangeHandler.ranges == [None]
+
+    def test_md5_mismatch(self, file_server, tmp_path):
+        with pytest.raises(RuntimeError, match="MD5 validation failed"):
+            utils.download_url(file_server, tmp_path, md5="0" * 32)
+        assert not (tmp_path / "data.bin").exists()
+        assert not (tmp_path / "data.bin.part").exists()
+
+    def test_resume(self, file_server, tmp_path):
+        (tmp_path / "data.bin.part").write_bytes(_RangeHandler.data[:30_000])
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.ranges == ["bytes=30000-"]
+
+    def test_resume_not_supported(self, file_server, tmp_path):
+        _RangeHandler.support_ranges = False
+        (tmp_path / "data.bin.part").write_bytes(b"x" * 30_000)
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+
+    def test_resume_invalid_part(self, file_server, tmp_path):
+        # a partial file larger than the remote file is downloaded again
+        (tmp_path / "data.bin.part").write_bytes(b"x" * 200_000)
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.ranges == ["bytes=200000-", None]
+
+    def test_no_resume(self, file_server, tmp_path):
+        (tmp_path / "data.bin.part").write_bytes(_RangeHandler.data[:30_000])
+        utils.download_url(file_server, tmp_path, md5=self.md5, resume=False)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.ranges == [None]
+
+    def test_parallel_chunks(self, file_server, tmp_path, monkeypatch):
+        monkeypatch.setattr(utils, "PARALLEL_CHUNK_MIN_SIZE", 10_000)
+        # a range left by an interrupted download is resumed
+        (tmp_path / "data.bin.part.25000-49999").write_bytes(_RangeHandler.data[25_000:35_000])
+        utils.download_url(file_server, tmp_path, md5=self.md5, parallel_chunks=4)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert sorted(_RangeHandler.ranges[1:]) == [
+            "bytes=0-24999",
+            "bytes=35000-49999",
+            "bytes=50000-74999",
+            "bytes=75000-99999",
+        ]
+        assert list(tmp_path.iterdir()) == [tmp_path / "data.bin"]
+
+    def test_parallel_chunks_small_file(self, file_server, tmp_path):
+        # files smaller than two chunks are downloaded in one request
+        utils.download_url(file_server, tmp_path, md5=self.md5, parallel_chunks=4)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.ranges == ["bytes=0-"]
+
+    def test_gzip_encoding(self, file_server, tmp_path):
+        # the unencoded body is requested, so its size matches the Content-Length
+        _RangeHandler.gzip = "accepted"
+        (tmp_path / "data.bin.part").write_bytes(_RangeHandler.data[:30_000])
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.encodings == ["identity"]
+
+    def test_gzip_encoding_ignored(self, file_server, tmp_path):
+        # a server that encodes the body anyway: the decoded body is written, and a resumed
+        # download is started again, as the byte range is of the encoded body
+        _RangeHandler.gzip = "always"
+        (tmp_path / "data.bin.part").write_bytes(_RangeHandler.data[:30_000])
+        utils.download_url(file_server, tmp_path, md5=self.md5)
+        assert (tmp_path / "data.bin").read_bytes() == _RangeHandler.data
+        assert _RangeHandler.ranges == ["bytes=30000-", None]
+
+    def test_shared_client(self):
+        assert utils.get_http_client() is utils.get_http_client()
+
+
 class TestExtractArchive:
     """Test utils.extract_archive."""
 
@@ -163,3 +322,31 @@ class TestListFiles:
         assert len(files) == 1
         assert "test_utils.py" not in files
         assert str(ROOT / "test_utils.py") in files
+
+
+class TestIsFileFormat:
+    """Test utils.is_file_format."""
+
+    def test_tsv(self, tmp_path):
+        file = tmp_path / "data.tsv"
+        file.write_text("a\tb\n1\t2\n")
+        assert utils.is_file_format(file, "tsv")
+
+    def test_invalid(self, tmp_path):
+        file = tmp_path / "data.tsv"
+        # a field larger than the field size limit of the csv module
+        file.write_text("a\tb\n1\t" + "x" * 200_000 + "\n")
+        assert not utils.is_file_format(file, "tsv")
+
+    def test_sample_head(self, tmp_path):
+        # the invalid line is after the sampled head of the file
+        file = tmp_path / "data.tsv"
+        file.write_text("a\tb\n" * 100 + "1\t" + "x" * 200_000 + "\n")
+        assert utils.is_file_format(file, "tsv", sample_size=300)
+        assert not utils.is_file_format(file, "tsv")
+
+    def test_unknown_format(self, tmp_path):
+        file = tmp_path / "data.tsv"
+        file.write_text("a\tb\n")
+        with pytest.raises(ValueError, match="Unknown format"):
+            utils.is_file_format(file, "json")